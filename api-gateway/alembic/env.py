@@ -0,0 +1,69 @@
+# api-gateway/alembic/env.py
+from logging.config import fileConfig
+
+from sqlalchemy import engine_from_config
+from sqlalchemy import pool
+
+from alembic import context
+
+from app.config import settings
+from app.models import Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# URL de la aplicación salvo que se indique otra (alembic -x / sqlalchemy.url)
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+
+# Metadata de los modelos (autogenerate)
+target_metadata = Base.metadata
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Excluir los índices de búsqueda gestionados por app.utils.search (DDL propio)"""
+    if type_ == "table" and reflected and compare_to is None and "_fts" in name:
+        return False
+    if type_ == "index" and reflected and compare_to is None and name.endswith("_trgm"):
+        return False
+    return True
+
+def run_migrations_offline() -> None:
+    """Generar el SQL de las migraciones sin conexión (alembic upgrade --sql)"""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_object=include_object,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=url.startswith("sqlite"),
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Aplicar las migraciones sobre la base de datos configurada"""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
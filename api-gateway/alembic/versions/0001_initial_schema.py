@@ -0,0 +1,152 @@
+"""initial schema
+
+Esquema tal como lo crean los modelos (Base.metadata.create_all).
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 01:16:01.408119
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('companies',
+    sa.Column('id', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('sap_database', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('default_amortization_account', sa.String(length=20), nullable=True),
+    sa.Column('default_interest_rate', sa.Numeric(precision=5, scale=4), nullable=True),
+    sa.Column('default_installments', sa.Integer(), nullable=True),
+    sa.Column('sap_server_url', sa.String(length=255), nullable=True),
+    sa.Column('sap_username', sa.String(length=100), nullable=True),
+    sa.Column('sap_company_db', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('users',
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('full_name', sa.String(length=255), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('last_login', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table('company_settings',
+    sa.Column('company_id', sa.String(length=50), nullable=False),
+    sa.Column('setting_key', sa.String(length=100), nullable=False),
+    sa.Column('setting_value', sa.Text(), nullable=True),
+    sa.Column('setting_type', sa.String(length=20), nullable=True),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_id', 'setting_key', name='unique_company_setting')
+    )
+    op.create_table('entities',
+    sa.Column('company_id', sa.String(length=50), nullable=False),
+    sa.Column('sap_card_code', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('type', sa.String(length=20), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=True),
+    sa.Column('sap_card_name', sa.String(length=255), nullable=True),
+    sa.Column('sap_group_code', sa.String(length=20), nullable=True),
+    sa.Column('credit_limit', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('current_balance', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('amortization_enabled', sa.Boolean(), nullable=True),
+    sa.Column('default_amortization_config', sa.String(length=50), nullable=True),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_id', 'sap_card_code', name='unique_company_entity')
+    )
+    op.create_table('amortizations',
+    sa.Column('company_id', sa.String(length=50), nullable=False),
+    sa.Column('entity_id', sa.String(length=36), nullable=False),
+    sa.Column('reference', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('pending_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('paid_amount', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('total_installments', sa.Integer(), nullable=False),
+    sa.Column('paid_installments', sa.Integer(), nullable=True),
+    sa.Column('installment_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('interest_rate', sa.Numeric(precision=5, scale=4), nullable=True),
+    sa.Column('total_interest', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('next_due_date', sa.Date(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('amortization_method', sa.String(length=20), nullable=True),
+    sa.Column('frequency', sa.String(length=20), nullable=True),
+    sa.Column('sap_doc_entry', sa.Integer(), nullable=True),
+    sa.Column('sap_doc_type', sa.String(length=10), nullable=True),
+    sa.Column('sap_base_ref', sa.String(length=50), nullable=True),
+    sa.Column('auto_payment', sa.Boolean(), nullable=True),
+    sa.Column('send_notifications', sa.Boolean(), nullable=True),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.ForeignKeyConstraint(['entity_id'], ['entities.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('amortization_installments',
+    sa.Column('amortization_id', sa.String(length=36), nullable=False),
+    sa.Column('installment_number', sa.Integer(), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=False),
+    sa.Column('payment_date', sa.Date(), nullable=True),
+    sa.Column('principal_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('interest_amount', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('paid_amount', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('remaining_balance', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('sap_payment_entry', sa.Integer(), nullable=True),
+    sa.Column('sap_journal_entry', sa.Integer(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('late_fee', sa.Numeric(precision=18, scale=2), nullable=True),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['amortization_id'], ['amortizations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('amortization_id', 'installment_number', name='unique_amortization_installment')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('amortization_installments')
+    op.drop_table('amortizations')
+    op.drop_table('entities')
+    op.drop_table('company_settings')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('users')
+    op.drop_table('companies')
@@ -0,0 +1,50 @@
+"""filter indexes
+
+Índices compuestos y parciales para los filtros de listado
+(apply_amortization_filters / apply_installment_filters). En PostgreSQL
+se crean con CONCURRENTLY para no bloquear escrituras en tablas grandes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 01:24:37.512204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = sa.text("status = 'pending'")
+
+INDEXES = (
+    ('ix_amortizations_company_status_start', 'amortizations', ['company_id', 'status', 'start_date'], {}),
+    ('ix_amortizations_company_created', 'amortizations', ['company_id', 'created_at'], {}),
+    ('ix_amortizations_company_amount', 'amortizations', ['company_id', 'total_amount'], {}),
+    ('ix_amortizations_entity', 'amortizations', ['entity_id'], {}),
+    ('ix_installments_amortization_status_due', 'amortization_installments',
+     ['amortization_id', 'status', 'due_date'], {}),
+    ('ix_installments_pending_due', 'amortization_installments',
+     ['due_date', 'amortization_id'], {'postgresql_where': PENDING, 'sqlite_where': PENDING}),
+    ('ix_entities_company_type', 'entities', ['company_id', 'type'], {}),
+)
+
+
+def upgrade() -> None:
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=concurrently, **options)
+
+
+def downgrade() -> None:
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=concurrently)
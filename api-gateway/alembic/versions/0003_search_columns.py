@@ -0,0 +1,92 @@
+"""search columns
+
+Columnas de búsqueda normalizadas (amortizations.search_text,
+entities.search_name) y su índice: GIN pg_trgm en PostgreSQL, tabla FTS5
+(trigram) con triggers en SQLite. Ver app/utils/search.py.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 01:41:12.083615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.search import normalize_search_text, populate_search_sql, search_ddl, drop_search_ddl
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = (
+    ('amortizations', 'search_text', sa.Text(), ('reference', 'description')),
+    ('entities', 'search_name', sa.String(length=255), ('name',)),
+)
+
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def backfill(table_name: str, column_name: str, sources) -> None:
+    """Rellenar la columna normalizada por bloques de id (solo modo online)"""
+    if op.get_context().as_sql:
+        return
+
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column('id'), sa.column(column_name), *(sa.column(name) for name in sources))
+    update = sa.update(table).where(table.c.id == sa.bindparam('row_id')).values(
+        {column_name: sa.bindparam('normalized')}
+    )
+
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, *(table.c[name] for name in sources))
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {'row_id': row[0], 'normalized': normalize_search_text(*row[1:])}
+            for row in rows
+        ])
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+
+    for table_name, column_name, column_type, sources in SEARCH_COLUMNS:
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.add_column(sa.Column(column_name, column_type, nullable=True))
+        backfill(table_name, column_name, sources)
+
+    if dialect_name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY no admite transacción
+        with op.get_context().autocommit_block():
+            for table_name, column_name, _, _ in SEARCH_COLUMNS:
+                for statement in search_ddl(table_name, column_name, dialect_name, concurrently=True):
+                    op.execute(statement)
+    else:
+        for table_name, column_name, _, _ in SEARCH_COLUMNS:
+            for statement in search_ddl(table_name, column_name, dialect_name):
+                op.execute(statement)
+            if dialect_name == 'sqlite':
+                for statement in populate_search_sql(table_name, column_name):
+                    op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+
+    for table_name, column_name, _, _ in reversed(SEARCH_COLUMNS):
+        for statement in drop_search_ddl(table_name, column_name, dialect_name):
+            op.execute(statement)
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column(column_name)
@@ -0,0 +1,45 @@
+"""amortization monthly summary
+
+Tabla de agregados por (company_id, entity_type, status, mes) para
+/amortizations/reports/summary. Se mantiene por deltas en cada flush
+(ver app/models/summary.py); aquí se crea y se rellena desde
+amortizations.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:12:40.227318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.summary import rebuild_summary
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('amortization_monthly_summary',
+    sa.Column('company_id', sa.String(length=50), nullable=False),
+    sa.Column('entity_type', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('amortization_count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('paid_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('pending_amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('company_id', 'entity_type', 'status', 'month')
+    )
+    if not op.get_context().as_sql:
+        rebuild_summary(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_table('amortization_monthly_summary')
@@ -0,0 +1,48 @@
+"""overdue sweep runs
+
+Registro de las ejecuciones del barrido de vencidos por compañía
+(app/services/overdue_sweep.py): fecha de corte, duración y filas
+modificadas.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 14:05:12.481905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('overdue_sweep_runs',
+    sa.Column('company_id', sa.String(length=50), nullable=False),
+    sa.Column('as_of', sa.Date(), nullable=False),
+    sa.Column('previous_as_of', sa.Date(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('duration_ms', sa.Integer(), nullable=False),
+    sa.Column('installments_updated', sa.Integer(), nullable=False),
+    sa.Column('next_due_dates_updated', sa.Integer(), nullable=False),
+    sa.Column('amortizations_updated', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_overdue_sweep_runs_company_as_of', 'overdue_sweep_runs', ['company_id', 'as_of'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_overdue_sweep_runs_company_as_of', table_name='overdue_sweep_runs')
+    op.drop_table('overdue_sweep_runs')
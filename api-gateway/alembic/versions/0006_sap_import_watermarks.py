@@ -0,0 +1,45 @@
+"""sap import watermarks
+
+Último documento importado de SAP por compañía y tipo de documento
+(app/services/sap_import.py) e índice único del documento SAP de origen
+de cada amortización, clave del upsert de la importación.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 19:32:47.106583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sap_import_watermarks',
+    sa.Column('company_id', sa.String(length=50), nullable=False),
+    sa.Column('document_type', sa.String(length=50), nullable=False),
+    sa.Column('last_update_date', sa.Date(), nullable=True),
+    sa.Column('last_doc_entry', sa.Integer(), nullable=True),
+    sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('documents_imported', sa.Integer(), nullable=False),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_id', 'document_type', name='unique_sap_import_watermark')
+    )
+    op.create_index('ux_amortizations_sap_document', 'amortizations', ['company_id', 'sap_doc_type', 'sap_doc_entry'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_amortizations_sap_document', table_name='amortizations')
+    op.drop_table('sap_import_watermarks')
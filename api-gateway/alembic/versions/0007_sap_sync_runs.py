@@ -0,0 +1,46 @@
+"""sap sync runs
+
+Registro por compañía y tarea de las sincronizaciones con SAP del
+planificador multi-compañía (app/services/sap_scheduler.py): espera en
+cola, duración, registros leídos y error.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 21:08:19.640257
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sap_sync_runs',
+    sa.Column('company_id', sa.String(length=50), nullable=False),
+    sa.Column('task', sa.String(length=50), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('wait_ms', sa.Integer(), nullable=False),
+    sa.Column('duration_ms', sa.Integer(), nullable=False),
+    sa.Column('items', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sap_sync_runs_company_task_started', 'sap_sync_runs', ['company_id', 'task', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sap_sync_runs_company_task_started', table_name='sap_sync_runs')
+    op.drop_table('sap_sync_runs')
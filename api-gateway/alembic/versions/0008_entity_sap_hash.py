@@ -0,0 +1,30 @@
+"""entity sap hash
+
+Hash de los datos de cada BusinessPartner sincronizado
+(app/services/sap_partners.py): solo se escriben las entidades cuyo hash
+ha cambiado.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 22:41:05.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('entities', sa.Column('sap_hash', sa.String(length=40), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('entities', 'sap_hash')
@@ -0,0 +1,43 @@
+"""unpaid due index
+
+ix_installments_pending_due pasa a cubrir todas las cuotas sin pagar
+('pending', 'partial' y 'overdue', el predicado de
+AmortizationInstallment.is_overdue) con status como primera columna: el
+barrido de vencidos sigue recorriendo solo el rango status = 'pending'.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 23:52:14.906217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = sa.text("status = 'pending'")
+UNPAID = sa.text("status IN ('pending', 'partial', 'overdue')")
+
+
+def _replace_index(columns, where) -> None:
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_installments_pending_due', table_name='amortization_installments',
+                      postgresql_concurrently=concurrently)
+        op.create_index('ix_installments_pending_due', 'amortization_installments', columns,
+                        postgresql_concurrently=concurrently, postgresql_where=where, sqlite_where=where)
+
+
+def upgrade() -> None:
+    _replace_index(['status', 'due_date', 'amortization_id'], UNPAID)
+
+
+def downgrade() -> None:
+    _replace_index(['due_date', 'amortization_id'], PENDING)
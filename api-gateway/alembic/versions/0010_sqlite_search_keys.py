@@ -0,0 +1,72 @@
+"""sqlite search keys
+
+Las tablas FTS5 de búsqueda en SQLite dejan de ser de contenido externo
+(content_rowid='rowid'): el rowid implícito de una tabla con clave String
+no es estable. Pasan a guardar una copia del texto normalizado con un
+rowid entero asignado en {tabla}_fts_keys (clave primaria UNIQUE ->
+fts_rowid), por el que los triggers borran sin recorrer la tabla FTS5
+(app/utils/search.py). Sin cambios en PostgreSQL.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 01:12:37.540218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.utils.search import drop_search_ddl, fts_table_name, populate_search_sql, search_ddl
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = (
+    ('amortizations', 'search_text'),
+    ('entities', 'search_name'),
+)
+
+
+def external_content_ddl(table_name: str, column_name: str):
+    """Tabla FTS5 de contenido externo y triggers anteriores (downgrade)"""
+    fts = fts_table_name(table_name)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column_name}, content='{table_name}', content_rowid='rowid', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column_name}) VALUES (new.rowid, new.{column_name}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_name}) VALUES ('delete', old.rowid, old.{column_name}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_name} ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_name}) VALUES ('delete', old.rowid, old.{column_name}); "
+        f"INSERT INTO {fts}(rowid, {column_name}) VALUES (new.rowid, new.{column_name}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for table_name, column_name in SEARCH_COLUMNS:
+        for statement in drop_search_ddl(table_name, column_name, 'sqlite'):
+            op.execute(statement)
+        for statement in search_ddl(table_name, column_name, 'sqlite'):
+            op.execute(statement)
+        for statement in populate_search_sql(table_name, column_name):
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for table_name, column_name in SEARCH_COLUMNS:
+        for statement in drop_search_ddl(table_name, column_name, 'sqlite'):
+            op.execute(statement)
+        for statement in external_content_ddl(table_name, column_name):
+            op.execute(statement)
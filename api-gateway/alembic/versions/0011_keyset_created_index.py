@@ -0,0 +1,56 @@
+"""keyset created index
+
+ix_amortizations_company_created pasa a (company_id, created_at, id): la
+paginación keyset ordena por (created_at, id) y el índice sirve el ORDER BY
+en ambos sentidos sin ordenación adicional.
+
+En SQLite, los created_at/updated_at escritos con CURRENT_TIMESTAMP
+('YYYY-MM-DD HH:MM:SS') se normalizan al formato de SQLAlchemy (con
+microsegundos) para que el orden de texto coincida con el cronológico.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 10:12:41.305118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_TABLES = (
+    'companies', 'company_settings', 'entities', 'amortizations', 'amortization_installments',
+    'users', 'overdue_sweep_runs', 'sap_import_watermarks', 'sap_sync_runs',
+)
+
+
+def _replace_index(columns) -> None:
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_amortizations_company_created', table_name='amortizations',
+                      postgresql_concurrently=concurrently)
+        op.create_index('ix_amortizations_company_created', 'amortizations', columns,
+                        postgresql_concurrently=concurrently)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        for table_name in TIMESTAMP_TABLES:
+            for column_name in ('created_at', 'updated_at'):
+                op.execute(
+                    f"UPDATE {table_name} SET {column_name} = {column_name} || '.000000' "
+                    f"WHERE length({column_name}) = 19"
+                )
+
+    _replace_index(['company_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    _replace_index(['company_id', 'created_at'])
@@ -18,6 +18,13 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Trabajos en segundo plano (Celery, app.worker)
+    CELERY_BROKER_URL: Optional[str] = None  # Por defecto REDIS_URL
+    CELERY_RESULT_BACKEND: Optional[str] = None  # Por defecto REDIS_URL
+    JOBS_EAGER: bool = False  # Ejecutar los trabajos en el propio proceso (tests/desarrollo)
+    JOB_RESULT_TTL: int = 24 * 3600
+    OVERDUE_SWEEP_HOUR: int = 2  # Hora (UTC) del barrido nocturno de vencidos (Celery beat)
+    
     # JWT Configuration
     JWT_SECRET_KEY: str = "your-super-secret-jwt-key-here-change-this-in-production"
     JWT_ALGORITHM: str = "HS256"
@@ -32,6 +39,21 @@ class Settings(BaseSettings):
     SAP_USERNAME: Optional[str] = None
     SAP_PASSWORD: Optional[str] = None
     SAP_DEFAULT_COMPANY: str = "SBODEMOUS"
+    SAP_VERIFY_SSL: bool = True
+    SAP_TIMEOUT: float = 30.0
+    SAP_MAX_CONNECTIONS: int = 20  # Pool keep-alive compartido por el proceso
+    SAP_MAX_CONCURRENCY_PER_COMPANY: int = 4  # Peticiones simultáneas por CompanyDB
+    SAP_MAX_CONCURRENCY_PER_SERVER: int = 16  # Peticiones simultáneas por servidor (reparto por turnos entre compañías)
+    SAP_SESSION_REFRESH_MARGIN: int = 60  # Segundos antes de caducar en los que se renueva B1SESSION
+    SAP_BATCH_SIZE: int = 20  # Operaciones por change set de $batch
+    SAP_BATCH_CHANGESETS: int = 5  # Change sets por petición $batch
+    SAP_BATCH_RETRIES: int = 2  # Rondas de reintento de las operaciones fallidas
+    SAP_BATCH_RETRY_DELAY: float = 1.0
+    SAP_IMPORT_PAGE_SIZE: int = 100  # Documentos por página (Prefer: odata.maxpagesize)
+    SAP_IMPORT_BATCH_SIZE: int = 500  # Documentos por transacción de la importación
+    SAP_PARTNER_PAGE_SIZE: int = 500  # Business partners por página y por upsert
+    SAP_SYNC_MAX_COMPANIES: int = 8  # Compañías sincronizándose a la vez
+    SAP_SYNC_INTERVAL_MINUTES: int = 0  # Sincronización periódica de todas las compañías (0 = desactivada)
     
     # Email configuration (para notificaciones)
     SMTP_HOST: Optional[str] = None
@@ -47,9 +69,17 @@ class Settings(BaseSettings):
     # File uploads
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     UPLOAD_DIR: str = "uploads"
+    IMPORT_CHUNK_SIZE: int = 5000  # Filas por bloque/transacción (services.import_service)
+    IMPORT_WORKERS: int = 2  # Procesos de validación (0 = en el propio proceso)
     
     # Cache
     CACHE_TTL: int = 300  # 5 minutes
+    RESPONSE_CACHE_ENABLED: bool = True  # Caché Redis de GET /amortizations (utils.cache)
+    COUNT_CACHE_TTL: int = 60  # Totales de listados (count_mode=cached)
+    COUNT_ESTIMATE_THRESHOLD: int = 10000  # Por debajo, count_mode=estimated cuenta exacto
+    ROW_CACHE_TTL: int = 300  # Filas Company/Entity en memoria (utils.row_cache)
+    ROW_CACHE_MAXSIZE: int = 5000
+    ROW_CACHE_PUBSUB: bool = False  # Difundir invalidaciones entre workers por Redis
     
     # Rate limiting
     RATE_LIMIT_REQUESTS: int = 100
@@ -1,10 +1,11 @@
 # api-gateway/app/database.py
 from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 import logging
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from .config import settings
 
@@ -49,6 +50,49 @@ SessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+def get_async_database_url(database_url: str) -> str:
+    """Traducir la URL síncrona al driver async equivalente (asyncpg/aiosqlite)"""
+    scheme, separator, rest = database_url.partition("://")
+    if scheme in ("postgresql", "postgresql+psycopg2", "postgres"):
+        return f"postgresql+asyncpg{separator}{rest}"
+    if scheme in ("sqlite", "sqlite+pysqlite"):
+        return f"sqlite+aiosqlite{separator}{rest}"
+    return database_url
+
+# Motor async (mismo pool y configuración que el síncrono)
+async_engine_config = {
+    "pool_pre_ping": True,
+    "pool_recycle": 300,
+    "echo": settings.DEBUG,
+}
+
+if settings.DATABASE_URL.startswith("sqlite"):
+    async_engine_config.update({
+        "poolclass": StaticPool,
+        "connect_args": {
+            "check_same_thread": False,
+            "timeout": 20,
+        }
+    })
+elif settings.DATABASE_URL.startswith("postgresql"):
+    async_engine_config.update({
+        "pool_size": 20,
+        "max_overflow": 0,
+        "connect_args": {
+            "timeout": 10,
+            "server_settings": {"application_name": "sap_amortization_api"},
+        }
+    })
+
+async_engine = create_async_engine(get_async_database_url(settings.DATABASE_URL), **async_engine_config)
+
+# Configurar AsyncSessionLocal
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base para modelos
 Base = declarative_base()
 
@@ -76,6 +120,10 @@ def set_postgresql_config(dbapi_connection, connection_record):
         cursor.execute("SET client_encoding TO 'UTF8'")
         cursor.close()
 
+# Mismos ajustes de conexión para el motor async
+event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+event.listen(async_engine.sync_engine, "connect", set_postgresql_config)
+
 # Dependencia para obtener sesión de base de datos
 def get_db() -> Generator[Session, None, None]:
     """
@@ -92,6 +140,20 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+# Dependencia async para obtener sesión de base de datos
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependencia de FastAPI para obtener sesión async de base de datos.
+    Las consultas no bloquean el event loop de uvicorn.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await db.rollback()
+            raise
+
 # Función para crear todas las tablas
 def create_tables():
     """Crear todas las tablas en la base de datos"""
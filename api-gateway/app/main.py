@@ -11,9 +11,12 @@ from datetime import datetime
 from .config import settings
 from .database import engine, SessionLocal
 from .models import Base
-from .routers import amortization, companies, sap_integration, auth, reports
+from .routers import amortization, companies, sap_integration, auth, reports, jobs
 from .services.auth_service import AuthService
 from .services.logging_service import setup_logging
+from .services.sap_service import close_pools
+from .utils.cache import response_cache
+from .utils.row_cache import row_cache, row_cache_broadcaster
 
 # Configurar logging
 setup_logging()
@@ -30,9 +33,14 @@ async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
     logger.info("Tablas de base de datos creadas/verificadas")
     
+    # Invalidaciones de la caché de filas desde otros workers
+    row_cache_broadcaster.start_listener()
+    
     yield
     
     # Shutdown
+    row_cache_broadcaster.stop_listener()
+    await close_pools()
     logger.info("Cerrando API Gateway")
 
 # Crear instancia de FastAPI
@@ -130,6 +138,15 @@ async def health_check():
             detail="Service unhealthy"
         )
 
+@app.get("/health/cache", tags=["Health"])
+async def cache_stats():
+    """Contadores de aciertos/fallos de las cachés"""
+    return {
+        "row_cache": {**row_cache.stats, "size": len(row_cache)},
+        "response_cache": response_cache.stats,
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/info", tags=["Health"])
 async def app_info():
     """Información de la aplicación"""
@@ -149,7 +166,8 @@ async def app_info():
             "companies": "/companies",
             "amortizations": "/amortizations",
             "sap": "/sap",
-            "reports": "/reports"
+            "reports": "/reports",
+            "jobs": "/jobs"
         }
     }
 
@@ -188,6 +206,13 @@ app.include_router(
     dependencies=[Depends(get_current_user)]
 )
 
+app.include_router(
+    jobs.router,
+    prefix="/jobs",
+    tags=["Jobs"],
+    dependencies=[Depends(get_current_user)]
+)
+
 # Manejadores de errores globales
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
@@ -2,17 +2,28 @@
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, String, DateTime, Boolean
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import uuid
 
 Base = declarative_base()
 
+def utcnow() -> datetime:
+    """
+    Marca de tiempo UTC de las columnas created_at/updated_at
+
+    Se asigna desde Python para que SQLite guarde siempre el mismo formato
+    de texto (con microsegundos) que los valores enlazados por SQLAlchemy:
+    CURRENT_TIMESTAMP no lleva microsegundos y no ordena igual.
+    """
+    return datetime.now(timezone.utc)
+
 class BaseModel(Base):
     """Modelo base con campos comunes"""
     __abstract__ = True
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow)
     is_active = Column(Boolean, default=True)
 
 # Importar todos los modelos
@@ -20,6 +31,9 @@ from .company import Company
 from .entity import Entity
 from .amortization import Amortization, AmortizationInstallment
 from .user import User
+from .summary import AmortizationMonthlySummary
+from .sweep import OverdueSweepRun
+from .sap_import import SAPImportWatermark, SAPSyncRun
 
 __all__ = [
     "Base",
@@ -28,5 +42,9 @@ __all__ = [
     "Entity",
     "Amortization",
     "AmortizationInstallment",
-    "User"
+    "User",
+    "AmortizationMonthlySummary",
+    "OverdueSweepRun",
+    "SAPImportWatermark",
+    "SAPSyncRun"
 ]
\ No newline at end of file
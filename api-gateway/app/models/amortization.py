@@ -273,11 +273,17 @@
 #             'is_active': self.is_active
 #         }
 # api-gateway/app/models/amortization.py
-from sqlalchemy import Column, String, ForeignKey, Numeric, Integer, Date, Text, UniqueConstraint, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, ForeignKey, Numeric, Integer, Date, Text, UniqueConstraint, Boolean, Index, text, case, func, bindparam
+from sqlalchemy.orm import relationship, column_property
 from decimal import Decimal
 from datetime import date, timedelta
 from . import BaseModel
+from ..services.schedule_engine import calculate_schedule
+from ..utils.due_dates import due_date_table, days_elapsed
+from ..utils.search import register_search_column
+
+# Estados de cuota con importe pendiente (el barrido pasa 'pending' a 'overdue')
+UNPAID_STATUSES = ('pending', 'partial', 'overdue')
 
 class Amortization(BaseModel):
     """Modelo para tablas de amortización"""
@@ -323,30 +329,34 @@ class Amortization(BaseModel):
     auto_payment = Column(Boolean, default=False)
     send_notifications = Column(Boolean, default=True)
     
+    # Búsqueda: reference + description normalizados (ver utils.search)
+    search_text = Column(Text)
+    
     # Relaciones
     company = relationship("Company", back_populates="amortizations")
     entity = relationship("Entity", back_populates="amortizations")
     installments = relationship("AmortizationInstallment", back_populates="amortization", 
                               cascade="all, delete-orphan", order_by="AmortizationInstallment.installment_number")
     
+    # Índices de los filtros de listado (apply_amortization_filters)
+    __table_args__ = (
+        Index('ix_amortizations_company_status_start', 'company_id', 'status', 'start_date'),
+        Index('ix_amortizations_company_created', 'company_id', 'created_at', 'id'),
+        Index('ix_amortizations_company_amount', 'company_id', 'total_amount'),
+        Index('ix_amortizations_entity', 'entity_id'),
+        # Documento SAP de origen (upsert de services.sap_import)
+        Index('ux_amortizations_sap_document', 'company_id', 'sap_doc_type', 'sap_doc_entry', unique=True),
+    )
+    
     def __repr__(self):
         return f"<Amortization(reference='{self.reference}', total_amount={self.total_amount})>"
     
     def calculate_installments(self):
-        """Calcular las cuotas de amortización"""
-        installments = []
-        
-        if self.amortization_method == 'linear':
-            installments = self._calculate_linear_installments()
-        elif self.amortization_method == 'french':
-            installments = self._calculate_french_installments()
-        elif self.amortization_method == 'german':
-            installments = self._calculate_german_installments()
-        elif self.amortization_method == 'decreasing':
-            installments = self._calculate_decreasing_installments()
-        
-        return installments
+        """Calcular las cuotas de amortización usando el motor por lotes"""
+        return calculate_schedule(self)
     
+    # Cálculo por objeto original (Decimal, fila a fila). Se conserva como
+    # referencia de resultados y como línea base de benchmarks/bench_schedule_engine.py
     def _calculate_linear_installments(self):
         """Amortización lineal (cuotas iguales de capital)"""
         installments = []
@@ -408,19 +418,14 @@ class Amortization(BaseModel):
     
     def _calculate_due_date(self, installment_number):
         """Calcular fecha de vencimiento basada en la frecuencia"""
-        if self.frequency == 'monthly':
-            months = installment_number
-        elif self.frequency == 'quarterly':
-            months = installment_number * 3
-        elif self.frequency == 'biannual':
-            months = installment_number * 6
-        elif self.frequency == 'annual':
-            months = installment_number * 12
-        else:
-            months = installment_number
-        
-        # Calcular fecha aproximada (mejorar con dateutil para fechas exactas)
-        return self.start_date + timedelta(days=months * 30)
+        if installment_number < 1:
+            raise ValueError(f"Número de cuota no válido: {installment_number}")
+
+        # Rejilla de vencimientos memorizada por (start_date, frequency, n);
+        # se amplía si la cuota supera el total (p. ej. cuotas añadidas)
+        n = max(self.total_installments or 0, installment_number)
+        table = due_date_table(self.start_date, self.frequency, n)
+        return table[installment_number - 1].item()
     
     def get_status_display(self):
         """Obtener descripción del estado"""
@@ -474,6 +479,8 @@ class Amortization(BaseModel):
             'is_active': self.is_active
         }
 
+register_search_column(Amortization, 'search_text', 'reference', 'description')
+
 class AmortizationInstallment(BaseModel):
     """Modelo para cuotas de amortización"""
     __tablename__ = "amortization_installments"
@@ -503,26 +510,39 @@ class AmortizationInstallment(BaseModel):
     notes = Column(Text)
     late_fee = Column(Numeric(18, 2), default=0)
     
+    # Campos calculados en el SELECT (filtrables y ordenables en SQL)
+    # Estados como literales: el planificador solo usa el índice parcial
+    # ix_installments_pending_due si el IN coincide con su predicado
+    is_overdue = column_property(
+        status.in_(bindparam('unpaid_statuses', UNPAID_STATUSES, expanding=True, literal_execute=True))
+        & (due_date < func.current_date())
+    )
+    days_overdue = column_property(
+        case((is_overdue.expression, days_elapsed(due_date)), else_=0)
+    )
+    remaining_amount = column_property(total_amount - func.coalesce(paid_amount, 0))
+    payment_percentage = column_property(
+        case((total_amount > 0, func.coalesce(paid_amount, 0) * 100 / total_amount), else_=0)
+    )
+    
     # Relaciones
     amortization = relationship("Amortization", back_populates="installments")
     
     __table_args__ = (
         UniqueConstraint('amortization_id', 'installment_number', name='unique_amortization_installment'),
+        # Filtros de cuotas (apply_installment_filters)
+        Index('ix_installments_amortization_status_due', 'amortization_id', 'status', 'due_date'),
+        # Cuotas sin pagar por vencimiento (is_overdue, próximos vencimientos, barrido de vencidos)
+        Index(
+            'ix_installments_pending_due', 'status', 'due_date', 'amortization_id',
+            postgresql_where=text("status IN ('pending', 'partial', 'overdue')"),
+            sqlite_where=text("status IN ('pending', 'partial', 'overdue')")
+        ),
     )
     
     def __repr__(self):
         return f"<AmortizationInstallment(amortization_id='{self.amortization_id}', number={self.installment_number})>"
     
-    def is_overdue(self):
-        """Verificar si la cuota está vencida"""
-        return self.status == 'pending' and self.due_date < date.today()
-    
-    def days_overdue(self):
-        """Días de retraso"""
-        if self.is_overdue():
-            return (date.today() - self.due_date).days
-        return 0
-    
     def to_dict(self):
         return {
             'id': self.id,
@@ -540,8 +560,8 @@ class AmortizationInstallment(BaseModel):
             'sap_journal_entry': self.sap_journal_entry,
             'notes': self.notes,
             'late_fee': float(self.late_fee),
-            'is_overdue': self.is_overdue(),
-            'days_overdue': self.days_overdue(),
+            'is_overdue': self.is_overdue,
+            'days_overdue': self.days_overdue,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'is_active': self.is_active
@@ -53,9 +53,10 @@
 #             'is_active': self.is_active
 #         }
 # api-gateway/app/models/entity.py
-from sqlalchemy import Column, String, ForeignKey, UniqueConstraint, Integer, Numeric, Boolean
+from sqlalchemy import Column, String, ForeignKey, UniqueConstraint, Integer, Numeric, Boolean, Index
 from sqlalchemy.orm import relationship
 from . import BaseModel
+from ..utils.search import register_search_column
 
 class Entity(BaseModel):
     """Modelo para clientes y proveedores"""
@@ -72,17 +73,22 @@ class Entity(BaseModel):
     sap_group_code = Column(String(20))
     credit_limit = Column(Numeric(18, 2))
     current_balance = Column(Numeric(18, 2))
+    sap_hash = Column(String(40))  # Hash de los datos del BusinessPartner (ver services.sap_partners)
     
     # Configuración de amortización
     amortization_enabled = Column(Boolean, default=False)
     default_amortization_config = Column(String(50))
     
+    # Búsqueda: nombre normalizado (ver utils.search)
+    search_name = Column(String(255))
+    
     # Relaciones
     company = relationship("Company", back_populates="entities")
     amortizations = relationship("Amortization", back_populates="entity", cascade="all, delete-orphan")
     
     __table_args__ = (
         UniqueConstraint('company_id', 'sap_card_code', name='unique_company_entity'),
+        Index('ix_entities_company_type', 'company_id', 'type'),
     )
     
     def __repr__(self):
@@ -105,4 +111,6 @@ class Entity(BaseModel):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'is_active': self.is_active
-        }
\ No newline at end of file
+        }
+
+register_search_column(Entity, 'search_name', 'name')
@@ -0,0 +1,48 @@
+# api-gateway/app/models/sap_import.py
+from sqlalchemy import Column, String, Date, DateTime, Integer, Text, UniqueConstraint, Index
+
+from . import BaseModel
+
+class SAPImportWatermark(BaseModel):
+    """Último documento SAP importado por compañía y tipo de documento (services.sap_import)"""
+    __tablename__ = "sap_import_watermarks"
+
+    company_id = Column(String(50), nullable=False)
+    document_type = Column(String(50), nullable=False)  # Invoices, PurchaseInvoices
+
+    last_update_date = Column(Date)  # UpdateDate del último documento procesado
+    last_doc_entry = Column(Integer)  # DocEntry del último documento procesado
+    last_run_at = Column(DateTime(timezone=True))
+    documents_imported = Column(Integer, nullable=False, default=0)  # Documentos de la última ejecución
+
+    __table_args__ = (
+        UniqueConstraint('company_id', 'document_type', name='unique_sap_import_watermark'),
+    )
+
+    def __repr__(self):
+        return (
+            f"<SAPImportWatermark(company_id='{self.company_id}', document_type='{self.document_type}', "
+            f"last_update_date={self.last_update_date})>"
+        )
+
+class SAPSyncRun(BaseModel):
+    """Tarea de sincronización con SAP de una compañía (services.sap_scheduler)"""
+    __tablename__ = "sap_sync_runs"
+
+    company_id = Column(String(50), nullable=False)
+    task = Column(String(50), nullable=False)  # business_partners, documents
+
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    wait_ms = Column(Integer, nullable=False, default=0)  # Espera en la cola del planificador
+    duration_ms = Column(Integer, nullable=False, default=0)
+    items = Column(Integer, nullable=False, default=0)  # Registros leídos de SAP
+
+    status = Column(String(20), nullable=False, default='completed')  # completed, failed
+    error = Column(Text)
+
+    __table_args__ = (
+        Index('ix_sap_sync_runs_company_task_started', 'company_id', 'task', 'started_at'),
+    )
+
+    def __repr__(self):
+        return f"<SAPSyncRun(company_id='{self.company_id}', task='{self.task}', status='{self.status}')>"
@@ -0,0 +1,294 @@
+# api-gateway/app/models/summary.py
+"""
+Resumen de amortizaciones por (company_id, entity_type, status, mes).
+
+La tabla se mantiene de forma incremental en el mismo flush que modifica
+las amortizaciones (evento after_flush de Session): cada alta, baja o
+cambio de importes/estado/fecha aplica un delta al grupo antiguo y al
+nuevo mediante INSERT ... ON CONFLICT DO UPDATE. El mes es el de
+start_date. Solo cuentan las amortizaciones con is_active.
+
+Las sentencias masivas (query.update, inserts Core) no pasan por el flush:
+quien las ejecute aplica los deltas de las filas que ha modificado con
+apply_summary_deltas (status_change_deltas para los cambios de estado).
+rebuild_summary recalcula una compañía completa y queda para reparar el
+resumen, no para el camino habitual.
+"""
+from typing import Any, Dict, Iterable, Optional, Tuple
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Column, String, Date, Numeric, Integer, event, select, delete, func, cast
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import Base
+from .amortization import Amortization
+from .entity import Entity
+
+class AmortizationMonthlySummary(Base):
+    """Agregados de amortizaciones por compañía, tipo de entidad, estado y mes"""
+    __tablename__ = "amortization_monthly_summary"
+
+    company_id = Column(String(50), primary_key=True)
+    entity_type = Column(String(20), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    month = Column(Date, primary_key=True)  # Primer día del mes de start_date
+
+    amortization_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(18, 2), nullable=False, default=0)
+    paid_amount = Column(Numeric(18, 2), nullable=False, default=0)
+    pending_amount = Column(Numeric(18, 2), nullable=False, default=0)
+
+    def __repr__(self):
+        return (f"<AmortizationMonthlySummary(company_id='{self.company_id}', entity_type='{self.entity_type}', "
+                f"status='{self.status}', month={self.month})>")
+
+SUMMARY_FIELDS = ('amortization_count', 'total_amount', 'paid_amount', 'pending_amount')
+
+# Campos de Amortization que afectan al resumen
+TRACKED_FIELDS = ('company_id', 'entity_id', 'status', 'start_date', 'is_active',
+                  'total_amount', 'paid_amount', 'pending_amount')
+
+GroupKey = Tuple[str, str, str, date]
+
+def month_start(value: Any) -> date:
+    """Primer día del mes de una fecha (admite ISO string)"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.replace(day=1)
+
+def month_bucket(column, dialect_name: str):
+    """Expresión SQL del primer día del mes de una columna de fecha"""
+    if dialect_name == 'postgresql':
+        return cast(func.date_trunc('month', column), Date)
+    return func.date(column, 'start of month')
+
+def _values(instance: Amortization, previous: bool) -> Dict[str, Any]:
+    """Valores de los campos del resumen, actuales o anteriores al flush"""
+    values = {}
+    for key in TRACKED_FIELDS:
+        history = get_history(instance, key)
+        if previous and history.deleted:
+            values[key] = history.deleted[0]
+        elif previous and history.added:
+            # Sin valor anterior (NULL)
+            values[key] = None
+        else:
+            values[key] = getattr(instance, key)
+    return values
+
+def _changed(instance: Amortization) -> bool:
+    return any(get_history(instance, key).has_changes() for key in TRACKED_FIELDS)
+
+def _contribution(values: Dict[str, Any], sign: int) -> Optional[Tuple[Any, ...]]:
+    if not values['is_active'] or values['start_date'] is None:
+        return None
+    return (
+        sign,
+        sign * Decimal(str(values['total_amount'] or 0)),
+        sign * Decimal(str(values['paid_amount'] or 0)),
+        sign * Decimal(str(values['pending_amount'] or 0)),
+    )
+
+def _entity_types(session: Session, entity_ids: Iterable[str]) -> Dict[str, str]:
+    """
+    Tipo de cada entidad antes del flush
+
+    Las entidades de la sesión aportan su valor anterior (si el tipo cambia
+    en este flush, sus amortizaciones se mueven en _move_entity_types); el
+    resto se consulta en una sola sentencia.
+    """
+    types = {}
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, Entity):
+            history = get_history(instance, 'type')
+            types[instance.id] = history.deleted[0] if history.deleted else instance.type
+
+    missing = {entity_id for entity_id in entity_ids if entity_id not in types}
+    if missing:
+        rows = session.connection().execute(select(Entity.id, Entity.type).where(Entity.id.in_(missing)))
+        types.update({row.id: row.type for row in rows})
+    return types
+
+def _upsert_statement(dialect_name: str, rows):
+    table = AmortizationMonthlySummary.__table__
+    insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}[dialect_name]
+    statement = insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[c.name for c in table.primary_key.columns],
+        set_={field: table.c[field] + statement.excluded[field] for field in SUMMARY_FIELDS}
+    )
+
+def apply_summary_deltas(connection, deltas: Dict[GroupKey, list]) -> None:
+    """Sumar deltas (count, total, paid, pending) a los grupos del resumen"""
+    rows = [
+        {'company_id': key[0], 'entity_type': key[1], 'status': key[2], 'month': key[3],
+         **dict(zip(SUMMARY_FIELDS, delta))}
+        for key, delta in deltas.items() if any(delta)
+    ]
+    if not rows:
+        return
+
+    dialect_name = connection.dialect.name
+    if dialect_name in ('postgresql', 'sqlite'):
+        connection.execute(_upsert_statement(dialect_name, rows))
+        return
+
+    table = AmortizationMonthlySummary.__table__
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(table.c.company_id == row['company_id'], table.c.entity_type == row['entity_type'],
+                   table.c.status == row['status'], table.c.month == row['month'])
+            .values({field: table.c[field] + row[field] for field in SUMMARY_FIELDS})
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(row))
+
+# Columnas de Amortization que status_change_deltas necesita de cada fila
+SUMMARY_COLUMNS = (
+    Amortization.company_id, Amortization.entity_id, Amortization.status, Amortization.start_date,
+    Amortization.total_amount, Amortization.paid_amount, Amortization.pending_amount,
+)
+
+def status_change_deltas(
+    connection,
+    rows: Iterable[Any],
+    status: Optional[str],
+    previous_status: Optional[str] = None
+) -> Dict[GroupKey, list]:
+    """
+    Deltas del resumen para amortizaciones activas que cambian de estado
+
+    Args:
+        connection: Conexión (para el tipo de las entidades)
+        rows: Filas con los campos de SUMMARY_COLUMNS, con el estado anterior
+        status: Estado nuevo (None = dejan de contar, is_active pasa a False)
+        previous_status: Estado anterior común a todas las filas, si las
+            filas no lo incluyen (p. ej. RETURNING de un UPDATE condicionado)
+
+    Returns:
+        Deltas para apply_summary_deltas
+    """
+    deltas: Dict[GroupKey, list] = defaultdict(lambda: [0, Decimal(0), Decimal(0), Decimal(0)])
+    rows = [row for row in rows if row.start_date is not None]
+    if not rows:
+        return deltas
+
+    entity_ids = {row.entity_id for row in rows}
+    types = dict(connection.execute(select(Entity.id, Entity.type).where(Entity.id.in_(entity_ids))).all())
+
+    for row in rows:
+        amounts = (1, *(Decimal(str(value or 0)) for value in (row.total_amount, row.paid_amount, row.pending_amount)))
+        moves = [(previous_status or row.status or 'active', -1)] + ([(status, 1)] if status else [])
+        for group_status, sign in moves:
+            delta = deltas[(row.company_id, types.get(row.entity_id), group_status, month_start(row.start_date))]
+            for i, value in enumerate(amounts):
+                delta[i] += sign * value
+    return deltas
+
+def _move_entity_types(session: Session, deltas: Dict[GroupKey, list]) -> None:
+    """Mover los agregados de las entidades cuyo tipo cambia en este flush"""
+    connection = session.connection()
+    for instance in session.dirty:
+        if not isinstance(instance, Entity):
+            continue
+        history = get_history(instance, 'type')
+        if not history.deleted or history.deleted[0] == instance.type:
+            continue
+
+        month = month_bucket(Amortization.start_date, connection.dialect.name)
+        rows = connection.execute(
+            select(
+                Amortization.company_id, Amortization.status, month.label('month'),
+                func.count(), func.sum(Amortization.total_amount),
+                func.sum(Amortization.paid_amount), func.sum(Amortization.pending_amount)
+            )
+            .where(Amortization.entity_id == instance.id, Amortization.is_active == True)
+            .group_by(Amortization.company_id, Amortization.status, month)
+        )
+        for company_id, status, month_value, count, *amounts in rows:
+            month_value = month_start(month_value)
+            totals = [count, *(Decimal(str(value or 0)) for value in amounts)]
+            for entity_type, sign in ((history.deleted[0], -1), (instance.type, 1)):
+                delta = deltas[(company_id, entity_type, status or 'active', month_value)]
+                for i, value in enumerate(totals):
+                    delta[i] += sign * value
+
+def _collect_deltas(session: Session) -> Dict[GroupKey, list]:
+    changes = []
+    for instance in session.new:
+        if isinstance(instance, Amortization):
+            changes.append((None, _values(instance, previous=False)))
+    for instance in session.dirty:
+        if isinstance(instance, Amortization) and _changed(instance):
+            changes.append((_values(instance, previous=True), _values(instance, previous=False)))
+    for instance in session.deleted:
+        if isinstance(instance, Amortization):
+            changes.append((_values(instance, previous=True), None))
+
+    deltas: Dict[GroupKey, list] = defaultdict(lambda: [0, Decimal(0), Decimal(0), Decimal(0)])
+    if not changes and not any(isinstance(instance, Entity) for instance in session.dirty):
+        return deltas
+
+    entity_ids = {values['entity_id'] for change in changes for values in change if values}
+    types = _entity_types(session, entity_ids)
+
+    for old, new in changes:
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None or values['company_id'] is None:
+                continue
+            contribution = _contribution(values, sign)
+            if contribution is None:
+                continue
+            key = (values['company_id'], types.get(values['entity_id']),
+                   values['status'] or 'active', month_start(values['start_date']))
+            delta = deltas[key]
+            for i, value in enumerate(contribution):
+                delta[i] += value
+
+    _move_entity_types(session, deltas)
+    return deltas
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+# Cargar el valor anterior al asignar (si estaba expirado) para poder restarlo
+for _attribute in [getattr(Amortization, field) for field in TRACKED_FIELDS] + [Entity.type]:
+    event.listen(_attribute, "set", _load_previous_value, active_history=True)
+
+@event.listens_for(Session, "after_flush")
+def _maintain_summary(session: Session, flush_context) -> None:
+    """Aplicar los deltas del flush al resumen (misma transacción)"""
+    deltas = _collect_deltas(session)
+    if deltas:
+        apply_summary_deltas(session.connection(), deltas)
+
+def rebuild_summary(connection, company_id: Optional[str] = None) -> None:
+    """Recalcular el resumen desde amortizations (una compañía o todas)"""
+    table = AmortizationMonthlySummary.__table__
+    month = month_bucket(Amortization.start_date, connection.dialect.name)
+
+    source = (
+        select(
+            Amortization.company_id, Entity.type, func.coalesce(Amortization.status, 'active'), month,
+            func.count(), func.coalesce(func.sum(Amortization.total_amount), 0),
+            func.coalesce(func.sum(Amortization.paid_amount), 0),
+            func.coalesce(func.sum(Amortization.pending_amount), 0)
+        )
+        .join(Entity, Entity.id == Amortization.entity_id)
+        .where(Amortization.is_active == True)
+        .group_by(Amortization.company_id, Entity.type, func.coalesce(Amortization.status, 'active'), month)
+    )
+    clear = delete(table)
+    if company_id is not None:
+        source = source.where(Amortization.company_id == company_id)
+        clear = clear.where(table.c.company_id == company_id)
+
+    connection.execute(clear)
+    connection.execute(table.insert().from_select(
+        ['company_id', 'entity_type', 'status', 'month', *SUMMARY_FIELDS], source
+    ))
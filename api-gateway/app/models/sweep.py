@@ -0,0 +1,29 @@
+# api-gateway/app/models/sweep.py
+from sqlalchemy import Column, String, Date, DateTime, Integer, Text, Index
+
+from . import BaseModel
+
+class OverdueSweepRun(BaseModel):
+    """Ejecución del barrido de vencidos por compañía (services.overdue_sweep)"""
+    __tablename__ = "overdue_sweep_runs"
+
+    company_id = Column(String(50), nullable=False)
+    as_of = Column(Date, nullable=False)  # Fecha de corte: vencidas las cuotas con due_date < as_of
+    previous_as_of = Column(Date)  # Fecha de corte de la ejecución anterior
+
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    duration_ms = Column(Integer, nullable=False, default=0)
+
+    installments_updated = Column(Integer, nullable=False, default=0)
+    next_due_dates_updated = Column(Integer, nullable=False, default=0)
+    amortizations_updated = Column(Integer, nullable=False, default=0)
+
+    status = Column(String(20), nullable=False, default='completed')  # completed, failed
+    error = Column(Text)
+
+    __table_args__ = (
+        Index('ix_overdue_sweep_runs_company_as_of', 'company_id', 'as_of'),
+    )
+
+    def __repr__(self):
+        return f"<OverdueSweepRun(company_id='{self.company_id}', as_of={self.as_of}, status='{self.status}')>"
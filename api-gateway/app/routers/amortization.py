@@ -446,26 +446,44 @@
 #         )
 
 # api-gateway/app/routers/amortization.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, or_, desc, asc
 from typing import List, Optional
 from datetime import date, datetime
 from decimal import Decimal
 
-from ..database import get_db
+from ..database import get_db, get_async_db
 from ..models.amortization import Amortization, AmortizationInstallment
 from ..models.entity import Entity
 from ..models.company import Company
 from ..schemas.amortization import (
     AmortizationCreate, AmortizationUpdate, AmortizationResponse,
     InstallmentCreate, InstallmentUpdate, InstallmentResponse,
-    AmortizationListResponse, AmortizationDetailResponse
+    AmortizationListResponse, AmortizationDetailResponse, AmortizationSummary, AgingReport
 )
-from ..services.amortization_service import AmortizationService
+from ..schemas.common import (
+    BulkOperationRequest, BulkOperationResponse, ExportRequest, ImportRequest, ImportResponse
+)
+from ..services.amortization_service import AmortizationService, AsyncAmortizationService, DETAIL_FIELDS, LIST_EXTRA_FIELDS, LIST_FIELDS
+from ..services.bulk_service import BACKGROUND_OPERATIONS, BulkOperationError, BulkOperationService
+from ..services.export_service import ExportError, stream_export
+from ..services.job_service import job_accepted, submit_job
+from ..services.import_service import AmortizationImporter, ImportFileError
+from ..services.aging_engine import (
+    DEFAULT_AGING_PERIODS, DETAIL_COLUMNS, AgingPeriodsError, validate_periods, iter_aging_detail, iter_csv
+)
+from ..services.sap_import import DOCUMENT_TYPES as SAP_DOCUMENT_TYPES
 from ..services.sap_service import SAPService
-from ..utils.pagination import paginate
+from ..utils.pagination import paginate, InvalidCursorError
+from ..utils.counting import COUNT_MODES
 from ..utils.filters import AmortizationFilters
+from ..utils.cache import response_cache, serialize_response, encoded_response, etag_response
+from ..utils.serialization import FastJSONResponse, FieldSelectionError, dumps, parse_fields
+from ..utils.row_cache import get_company, get_entity
 
 router = APIRouter()
 
@@ -473,11 +491,20 @@ router = APIRouter()
 def get_amortization_service(db: Session = Depends(get_db)) -> AmortizationService:
     return AmortizationService(db)
 
+def get_async_amortization_service(db: AsyncSession = Depends(get_async_db)) -> AsyncAmortizationService:
+    return AsyncAmortizationService(db)
+
 def get_sap_service() -> SAPService:
     return SAPService()
 
-@router.get("/", response_model=AmortizationListResponse)
+async def invalidate_amortization_cache(db: Session, amortization_id: str) -> None:
+    """Invalidar respuestas cacheadas de una amortización y de los listados de su compañía"""
+    company_id = db.query(Amortization.company_id).filter(Amortization.id == amortization_id).scalar()
+    await response_cache.invalidate(company_id=company_id, amortization_id=amortization_id)
+
+@router.get("/", response_model=AmortizationListResponse, response_class=FastJSONResponse)
 async def list_amortizations(
+    request: Request,
     company_id: str = Query(..., description="ID de la compañía"),
     entity_type: Optional[str] = Query(None, description="Tipo de entidad (cliente/proveedor)"),
     status: Optional[str] = Query(None, description="Estado de la amortización"),
@@ -489,15 +516,28 @@ async def list_amortizations(
     page_size: int = Query(20, ge=1, le=100),
     sort_by: str = Query("created_at", description="Campo para ordenar"),
     sort_order: str = Query("desc", description="Orden ascendente o descendente"),
-    db: Session = Depends(get_db),
-    amortization_service: AmortizationService = Depends(get_amortization_service)
+    pagination: str = Query("offset", description="Modo de paginación (offset/cursor)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor)"),
+    include_total: bool = Query(False, description="Calcular total en modo cursor"),
+    count_mode: str = Query("exact", description="Cálculo del total (exact/estimated/cached)"),
+    fields: Optional[str] = Query(None, description="Campos de cada item separados por comas (por defecto todos)"),
+    amortization_service: AsyncAmortizationService = Depends(get_async_amortization_service)
 ):
-    """Listar amortizaciones con filtros y paginación"""
+    """Listar amortizaciones con filtros y paginación (por página o por cursor)"""
     
     try:
         # Validar sort_order
         if sort_order not in ["asc", "desc"]:
             sort_order = "desc"
+        if count_mode not in COUNT_MODES:
+            count_mode = "exact"
+        item_fields = parse_fields(fields, LIST_FIELDS + LIST_EXTRA_FIELDS)
+        
+        # Respuesta cacheada (ETag / If-None-Match)
+        cache_key = await response_cache.key("list", "company", company_id, request.query_params.multi_items())
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return etag_response(request, cached)
             
         # Crear filtros
         filters = AmortizationFilters(
@@ -516,42 +556,85 @@ async def list_amortizations(
             page=page,
             page_size=page_size,
             sort_by=sort_by,
-            sort_order=sort_order
+            sort_order=sort_order,
+            cursor=cursor,
+            use_cursor=pagination == "cursor",
+            include_total=include_total,
+            count_mode=count_mode,
+            fields=item_fields
         )
         
-        return result
+        # Con fields los items no tienen todos los campos del schema
+        if item_fields is None:
+            cached = serialize_response(AmortizationListResponse, result)
+        else:
+            cached = encoded_response(dumps(result))
+        await response_cache.set(cache_key, cached)
+        return etag_response(request, cached)
         
+    except (InvalidCursorError, FieldSelectionError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener amortizaciones: {str(e)}"
         )
 
-@router.get("/{amortization_id}", response_model=AmortizationDetailResponse)
+@router.get("/{amortization_id}", response_model=AmortizationDetailResponse, response_class=FastJSONResponse)
 async def get_amortization(
+    request: Request,
     amortization_id: str = Path(..., description="ID de la amortización"),
     include_installments: bool = Query(True, description="Incluir cuotas"),
-    db: Session = Depends(get_db),
-    amortization_service: AmortizationService = Depends(get_amortization_service)
+    fields: Optional[str] = Query(None, description="Campos a devolver separados por comas (por defecto todos)"),
+    include: Optional[str] = Query(None, description="Relaciones a incluir con fields (installments)"),
+    amortization_service: AsyncAmortizationService = Depends(get_async_amortization_service)
 ):
-    """Obtener detalles de una amortización específica"""
+    """
+    Obtener detalles de una amortización específica
+    
+    Con fields solo se devuelven esos campos y las cuotas solo con include=installments.
+    """
     
     try:
-        amortization = await amortization_service.get_amortization_detail(
+        company_id = await amortization_service.get_company_id(amortization_id)
+        cache_key = await response_cache.key(
+            "detail", "amortization", amortization_id, request.query_params.multi_items(), company_id=company_id
+        )
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return etag_response(request, cached)
+        
+        detail_fields = parse_fields(fields, DETAIL_FIELDS)
+        if detail_fields is not None:
+            includes = parse_fields(include, ("installments",), required=()) or []
+            include_installments = "installments" in includes
+        
+        body = await amortization_service.get_amortization_detail_json(
             amortization_id=amortization_id,
-            include_installments=include_installments
+            include_installments=include_installments,
+            fields=detail_fields
         )
         
-        if not amortization:
+        if body is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Amortización no encontrada"
             )
         
-        return amortization
+        cached = encoded_response(body)
+        await response_cache.set(cache_key, cached)
+        return etag_response(request, cached)
         
     except HTTPException:
         raise
+    except FieldSelectionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -569,12 +652,7 @@ async def create_amortization(
     
     try:
         # Validar que la entidad existe
-        entity = db.query(Entity).filter(
-            and_(
-                Entity.id == amortization_data.entity_id,
-                Entity.company_id == amortization_data.company_id
-            )
-        ).first()
+        entity = get_entity(db, amortization_data.entity_id, amortization_data.company_id)
         
         if not entity:
             raise HTTPException(
@@ -587,6 +665,7 @@ async def create_amortization(
             amortization_data=amortization_data,
             auto_generate_installments=auto_generate_installments
         )
+        await response_cache.invalidate(company_id=amortization.company_id)
         
         return amortization
         
@@ -621,6 +700,8 @@ async def update_amortization(
                 detail="Amortización no encontrada"
             )
         
+        await response_cache.invalidate(company_id=amortization.company_id, amortization_id=amortization_id)
+        
         return amortization
         
     except HTTPException:
@@ -641,6 +722,9 @@ async def delete_amortization(
     """Eliminar amortización (soft delete por defecto)"""
     
     try:
+        # Compañía antes de eliminar (para invalidar sus listados)
+        company_id = db.query(Amortization.company_id).filter(Amortization.id == amortization_id).scalar()
+        
         success = await amortization_service.delete_amortization(
             amortization_id=amortization_id,
             force_delete=force_delete
@@ -652,6 +736,8 @@ async def delete_amortization(
                 detail="Amortización no encontrada"
             )
         
+        await response_cache.invalidate(company_id=company_id, amortization_id=amortization_id)
+        
         return {"message": "Amortización eliminada exitosamente"}
         
     except HTTPException:
@@ -663,24 +749,38 @@ async def delete_amortization(
         )
 
 # Endpoints para cuotas
-@router.get("/{amortization_id}/installments", response_model=List[InstallmentResponse])
+@router.get("/{amortization_id}/installments", response_model=List[InstallmentResponse], response_class=FastJSONResponse)
 async def get_installments(
+    request: Request,
     amortization_id: str = Path(..., description="ID de la amortización"),
     status_filter: Optional[str] = Query(None, description="Filtrar por estado"),
     overdue_only: bool = Query(False, description="Solo cuotas vencidas"),
-    db: Session = Depends(get_db),
-    amortization_service: AmortizationService = Depends(get_amortization_service)
+    sort_by: str = Query("installment_number", description="Campo para ordenar (installment_number, due_date, days_overdue, remaining_amount)"),
+    sort_order: str = Query("asc", description="Orden ascendente o descendente"),
+    amortization_service: AsyncAmortizationService = Depends(get_async_amortization_service)
 ):
     """Obtener cuotas de una amortización"""
     
     try:
-        installments = await amortization_service.get_installments(
+        company_id = await amortization_service.get_company_id(amortization_id)
+        cache_key = await response_cache.key(
+            "installments", "amortization", amortization_id, request.query_params.multi_items(), company_id=company_id
+        )
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return etag_response(request, cached)
+        
+        body = await amortization_service.get_installments_json(
             amortization_id=amortization_id,
             status_filter=status_filter,
-            overdue_only=overdue_only
+            overdue_only=overdue_only,
+            sort_by=sort_by,
+            sort_order=sort_order
         )
         
-        return installments
+        cached = encoded_response(body)
+        await response_cache.set(cache_key, cached)
+        return etag_response(request, cached)
         
     except Exception as e:
         raise HTTPException(
@@ -710,11 +810,299 @@ async def record_payment(
             notes=notes,
             create_sap_entry=create_sap_entry
         )
+        await invalidate_amortization_cache(db, amortization_id)
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al registrar pago: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/{amortization_id}/generate-installments", status_code=status.HTTP_202_ACCEPTED)
+async def generate_installments(
+    amortization_id: str = Path(..., description="ID de la amortización"),
+    overwrite_existing: bool = Query(False, description="Sobrescribir cuotas existentes"),
+    db: Session = Depends(get_db)
+):
+    """Regenerar la tabla de cuotas en segundo plano (202 + id del trabajo)"""
+    
+    try:
+        amortization = db.query(Amortization.id).filter(Amortization.id == amortization_id).first()
+        if not amortization:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Amortización no encontrada"
+            )
+        
+        existing = db.query(AmortizationInstallment.id).filter(
+            AmortizationInstallment.amortization_id == amortization_id
+        ).first()
+        if existing and not overwrite_existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La amortización ya tiene cuotas; use overwrite_existing para regenerarlas"
+            )
+        if existing and AmortizationService(db).paid_amortization_ids([amortization_id]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La amortización tiene pagos registrados; no se puede recalcular"
+            )
+        
+        job_id = await run_in_threadpool(submit_job, "regenerate_installments", amortization_ids=[amortization_id])
+        return job_accepted(job_id)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar cuotas: {str(e)}"
+        )
+
+# Endpoints de reportes
+@router.get("/reports/summary", response_model=AmortizationSummary)
+async def amortization_summary(
+    company_id: str = Query(..., description="ID de la compañía"),
+    entity_type: Optional[str] = Query(None, description="Tipo de entidad"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Estado"),
+    date_from: Optional[date] = Query(None, description="Fecha desde"),
+    date_to: Optional[date] = Query(None, description="Fecha hasta"),
+    amortization_service: AmortizationService = Depends(get_amortization_service)
+):
+    """Resumen de amortizaciones (tabla de agregados mensuales)"""
+    
+    try:
+        summary = await amortization_service.get_amortization_summary(
+            company_id=company_id,
+            entity_type=entity_type,
+            status=status_filter,
+            date_from=date_from,
+            date_to=date_to
+        )
+        
+        return summary
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener resumen: {str(e)}"
+        )
+
+@router.get("/reports/aging", response_model=AgingReport)
+async def aging_report(
+    company_id: str = Query(..., description="ID de la compañía"),
+    entity_type: Optional[str] = Query(None, description="Tipo de entidad"),
+    aging_periods: List[int] = Query(list(DEFAULT_AGING_PERIODS), description="Períodos de aging"),
+    as_of: Optional[date] = Query(None, description="Fecha de corte (por defecto hoy)"),
+    amortization_service: AmortizationService = Depends(get_amortization_service)
+):
+    """Reporte de aging de amortizaciones agrupado por entidad"""
+    
+    try:
+        aging = await amortization_service.get_aging_report(
+            company_id=company_id,
+            entity_type=entity_type,
+            aging_periods=aging_periods,
+            as_of=as_of
+        )
+        
+        return aging
+        
+    except AgingPeriodsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar reporte de aging: {str(e)}"
+        )
+
+@router.get("/reports/aging/detail")
+async def aging_detail(
+    company_id: str = Query(..., description="ID de la compañía"),
+    entity_type: Optional[str] = Query(None, description="Tipo de entidad"),
+    aging_periods: List[int] = Query(list(DEFAULT_AGING_PERIODS), description="Períodos de aging"),
+    as_of: Optional[date] = Query(None, description="Fecha de corte (por defecto hoy)"),
+    db: Session = Depends(get_db)
+):
+    """Detalle de aging por cuota en CSV (streaming, sin cargar todas las cuotas)"""
+    
+    try:
+        periods = validate_periods(aging_periods)
+    except AgingPeriodsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    rows = iter_aging_detail(
+        db,
+        company_id=company_id,
+        aging_periods=periods,
+        entity_type=entity_type,
+        as_of=as_of
+    )
+    return StreamingResponse(
+        iter_csv(rows, DETAIL_COLUMNS),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="aging_{company_id}.csv"'}
+    )
+
+# Exportación
+@router.post("/export")
+async def export_amortizations(
+    export_request: ExportRequest,
+    db: Session = Depends(get_db)
+):
+    """Exportar las cuotas de las amortizaciones filtradas (CSV/Excel en streaming)"""
+    
+    try:
+        content, media_type, filename = stream_export(db, export_request)
+    except ExportError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al exportar amortizaciones: {str(e)}"
+        )
+    
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/import", response_model=ImportResponse)
+async def import_amortizations(
+    import_request: ImportRequest,
+    company_id: str = Query(..., description="ID de la compañía"),
+    background: bool = Query(False, description="Importar en segundo plano (202 + id del trabajo)"),
+    db: Session = Depends(get_db)
+):
+    """Importar amortizaciones desde CSV/Excel (por bloques, validación en paralelo)"""
+    
+    try:
+        if not get_company(db, company_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Compañía no encontrada"
+            )
+        
+        if background:
+            job_id = await run_in_threadpool(
+                submit_job, "import_amortizations", company_id=company_id, request=import_request.model_dump()
+            )
+            return job_accepted(job_id)
+        
+        importer = AmortizationImporter(db, company_id)
+        result = await run_in_threadpool(importer.run, import_request)
+        if result["imported_ids"]:
+            await response_cache.invalidate(company_id=company_id)
+        return ImportResponse(**result)
+        
+    except HTTPException:
+        raise
+    except ImportFileError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al importar amortizaciones: {str(e)}"
+        )
+
+@router.post("/import-from-sap", status_code=status.HTTP_202_ACCEPTED)
+async def import_from_sap(
+    company_id: str = Query(..., description="ID de la compañía"),
+    document_types: List[str] = Query(["Invoices"], description="Tipos de documento"),
+    date_from: Optional[date] = Query(None, description="Fecha de documento desde (recarga sin marca de agua)"),
+    date_to: Optional[date] = Query(None, description="Fecha de documento hasta (recarga sin marca de agua)"),
+    full: bool = Query(False, description="Ignorar la marca de agua y releer todo"),
+    db: Session = Depends(get_db)
+):
+    """
+    Importar documentos de SAP como amortizaciones (trabajo en segundo plano)
+
+    Sin rango de fechas la importación es incremental: solo se piden los
+    documentos modificados desde la última importación de cada tipo.
+    """
+    
+    try:
+        if not get_company(db, company_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Compañía no encontrada"
+            )
+        
+        unknown = [document_type for document_type in document_types if document_type not in SAP_DOCUMENT_TYPES]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tipos de documento no soportados: {', '.join(unknown)}"
+            )
+        
+        job_id = await run_in_threadpool(
+            submit_job, "import_from_sap",
+            company_id=company_id,
+            document_types=document_types,
+            date_from=date_from.isoformat() if date_from else None,
+            date_to=date_to.isoformat() if date_to else None,
+            full=full
+        )
+        return job_accepted(job_id)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al importar desde SAP: {str(e)}"
+        )
+
+@router.post("/bulk", response_model=BulkOperationResponse)
+async def bulk_operation(
+    bulk_request: BulkOperationRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Operación en lote (suspend, cancel, reactivate, delete, recalculate, sync_to_sap) por ids o filtros
+
+    Los cambios de estado se aplican en la petición; recalculate y
+    sync_to_sap se ejecutan como trabajo (202 + id del trabajo, el
+    resultado tiene el formato de BulkOperationResponse).
+    """
+    
+    try:
+        if bulk_request.operation in BACKGROUND_OPERATIONS:
+            job_id = await run_in_threadpool(submit_job, "bulk_operation", request=bulk_request.model_dump())
+            return job_accepted(job_id)
+        
+        result = await run_in_threadpool(BulkOperationService(db).run, bulk_request)
+        changed = {}
+        for item in result["results"]:
+            changed.setdefault(item["company_id"], []).append(item["id"])
+        for company_id, amortization_ids in changed.items():
+            await response_cache.invalidate(company_id=company_id, amortization_ids=amortization_ids)
+        return BulkOperationResponse(**result)
+        
+    except BulkOperationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error en la operación en lote: {str(e)}"
+        )
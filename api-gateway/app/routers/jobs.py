@@ -0,0 +1,71 @@
+# api-gateway/app/routers/jobs.py
+from fastapi import APIRouter, HTTPException, status, Path
+from starlette.concurrency import run_in_threadpool
+
+from ..schemas.common import JobResponse, JobSubmitRequest
+from ..services.job_service import JobNotFoundError, JobSubmitError, get_job, job_accepted, submit_job
+
+router = APIRouter()
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+async def create_job(job_request: JobSubmitRequest):
+    """Enviar un trabajo en segundo plano"""
+
+    try:
+        job_id = await run_in_threadpool(submit_job, job_request.job_type, **job_request.parameters)
+        return job_accepted(job_id)
+    except JobSubmitError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al enviar el trabajo: {str(e)}"
+        )
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job_status(
+    job_id: str = Path(..., description="ID del trabajo")
+):
+    """Estado, progreso y resultado de un trabajo"""
+
+    try:
+        return JobResponse(**await run_in_threadpool(get_job, job_id))
+    except JobNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo no encontrado"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener el trabajo: {str(e)}"
+        )
+
+@router.get("/{job_id}/result")
+async def get_job_result(
+    job_id: str = Path(..., description="ID del trabajo")
+):
+    """Resultado de un trabajo completado (409 si aún no ha terminado)"""
+
+    try:
+        job = await run_in_threadpool(get_job, job_id)
+    except JobNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo no encontrado"
+        )
+
+    if job["status"] == "failed":
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=job["error"]
+        )
+    if job["status"] != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El trabajo aún no ha terminado ({job['status']})"
+        )
+    return job["result"]
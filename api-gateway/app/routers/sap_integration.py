@@ -0,0 +1,45 @@
+# api-gateway/app/routers/sap_integration.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..schemas.common import SAPBusinessPartnerSyncRequest
+from ..services.job_service import job_accepted, submit_job
+from ..utils.row_cache import get_company
+
+router = APIRouter()
+
+@router.post("/sync-business-partners", status_code=status.HTTP_202_ACCEPTED)
+async def sync_business_partners(
+    sync_request: SAPBusinessPartnerSyncRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Sincronizar clientes y proveedores de SAP con las entidades (trabajo en segundo plano)
+
+    Solo se escriben los business partners cuyo contenido ha cambiado
+    desde la última sincronización (hash por CardCode).
+    """
+
+    try:
+        if not get_company(db, sync_request.company_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Compañía no encontrada"
+            )
+
+        job_id = await run_in_threadpool(
+            submit_job, "sync_business_partners",
+            company_id=sync_request.company_id,
+            entity_types=[sync_request.entity_type] if sync_request.entity_type else None
+        )
+        return job_accepted(job_id)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al sincronizar business partners: {str(e)}"
+        )
@@ -1,6 +1,6 @@
 # api-gateway/app/schemas/amortization.py
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import date, datetime
 from decimal import Decimal
 from enum import Enum
@@ -142,11 +142,13 @@ class AmortizationListItem(BaseModel):
 class AmortizationListResponse(BaseModel):
     """Schema para lista paginada de amortizaciones"""
     items: List[AmortizationListItem]
-    total: int
-    page: int
+    total: Optional[int] = None  # None en modo cursor si no se pide include_total
+    page: Optional[int] = None  # None en modo cursor
     page_size: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
+    count_mode: Optional[str] = None  # exact/estimated/cached; None si no se calculó total
 
 class AmortizationDetailResponse(AmortizationResponse):
     """Schema detallado de amortización con cuotas"""
@@ -168,6 +170,26 @@ class AmortizationSummary(BaseModel):
     amount_trend: float = 0
     payments_trend: float = 0
 
+class AgingEntity(BaseModel):
+    """Schema para fila de aging por entidad"""
+    entity_id: str
+    entity_card_code: Optional[str] = None
+    entity_name: Optional[str] = None
+    entity_type: Optional[str] = None
+    buckets: Dict[str, Decimal]
+    installments: int
+    total: Decimal
+
+class AgingReport(BaseModel):
+    """Schema para reporte de aging"""
+    company_id: str
+    as_of: date
+    aging_periods: List[int]
+    buckets: List[str]
+    totals: Dict[str, Decimal]
+    total: Decimal
+    entities: List[AgingEntity]
+
 class AmortizationCalculation(BaseModel):
     """Schema para cálculo de amortización"""
     total_amount: Decimal = Field(..., gt=0)
@@ -193,3 +215,7 @@ class AmortizationCalculationResponse(BaseModel):
     total_interest: Decimal
     total_amount: Decimal
     effective_rate: Decimal
+
+# Referencia adelantada de AmortizationDetailResponse.installments
+from .installment import InstallmentResponse
+AmortizationDetailResponse.model_rebuild()
@@ -158,10 +158,19 @@ class DateRangeFilter(BaseModel):
         return v
 
 class BulkOperationRequest(BaseModel):
-    """Schema para operaciones en lote"""
-    ids: List[str] = Field(..., min_items=1, max_items=100, description="Lista de IDs")
-    operation: str = Field(..., description="Tipo de operación")
+    """Schema para operaciones en lote (por lista de IDs o por filtros)"""
+    ids: Optional[List[str]] = Field(None, min_items=1, max_items=100000, description="Lista de IDs")
+    filters: Optional[Dict[str, Any]] = Field(None, description="Filtros de amortizaciones (con company_id)")
+    operation: str = Field(
+        ..., pattern="^(suspend|cancel|reactivate|delete|recalculate|sync_to_sap)$", description="Tipo de operación"
+    )
     parameters: Optional[Dict[str, Any]] = Field(None, description="Parámetros adicionales")
+    
+    @validator('filters', always=True)
+    def validate_target(cls, v, values):
+        if bool(v) == bool(values.get('ids')):
+            raise ValueError('Indique ids o filters (solo uno de los dos)')
+        return v
 
 class BulkOperationResponse(BaseModel):
     """Schema para respuesta de operaciones en lote"""
@@ -194,6 +203,27 @@ class ImportResponse(BaseModel):
     validation_errors: List[Dict[str, Any]] = Field(default_factory=list, description="Errores de validación")
     imported_ids: List[str] = Field(default_factory=list, description="IDs de elementos importados")
 
+class JobSubmitRequest(BaseModel):
+    """Schema para enviar un trabajo en segundo plano"""
+    job_type: str = Field(..., description="Tipo de trabajo")
+    parameters: Dict[str, Any] = Field(default_factory=dict, description="Argumentos del trabajo")
+
+class JobResponse(BaseModel):
+    """Schema de estado de un trabajo en segundo plano"""
+    job_id: str = Field(..., description="ID del trabajo")
+    job_type: Optional[str] = Field(None, description="Tipo de trabajo")
+    status: str = Field(..., description="pending, running, completed, failed o cancelled")
+    progress: Optional[Dict[str, Any]] = Field(None, description="Progreso (current, total, ...)")
+    result: Optional[Any] = Field(None, description="Resultado (al completarse)")
+    error: Optional[str] = Field(None, description="Error (si ha fallado)")
+
+class SAPBusinessPartnerSyncRequest(BaseModel):
+    """Schema para sincronizar los business partners de SAP de una compañía"""
+    company_id: str = Field(..., description="ID de la compañía")
+    entity_type: Optional[str] = Field(
+        None, pattern="^(cliente|proveedor)$", description="Tipo de entidad (por defecto clientes y proveedores)"
+    )
+
 # Configurar referencias circulares
 try:
     from .amortization import AmortizationDetailResponse
@@ -1,6 +1,6 @@
 # api-gateway/app/schemas/installment.py
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import Optional, List
 from datetime import date, datetime
 from decimal import Decimal
 from enum import Enum
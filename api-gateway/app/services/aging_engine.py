@@ -0,0 +1,222 @@
+# api-gateway/app/services/aging_engine.py
+"""
+Motor de aging de cuotas pendientes.
+
+El tramo de cada cuota se calcula en SQL a partir de los días vencidos
+(fecha de corte - due_date): width_bucket sobre el array de límites en
+PostgreSQL y CASE en el resto de bases de datos. El informe agrupado
+devuelve una fila por (entidad, tramo), de modo que el coste en memoria
+depende del número de entidades y no del de cuotas.
+
+El detalle por cuota se lee con yield_per (cursor de servidor en
+PostgreSQL) y se recorre como iterador, sin materializar el resultado.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from datetime import date
+from decimal import Decimal
+import csv
+import io
+
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import Session
+
+from ..models.amortization import UNPAID_STATUSES, Amortization, AmortizationInstallment
+from ..models.entity import Entity
+from ..utils.due_dates import days_elapsed
+
+DEFAULT_AGING_PERIODS = (30, 60, 90, 120)
+
+DETAIL_CHUNK_SIZE = 5000
+
+DETAIL_COLUMNS = (
+    'entity_id', 'entity_card_code', 'entity_name', 'entity_type', 'amortization_id', 'reference',
+    'installment_id', 'installment_number', 'due_date', 'days_overdue', 'bucket', 'outstanding_amount'
+)
+
+class AgingPeriodsError(ValueError):
+    """Límites de tramos no válidos"""
+
+def validate_periods(periods: Sequence[int]) -> List[int]:
+    """Comprobar que los límites son enteros positivos estrictamente crecientes"""
+    periods = [int(period) for period in periods]
+    if not periods:
+        raise AgingPeriodsError("Debe indicar al menos un período de aging")
+    if periods[0] <= 0 or any(b <= a for a, b in zip(periods, periods[1:])):
+        raise AgingPeriodsError("Los períodos de aging deben ser positivos y crecientes")
+    return periods
+
+def bucket_labels(periods: Sequence[int]) -> List[str]:
+    """Etiquetas de tramo: current, 1-30, 31-60, ..., 91-120, 121+"""
+    labels = ['current']
+    lower = 1
+    for period in periods:
+        labels.append(f"{lower}-{period}")
+        lower = period + 1
+    labels.append(f"{periods[-1] + 1}+")
+    return labels
+
+def days_overdue(as_of: date):
+    """Días vencidos de la cuota a la fecha de corte (negativo si aún no vence)"""
+    return days_elapsed(AmortizationInstallment.due_date, as_of)
+
+def bucket_index(days, periods: Sequence[int], dialect_name: str):
+    """
+    Índice del tramo (0 = current, len(periods) + 1 = último)
+
+    Los límites inferiores de los tramos son 1, p1 + 1, p2 + 1...
+    """
+    lower_bounds = [1] + [period + 1 for period in periods]
+    if dialect_name == 'postgresql':
+        return func.width_bucket(days, array(lower_bounds))
+    return case(
+        *((days < bound, index) for index, bound in enumerate(lower_bounds)),
+        else_=len(lower_bounds)
+    )
+
+def outstanding_amount():
+    return AmortizationInstallment.total_amount - func.coalesce(AmortizationInstallment.paid_amount, 0)
+
+def _unpaid_installments(select_stmt, company_id: str, entity_type: Optional[str]):
+    stmt = (
+        select_stmt
+        .join(Amortization, Amortization.id == AmortizationInstallment.amortization_id)
+        .join(Entity, Entity.id == Amortization.entity_id)
+        .where(
+            Amortization.company_id == company_id,
+            Amortization.is_active == True,
+            AmortizationInstallment.status.in_(UNPAID_STATUSES)
+        )
+    )
+    if entity_type:
+        stmt = stmt.where(Entity.type == entity_type)
+    return stmt
+
+def aging_report(
+    db: Session,
+    company_id: str,
+    aging_periods: Sequence[int] = DEFAULT_AGING_PERIODS,
+    entity_type: Optional[str] = None,
+    as_of: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    Aging agrupado por entidad
+
+    Args:
+        db: Sesión de base de datos
+        company_id: ID de la compañía
+        aging_periods: Límites superiores de los tramos en días
+        entity_type: Filtrar por tipo de entidad
+        as_of: Fecha de corte (por defecto hoy)
+
+    Returns:
+        Tramos, totales por tramo y filas por entidad
+    """
+    periods = validate_periods(aging_periods)
+    labels = bucket_labels(periods)
+    as_of = as_of or date.today()
+    dialect_name = db.get_bind().dialect.name
+
+    bucket = bucket_index(days_overdue(as_of), periods, dialect_name).label('bucket')
+    stmt = _unpaid_installments(
+        select(
+            Entity.id, Entity.sap_card_code, Entity.name, Entity.type, bucket,
+            func.count().label('installments'), func.sum(outstanding_amount()).label('amount')
+        ).select_from(AmortizationInstallment),
+        company_id, entity_type
+    ).group_by(Entity.id, Entity.sap_card_code, Entity.name, Entity.type, bucket).order_by(Entity.name, Entity.id)
+
+    totals = {label: Decimal(0) for label in labels}
+    entities: Dict[str, Dict[str, Any]] = {}
+    for row in db.execute(stmt):
+        entity = entities.get(row.id)
+        if entity is None:
+            entity = entities[row.id] = {
+                'entity_id': row.id,
+                'entity_card_code': row.sap_card_code,
+                'entity_name': row.name,
+                'entity_type': row.type,
+                'buckets': {label: Decimal(0) for label in labels},
+                'installments': 0,
+                'total': Decimal(0)
+            }
+        label = labels[int(row.bucket)]
+        amount = Decimal(str(row.amount or 0)).quantize(Decimal('0.01'))
+        entity['buckets'][label] += amount
+        entity['installments'] += row.installments
+        entity['total'] += amount
+        totals[label] += amount
+
+    return {
+        'company_id': company_id,
+        'as_of': as_of,
+        'aging_periods': periods,
+        'buckets': labels,
+        'totals': totals,
+        'total': sum(totals.values(), Decimal(0)),
+        'entities': list(entities.values())
+    }
+
+def iter_aging_detail(
+    db: Session,
+    company_id: str,
+    aging_periods: Sequence[int] = DEFAULT_AGING_PERIODS,
+    entity_type: Optional[str] = None,
+    as_of: Optional[date] = None,
+    chunk_size: int = DETAIL_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Detalle de aging por cuota, leído por bloques de chunk_size
+
+    Usa yield_per (stream_results): en PostgreSQL las filas llegan por un
+    cursor de servidor y solo hay chunk_size filas en memoria.
+    """
+    periods = validate_periods(aging_periods)
+    labels = bucket_labels(periods)
+    as_of = as_of or date.today()
+    dialect_name = db.get_bind().dialect.name
+
+    days = days_overdue(as_of)
+    stmt = _unpaid_installments(
+        select(
+            Entity.id.label('entity_id'),
+            Entity.sap_card_code.label('entity_card_code'),
+            Entity.name.label('entity_name'),
+            Entity.type.label('entity_type'),
+            Amortization.id.label('amortization_id'),
+            Amortization.reference,
+            AmortizationInstallment.id.label('installment_id'),
+            AmortizationInstallment.installment_number,
+            AmortizationInstallment.due_date,
+            days.label('days_overdue'),
+            bucket_index(days, periods, dialect_name).label('bucket'),
+            outstanding_amount().label('outstanding_amount')
+        ).select_from(AmortizationInstallment),
+        company_id, entity_type
+    ).order_by(Entity.id, AmortizationInstallment.due_date, AmortizationInstallment.id)
+
+    result = db.execute(stmt.execution_options(yield_per=chunk_size))
+    try:
+        for row in result:
+            detail = row._asdict()
+            detail['bucket'] = labels[int(detail['bucket'])]
+            detail['outstanding_amount'] = Decimal(str(detail['outstanding_amount'] or 0)).quantize(Decimal('0.01'))
+            yield detail
+    finally:
+        result.close()
+
+def iter_csv(rows: Iterator[Dict[str, Any]], columns: Sequence[str], batch_size: int = 1000) -> Iterator[str]:
+    """Serializar filas a CSV en bloques de texto (cabecera incluida)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
@@ -0,0 +1,773 @@
+# api-gateway/app/services/amortization_service.py
+from typing import List, Dict, Any, Optional, Sequence, Set, Union
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import select, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from fastapi import HTTPException, status
+import logging
+
+from ..models.amortization import Amortization, AmortizationInstallment
+from ..models.entity import Entity
+from ..models.summary import AmortizationMonthlySummary, month_start
+from ..schemas.amortization import AmortizationCreate, AmortizationListItem, AmortizationResponse, AmortizationUpdate
+from ..schemas.installment import InstallmentResponse
+from ..utils.filters import (
+    AmortizationFilters, InstallmentFilters, apply_amortization_filters, apply_installment_filters
+)
+from ..utils.pagination import paginate
+from ..utils.counting import count_cache, count_cache_key
+from ..utils.serialization import RowEncoder, dumps
+from .schedule_engine import calculate_schedule, calculate_schedules, ScheduleBatch
+from .installment_writer import InstallmentBulkWriter
+from .aging_engine import DEFAULT_AGING_PERIODS, aging_report
+from .sap_sync import SAPDocumentSync
+
+logger = logging.getLogger(__name__)
+
+# Campos de ordenación del listado de cuotas (columnas o campos calculados en SQL)
+INSTALLMENT_SORT_FIELDS = ('installment_number', 'due_date', 'days_overdue', 'remaining_amount')
+
+# Campos de la entidad incluidos en listado y detalle
+ENTITY_FIELDS = {
+    'entity_name': Entity.name,
+    'entity_type': Entity.type,
+    'entity_card_code': Entity.sap_card_code
+}
+
+# Columnas de las respuestas de lectura, codificadas sin pasar por el ORM (utils.serialization)
+INSTALLMENT_ENCODER = RowEncoder(InstallmentResponse, AmortizationInstallment)
+AMORTIZATION_ENCODER = RowEncoder(AmortizationResponse, Amortization, columns=ENTITY_FIELDS)
+
+# Campos admitidos en fields= (listado y detalle)
+LIST_FIELDS = tuple(AmortizationListItem.model_fields)
+# Columnas que el listado admite en fields= aunque no estén en el item por defecto
+LIST_EXTRA_FIELDS = ('amortization_method', 'start_date')
+DETAIL_FIELDS = tuple(AMORTIZATION_ENCODER.fields)
+
+def _list_item(amortization: Amortization, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Convertir amortización a item de listado (AmortizationListItem, o solo `fields`)"""
+    item = {}
+    for name in fields or LIST_FIELDS:
+        if name in ENTITY_FIELDS:
+            entity = amortization.entity
+            item[name] = getattr(entity, ENTITY_FIELDS[name].key) if entity else None
+        else:
+            item[name] = getattr(amortization, name)
+    return item
+
+def _detail(amortization: Amortization, installments: Optional[List[AmortizationInstallment]]) -> Dict[str, Any]:
+    """Convertir amortización a detalle (AmortizationDetailResponse)"""
+    detail = {column.key: getattr(amortization, column.key) for column in Amortization.__table__.columns}
+    entity = amortization.entity
+    detail.update({
+        'entity_name': entity.name if entity else None,
+        'entity_type': entity.type if entity else None,
+        'entity_card_code': entity.sap_card_code if entity else None,
+        'installments': installments
+    })
+    return detail
+
+def _installments_statement(
+    columns: Sequence[Any],
+    amortization_id: str,
+    status_filter: Optional[str] = None,
+    overdue_only: bool = False,
+    sort_by: str = "installment_number",
+    sort_order: str = "asc"
+):
+    """SELECT de cuotas filtradas y ordenadas (entidades ORM o columnas sueltas)"""
+    filters = InstallmentFilters(
+        amortization_id=amortization_id,
+        status=status_filter,
+        overdue_only=overdue_only
+    )
+    sort_column = getattr(
+        AmortizationInstallment,
+        sort_by if sort_by in INSTALLMENT_SORT_FIELDS else "installment_number"
+    )
+    return apply_installment_filters(
+        select(*columns), filters, AmortizationInstallment
+    ).order_by(
+        sort_column.desc() if sort_order == "desc" else sort_column.asc(),
+        AmortizationInstallment.installment_number
+    )
+
+def _trend(current: Union[int, Decimal], previous: Union[int, Decimal]) -> float:
+    """Variación porcentual respecto al período anterior (0 sin datos previos)"""
+    if not previous:
+        return 0.0
+    return round(float((current - previous) / previous * 100), 2)
+
+def _list_amortizations_query(
+    db: Session,
+    filters: AmortizationFilters,
+    fields: Optional[Sequence[str]] = None,
+    sort_by: Optional[str] = None
+):
+    """
+    Query base del listado (entidad cargada en la misma consulta)
+
+    Con `fields` solo se cargan esas columnas (más id y la de ordenación,
+    que necesita el cursor) y la entidad solo si se pide alguno de sus campos.
+    """
+    if fields is None:
+        query = db.query(Amortization).options(joinedload(Amortization.entity))
+        return apply_amortization_filters(query, filters, Amortization)
+
+    table_columns = Amortization.__table__.columns
+    loaded = {name for name in fields if name in table_columns} | {'id'}
+    if sort_by and sort_by in table_columns:
+        loaded.add(sort_by)
+    options = [load_only(*(getattr(Amortization, name) for name in sorted(loaded)))]
+    entity_columns = [ENTITY_FIELDS[name] for name in fields if name in ENTITY_FIELDS]
+    if entity_columns:
+        options.append(joinedload(Amortization.entity).load_only(*entity_columns))
+    return apply_amortization_filters(db.query(Amortization).options(*options), filters, Amortization)
+
+class PaidScheduleError(ValueError):
+    """Amortizaciones con pagos registrados: su tabla de cuotas no se regenera"""
+
+    def __init__(self, amortization_ids: Sequence[str]):
+        self.amortization_ids = sorted(amortization_ids)
+        super().__init__(
+            f"{len(self.amortization_ids)} amortizaciones tienen pagos registrados; no se pueden recalcular"
+        )
+
+class AmortizationService:
+    """Servicio de gestión de amortizaciones y cuotas"""
+
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+
+    def calculate_installments(
+        self,
+        total_amount: Union[int, float, Decimal],
+        installments: int,
+        interest_rate: Union[int, float, Decimal] = 0,
+        start_date: Union[date, str] = None,
+        amortization_method: str = 'french',
+        frequency: str = 'monthly'
+    ) -> List[Dict[str, Any]]:
+        """Calcular una tabla de cuotas sin persistirla (formato CalculatedInstallment)"""
+        schedule = calculate_schedule({
+            'total_amount': Decimal(str(total_amount)),
+            'total_installments': installments,
+            'interest_rate': Decimal(str(interest_rate)),
+            'start_date': start_date or date.today(),
+            'amortization_method': amortization_method,
+            'frequency': frequency
+        })
+
+        return [
+            {
+                'number': row['installment_number'],
+                'due_date': row['due_date'],
+                'principal': row['principal_amount'],
+                'interest': row['interest_amount'],
+                'total': row['total_amount'],
+                'balance': row['remaining_balance']
+            }
+            for row in schedule
+        ]
+
+    def calculate_linear_installments(self, **kwargs) -> List[Dict[str, Any]]:
+        """Calcular tabla de cuotas con amortización lineal"""
+        return self.calculate_installments(amortization_method='linear', **kwargs)
+
+    async def list_amortizations(
+        self,
+        filters: AmortizationFilters,
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        cursor: Optional[str] = None,
+        use_cursor: bool = False,
+        include_total: bool = False,
+        count_mode: str = "exact",
+        fields: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Listar amortizaciones con filtros y paginación
+
+        Con cursor/use_cursor se usa paginación keyset sobre (sort_by, id):
+        no hay OFFSET ni COUNT (salvo include_total) y se devuelve next_cursor.
+        count_mode elige cómo se obtiene el total (ver utils.counting).
+        fields limita los campos de cada item (y las columnas cargadas).
+        """
+        query = _list_amortizations_query(self.db, filters, fields, sort_by)
+        generation = count_cache.generation_sync(filters.company_id) if count_mode == "cached" else None
+
+        result = paginate(
+            query,
+            page=page,
+            page_size=page_size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            use_cursor=use_cursor,
+            include_total=include_total,
+            count_mode=count_mode,
+            count_key=count_cache_key(filters, generation)
+        )
+        result["items"] = [_list_item(amortization, fields) for amortization in result["items"]]
+        return result
+
+    def _apply_schedule_totals(self, amortization: Amortization, batch: ScheduleBatch, index: int) -> None:
+        """Actualizar campos calculados de la amortización a partir de su tabla"""
+        start, end = batch.bounds(index)
+        totals = batch.totals(index)
+
+        amortization.installment_amount = Decimal(int(batch.total[start])) / 100
+        amortization.total_interest = totals['total_interest']
+        amortization.next_due_date = batch.due_date[start].item()
+        amortization.end_date = batch.due_date[end - 1].item()
+
+    async def create_amortization(
+        self,
+        amortization_data: AmortizationCreate,
+        auto_generate_installments: bool = True
+    ) -> Amortization:
+        """Crear amortización y, opcionalmente, persistir su tabla de cuotas en bloque"""
+        data = amortization_data.model_dump()
+        data['amortization_method'] = amortization_data.amortization_method.value
+        data['frequency'] = amortization_data.frequency.value
+
+        amortization = Amortization(
+            **data,
+            pending_amount=amortization_data.total_amount,
+            paid_amount=0,
+            paid_installments=0
+        )
+
+        try:
+            batch = calculate_schedules([amortization])
+            self._apply_schedule_totals(amortization, batch, 0)
+
+            self.db.add(amortization)
+            self.db.flush()
+
+            if auto_generate_installments:
+                InstallmentBulkWriter(self.db).write([amortization.id], batch)
+
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        count_cache.invalidate(amortization.company_id)
+        logger.info(f"Amortization created: {amortization.reference} ({amortization.total_installments} installments)")
+        return amortization
+
+    async def generate_installments(
+        self,
+        amortization_id: str,
+        overwrite_existing: bool = False
+    ) -> Dict[str, Any]:
+        """Regenerar la tabla de cuotas de una amortización"""
+        amortization = self.db.query(Amortization).filter(Amortization.id == amortization_id).first()
+        if not amortization:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Amortización no encontrada"
+            )
+
+        existing = self.db.query(AmortizationInstallment.id).filter(
+            AmortizationInstallment.amortization_id == amortization_id
+        ).count()
+
+        if existing and not overwrite_existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La amortización ya tiene cuotas; use overwrite_existing para regenerarlas"
+            )
+
+        try:
+            installment_ids = self.regenerate_schedules([amortization])
+        except PaidScheduleError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        return {
+            "message": "Cuotas generadas exitosamente",
+            "amortization_id": amortization_id,
+            "installments_created": len(installment_ids)
+        }
+
+    def paid_amortization_ids(self, amortization_ids: Sequence[str]) -> Set[str]:
+        """IDs de las amortizaciones con pagos registrados (en sus totales o en alguna cuota)"""
+        if not amortization_ids:
+            return set()
+        paid = set(self.db.execute(
+            select(Amortization.id).where(
+                Amortization.id.in_(amortization_ids),
+                or_(Amortization.paid_amount > 0, Amortization.paid_installments > 0)
+            )
+        ).scalars())
+        paid.update(self.db.execute(
+            select(AmortizationInstallment.amortization_id).where(
+                AmortizationInstallment.amortization_id.in_(amortization_ids),
+                or_(
+                    AmortizationInstallment.paid_amount > 0,
+                    AmortizationInstallment.payment_date.isnot(None),
+                    AmortizationInstallment.sap_payment_entry.isnot(None)
+                )
+            ).distinct()
+        ).scalars())
+        return paid
+
+    def regenerate_schedules(self, amortizations: Sequence[Amortization]) -> List[str]:
+        """
+        Recalcular y reemplazar las tablas de varias amortizaciones en una sola pasada
+
+        Reemplazar la tabla borra las cuotas existentes, así que no se
+        regenera ninguna si alguna de las amortizaciones tiene pagos.
+
+        Args:
+            amortizations: Amortizaciones a regenerar
+
+        Returns:
+            IDs de las cuotas creadas
+
+        Raises:
+            PaidScheduleError: Alguna amortización tiene pagos registrados
+        """
+        paid = self.paid_amortization_ids([amortization.id for amortization in amortizations])
+        if paid:
+            raise PaidScheduleError(paid)
+
+        batch = calculate_schedules(amortizations)
+
+        try:
+            for index, amortization in enumerate(amortizations):
+                self._apply_schedule_totals(amortization, batch, index)
+
+            installment_ids = InstallmentBulkWriter(self.db).replace(
+                [amortization.id for amortization in amortizations],
+                batch
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return installment_ids
+
+    async def update_amortization(
+        self,
+        amortization_id: str,
+        amortization_data: AmortizationUpdate,
+        recalculate_installments: bool = False
+    ) -> Optional[Amortization]:
+        """
+        Actualizar los campos indicados de una amortización activa
+
+        Con recalculate_installments se regenera además su tabla de cuotas
+        (regenerate_schedules).
+
+        Returns:
+            La amortización actualizada, o None si no existe
+
+        Raises:
+            HTTPException: Recálculo de una amortización con pagos registrados (400)
+        """
+        amortization = self.db.query(Amortization).filter(
+            Amortization.id == amortization_id,
+            Amortization.is_active == True
+        ).first()
+        if not amortization:
+            return None
+
+        data = amortization_data.model_dump(exclude_unset=True)
+        if data.get('status') is not None:
+            data['status'] = amortization_data.status.value
+
+        try:
+            for field, value in data.items():
+                setattr(amortization, field, value)
+
+            if recalculate_installments:
+                self.regenerate_schedules([amortization])
+            else:
+                self.db.commit()
+        except PaidScheduleError as e:
+            self.db.rollback()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        except Exception:
+            self.db.rollback()
+            raise
+
+        count_cache.invalidate(amortization.company_id)
+        logger.info(f"Amortization updated: {amortization.reference} ({', '.join(data) or 'no changes'})")
+        return amortization
+
+    async def delete_amortization(self, amortization_id: str, force_delete: bool = False) -> bool:
+        """
+        Eliminar una amortización
+
+        Por defecto se desactiva (is_active = False) y conserva sus cuotas;
+        con force_delete se borra junto con sus cuotas.
+
+        Returns:
+            False si la amortización no existe (o ya estaba desactivada sin force_delete)
+        """
+        query = self.db.query(Amortization).filter(Amortization.id == amortization_id)
+        if not force_delete:
+            query = query.filter(Amortization.is_active == True)
+        amortization = query.first()
+        if not amortization:
+            return False
+
+        try:
+            if force_delete:
+                self.db.delete(amortization)
+            else:
+                amortization.is_active = False
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        count_cache.invalidate(amortization.company_id)
+        logger.info(f"Amortization {'deleted' if force_delete else 'deactivated'}: {amortization.reference}")
+        return True
+
+    async def record_payment(
+        self,
+        amortization_id: str,
+        installment_id: str,
+        payment_amount: Decimal,
+        payment_date: date,
+        notes: Optional[str] = None,
+        create_sap_entry: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Registrar el pago (total o parcial) de una cuota
+
+        Actualiza la cuota y los totales de la amortización (pagado, pendiente,
+        cuotas pagadas, próximo vencimiento y estado). Con create_sap_entry se
+        envían después a SAP los documentos pendientes de la amortización
+        (SAPDocumentSync); un fallo de SAP no deshace el pago y se informa en
+        el resultado.
+
+        Raises:
+            HTTPException: Cuota no encontrada (404) o pago no válido (400)
+        """
+        installment = self.db.query(AmortizationInstallment).filter(
+            AmortizationInstallment.id == installment_id,
+            AmortizationInstallment.amortization_id == amortization_id
+        ).first()
+        if not installment or not installment.amortization.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cuota no encontrada"
+            )
+
+        amortization = installment.amortization
+        if amortization.status in ('cancelled', 'completed'):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No se pueden registrar pagos en una amortización con estado {amortization.status}"
+            )
+        if installment.status == 'paid':
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La cuota ya está pagada"
+            )
+
+        payment_amount = Decimal(str(payment_amount)).quantize(Decimal('0.01'))
+        remaining = installment.total_amount - (installment.paid_amount or 0)
+        if payment_amount <= 0 or payment_amount > remaining:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El importe del pago debe ser mayor que 0 y no superar el pendiente de la cuota ({remaining})"
+            )
+
+        try:
+            installment.paid_amount = (installment.paid_amount or 0) + payment_amount
+            installment.payment_date = payment_date
+            installment.status = 'paid' if installment.paid_amount >= installment.total_amount else 'partial'
+            if notes:
+                installment.notes = f"{installment.notes}\n{notes}" if installment.notes else notes
+
+            amortization.paid_amount = (amortization.paid_amount or 0) + payment_amount
+            amortization.pending_amount = max(amortization.pending_amount - payment_amount, Decimal('0'))
+            if installment.status == 'paid':
+                amortization.paid_installments = (amortization.paid_installments or 0) + 1
+                self.db.flush()
+                amortization.next_due_date = self.db.query(func.min(AmortizationInstallment.due_date)).filter(
+                    AmortizationInstallment.amortization_id == amortization_id,
+                    AmortizationInstallment.status != 'paid'
+                ).scalar()
+            # Los estados manuales (suspendida) se conservan
+            if amortization.status in ('active', 'overdue'):
+                amortization.update_status()
+
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        count_cache.invalidate(amortization.company_id)
+        logger.info(
+            f"Payment recorded: {amortization.reference} installment {installment.installment_number} "
+            f"({payment_amount})"
+        )
+
+        result = {
+            "message": "Pago registrado exitosamente",
+            "amortization_id": amortization_id,
+            "installment_id": installment_id,
+            "installment_status": installment.status,
+            "installment_paid_amount": installment.paid_amount,
+            "installment_remaining_amount": installment.total_amount - installment.paid_amount,
+            "amortization_status": amortization.status,
+            "paid_amount": amortization.paid_amount,
+            "pending_amount": amortization.pending_amount,
+            "paid_installments": amortization.paid_installments,
+            "next_due_date": amortization.next_due_date,
+            "sap": None
+        }
+
+        if create_sap_entry:
+            try:
+                results, errors = await SAPDocumentSync(self.db, amortization.company).sync([amortization_id])
+                result["sap"] = (results or errors)[0]
+            except Exception as e:
+                logger.error(f"SAP sync after payment failed for {amortization_id}: {e}")
+                result["sap"] = {"error": str(e)}
+
+        return result
+
+    async def get_amortization_summary(
+        self,
+        company_id: str,
+        entity_type: Optional[str] = None,
+        status: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Resumen de amortizaciones desde la tabla de agregados mensuales
+
+        El coste depende del número de grupos (tipo, estado, mes), no del de
+        amortizaciones. date_from/date_to se aplican por mes de start_date.
+        Las tendencias comparan el mes de date_to (o el actual) con el anterior.
+        """
+        summary = AmortizationMonthlySummary
+
+        def grouped(*columns, months=None):
+            query = self.db.query(
+                *columns,
+                func.sum(summary.amortization_count),
+                func.sum(summary.total_amount),
+                func.sum(summary.paid_amount),
+                func.sum(summary.pending_amount)
+            ).filter(summary.company_id == company_id)
+            if entity_type:
+                query = query.filter(summary.entity_type == entity_type)
+            if status:
+                query = query.filter(summary.status == status)
+            if months is not None:
+                query = query.filter(summary.month.in_(months))
+            else:
+                if date_from:
+                    query = query.filter(summary.month >= month_start(date_from))
+                if date_to:
+                    query = query.filter(summary.month <= month_start(date_to))
+            return query.group_by(*columns).all()
+
+        result = {
+            'total_amortizations': 0,
+            'total_amount': Decimal(0),
+            'paid_amount': Decimal(0),
+            'pending_amount': Decimal(0),
+            'overdue_amount': Decimal(0),
+            'overdue_count': 0,
+            'active_count': 0,
+            'completed_count': 0
+        }
+        for group_status, count, total, paid, pending in grouped(summary.status):
+            count = int(count or 0)
+            result['total_amortizations'] += count
+            result['total_amount'] += Decimal(str(total or 0))
+            result['paid_amount'] += Decimal(str(paid or 0))
+            result['pending_amount'] += Decimal(str(pending or 0))
+            if group_status == 'overdue':
+                result['overdue_count'] = count
+                result['overdue_amount'] = Decimal(str(pending or 0))
+            elif group_status in ('active', 'completed'):
+                result[f'{group_status}_count'] = count
+
+        current = month_start(date_to or date.today())
+        previous = month_start(current - timedelta(days=1))
+        months = {month_start(month): (int(count or 0), Decimal(str(total or 0)))
+                  for month, count, total, _, _ in grouped(summary.month, months=[current, previous])}
+        current_count, current_amount = months.get(current, (0, Decimal(0)))
+        previous_count, previous_amount = months.get(previous, (0, Decimal(0)))
+        result['amortizations_trend'] = _trend(current_count, previous_count)
+        result['amount_trend'] = _trend(current_amount, previous_amount)
+
+        return result
+
+    async def get_aging_report(
+        self,
+        company_id: str,
+        entity_type: Optional[str] = None,
+        aging_periods: Sequence[int] = DEFAULT_AGING_PERIODS,
+        as_of: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """Reporte de aging por entidad (tramos calculados en SQL, ver aging_engine)"""
+        return aging_report(
+            self.db,
+            company_id=company_id,
+            aging_periods=aging_periods,
+            entity_type=entity_type,
+            as_of=as_of
+        )
+
+class AsyncAmortizationService:
+    """
+    Consultas de lectura de amortizaciones sobre AsyncSession (asyncpg/aiosqlite)
+
+    Las esperas de red se hacen con await, por lo que los handlers no
+    bloquean el event loop mientras la base de datos responde.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def list_amortizations(
+        self,
+        filters: AmortizationFilters,
+        page: int = 1,
+        page_size: int = 20,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        cursor: Optional[str] = None,
+        use_cursor: bool = False,
+        include_total: bool = False,
+        count_mode: str = "exact",
+        fields: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Listar amortizaciones con filtros y paginación
+
+        Reutiliza paginate (offset/keyset y estrategias de conteo) a través
+        de run_sync: las consultas se ejecutan sobre la conexión async.
+        """
+        generation = await count_cache.generation(filters.company_id) if count_mode == "cached" else None
+
+        def run(session: Session) -> Dict[str, Any]:
+            result = paginate(
+                _list_amortizations_query(session, filters, fields, sort_by),
+                page=page,
+                page_size=page_size,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                cursor=cursor,
+                use_cursor=use_cursor,
+                include_total=include_total,
+                count_mode=count_mode,
+                count_key=count_cache_key(filters, generation)
+            )
+            result["items"] = [_list_item(amortization, fields) for amortization in result["items"]]
+            return result
+
+        return await self.db.run_sync(run)
+
+    async def get_company_id(self, amortization_id: str) -> Optional[str]:
+        """Compañía de una amortización (parte de las claves de caché de sus respuestas)"""
+        result = await self.db.execute(select(Amortization.company_id).where(Amortization.id == amortization_id))
+        return result.scalar()
+
+    async def get_amortization_detail(
+        self,
+        amortization_id: str,
+        include_installments: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Obtener detalle de amortización con su entidad y, opcionalmente, sus cuotas"""
+        options = [selectinload(Amortization.entity)]
+        if include_installments:
+            options.append(selectinload(Amortization.installments))
+
+        result = await self.db.execute(
+            select(Amortization).options(*options).where(
+                Amortization.id == amortization_id, Amortization.is_active == True
+            )
+        )
+        amortization = result.scalars().first()
+        if not amortization:
+            return None
+
+        installments = list(amortization.installments) if include_installments else None
+        return _detail(amortization, installments)
+
+    async def get_installments(
+        self,
+        amortization_id: str,
+        status_filter: Optional[str] = None,
+        overdue_only: bool = False,
+        sort_by: str = "installment_number",
+        sort_order: str = "asc"
+    ) -> List[AmortizationInstallment]:
+        """Obtener cuotas de una amortización (por número, o por un campo de INSTALLMENT_SORT_FIELDS)"""
+        statement = _installments_statement(
+            [AmortizationInstallment], amortization_id, status_filter, overdue_only, sort_by, sort_order
+        )
+
+        result = await self.db.execute(statement)
+        return list(result.scalars().all())
+
+    async def get_installments_json(
+        self,
+        amortization_id: str,
+        status_filter: Optional[str] = None,
+        overdue_only: bool = False,
+        sort_by: str = "installment_number",
+        sort_order: str = "asc"
+    ) -> bytes:
+        """Cuotas de una amortización codificadas como List[InstallmentResponse] (sin ORM ni Pydantic)"""
+        statement = _installments_statement(
+            INSTALLMENT_ENCODER.columns, amortization_id, status_filter, overdue_only, sort_by, sort_order
+        )
+
+        result = await self.db.execute(statement)
+        return INSTALLMENT_ENCODER.encode(result.all())
+
+    async def get_amortization_detail_json(
+        self,
+        amortization_id: str,
+        include_installments: bool = True,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[bytes]:
+        """
+        Detalle de amortización codificado como AmortizationDetailResponse (sin ORM ni Pydantic)
+
+        Con `fields` solo se seleccionan esas columnas (la entidad solo se une
+        si se pide alguno de sus campos) y la clave installments solo aparece
+        si se incluyen las cuotas.
+        """
+        encoder = AMORTIZATION_ENCODER.project(fields)
+        statement = select(*encoder.columns).select_from(Amortization)
+        if any(name in ENTITY_FIELDS for name in encoder.fields):
+            statement = statement.outerjoin(Entity, Entity.id == Amortization.entity_id)
+
+        row = (await self.db.execute(
+            statement.where(Amortization.id == amortization_id, Amortization.is_active == True)
+        )).first()
+        if row is None:
+            return None
+
+        detail = encoder.to_dict(row)
+        if include_installments:
+            installments = await self.db.execute(
+                select(*INSTALLMENT_ENCODER.columns)
+                .where(AmortizationInstallment.amortization_id == amortization_id)
+                .order_by(AmortizationInstallment.installment_number)
+            )
+            detail['installments'] = [INSTALLMENT_ENCODER.to_dict(installment) for installment in installments]
+        elif fields is None:
+            detail['installments'] = None
+        return dumps(detail)
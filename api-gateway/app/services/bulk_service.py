@@ -0,0 +1,270 @@
+# api-gateway/app/services/bulk_service.py
+"""
+Operaciones en lote sobre amortizaciones (BulkOperationRequest).
+
+Los cambios de estado (suspend, cancel, reactivate, delete) se ejecutan
+como un UPDATE por bloque de BULK_CHUNK_SIZE ids (``id = ANY(:ids)`` con
+un único parámetro array en PostgreSQL, IN en el resto), condicionado al
+estado de origen permitido. Los ids afectados se obtienen con RETURNING
+cuando la base de datos lo soporta, así que el resultado por id refleja
+lo que realmente cambió aunque otra petición haya modificado la fila
+entre la lectura y el UPDATE.
+
+recalculate regenera las tablas de cuotas por bloques con el motor
+vectorizado (AmortizationService.regenerate_schedules).
+
+sync_to_sap crea los documentos SAP pendientes de las cuotas en $batch
+(SAPDocumentSync), una compañía cada vez.
+
+Los UPDATE masivos no pasan por el flush: cada bloque bloquea y lee
+antes sus filas (estado de origen, importes, start_date) y aplica al
+resumen mensual solo los deltas de las que cambian; al terminar se
+invalida la caché de totales de las compañías afectadas.
+"""
+from typing import Any, Dict, Iterator, List, Sequence, Set, Tuple
+import logging
+
+from sqlalchemy import String, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from ..models.amortization import Amortization
+from ..models.company import Company
+from ..models.summary import SUMMARY_COLUMNS, apply_summary_deltas, status_change_deltas
+from ..schemas.common import BulkOperationRequest
+from ..utils.counting import count_cache
+from ..utils.filters import AmortizationFilters, apply_amortization_filters
+from .amortization_service import AmortizationService
+from .sap_service import run_with_pools
+from .sap_sync import SAPDocumentSync
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = 5000
+
+# operación -> (estados de origen permitidos, valores a asignar)
+STATUS_OPERATIONS: Dict[str, Any] = {
+    'suspend': (('active', 'overdue'), {'status': 'suspended'}),
+    'cancel': (('active', 'overdue', 'suspended'), {'status': 'cancelled'}),
+    'reactivate': (('suspended', 'cancelled'), {'status': 'active'}),
+    'delete': (('active', 'completed', 'overdue', 'suspended', 'cancelled'), {'is_active': False}),
+}
+
+# Operaciones largas: la API las ejecuta como trabajo en segundo plano
+BACKGROUND_OPERATIONS = ('recalculate', 'sync_to_sap')
+
+BULK_OPERATIONS = tuple(STATUS_OPERATIONS) + BACKGROUND_OPERATIONS
+
+class BulkOperationError(ValueError):
+    """Solicitud de operación en lote no válida"""
+
+def _chunks(values: Sequence[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(values), size):
+        yield list(values[start:start + size])
+
+def id_condition(column, ids: List[str], dialect_name: str):
+    """Condición de pertenencia: un único parámetro array en PostgreSQL"""
+    if dialect_name == 'postgresql':
+        return column == any_(bindparam('ids', ids, type_=ARRAY(String)))
+    return column.in_(ids)
+
+class BulkOperationService:
+    """Servicio de operaciones en lote sobre amortizaciones"""
+
+    def __init__(self, db: Session, chunk_size: int = BULK_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    @property
+    def dialect_name(self) -> str:
+        return self.db.get_bind().dialect.name
+
+    def run(self, request: BulkOperationRequest) -> Dict[str, Any]:
+        """
+        Ejecutar la operación sobre los ids o filtros de la solicitud
+
+        Returns:
+            Campos de BulkOperationResponse (results y errors por id)
+
+        Raises:
+            BulkOperationError: Filtros no válidos
+        """
+        targets, missing = self._resolve_targets(request)
+        result = {
+            'total_requested': len(targets) + len(missing),
+            'successful': 0,
+            'failed': 0,
+            'errors': [{'id': amortization_id, 'error': 'Amortización no encontrada'}
+                       for amortization_id in missing],
+            'results': []
+        }
+
+        if request.operation in STATUS_OPERATIONS:
+            self._run_status_operation(request.operation, targets, result)
+        elif request.operation == 'recalculate':
+            self._run_recalculate(targets, result)
+        else:
+            self._run_sync_to_sap(targets, result)
+
+        result['successful'] = len(result['results'])
+        result['failed'] = len(result['errors'])
+        logger.info(
+            f"Bulk {request.operation}: {result['successful']} ok, {result['failed']} failed "
+            f"of {result['total_requested']}"
+        )
+        return result
+
+    def _resolve_targets(self, request: BulkOperationRequest) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Amortizaciones activas a procesar (id -> company_id, status) e ids no encontrados"""
+        columns = (Amortization.id, Amortization.company_id, Amortization.status)
+        targets: Dict[str, Dict[str, Any]] = {}
+
+        if request.filters is not None:
+            try:
+                filters = AmortizationFilters(**request.filters)
+            except Exception as e:
+                raise BulkOperationError(f"Filtros no válidos: {e}")
+            if not filters.company_id:
+                raise BulkOperationError("Los filtros deben incluir company_id")
+            query = apply_amortization_filters(self.db.query(*columns), filters, Amortization)
+            rows = query.filter(Amortization.is_active == True).order_by(Amortization.id)
+            for row in rows.yield_per(self.chunk_size):
+                targets[row.id] = {'company_id': row.company_id, 'status': row.status}
+            return targets, []
+
+        ids = list(dict.fromkeys(request.ids))
+        for chunk in _chunks(ids, self.chunk_size):
+            rows = self.db.execute(
+                select(*columns).where(
+                    id_condition(Amortization.id, chunk, self.dialect_name),
+                    Amortization.is_active == True
+                )
+            )
+            for row in rows:
+                targets[row.id] = {'company_id': row.company_id, 'status': row.status}
+        return targets, [amortization_id for amortization_id in ids if amortization_id not in targets]
+
+    def _run_status_operation(self, operation: str, targets: Dict[str, Dict[str, Any]], result: Dict[str, Any]) -> None:
+        """Un UPDATE por bloque, condicionado al estado de origen"""
+        allowed, values = STATUS_OPERATIONS[operation]
+        returning = self.db.get_bind().dialect.update_returning
+        eligible = [amortization_id for amortization_id, target in targets.items() if target['status'] in allowed]
+
+        updated: Set[str] = set()
+        companies: Set[str] = set()
+        try:
+            for chunk in _chunks(eligible, self.chunk_size):
+                condition = (
+                    id_condition(Amortization.id, chunk, self.dialect_name),
+                    Amortization.is_active == True,
+                    Amortization.status.in_(allowed)
+                )
+                # Filas bloqueadas con sus valores anteriores para los deltas del resumen
+                rows = {
+                    row.id: row for row in self.db.execute(
+                        select(Amortization.id, *SUMMARY_COLUMNS).where(*condition).with_for_update()
+                    )
+                }
+                statement = (
+                    update(Amortization)
+                    .where(*condition)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                if returning:
+                    changed = set(self.db.execute(statement.returning(Amortization.id)).scalars())
+                else:
+                    self.db.execute(statement)
+                    changed = set(rows)
+                updated.update(changed)
+
+                deltas = status_change_deltas(
+                    self.db.connection(),
+                    [rows[amortization_id] for amortization_id in changed if amortization_id in rows],
+                    values.get('status')
+                )
+                apply_summary_deltas(self.db.connection(), deltas)
+
+            companies = {targets[amortization_id]['company_id'] for amortization_id in updated}
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        for company_id in companies:
+            count_cache.invalidate(company_id)
+
+        for amortization_id, target in targets.items():
+            if amortization_id in updated:
+                result['results'].append({
+                    'id': amortization_id,
+                    'company_id': target['company_id'],
+                    'status': values.get('status', target['status']),
+                    'is_active': values.get('is_active', True)
+                })
+            else:
+                result['errors'].append({
+                    'id': amortization_id,
+                    'error': f"La operación {operation} no se permite en estado {target['status']}"
+                })
+
+    def _run_recalculate(self, targets: Dict[str, Dict[str, Any]], result: Dict[str, Any]) -> None:
+        """Regenerar las tablas de cuotas por bloques (solo sin pagos registrados)"""
+        service = AmortizationService(self.db)
+        companies = set()
+
+        for chunk in _chunks(list(targets), self.chunk_size):
+            amortizations = self.db.query(Amortization).filter(
+                id_condition(Amortization.id, chunk, self.dialect_name)
+            ).all()
+
+            paid = service.paid_amortization_ids([amortization.id for amortization in amortizations])
+            pending = []
+            for amortization in amortizations:
+                if amortization.id in paid:
+                    result['errors'].append({
+                        'id': amortization.id,
+                        'error': 'La amortización tiene pagos registrados; no se puede recalcular'
+                    })
+                else:
+                    pending.append(amortization)
+            if not pending:
+                continue
+
+            try:
+                service.regenerate_schedules(pending)
+            except Exception as e:
+                logger.error(f"Bulk recalculate chunk failed: {e}")
+                result['errors'].extend({'id': amortization.id, 'error': str(e)} for amortization in pending)
+                continue
+
+            result['results'].extend(
+                {'id': amortization.id, 'company_id': amortization.company_id,
+                 'installments': amortization.total_installments}
+                for amortization in pending
+            )
+            companies.update(amortization.company_id for amortization in pending)
+
+        for company_id in companies:
+            count_cache.invalidate(company_id)
+
+    def _run_sync_to_sap(self, targets: Dict[str, Dict[str, Any]], result: Dict[str, Any]) -> None:
+        """Crear en SAP los documentos pendientes de las cuotas, por compañía ($batch)"""
+        by_company: Dict[str, List[str]] = {}
+        for amortization_id, target in targets.items():
+            by_company.setdefault(target['company_id'], []).append(amortization_id)
+
+        for company_id, amortization_ids in by_company.items():
+            try:
+                company = self.db.get(Company, company_id)
+                results, errors = run_with_pools(SAPDocumentSync(self.db, company).sync(amortization_ids))
+            except Exception as e:
+                self.db.rollback()
+                logger.error(f"Bulk sync_to_sap failed for {company_id}: {e}")
+                result['errors'].extend(
+                    {'id': amortization_id, 'error': f"Error al sincronizar con SAP: {e}"}
+                    for amortization_id in amortization_ids
+                )
+                continue
+            result['results'].extend(results)
+            result['errors'].extend(errors)
@@ -0,0 +1,234 @@
+# api-gateway/app/services/export_service.py
+"""
+Exportación en streaming del libro de cuotas (CSV / Excel).
+
+Las filas se leen con yield_per (cursor de servidor en PostgreSQL) y se
+escriben a medida que llegan:
+
+- CSV: se emite por bloques de texto; importes y fechas con
+  utils.formatters.
+- Excel: xlsxwriter en modo constant_memory sobre un fichero temporal
+  (cada fila se vuelca a disco al escribir la siguiente); al cerrar el
+  libro se envía el fichero por bloques. Importes y fechas se escriben
+  como celdas numéricas/fecha con formato, para que sigan siendo
+  operables en la hoja.
+
+En ambos casos la memoria no crece con el número de filas.
+"""
+from typing import Any, Callable, Iterator, List, Tuple
+from datetime import date, datetime
+import csv
+import io
+import os
+import tempfile
+
+from sqlalchemy.orm import Session
+
+from ..models.amortization import Amortization, AmortizationInstallment
+from ..models.company import Company
+from ..models.entity import Entity
+from ..schemas.common import ExportRequest
+from ..utils.filters import AmortizationFilters, apply_amortization_filters
+from ..utils.formatters import currency_format, format_currency, format_date
+
+EXPORT_CHUNK_SIZE = 5000
+FILE_CHUNK_SIZE = 64 * 1024
+XLSX_MAX_ROWS = 1048576  # Filas por hoja de Excel
+
+# date_format de ExportRequest -> (format_type de format_date, formato de celda Excel)
+DATE_FORMATS = {
+    "YYYY-MM-DD": ("iso", "yyyy-mm-dd"),
+    "DD/MM/YYYY": ("short", "dd/mm/yyyy"),
+    "iso": ("iso", "yyyy-mm-dd"),
+    "short": ("short", "dd/mm/yyyy"),
+    "medium": ("medium", "dd mmm yyyy"),
+    "long": ("long", "d \"de\" mmmm \"de\" yyyy"),
+}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+FILE_EXTENSIONS = {"csv": "csv", "excel": "xlsx"}
+
+# (cabecera, columna, tipo)
+EXPORT_COLUMNS: Tuple[Tuple[str, Any, str], ...] = (
+    ("Referencia", Amortization.reference, "text"),
+    ("Código SAP", Entity.sap_card_code, "text"),
+    ("Entidad", Entity.name, "text"),
+    ("Tipo entidad", Entity.type, "text"),
+    ("Estado amortización", Amortization.status, "text"),
+    ("Cuota", AmortizationInstallment.installment_number, "number"),
+    ("Vencimiento", AmortizationInstallment.due_date, "date"),
+    ("Fecha pago", AmortizationInstallment.payment_date, "date"),
+    ("Capital", AmortizationInstallment.principal_amount, "money"),
+    ("Interés", AmortizationInstallment.interest_amount, "money"),
+    ("Total cuota", AmortizationInstallment.total_amount, "money"),
+    ("Pagado", AmortizationInstallment.paid_amount, "money"),
+    ("Saldo pendiente", AmortizationInstallment.remaining_balance, "money"),
+    ("Estado cuota", AmortizationInstallment.status, "text"),
+)
+
+class ExportError(ValueError):
+    """Solicitud de exportación no válida"""
+
+def export_filters(request: ExportRequest) -> AmortizationFilters:
+    """Filtros de la solicitud (company_id obligatorio)"""
+    try:
+        filters = AmortizationFilters(**(request.filters or {}))
+    except Exception as e:
+        raise ExportError(f"Filtros no válidos: {e}")
+    if not filters.company_id:
+        raise ExportError("Los filtros deben incluir company_id")
+    if request.format not in MEDIA_TYPES:
+        raise ExportError(f"Formato no soportado para exportación: {request.format}")
+    if request.date_format not in DATE_FORMATS:
+        raise ExportError(f"date_format debe ser uno de: {list(DATE_FORMATS)}")
+    return filters
+
+def iter_export_rows(db: Session, filters: AmortizationFilters, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Tuple]:
+    """
+    Cuotas de las amortizaciones filtradas, leídas por bloques
+
+    Los filtros se aplican sobre una subconsulta de ids
+    (apply_amortization_filters), de modo que los joins que añaden no
+    interfieren con el de la exportación.
+    """
+    amortization_ids = apply_amortization_filters(db.query(Amortization.id), filters, Amortization).subquery()
+    query = (
+        db.query(*(column for _, column, _ in EXPORT_COLUMNS))
+        .select_from(AmortizationInstallment)
+        .join(Amortization, Amortization.id == AmortizationInstallment.amortization_id)
+        .join(Entity, Entity.id == Amortization.entity_id)
+        .filter(Amortization.id.in_(amortization_ids.select()))
+        .order_by(Amortization.reference, Amortization.id, AmortizationInstallment.installment_number)
+        .yield_per(chunk_size)
+    )
+    return iter(query)
+
+def _text_formatters(currency: str, date_type: str) -> List[Callable[[Any], Any]]:
+    def money(value):
+        return "" if value is None else format_currency(value, currency)
+
+    def day(value):
+        return "" if value is None else format_date(value, date_type)
+
+    def plain(value):
+        return "" if value is None else value
+
+    return [{"money": money, "date": day}.get(kind, plain) for _, _, kind in EXPORT_COLUMNS]
+
+def iter_csv_export(
+    rows: Iterator[Tuple],
+    currency: str = "EUR",
+    date_format: str = "YYYY-MM-DD",
+    include_headers: bool = True,
+    batch_size: int = 1000
+) -> Iterator[str]:
+    """Serializar filas a CSV por bloques de texto"""
+    formatters = _text_formatters(currency, DATE_FORMATS[date_format][0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if include_headers:
+        writer.writerow([header for header, _, _ in EXPORT_COLUMNS])
+
+    pending = 0
+    for row in rows:
+        writer.writerow([formatter(value) for formatter, value in zip(formatters, row)])
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+def excel_money_format(currency: str) -> str:
+    """Formato de celda Excel equivalente a format_currency"""
+    config = currency_format(currency)
+    number = "#,##0" + ("." + "0" * config["decimals"] if config["decimals"] else "")
+    symbol = f'"{config["symbol"]}"'
+    return f"{symbol} {number}" if config["position"] == "before" else f"{number} {symbol}"
+
+def iter_xlsx_export(
+    rows: Iterator[Tuple],
+    currency: str = "EUR",
+    date_format: str = "YYYY-MM-DD",
+    include_headers: bool = True,
+    max_rows: int = XLSX_MAX_ROWS
+) -> Iterator[bytes]:
+    """Escribir un libro Excel en modo constant_memory y emitirlo por bloques"""
+    import xlsxwriter
+
+    handle, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(handle)
+    try:
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        money = workbook.add_format({"num_format": excel_money_format(currency)})
+        day = workbook.add_format({"num_format": DATE_FORMATS[date_format][1]})
+        header = workbook.add_format({"bold": True})
+        kinds = [kind for _, _, kind in EXPORT_COLUMNS]
+
+        worksheet, row_index = None, max_rows
+        for row in rows:
+            if row_index >= max_rows:
+                # Límite de filas por hoja de Excel: continuar en una hoja nueva
+                sheet_number = len(workbook.worksheets()) + 1
+                worksheet = workbook.add_worksheet("Cuotas" if sheet_number == 1 else f"Cuotas ({sheet_number})")
+                row_index = 0
+                if include_headers:
+                    worksheet.write_row(0, 0, [title for title, _, _ in EXPORT_COLUMNS], header)
+                    row_index = 1
+
+            for col_index, (kind, value) in enumerate(zip(kinds, row)):
+                if value is None:
+                    continue
+                if kind == "money":
+                    worksheet.write_number(row_index, col_index, float(value), money)
+                elif kind == "date":
+                    if isinstance(value, str):
+                        value = date.fromisoformat(value)
+                    worksheet.write_datetime(row_index, col_index, datetime.combine(value, datetime.min.time()), day)
+                elif kind == "number":
+                    worksheet.write_number(row_index, col_index, value)
+                else:
+                    worksheet.write_string(row_index, col_index, str(value))
+            row_index += 1
+
+        if worksheet is None:
+            worksheet = workbook.add_worksheet("Cuotas")
+            if include_headers:
+                worksheet.write_row(0, 0, [title for title, _, _ in EXPORT_COLUMNS], header)
+        workbook.close()
+
+        with open(path, "rb") as stream:
+            while True:
+                chunk = stream.read(FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.unlink(path)
+
+def stream_export(db: Session, request: ExportRequest, chunk_size: int = EXPORT_CHUNK_SIZE) -> Tuple[Iterator, str, str]:
+    """
+    Preparar una exportación en streaming
+
+    Returns:
+        (iterador de bloques, media type, nombre de fichero)
+
+    Raises:
+        ExportError: Formato, filtros o date_format no válidos
+    """
+    filters = export_filters(request)
+    currency = db.query(Company.currency).filter(Company.id == filters.company_id).scalar() or "EUR"
+    rows = iter_export_rows(db, filters, chunk_size)
+
+    if request.format == "csv":
+        content = iter_csv_export(rows, currency, request.date_format, request.include_headers)
+    else:
+        content = iter_xlsx_export(rows, currency, request.date_format, request.include_headers)
+
+    filename = f"amortizaciones_{filters.company_id}_{date.today().isoformat()}.{FILE_EXTENSIONS[request.format]}"
+    return content, MEDIA_TYPES[request.format], filename
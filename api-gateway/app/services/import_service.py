@@ -0,0 +1,462 @@
+# api-gateway/app/services/import_service.py
+"""
+Importación masiva de amortizaciones (ImportRequest).
+
+Flujo por bloques de IMPORT_CHUNK_SIZE filas:
+
+1. Lectura en streaming: el base64 se decodifica por tramos; el CSV se lee
+   fila a fila y el Excel se vuelca a un fichero temporal y se recorre con
+   openpyxl en modo read_only. El fichero decodificado nunca está entero
+   en memoria.
+2. Validación en un pool de procesos con utils.validators. Hay como
+   máximo 2 × workers bloques en vuelo, así que la memoria no depende del
+   tamaño del fichero.
+3. Persistencia por bloque, en su propia transacción: INSERT masivo de
+   amortizaciones, tablas de cuotas calculadas en lote (schedule_engine +
+   InstallmentBulkWriter) y deltas del resumen mensual. Si un bloque
+   falla, se deshace solo ese bloque y sus filas se informan como errores.
+
+mapping asocia columnas del fichero (cabecera, o índice desde 0 si
+has_headers es False) con campos de IMPORT_FIELDS.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from collections import defaultdict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+import base64
+import csv
+import io
+import logging
+import os
+import tempfile
+import uuid
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.amortization import Amortization
+from ..models.entity import Entity
+from ..models.summary import apply_summary_deltas, month_start
+from ..schemas.common import ImportRequest
+from ..utils.counting import count_cache
+from ..utils.search import normalize_search_text
+from ..utils.validators import (
+    sanitize_string, validate_amount, validate_amortization_method, validate_installments,
+    validate_payment_frequency, validate_percentage, validate_reference, validate_sap_card_code
+)
+from .installment_writer import InstallmentBulkWriter
+from .schedule_engine import calculate_schedules
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FIELDS = (
+    'reference', 'description', 'entity_card_code', 'total_amount', 'total_installments',
+    'interest_rate', 'start_date', 'amortization_method', 'frequency', 'sap_doc_entry', 'sap_base_ref'
+)
+
+REQUIRED_FIELDS = ('reference', 'entity_card_code', 'total_amount', 'total_installments', 'start_date')
+
+# Errores de validación devueltos como máximo (el recuento siempre es exacto)
+MAX_REPORTED_ERRORS = 1000
+
+class ImportFileError(ValueError):
+    """Fichero o mapeo de columnas no válido"""
+
+class Base64Reader(io.RawIOBase):
+    """Lector de bytes que decodifica un texto base64 por tramos"""
+
+    def __init__(self, data: str):
+        if data.startswith('data:') and ',' in data[:200]:
+            data = data.split(',', 1)[1]
+        if any(char in data for char in '\r\n\t '):
+            data = ''.join(data.split())
+        self.data = data
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        # 4 caracteres base64 -> 3 bytes
+        length = (len(buffer) // 3) * 4
+        if length == 0 or self.position >= len(self.data):
+            return 0
+        encoded = self.data[self.position:self.position + length]
+        self.position += len(encoded)
+        try:
+            decoded = base64.b64decode(encoded, validate=True)
+        except ValueError as e:
+            raise ImportFileError(f"file_data no es base64 válido: {e}")
+        buffer[:len(decoded)] = decoded
+        return len(decoded)
+
+def _column_index(mapping: Dict[str, str], header: Optional[Sequence[Any]]) -> Dict[int, str]:
+    """Posición de cada columna mapeada -> campo de destino"""
+    unknown = sorted(set(mapping.values()) - set(IMPORT_FIELDS))
+    if unknown:
+        raise ImportFileError(f"Campos de destino desconocidos: {unknown}")
+    missing = sorted(set(REQUIRED_FIELDS) - set(mapping.values()))
+    if missing:
+        raise ImportFileError(f"Faltan columnas obligatorias en el mapeo: {missing}")
+
+    if header is None:
+        try:
+            return {int(column): field for column, field in mapping.items()}
+        except ValueError:
+            raise ImportFileError("Sin cabecera, las columnas del mapeo deben ser índices (0, 1, ...)")
+
+    positions = {str(name).strip(): index for index, name in enumerate(header) if name is not None}
+    absent = sorted(column for column in mapping if column not in positions)
+    if absent:
+        raise ImportFileError(f"Columnas no encontradas en el fichero: {absent}")
+    return {positions[column]: field for column, field in mapping.items()}
+
+def _iter_csv_rows(reader: io.RawIOBase) -> Iterator[Sequence[Any]]:
+    text = io.TextIOWrapper(io.BufferedReader(reader, buffer_size=256 * 1024), encoding='utf-8-sig', newline='')
+    sample = text.read(4096)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(_prepend(sample, text), dialect)
+
+def _prepend(sample: str, text: io.TextIOBase) -> Iterator[str]:
+    """Líneas del texto incluyendo la muestra ya leída"""
+    rest = text.readline()
+    yield from io.StringIO(sample + rest)
+    yield from text
+
+def _iter_excel_rows(reader: io.RawIOBase) -> Iterator[Sequence[Any]]:
+    import openpyxl
+
+    handle, path = tempfile.mkstemp(suffix='.xlsx')
+    try:
+        with os.fdopen(handle, 'wb') as stream:
+            while True:
+                chunk = reader.read(1024 * 1024)
+                if not chunk:
+                    break
+                stream.write(chunk)
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    finally:
+        os.unlink(path)
+
+def iter_import_rows(request: ImportRequest) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Filas del fichero como (número de línea, {campo: valor}), en streaming
+
+    Raises:
+        ImportFileError: base64, formato o mapeo no válidos
+    """
+    reader = Base64Reader(request.file_data)
+    rows = _iter_excel_rows(reader) if request.file_type == 'excel' else _iter_csv_rows(reader)
+
+    header = next(rows, None) if request.has_headers else None
+    if request.has_headers and header is None:
+        return
+    columns = _column_index(request.mapping, header)
+
+    first_line = 2 if request.has_headers else 1
+    for line, row in enumerate(rows, start=first_line):
+        if not any(value not in (None, '') for value in row):
+            continue
+        yield line, {field: row[index] if index < len(row) else None for index, field in columns.items()}
+
+def _parse_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def _text(value: Any) -> str:
+    return '' if value is None else sanitize_string(str(value))
+
+def validate_row(line: int, raw: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Validar y normalizar una fila (utils.validators)"""
+    errors = []
+
+    def error(field: str, message: str) -> None:
+        errors.append({'row': line, 'field': field, 'message': message})
+
+    for field in REQUIRED_FIELDS:
+        if raw.get(field) in (None, ''):
+            error(field, 'Campo obligatorio')
+    if errors:
+        return None, errors
+
+    row = {
+        'reference': _text(raw['reference'])[:100],
+        'description': _text(raw.get('description')) or None,
+        'entity_card_code': _text(raw['entity_card_code']).upper(),
+        'amortization_method': _text(raw.get('amortization_method')).lower() or 'linear',
+        'frequency': _text(raw.get('frequency')).lower() or 'monthly',
+        'sap_base_ref': _text(raw.get('sap_base_ref'))[:50] or None,
+    }
+
+    if not validate_reference(row['reference']):
+        error('reference', 'Referencia no válida')
+    if not validate_sap_card_code(row['entity_card_code']):
+        error('entity_card_code', 'Código de socio de negocio SAP no válido')
+
+    amount = raw['total_amount']
+    amount = Decimal(str(amount)) if isinstance(amount, (int, float)) else _text(amount).replace(',', '.')
+    if not validate_amount(amount, min_value=0.01):
+        error('total_amount', 'Monto no válido (positivo, máximo 2 decimales)')
+    else:
+        row['total_amount'] = Decimal(amount)
+
+    installments = raw['total_installments']
+    if isinstance(installments, float) and installments.is_integer():
+        installments = int(installments)
+    installments = installments if isinstance(installments, int) else _text(installments)
+    if not validate_installments(installments):
+        error('total_installments', 'Número de cuotas no válido (1-999)')
+    else:
+        row['total_installments'] = int(installments)
+
+    rate = raw.get('interest_rate')
+    rate = 0 if rate in (None, '') else (rate if isinstance(rate, (int, float)) else _text(rate).replace(',', '.'))
+    if not validate_percentage(rate):
+        error('interest_rate', 'Tasa de interés no válida (0-100)')
+    else:
+        row['interest_rate'] = Decimal(str(rate))
+
+    start_date = _parse_date(raw['start_date'])
+    if start_date is None:
+        error('start_date', 'Fecha no válida (YYYY-MM-DD o DD/MM/YYYY)')
+    else:
+        row['start_date'] = start_date
+
+    if not validate_amortization_method(row['amortization_method']):
+        error('amortization_method', 'Método de amortización no válido')
+    if not validate_payment_frequency(row['frequency']):
+        error('frequency', 'Frecuencia de pago no válida')
+
+    doc_entry = raw.get('sap_doc_entry')
+    if doc_entry in (None, ''):
+        row['sap_doc_entry'] = None
+    else:
+        try:
+            row['sap_doc_entry'] = int(float(doc_entry))
+        except (TypeError, ValueError):
+            error('sap_doc_entry', 'DocEntry no válido')
+
+    return (None if errors else row), errors
+
+def validate_chunk(rows: List[Tuple[int, Dict[str, Any]]]) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]]]:
+    """Validar un bloque de filas (se ejecuta en el pool de procesos)"""
+    valid, errors = [], []
+    for line, raw in rows:
+        row, row_errors = validate_row(line, raw)
+        if row is not None:
+            valid.append((line, row))
+        errors.extend(row_errors)
+    return valid, errors
+
+class _InlineExecutor(Executor):
+    """Ejecutor en el propio proceso (workers=0)"""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+def _chunks(rows: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def insert_amortizations(
+    db: Session,
+    company_id: str,
+    rows: List[Dict[str, Any]],
+    entities: Dict[str, Tuple[str, str]]
+) -> List[str]:
+    """
+    INSERT masivo de amortizaciones activas con sus cuotas (sin commit)
+
+    Args:
+        db: Sesión de base de datos
+        company_id: ID de la compañía
+        rows: Filas con los campos de IMPORT_FIELDS (más sap_doc_type opcional)
+        entities: sap_card_code -> (entity_id, tipo de entidad)
+
+    Returns:
+        IDs de las amortizaciones creadas, en el orden de `rows`
+    """
+    batch = calculate_schedules(rows)
+    ids = [str(uuid.uuid4()) for _ in rows]
+    amortizations = []
+    deltas = defaultdict(lambda: [0, Decimal(0), Decimal(0), Decimal(0)])
+    for index, (amortization_id, row) in enumerate(zip(ids, rows)):
+        start, end = batch.bounds(index)
+        entity_id, entity_type = entities[row['entity_card_code']]
+        amortizations.append({
+            'id': amortization_id,
+            'company_id': company_id,
+            'entity_id': entity_id,
+            'reference': row['reference'],
+            'description': row['description'],
+            'search_text': normalize_search_text(row['reference'], row['description']),
+            'total_amount': row['total_amount'],
+            'pending_amount': row['total_amount'],
+            'paid_amount': 0,
+            'total_installments': row['total_installments'],
+            'paid_installments': 0,
+            'installment_amount': Decimal(int(batch.total[start])) / 100,
+            'interest_rate': row['interest_rate'],
+            'total_interest': batch.totals(index)['total_interest'],
+            'start_date': row['start_date'],
+            'end_date': batch.due_date[end - 1].item(),
+            'next_due_date': batch.due_date[start].item(),
+            'status': 'active',
+            'amortization_method': row['amortization_method'],
+            'frequency': row['frequency'],
+            'sap_doc_entry': row['sap_doc_entry'],
+            'sap_doc_type': row.get('sap_doc_type'),
+            'sap_base_ref': row['sap_base_ref'],
+            'is_active': True,
+        })
+        delta = deltas[(company_id, entity_type, 'active', month_start(row['start_date']))]
+        delta[0] += 1
+        delta[1] += row['total_amount']
+        delta[3] += row['total_amount']
+
+    db.execute(insert(Amortization.__table__), amortizations)
+    InstallmentBulkWriter(db).write(ids, batch)
+    # Los INSERT Core no pasan por el flush: deltas del resumen explícitos
+    apply_summary_deltas(db.connection(), deltas)
+    return ids
+
+class AmortizationImporter:
+    """Pipeline de importación por bloques con validación en paralelo"""
+
+    def __init__(
+        self,
+        db: Session,
+        company_id: str,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        on_progress: Optional[Callable[[Dict[str, int]], None]] = None
+    ):
+        self.db = db
+        self.company_id = company_id
+        self.chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+        self.workers = settings.IMPORT_WORKERS if workers is None else workers
+        self.on_progress = on_progress
+
+    def run(self, request: ImportRequest) -> Dict[str, Any]:
+        """
+        Importar (o solo validar) el fichero de la solicitud
+
+        Returns:
+            Campos de ImportResponse
+
+        Raises:
+            ImportFileError: Fichero o mapeo no válidos
+        """
+        result = {
+            'total_rows': 0,
+            'successful_imports': 0,
+            'failed_imports': 0,
+            'validation_errors': [],
+            'imported_ids': []
+        }
+        executor = ProcessPoolExecutor(self.workers) if self.workers > 0 else _InlineExecutor()
+        in_flight = deque()
+        max_in_flight = max(1, self.workers) * 2
+
+        try:
+            for chunk in _chunks(iter_import_rows(request), self.chunk_size):
+                in_flight.append((len(chunk), executor.submit(validate_chunk, chunk)))
+                if len(in_flight) >= max_in_flight:
+                    self._complete(result, *in_flight.popleft(), request.validate_only)
+            while in_flight:
+                self._complete(result, *in_flight.popleft(), request.validate_only)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+        count_cache.invalidate(self.company_id)
+        logger.info(
+            f"Import finished for {self.company_id}: {result['successful_imports']} imported, "
+            f"{result['failed_imports']} failed of {result['total_rows']}"
+        )
+        return result
+
+    def _complete(self, result: Dict[str, Any], size: int, future: Future, validate_only: bool) -> None:
+        """Persistir un bloque validado (en orden de lectura) y notificar el progreso"""
+        valid, errors = future.result()
+        failed_lines = {error['row'] for error in errors}
+
+        if valid and not validate_only:
+            ids, persist_errors = self._persist(valid)
+            result['imported_ids'].extend(ids)
+            errors = errors + persist_errors
+            failed_lines.update(error['row'] for error in persist_errors)
+
+        result['total_rows'] += size
+        result['failed_imports'] += len(failed_lines)
+        result['successful_imports'] = result['total_rows'] - result['failed_imports']
+        room = MAX_REPORTED_ERRORS - len(result['validation_errors'])
+        if room > 0:
+            result['validation_errors'].extend(errors[:room])
+
+        if self.on_progress:
+            self.on_progress({
+                'processed_rows': result['total_rows'],
+                'successful_imports': result['successful_imports'],
+                'failed_imports': result['failed_imports']
+            })
+
+    def _persist(self, valid: List[Tuple[int, Dict[str, Any]]]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Insertar un bloque de filas válidas y sus cuotas en una transacción"""
+        codes = {row['entity_card_code'] for _, row in valid}
+        entities = {
+            code: (entity_id, entity_type)
+            for entity_id, code, entity_type in self.db.execute(
+                select(Entity.id, Entity.sap_card_code, Entity.type)
+                .where(Entity.company_id == self.company_id, Entity.sap_card_code.in_(codes))
+            )
+        }
+
+        errors, rows = [], []
+        for line, row in valid:
+            if row['entity_card_code'] not in entities:
+                errors.append({'row': line, 'field': 'entity_card_code', 'message': 'Entidad no encontrada'})
+            else:
+                rows.append((line, row))
+        if not rows:
+            return [], errors
+
+        try:
+            ids = insert_amortizations(self.db, self.company_id, [row for _, row in rows], entities)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Import chunk failed for {self.company_id}: {e}")
+            return [], errors + [
+                {'row': line, 'field': None, 'message': f"Error al guardar el bloque: {e}"} for line, _ in rows
+            ]
+
+        return ids, errors
@@ -0,0 +1,146 @@
+# api-gateway/app/services/installment_writer.py
+"""
+Persistencia masiva de tablas de cuotas.
+
+Escribe una o varias tablas calculadas por el motor de cuotas sin crear
+instancias ORM: COPY en PostgreSQL y executemany (INSERT multi-fila) en el
+resto de bases de datos. Los IDs se generan en el cliente, por lo que se
+devuelven sin volver a consultar la base de datos.
+"""
+from typing import Any, Iterator, List, Sequence, Tuple
+import csv
+import io
+import logging
+import uuid
+import numpy as np
+
+from sqlalchemy import insert, delete
+from sqlalchemy.orm import Session
+
+from ..models.amortization import AmortizationInstallment
+from .schedule_engine import ScheduleBatch
+
+logger = logging.getLogger(__name__)
+
+# Columnas escritas por el writer (el resto usa defaults del servidor)
+INSTALLMENT_COLUMNS = (
+    'id',
+    'amortization_id',
+    'installment_number',
+    'due_date',
+    'principal_amount',
+    'interest_amount',
+    'total_amount',
+    'paid_amount',
+    'remaining_balance',
+    'status',
+    'late_fee',
+    'is_active',
+)
+
+def _cents(value: int) -> str:
+    """Formatear céntimos enteros como literal decimal ('123.45')"""
+    sign = '-' if value < 0 else ''
+    value = abs(value)
+    return f"{sign}{value // 100}.{value % 100:02d}"
+
+class InstallmentBulkWriter:
+    """Escritor masivo de cuotas de amortización"""
+
+    def __init__(self, db: Session, chunk_size: int = 5000):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.table = AmortizationInstallment.__table__
+
+    @property
+    def dialect(self) -> str:
+        return self.db.get_bind().dialect.name
+
+    def write(self, amortization_ids: Sequence[str], batch: ScheduleBatch) -> List[str]:
+        """
+        Persistir las tablas de un lote calculado
+
+        Args:
+            amortization_ids: ID de amortización de cada tabla del lote (mismo orden)
+            batch: Resultado de schedule_engine.calculate_schedules
+
+        Returns:
+            IDs generados de las cuotas, en el orden de las filas del lote
+        """
+        if len(amortization_ids) != len(batch):
+            raise ValueError('amortization_ids must have one id per schedule in the batch')
+
+        ids = [str(uuid.uuid4()) for _ in range(batch.row_count)]
+        if not ids:
+            return ids
+
+        rows = self._rows(ids, amortization_ids, batch)
+
+        if self.dialect == 'postgresql':
+            self._write_copy(rows)
+        else:
+            self._write_executemany(rows)
+
+        logger.info(f"Bulk inserted {len(ids)} installments for {len(batch)} amortizations")
+        return ids
+
+    def replace(self, amortization_ids: Sequence[str], batch: ScheduleBatch) -> List[str]:
+        """Eliminar las cuotas existentes de las amortizaciones y escribir las nuevas"""
+        for start in range(0, len(amortization_ids), self.chunk_size):
+            chunk = list(amortization_ids[start:start + self.chunk_size])
+            self.db.execute(delete(self.table).where(self.table.c.amortization_id.in_(chunk)))
+        return self.write(amortization_ids, batch)
+
+    def _rows(
+        self,
+        ids: List[str],
+        amortization_ids: Sequence[str],
+        batch: ScheduleBatch
+    ) -> Iterator[Tuple[Any, ...]]:
+        """Generar filas (tuplas en el orden de INSTALLMENT_COLUMNS) desde las columnas del lote"""
+        counts = np.diff(batch.offsets).tolist()
+        owners = [owner for owner, count in zip(amortization_ids, counts) for _ in range(count)]
+
+        return zip(
+            ids,
+            owners,
+            batch.installment_number.tolist(),
+            batch.due_date.tolist(),
+            map(_cents, batch.principal.tolist()),
+            map(_cents, batch.interest.tolist()),
+            map(_cents, batch.total.tolist()),
+            ('0.00' for _ in ids),
+            map(_cents, batch.balance.tolist()),
+            ('pending' for _ in ids),
+            ('0.00' for _ in ids),
+            (True for _ in ids),
+        )
+
+    def _write_executemany(self, rows: Iterator[Tuple[Any, ...]]) -> None:
+        """INSERT con múltiples juegos de parámetros (executemany), por bloques"""
+        statement = insert(self.table)
+        chunk = []
+        for row in rows:
+            chunk.append(dict(zip(INSTALLMENT_COLUMNS, row)))
+            if len(chunk) >= self.chunk_size:
+                self.db.execute(statement, chunk)
+                chunk = []
+        if chunk:
+            self.db.execute(statement, chunk)
+
+    def _write_copy(self, rows: Iterator[Tuple[Any, ...]]) -> None:
+        """COPY ... FROM STDIN (PostgreSQL) dentro de la transacción de la sesión"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+
+        columns = ', '.join(INSTALLMENT_COLUMNS)
+        connection = self.db.connection().connection
+        cursor = connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {self.table.name} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
@@ -0,0 +1,100 @@
+# api-gateway/app/services/job_service.py
+"""
+Envío y consulta de trabajos en segundo plano (ver app.worker).
+
+Al enviar un trabajo se guarda su tipo en el backend de resultados
+(misma caducidad que los resultados). Así /jobs/{id} distingue un
+trabajo aún en cola de un id desconocido, para los que Celery devuelve
+PENDING en ambos casos, y conoce el tipo también en modo eager, donde
+los resultados no incluyen el nombre de la tarea.
+"""
+from typing import Any, Dict
+import inspect
+import uuid
+
+from celery import states
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from ..worker import JOB_TASKS, celery_app
+
+# Estados de Celery -> estado del trabajo
+JOB_STATUSES = {
+    states.PENDING: 'pending',
+    states.RECEIVED: 'pending',
+    states.STARTED: 'running',
+    'PROGRESS': 'running',
+    states.RETRY: 'running',
+    states.SUCCESS: 'completed',
+    states.FAILURE: 'failed',
+    states.REVOKED: 'cancelled',
+}
+
+def _job_type_key(job_id: str) -> str:
+    return f"gateway:job-type:{job_id}"
+
+class JobSubmitError(ValueError):
+    """Tipo de trabajo o parámetros no válidos"""
+
+class JobNotFoundError(LookupError):
+    """Trabajo inexistente o caducado"""
+
+def submit_job(job_type: str, **parameters: Any) -> str:
+    """
+    Encolar un trabajo
+
+    Returns:
+        ID del trabajo
+
+    Raises:
+        JobSubmitError: Tipo de trabajo desconocido o parámetros no válidos
+    """
+    task = JOB_TASKS.get(job_type)
+    if task is None:
+        raise JobSubmitError(f"Tipo de trabajo desconocido: {job_type}. Tipos: {sorted(JOB_TASKS)}")
+    try:
+        inspect.signature(task.run).bind(**parameters)
+    except TypeError as e:
+        raise JobSubmitError(f"Parámetros no válidos para {job_type}: {e}")
+
+    job_id = str(uuid.uuid4())
+    celery_app.backend.set(_job_type_key(job_id), job_type)
+    task.apply_async(kwargs=parameters, task_id=job_id)
+    return job_id
+
+def get_job(job_id: str) -> Dict[str, Any]:
+    """
+    Estado, progreso y resultado de un trabajo (formato JobResponse)
+
+    Raises:
+        JobNotFoundError: Id desconocido o resultado caducado
+    """
+    job_type = celery_app.backend.get(_job_type_key(job_id))
+    if job_type is None:
+        raise JobNotFoundError(job_id)
+
+    meta = celery_app.backend.get_task_meta(job_id)
+    state, result = meta.get('status'), meta.get('result')
+    job = {
+        'job_id': job_id,
+        'job_type': job_type.decode() if isinstance(job_type, bytes) else job_type,
+        'status': JOB_STATUSES.get(state, state.lower()),
+        'progress': None,
+        'result': None,
+        'error': None,
+    }
+    if state == 'PROGRESS':
+        job['progress'] = result
+    elif state == states.SUCCESS:
+        job['result'] = result
+    elif state == states.FAILURE:
+        job['error'] = f"{type(result).__name__}: {result}" if isinstance(result, Exception) else str(result)
+    return job
+
+def job_accepted(job_id: str) -> JSONResponse:
+    """Respuesta 202 con el id del trabajo y la URL de consulta"""
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"job_id": job_id, "status": "pending", "status_url": f"/jobs/{job_id}"},
+        headers={"Location": f"/jobs/{job_id}"}
+    )
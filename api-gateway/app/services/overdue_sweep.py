@@ -0,0 +1,208 @@
+# api-gateway/app/services/overdue_sweep.py
+"""
+Barrido de vencidos: estado 'overdue' persistido en la base de datos.
+
+Sustituye al cálculo por objeto (Amortization.update_status,
+AmortizationInstallment.is_overdue) por unas pocas sentencias UPDATE por
+compañía, en una transacción:
+
+1. Cuotas 'pending' con due_date < fecha de corte -> 'overdue'.
+2. next_due_date de las amortizaciones afectadas = primera cuota sin
+   pagar (subconsulta correlacionada; solo se escriben las que cambian).
+3. Amortizaciones 'active' con next_due_date < fecha de corte -> 'overdue'.
+
+El paso 1 es incremental sin necesidad de una cota inferior: recorre el
+rango status = 'pending' del índice parcial ix_installments_pending_due
+(cuotas sin pagar, por status y due_date), y tras cada ejecución ya no
+quedan cuotas pendientes por debajo de la fecha de corte. Cada ejecución
+toca, por tanto, las cuotas cuyo vencimiento se ha cruzado desde la
+anterior, más las que se hayan dado de alta después con vencimientos
+pasados (que una cota ``due_date >= fecha anterior`` dejaría sin marcar).
+
+Cada ejecución se registra en overdue_sweep_runs con la fecha de corte
+anterior, la duración y las filas modificadas. Los UPDATE masivos no
+pasan por el flush: el paso 3 devuelve las amortizaciones que pasan a
+'overdue' con sus importes y start_date, y al resumen mensual se aplican
+solo los deltas active -> overdue de esas filas.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from datetime import date, datetime, timezone
+import logging
+import time
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from ..models.amortization import Amortization, AmortizationInstallment
+from ..models.company import Company
+from ..models.summary import apply_summary_deltas, status_change_deltas
+from ..models.sweep import OverdueSweepRun
+from ..utils.counting import count_cache
+from .aging_engine import UNPAID_STATUSES
+from .bulk_service import BULK_CHUNK_SIZE, id_condition
+
+logger = logging.getLogger(__name__)
+
+# Estados de amortización cuyas cuotas se marcan como vencidas
+SWEPT_STATUSES = ('active', 'overdue', 'suspended')
+
+def _company_amortizations(company_id: str):
+    return select(Amortization.id).where(
+        Amortization.company_id == company_id,
+        Amortization.is_active == True,
+        Amortization.status.in_(SWEPT_STATUSES)
+    )
+
+def _update_rows(db: Session, table, condition, values: Dict[str, Any], *columns) -> List[Any]:
+    """UPDATE masivo devolviendo `columns` de cada fila modificada (RETURNING si existe)"""
+    statement = update(table).where(condition).values(**values)
+    if db.get_bind().dialect.update_returning:
+        return list(db.execute(statement.returning(*columns)))
+    rows = list(db.execute(select(*columns).where(condition)))
+    db.execute(statement)
+    return rows
+
+def sweep_company(db: Session, company_id: str, as_of: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Marcar vencidos en una compañía y registrar la ejecución
+
+    Args:
+        db: Sesión de base de datos
+        company_id: ID de la compañía
+        as_of: Fecha de corte (por defecto hoy)
+
+    Returns:
+        Resumen de la ejecución (filas modificadas, duración) y los ids de
+        las amortizaciones afectadas
+    """
+    as_of = as_of or date.today()
+    started_at = datetime.now(timezone.utc)
+    started = time.monotonic()
+    previous_as_of = db.query(func.max(OverdueSweepRun.as_of)).filter(
+        OverdueSweepRun.company_id == company_id,
+        OverdueSweepRun.status == 'completed'
+    ).scalar()
+
+    installments = AmortizationInstallment.__table__
+    amortizations = Amortization.__table__
+    dialect_name = db.get_bind().dialect.name
+
+    try:
+        # 1. Cuotas que han cruzado su vencimiento (una fila devuelta por cuota)
+        flipped = _update_rows(
+            db, installments,
+            (installments.c.status == 'pending')
+            & (installments.c.due_date < as_of)
+            & installments.c.amortization_id.in_(_company_amortizations(company_id)),
+            {'status': 'overdue'},
+            installments.c.amortization_id
+        )
+        installments_updated = len(flipped)
+        affected = {row.amortization_id for row in flipped}
+
+        # 2. Próximo vencimiento = primera cuota sin pagar
+        next_due = select(func.min(installments.c.due_date)).where(
+            installments.c.amortization_id == amortizations.c.id,
+            installments.c.status.in_(UNPAID_STATUSES)
+        ).scalar_subquery()
+        next_due_dates_updated = 0
+        ordered = sorted(affected)
+        for start in range(0, len(ordered), BULK_CHUNK_SIZE):
+            chunk = ordered[start:start + BULK_CHUNK_SIZE]
+            next_due_dates_updated += db.execute(
+                update(amortizations)
+                .where(
+                    id_condition(amortizations.c.id, chunk, dialect_name),
+                    amortizations.c.next_due_date.is_distinct_from(next_due)
+                )
+                .values(next_due_date=next_due)
+            ).rowcount
+
+        # 3. Amortizaciones con vencimientos sin pagar
+        overdue_rows = _update_rows(
+            db, amortizations,
+            (amortizations.c.company_id == company_id)
+            & (amortizations.c.is_active == True)
+            & (amortizations.c.status == 'active')
+            & (amortizations.c.next_due_date < as_of),
+            {'status': 'overdue'},
+            amortizations.c.id, amortizations.c.company_id, amortizations.c.entity_id,
+            amortizations.c.start_date, amortizations.c.total_amount,
+            amortizations.c.paid_amount, amortizations.c.pending_amount
+        )
+        overdue = {row.id for row in overdue_rows}
+        deltas = status_change_deltas(db.connection(), overdue_rows, 'overdue', previous_status='active')
+        apply_summary_deltas(db.connection(), deltas)
+
+        run = OverdueSweepRun(
+            company_id=company_id,
+            as_of=as_of,
+            previous_as_of=previous_as_of,
+            started_at=started_at,
+            duration_ms=int((time.monotonic() - started) * 1000),
+            installments_updated=installments_updated,
+            next_due_dates_updated=next_due_dates_updated,
+            amortizations_updated=len(overdue),
+            status='completed'
+        )
+        db.add(run)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Overdue sweep failed for {company_id}: {e}")
+        db.add(OverdueSweepRun(
+            company_id=company_id,
+            as_of=as_of,
+            previous_as_of=previous_as_of,
+            started_at=started_at,
+            duration_ms=int((time.monotonic() - started) * 1000),
+            status='failed',
+            error=str(e)
+        ))
+        db.commit()
+        raise
+
+    if affected or overdue:
+        count_cache.invalidate(company_id)
+    logger.info(
+        f"Overdue sweep {company_id} as of {as_of}: {installments_updated} installments, "
+        f"{len(overdue)} amortizations in {run.duration_ms} ms"
+    )
+    return {
+        'company_id': company_id,
+        'as_of': as_of.isoformat(),
+        'previous_as_of': previous_as_of.isoformat() if previous_as_of else None,
+        'duration_ms': run.duration_ms,
+        'installments_updated': installments_updated,
+        'next_due_dates_updated': next_due_dates_updated,
+        'amortizations_updated': len(overdue),
+        'amortization_ids': sorted(affected | overdue)
+    }
+
+def run_overdue_sweep(
+    db: Session,
+    company_id: Optional[str] = None,
+    as_of: Optional[date] = None,
+    on_progress: Optional[Callable[[int, int, Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Barrido de vencidos de una compañía o de todas las activas
+
+    Un fallo en una compañía queda registrado y no detiene el resto.
+    on_progress recibe (compañías procesadas, total, resultado).
+    """
+    if company_id is not None:
+        company_ids = [company_id]
+    else:
+        company_ids = [row.id for row in db.query(Company.id).filter(Company.is_active == True).order_by(Company.id)]
+
+    results = []
+    for index, current in enumerate(company_ids):
+        try:
+            result = sweep_company(db, current, as_of)
+        except Exception as e:
+            result = {'company_id': current, 'error': str(e)}
+        results.append(result)
+        if on_progress:
+            on_progress(index + 1, len(company_ids), result)
+    return results
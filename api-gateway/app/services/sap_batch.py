@@ -0,0 +1,312 @@
+# api-gateway/app/services/sap_batch.py
+"""
+Creación de documentos en SAP por lotes con $batch del Service Layer.
+
+Las operaciones se agrupan en change sets de SAP_BATCH_SIZE operaciones y
+cada petición $batch lleva hasta SAP_BATCH_CHANGESETS change sets: 120
+asientos son 6 change sets en 2 peticiones en lugar de 120 peticiones.
+
+Un change set es atómico: si falla una operación, el Service Layer
+deshace las demás y responde un único error para todo el change set, sin
+indicar qué operación lo provocó. Por eso solo se reintentan las partes
+fallidas, y en change sets de una operación (siguen yendo en un $batch):
+
+- Las operaciones de un change set fallido de varias operaciones se
+  reintentan siempre: pueden haber fallado por otra del mismo grupo.
+- Una operación que falla sola se reintenta si el error es transitorio
+  (401, 429 o 5xx); un 4xx es definitivo.
+- Sin respuesta (timeout, conexión cortada, change set sin respuesta) no se
+  sabe si SAP creó el documento y no se reenvía a ciegas: se busca por los
+  campos de BatchOperation.lookup (p. ej. Reference/Reference2). Si existe
+  cuenta como creado; si no, se reintenta. Sin lookup, o si la búsqueda
+  falla, la operación queda sin resolver (BatchResult.unresolved).
+
+Las operaciones correctas se notifican después de cada petición
+(on_success), para que el llamante persista el número de documento antes
+de continuar y un fallo posterior no provoque duplicados al reintentar.
+"""
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import json
+import logging
+import re
+import uuid
+
+import httpx
+
+from ..config import settings
+from .sap_service import SAPService, SAPServiceLayerError
+
+logger = logging.getLogger(__name__)
+
+class BatchOperation(NamedTuple):
+    """
+    Operación de un change set (key identifica la operación para el llamante)
+
+    lookup son los campos (valor exacto) que identifican el documento creado,
+    para buscarlo en `path` cuando no se sabe si la operación se aplicó.
+    """
+    key: Hashable
+    method: str
+    path: str
+    body: Optional[Dict[str, Any]] = None
+    lookup: Optional[Dict[str, Any]] = None
+
+class BatchResult(NamedTuple):
+    """Resultado de una operación: cuerpo de la respuesta o error"""
+    status_code: Optional[int]
+    body: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def transient(self) -> bool:
+        return self.status_code is not None and (self.status_code in (401, 429) or self.status_code >= 500)
+
+    @property
+    def unresolved(self) -> bool:
+        """Sin respuesta: la operación pudo aplicarse o no"""
+        return self.error is not None and self.status_code is None
+
+def odata_filter(fields: Dict[str, Any]) -> str:
+    """$filter de igualdad sobre varios campos (comillas escapadas)"""
+    conditions = []
+    for name, value in fields.items():
+        escaped = str(value).replace("'", "''")
+        conditions.append(f"{name} eq '{escaped}'")
+    return ' and '.join(conditions)
+
+def _boundary(content_type: str) -> Optional[str]:
+    match = re.search(r'boundary=("?)([^";]+)\1', content_type or '')
+    return match.group(2) if match else None
+
+def _split_head(text: str) -> Tuple[str, str]:
+    parts = re.split(r'\r?\n\r?\n', text, maxsplit=1)
+    return parts[0], parts[1] if len(parts) > 1 else ''
+
+def _headers(head: str) -> Dict[str, str]:
+    headers = {}
+    for line in head.splitlines():
+        name, _, value = line.partition(':')
+        if value:
+            headers[name.strip().lower()] = value.strip()
+    return headers
+
+def _multipart(body: str, boundary: str) -> List[Tuple[Dict[str, str], str]]:
+    """Partes (cabeceras, contenido) de un cuerpo multipart/mixed"""
+    parts = []
+    for chunk in body.split(f'--{boundary}')[1:]:
+        if chunk.startswith('--'):
+            break
+        head, content = _split_head(chunk.lstrip('\r\n'))
+        parts.append((_headers(head), re.sub(r'\r?\n$', '', content)))
+    return parts
+
+def _http_result(message: str) -> Tuple[Dict[str, str], BatchResult]:
+    """Respuesta HTTP embebida (application/http) -> cabeceras y resultado"""
+    head, content = _split_head(message.lstrip('\r\n'))
+    status_line, _, header_lines = head.partition('\n')
+    match = re.match(r'HTTP/\d\.\d\s+(\d{3})', status_line.strip())
+    status_code = int(match.group(1)) if match else None
+    try:
+        body = json.loads(content) if content.strip() else {}
+    except ValueError:
+        body = {}
+
+    if status_code is None or status_code >= 400:
+        error = body.get('error', {}) if isinstance(body, dict) else {}
+        message = error.get('message')
+        if isinstance(message, dict):
+            message = message.get('value')
+        return _headers(header_lines), BatchResult(status_code, body, message or content.strip() or f"HTTP {status_code}")
+    return _headers(header_lines), BatchResult(status_code, body)
+
+def build_batch(change_sets: Sequence[Sequence[BatchOperation]], base_path: str) -> Tuple[str, bytes]:
+    """
+    Cuerpo multipart de una petición $batch
+
+    Args:
+        change_sets: Operaciones agrupadas por change set
+        base_path: Ruta del Service Layer (/b1s/v1/)
+
+    Returns:
+        (Content-Type, cuerpo)
+    """
+    batch = f"batch_{uuid.uuid4()}"
+    lines = []
+    for operations in change_sets:
+        changeset = f"changeset_{uuid.uuid4()}"
+        lines += [f"--{batch}", f"Content-Type: multipart/mixed;boundary={changeset}", ""]
+        for content_id, operation in enumerate(operations, start=1):
+            lines += [
+                f"--{changeset}",
+                "Content-Type: application/http",
+                "Content-Transfer-Encoding: binary",
+                f"Content-ID: {content_id}",
+                "",
+                f"{operation.method} {base_path}{operation.path.lstrip('/')} HTTP/1.1",
+                "Content-Type: application/json",
+                "",
+                json.dumps(operation.body or {}, default=str),
+                ""
+            ]
+        lines.append(f"--{changeset}--")
+    lines += [f"--{batch}--", ""]
+    return f"multipart/mixed;boundary={batch}", "\r\n".join(lines).encode()
+
+def parse_batch(
+    content_type: str,
+    body: str,
+    change_sets: Sequence[Sequence[BatchOperation]]
+) -> List[List[BatchResult]]:
+    """
+    Resultados por operación de una respuesta $batch
+
+    Un change set fallido llega como una única respuesta de error, que se
+    asigna a todas sus operaciones. Los change sets sin respuesta quedan
+    como fallidos (transitorios).
+    """
+    boundary = _boundary(content_type)
+    parts = _multipart(body, boundary) if boundary else []
+    results = []
+
+    for index, operations in enumerate(change_sets):
+        if index >= len(parts):
+            results.append([BatchResult(None, error="Sin respuesta en el $batch")] * len(operations))
+            continue
+        headers, content = parts[index]
+        changeset_boundary = _boundary(headers.get('content-type', ''))
+        if changeset_boundary is None:
+            _, result = _http_result(content)
+            if result.ok:
+                result = BatchResult(result.status_code, error="Respuesta inesperada para el change set")
+            results.append([result] * len(operations))
+            continue
+
+        by_id: Dict[str, BatchResult] = {}
+        ordered = []
+        for part_headers, message in _multipart(content, changeset_boundary):
+            inner_headers, result = _http_result(message)
+            content_id = part_headers.get('content-id') or inner_headers.get('content-id')
+            if content_id:
+                by_id[content_id] = result
+            ordered.append(result)
+        results.append([
+            by_id.get(str(position), ordered[position - 1] if position <= len(ordered) else
+                      BatchResult(None, error="Sin respuesta para la operación"))
+            for position in range(1, len(operations) + 1)
+        ])
+    return results
+
+class SAPBatchPoster:
+    """
+    Envío de operaciones en $batch con reintento de las partes fallidas
+
+    Args:
+        sap: Servicio de la compañía
+        batch_size: Operaciones por change set
+        changesets: Change sets por petición $batch
+        retries: Rondas de reintento de las operaciones fallidas
+        retry_delay: Espera (segundos) antes de cada ronda de reintento
+    """
+
+    def __init__(
+        self,
+        sap: SAPService,
+        batch_size: int = settings.SAP_BATCH_SIZE,
+        changesets: int = settings.SAP_BATCH_CHANGESETS,
+        retries: int = settings.SAP_BATCH_RETRIES,
+        retry_delay: float = settings.SAP_BATCH_RETRY_DELAY
+    ):
+        self.sap = sap
+        self.batch_size = max(1, batch_size)
+        self.changesets = max(1, changesets)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.stats = {"requests": 0, "operations": 0, "retried": 0, "reconciled": 0, "unresolved": 0}
+
+    async def send(self, change_sets: List[List[BatchOperation]]) -> List[List[BatchResult]]:
+        """Una petición $batch con varios change sets"""
+        content_type, body = build_batch(change_sets, httpx.URL(self.sap.pool.base_url).path)
+        self.stats["requests"] += 1
+        try:
+            response = await self.sap.request('POST', '$batch', content=body, headers={'Content-Type': content_type})
+        except SAPServiceLayerError as e:
+            return [[BatchResult(e.status_code, error=str(e))] * len(operations) for operations in change_sets]
+        return parse_batch(response.headers.get('content-type', ''), response.text, change_sets)
+
+    async def find(self, operation: BatchOperation) -> Optional[BatchResult]:
+        """
+        Buscar el documento de una operación sin respuesta (por operation.lookup)
+
+        Returns:
+            Resultado correcto con el documento encontrado, None si no existe,
+            o un error sin resolver si no tiene lookup o la búsqueda falla
+        """
+        if not operation.lookup:
+            return BatchResult(None, error="Sin respuesta de SAP; el documento no se reenvía (sin campos de búsqueda)")
+        try:
+            response = await self.sap.get(operation.path, {'$filter': odata_filter(operation.lookup), '$top': 1})
+        except SAPServiceLayerError as e:
+            return BatchResult(None, error=f"Sin respuesta de SAP y búsqueda del documento fallida: {e}")
+        documents = response.get('value') or []
+        return BatchResult(200, documents[0]) if documents else None
+
+    async def post(
+        self,
+        operations: Sequence[BatchOperation],
+        on_success: Optional[Callable[[List[Tuple[BatchOperation, BatchResult]]], None]] = None
+    ) -> Dict[Hashable, BatchResult]:
+        """
+        Ejecutar las operaciones y devolver el resultado final de cada una (por key)
+
+        on_success recibe las operaciones correctas de cada petición $batch
+        (también las de resultado desconocido cuyo documento se encuentra).
+        """
+        results: Dict[Hashable, BatchResult] = {}
+        pending = list(operations)
+        size = self.batch_size
+
+        for attempt in range(self.retries + 1):
+            if not pending:
+                break
+            if attempt:
+                self.stats["retried"] += len(pending)
+                logger.warning(f"SAP $batch: retrying {len(pending)} failed operations (attempt {attempt})")
+                if self.retry_delay:
+                    await asyncio.sleep(self.retry_delay * attempt)
+
+            change_sets = [pending[start:start + size] for start in range(0, len(pending), size)]
+            # Los reintentos van en change sets de una operación: mismas operaciones por petición
+            per_request = self.changesets * self.batch_size // size
+            failed = []
+            for start in range(0, len(change_sets), per_request):
+                group = change_sets[start:start + per_request]
+                succeeded = []
+                for change_set, change_set_results in zip(group, await self.send(group)):
+                    for operation, result in zip(change_set, change_set_results):
+                        self.stats["operations"] += 1
+                        if result.unresolved:
+                            found = await self.find(operation)
+                            if found is None:
+                                # No se creó: se puede reenviar
+                                results[operation.key] = result
+                                failed.append(operation)
+                                continue
+                            result = found
+                            self.stats["reconciled" if found.ok else "unresolved"] += 1
+                        results[operation.key] = result
+                        if result.ok:
+                            succeeded.append((operation, result))
+                        elif not result.unresolved and (len(change_set) > 1 or result.transient):
+                            failed.append(operation)
+                if succeeded and on_success:
+                    on_success(succeeded)
+
+            pending = failed
+            size = 1
+
+        return results
@@ -0,0 +1,324 @@
+# api-gateway/app/services/sap_import.py
+"""
+Importación incremental de documentos SAP (facturas) como amortizaciones.
+
+Cada (compañía, tipo de documento) tiene una marca de agua
+(SAPImportWatermark) con el UpdateDate y el DocEntry del último documento
+procesado. Las importaciones siguientes solo piden a SAP los documentos
+con ``UpdateDate ge <marca>``: el coste depende de los documentos nuevos
+o modificados, no del histórico. UpdateDate no tiene hora, así que se
+vuelve a leer el día de la marca; el upsert hace que releerlo no
+duplique nada.
+
+La consulta lleva $select (solo DOCUMENT_FIELDS) y $orderby
+UpdateDate,DocEntry, y se recorre página a página (odata.nextLink) como
+un stream async. Cada bloque de SAP_IMPORT_BATCH_SIZE documentos se
+guarda en una transacción junto con la marca de agua (en un hilo, con
+asyncio.to_thread, para no bloquear el bucle de eventos), así que una
+importación interrumpida continúa desde el último bloque guardado:
+
+- Entidades: INSERT de los CardCode que no existen (ON CONFLICT DO
+  NOTHING sobre unique_company_entity).
+- Amortizaciones: clave (company_id, sap_doc_type, sap_doc_entry). Los
+  documentos nuevos se insertan con su tabla de cuotas
+  (import_service.insert_amortizations); en los existentes se actualiza
+  la descripción y, si el documento se ha cancelado en SAP y no hay
+  pagos, el estado pasa a 'cancelled'.
+
+Con date_from/date_to se importa ese rango de DocDate sin usar ni mover
+la marca de agua (recarga puntual); full=True ignora la marca y la
+reinicia con lo leído.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import asyncio
+import logging
+import uuid
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.amortization import Amortization
+from ..models.company import Company
+from ..models.entity import Entity
+from ..models.sap_import import SAPImportWatermark
+from ..models.summary import SUMMARY_COLUMNS, apply_summary_deltas, status_change_deltas
+from ..utils.counting import count_cache
+from ..utils.search import normalize_search_text
+from .import_service import insert_amortizations
+from .sap_service import SAPService
+
+logger = logging.getLogger(__name__)
+
+# Tipo de documento SAP -> (tipo de entidad, Amortization.sap_doc_type)
+DOCUMENT_TYPES = {
+    'Invoices': ('cliente', 'Invoice'),
+    'PurchaseInvoices': ('proveedor', 'Purchase'),
+}
+
+DOCUMENT_FIELDS = (
+    'DocEntry', 'DocNum', 'CardCode', 'CardName', 'DocDate', 'DocDueDate', 'DocTotal',
+    'DocCurrency', 'Comments', 'Cancelled', 'UpdateDate'
+)
+
+# Estados que se cancelan cuando el documento se cancela en SAP
+CANCELLABLE_STATUSES = ('active', 'overdue', 'suspended')
+
+class SAPImportError(ValueError):
+    """Solicitud de importación desde SAP no válida"""
+
+def _sap_date(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value[:10]) if value else None
+
+def _insert_ignore(db: Session, table, rows: List[Dict[str, Any]]) -> None:
+    """INSERT que ignora las filas que ya existen (ON CONFLICT DO NOTHING si existe)"""
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        db.execute(postgresql.insert(table).on_conflict_do_nothing(), rows)
+    elif dialect_name == 'sqlite':
+        db.execute(sqlite.insert(table).on_conflict_do_nothing(), rows)
+    else:
+        db.execute(insert(table), rows)
+
+class SAPDocumentImporter:
+    """
+    Importación incremental de documentos SAP de una compañía
+
+    Args:
+        db: Sesión de base de datos
+        company: Compañía a importar
+        sap: Servicio SAP (por defecto el de la compañía)
+        batch_size: Documentos por transacción
+        page_size: Documentos por página de SAP
+        on_progress: Recibe los contadores de cada tipo tras cada bloque
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        company: Company,
+        sap: Optional[SAPService] = None,
+        batch_size: int = settings.SAP_IMPORT_BATCH_SIZE,
+        page_size: int = settings.SAP_IMPORT_PAGE_SIZE,
+        on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ):
+        self.db = db
+        self.company_id = company.id
+        self.currency = company.currency
+        self.total_installments = company.default_installments or 12
+        self.interest_rate = company.default_interest_rate or Decimal(0)
+        self.sap = sap or SAPService.for_company(company)
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.on_progress = on_progress
+
+    async def run(
+        self,
+        document_types: List[str],
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        full: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Importar los documentos nuevos o modificados de cada tipo
+
+        Returns:
+            Contadores por tipo de documento
+
+        Raises:
+            SAPImportError: Tipo de documento no soportado
+        """
+        unknown = [document_type for document_type in document_types if document_type not in DOCUMENT_TYPES]
+        if unknown:
+            raise SAPImportError(f"Tipos de documento no soportados: {', '.join(unknown)}")
+
+        results = {}
+        for document_type in document_types:
+            results[document_type] = await self._import(document_type, date_from, date_to, full)
+
+        if any(result['amortizations_created'] or result['amortizations_updated'] for result in results.values()):
+            count_cache.invalidate(self.company_id)
+        return {'company_id': self.company_id, 'document_types': results}
+
+    def _watermark(self, document_type: str) -> SAPImportWatermark:
+        watermark = self.db.query(SAPImportWatermark).filter_by(
+            company_id=self.company_id, document_type=document_type
+        ).one_or_none()
+        if watermark is None:
+            watermark = SAPImportWatermark(company_id=self.company_id, document_type=document_type,
+                                           documents_imported=0)
+        return watermark
+
+    async def _import(self, document_type: str, date_from: Optional[date], date_to: Optional[date], full: bool) -> Dict[str, Any]:
+        watermark = self._watermark(document_type)
+        incremental = date_from is None and date_to is None
+        since = watermark.last_update_date if incremental and not full else None
+
+        conditions = []
+        if since:
+            conditions.append(f"UpdateDate ge '{since.isoformat()}'")
+        if date_from:
+            conditions.append(f"DocDate ge '{date_from.isoformat()}'")
+        if date_to:
+            conditions.append(f"DocDate le '{date_to.isoformat()}'")
+        params = {
+            '$select': ','.join(DOCUMENT_FIELDS),
+            '$filter': ' and '.join(conditions) or None,
+            '$orderby': 'UpdateDate,DocEntry'
+        }
+
+        result = {
+            'since': since.isoformat() if since else None,
+            'documents': 0,
+            'entities_created': 0,
+            'amortizations_created': 0,
+            'amortizations_updated': 0,
+            'skipped': 0,
+            'amortization_ids': []
+        }
+        if incremental:
+            watermark.documents_imported = 0
+            watermark.last_run_at = datetime.now(timezone.utc)
+
+        pending: List[Dict[str, Any]] = []
+        async for page in self.sap.iter_pages(document_type, params, self.page_size):
+            pending.extend(page)
+            while len(pending) >= self.batch_size:
+                await asyncio.to_thread(
+                    self._save, document_type, pending[:self.batch_size], result, watermark if incremental else None
+                )
+                pending = pending[self.batch_size:]
+        if pending or incremental:
+            await asyncio.to_thread(self._save, document_type, pending, result, watermark if incremental else None)
+
+        logger.info(
+            f"SAP import {self.company_id}/{document_type} since {result['since']}: {result['documents']} documents, "
+            f"{result['amortizations_created']} created, {result['amortizations_updated']} updated"
+        )
+        return result
+
+    def _save(
+        self,
+        document_type: str,
+        documents: List[Dict[str, Any]],
+        result: Dict[str, Any],
+        watermark: Optional[SAPImportWatermark]
+    ) -> None:
+        """Upsert de un bloque de documentos y avance de la marca de agua, en una transacción"""
+        try:
+            if documents:
+                self._upsert(document_type, documents, result)
+            if watermark is not None:
+                if documents:
+                    watermark.last_update_date = _sap_date(documents[-1].get('UpdateDate')) or watermark.last_update_date
+                    watermark.last_doc_entry = documents[-1]['DocEntry']
+                    watermark.documents_imported += len(documents)
+                self.db.add(watermark)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"SAP import batch failed for {self.company_id}/{document_type}: {e}")
+            raise
+
+        result['documents'] += len(documents)
+        if self.on_progress:
+            self.on_progress(document_type, result)
+
+    def _upsert(self, document_type: str, documents: List[Dict[str, Any]], result: Dict[str, Any]) -> None:
+        entity_type, sap_doc_type = DOCUMENT_TYPES[document_type]
+
+        # 1. Entidades que no existen
+        names = {document['CardCode']: document.get('CardName') or document['CardCode'] for document in documents}
+        entities = self._entities(names)
+        missing = [code for code in names if code not in entities]
+        if missing:
+            _insert_ignore(self.db, Entity.__table__, [{
+                'id': str(uuid.uuid4()),
+                'company_id': self.company_id,
+                'sap_card_code': code,
+                'name': names[code],
+                'sap_card_name': names[code],
+                'search_name': normalize_search_text(names[code]),
+                'type': entity_type,
+                'currency': self.currency,
+                'is_active': True,
+            } for code in missing])
+            entities.update(self._entities({code: names[code] for code in missing}))
+            result['entities_created'] += len(missing)
+
+        # 2. Amortizaciones existentes por documento de origen
+        existing = {
+            row.sap_doc_entry: row for row in self.db.execute(
+                select(Amortization.id, Amortization.sap_doc_entry, Amortization.description,
+                       Amortization.reference, Amortization.paid_installments, Amortization.is_active,
+                       *SUMMARY_COLUMNS)
+                .where(
+                    Amortization.company_id == self.company_id,
+                    Amortization.sap_doc_type == sap_doc_type,
+                    Amortization.sap_doc_entry.in_([document['DocEntry'] for document in documents])
+                )
+            )
+        }
+
+        new_rows, updates, cancelled = [], [], []
+        for document in {document['DocEntry']: document for document in documents}.values():
+            description = document.get('Comments') or document.get('CardName')
+            is_cancelled = document.get('Cancelled') == 'tYES'
+            current = existing.get(document['DocEntry'])
+
+            if current is None:
+                total = Decimal(str(document.get('DocTotal') or 0))
+                if is_cancelled or total <= 0:
+                    result['skipped'] += 1
+                    continue
+                new_rows.append({
+                    'reference': f"{sap_doc_type}-{document['DocNum']}",
+                    'description': description,
+                    'entity_card_code': document['CardCode'],
+                    'total_amount': total,
+                    'total_installments': self.total_installments,
+                    'interest_rate': self.interest_rate,
+                    'start_date': _sap_date(document.get('DocDueDate')) or _sap_date(document['DocDate']),
+                    'amortization_method': 'linear',
+                    'frequency': 'monthly',
+                    'sap_doc_entry': document['DocEntry'],
+                    'sap_doc_type': sap_doc_type,
+                    'sap_base_ref': str(document['DocNum']),
+                })
+                continue
+
+            values = {}
+            if description != current.description:
+                values.update(description=description,
+                              search_text=normalize_search_text(current.reference, description))
+            if is_cancelled and current.status in CANCELLABLE_STATUSES and not current.paid_installments:
+                values['status'] = 'cancelled'
+                if current.is_active:
+                    cancelled.append(current)
+            if values:
+                updates.append({'id': current.id, **values})
+
+        if new_rows:
+            ids = insert_amortizations(self.db, self.company_id, new_rows, entities)
+            result['amortizations_created'] += len(ids)
+            result['amortization_ids'].extend(ids)
+        if updates:
+            self.db.execute(update(Amortization), updates)
+            result['amortizations_updated'] += len(updates)
+            result['amortization_ids'].extend(row['id'] for row in updates)
+        if cancelled:
+            # El UPDATE por clave primaria no pasa por el flush: deltas de las canceladas
+            deltas = status_change_deltas(self.db.connection(), cancelled, 'cancelled')
+            apply_summary_deltas(self.db.connection(), deltas)
+
+    def _entities(self, names: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            code: (entity_id, entity_type)
+            for entity_id, code, entity_type in self.db.execute(
+                select(Entity.id, Entity.sap_card_code, Entity.type)
+                .where(Entity.company_id == self.company_id, Entity.sap_card_code.in_(list(names)))
+            )
+        }
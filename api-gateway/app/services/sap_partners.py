@@ -0,0 +1,221 @@
+# api-gateway/app/services/sap_partners.py
+"""
+Sincronización de business partners de SAP con las entidades.
+
+Los BusinessPartners se leen página a página (odata.nextLink, $select de
+PARTNER_FIELDS, orden por CardCode). De cada uno se calcula el hash de
+los valores que se guardan en Entity (partner_hash) y se compara con
+Entity.sap_hash, que se carga una vez por compañía (CardCode -> hash):
+
+- Hash igual: no se escribe nada.
+- Hash distinto o entidad nueva: la fila entra en un único
+  INSERT ... ON CONFLICT (company_id, sap_card_code) DO UPDATE por página.
+
+Sincronizar 100k partners con 200 cambios escribe 200 filas. Cada página
+es una transacción, que se guarda en un hilo (asyncio.to_thread) para no
+bloquear el bucle de eventos. El upsert no dispara los eventos del mapper, así que
+al terminar se invalida la caché de filas de la compañía
+(row_cache.invalidate_company).
+"""
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime, timezone
+from decimal import Decimal
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+
+from sqlalchemy import and_, bindparam, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.company import Company
+from ..models.entity import Entity
+from ..utils.counting import count_cache
+from ..utils.row_cache import invalidate_company
+from ..utils.search import normalize_search_text
+from .sap_service import SAPService
+
+logger = logging.getLogger(__name__)
+
+# Tipo de entidad -> CardType del Service Layer (los leads no se sincronizan)
+PARTNER_TYPES = {
+    'cliente': 'cCustomer',
+    'proveedor': 'cSupplier',
+}
+
+PARTNER_FIELDS = (
+    'CardCode', 'CardName', 'CardType', 'GroupCode', 'Currency', 'CreditLimit',
+    'CurrentAccountBalance', 'Frozen'
+)
+
+# Columnas que se actualizan cuando cambia el hash
+SYNCED_COLUMNS = (
+    'name', 'sap_card_name', 'type', 'sap_group_code', 'credit_limit', 'current_balance',
+    'currency', 'is_active', 'search_name', 'sap_hash'
+)
+
+def _amount(value: Any) -> Optional[Decimal]:
+    return Decimal(str(value)).quantize(Decimal('0.01')) if value is not None else None
+
+def partner_values(partner: Dict[str, Any], entity_type: str, default_currency: str) -> Dict[str, Any]:
+    """Valores de Entity de un BusinessPartner, con su hash en sap_hash"""
+    currency = partner.get('Currency')
+    values = {
+        'name': partner.get('CardName') or partner['CardCode'],
+        'sap_card_name': partner.get('CardName'),
+        'type': entity_type,
+        'sap_group_code': str(partner['GroupCode']) if partner.get('GroupCode') is not None else None,
+        'credit_limit': _amount(partner.get('CreditLimit')),
+        'current_balance': _amount(partner.get('CurrentAccountBalance')),
+        # '##' = todas las monedas
+        'currency': currency if currency and currency != '##' else default_currency,
+        'is_active': partner.get('Frozen') != 'tYES',
+    }
+    values['search_name'] = normalize_search_text(values['name'])
+    values['sap_hash'] = partner_hash(values)
+    return values
+
+def partner_hash(values: Dict[str, Any]) -> str:
+    """Hash estable de los valores sincronizados (sin sap_hash)"""
+    content = json.dumps(
+        [values[column] for column in SYNCED_COLUMNS if column != 'sap_hash'],
+        default=str, separators=(',', ':')
+    )
+    return hashlib.sha1(content.encode()).hexdigest()
+
+class SAPPartnerSync:
+    """
+    Sincronización de los business partners de una compañía
+
+    Args:
+        db: Sesión de base de datos
+        company: Compañía a sincronizar
+        sap: Servicio SAP (por defecto el de la compañía)
+        page_size: Partners por página de SAP y por upsert
+        on_progress: Recibe los contadores tras cada página
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        company: Company,
+        sap: Optional[SAPService] = None,
+        page_size: int = settings.SAP_PARTNER_PAGE_SIZE,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        self.db = db
+        self.company_id = company.id
+        self.currency = company.currency or 'EUR'
+        self.sap = sap or SAPService.for_company(company)
+        self.page_size = page_size
+        self.on_progress = on_progress
+
+    async def run(self, entity_types: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Sincronizar los partners de los tipos indicados (por defecto clientes y proveedores)
+
+        Returns:
+            Partners leídos, creados, actualizados y sin cambios
+
+        Raises:
+            ValueError: Tipo de entidad no soportado
+        """
+        entity_types = list(entity_types or PARTNER_TYPES)
+        unknown = [entity_type for entity_type in entity_types if entity_type not in PARTNER_TYPES]
+        if unknown:
+            raise ValueError(f"Tipos de entidad no soportados: {', '.join(unknown)}")
+
+        hashes = dict(self.db.execute(
+            select(Entity.sap_card_code, Entity.sap_hash).where(Entity.company_id == self.company_id)
+        ).all())
+        result = {'company_id': self.company_id, 'partners': 0, 'created': 0, 'updated': 0, 'unchanged': 0}
+
+        try:
+            for entity_type in entity_types:
+                params = {
+                    '$select': ','.join(PARTNER_FIELDS),
+                    '$filter': f"CardType eq '{PARTNER_TYPES[entity_type]}'",
+                    '$orderby': 'CardCode'
+                }
+                async for page in self.sap.iter_pages('BusinessPartners', params, self.page_size):
+                    await asyncio.to_thread(self._save, page, entity_type, hashes, result)
+        finally:
+            if result['created'] or result['updated']:
+                invalidate_company(self.company_id)
+                count_cache.invalidate(self.company_id)
+
+        logger.info(
+            f"SAP partner sync {self.company_id}: {result['partners']} partners, {result['created']} created, "
+            f"{result['updated']} updated, {result['unchanged']} unchanged"
+        )
+        return result
+
+    def _save(self, partners: List[Dict[str, Any]], entity_type: str, hashes: Dict[str, Optional[str]],
+              result: Dict[str, Any]) -> None:
+        """Upsert de los partners cambiados de una página, en una transacción"""
+        changed = {}
+        for partner in partners:
+            values = partner_values(partner, entity_type, self.currency)
+            if hashes.get(partner['CardCode'], '') == values['sap_hash']:
+                result['unchanged'] += 1
+            else:
+                changed[partner['CardCode']] = values
+
+        if changed:
+            now = datetime.now(timezone.utc)
+            rows = [{
+                'id': str(uuid.uuid4()),
+                'company_id': self.company_id,
+                'sap_card_code': code,
+                'updated_at': now,
+                **values
+            } for code, values in changed.items()]
+            try:
+                self._upsert(rows, hashes)
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                logger.error(f"SAP partner sync page failed for {self.company_id}: {e}")
+                raise
+
+            created = sum(1 for code in changed if code not in hashes)
+            result['created'] += created
+            result['updated'] += len(changed) - created
+            hashes.update((code, values['sap_hash']) for code, values in changed.items())
+
+        result['partners'] += len(partners)
+        if self.on_progress:
+            self.on_progress(result)
+
+    def _upsert(self, rows: List[Dict[str, Any]], hashes: Dict[str, Optional[str]]) -> None:
+        """INSERT ... ON CONFLICT (company_id, sap_card_code) DO UPDATE de las filas cambiadas"""
+        table = Entity.__table__
+        dialect_name = self.db.get_bind().dialect.name
+        if dialect_name in ('postgresql', 'sqlite'):
+            dialect_insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+            statement = dialect_insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=['company_id', 'sap_card_code'],
+                set_={column: statement.excluded[column] for column in (*SYNCED_COLUMNS, 'updated_at')}
+            )
+            self.db.execute(statement, rows)
+            return
+
+        # Sin ON CONFLICT: INSERT de las nuevas y UPDATE de las existentes
+        new_rows = [row for row in rows if row['sap_card_code'] not in hashes]
+        if new_rows:
+            self.db.execute(insert(table), new_rows)
+        existing = [
+            {**{f'b_{column}': row[column] for column in (*SYNCED_COLUMNS, 'updated_at')}, 'b_code': row['sap_card_code']}
+            for row in rows if row['sap_card_code'] in hashes
+        ]
+        if existing:
+            self.db.execute(
+                update(table)
+                .where(and_(table.c.company_id == self.company_id, table.c.sap_card_code == bindparam('b_code')))
+                .values({column: bindparam(f'b_{column}') for column in (*SYNCED_COLUMNS, 'updated_at')}),
+                existing
+            )
@@ -0,0 +1,205 @@
+# api-gateway/app/services/sap_scheduler.py
+"""
+Sincronización con SAP de todas las compañías en paralelo.
+
+Cada compañía activa con base de datos SAP ejecuta sus tareas
+(SYNC_TASKS, en orden) con su propia sesión de base de datos y el pool
+del servidor de la compañía (Company.sap_server_url):
+
+- Como mucho SAP_SYNC_MAX_COMPANIES compañías a la vez.
+- Las compañías con las tareas más largas registradas empiezan antes,
+  para que no alarguen el final de la ejecución.
+- Dentro de cada servidor, SAP_MAX_CONCURRENCY_PER_COMPANY limita las
+  peticiones de una compañía y SAP_MAX_CONCURRENCY_PER_SERVER las del
+  servidor, repartidas por turnos entre compañías (FairSemaphore): una
+  compañía enorme no deja sin turno a las demás.
+
+Cada tarea se registra en sap_sync_runs con la espera en cola, la
+duración y los registros leídos; un fallo queda registrado y no detiene
+el resto de tareas ni de compañías.
+
+El acceso a la base de datos es síncrono: la carga de la compañía, cada
+bloque importado y el registro de cada tarea se ejecutan en un hilo
+(asyncio.to_thread), así que un commit de una compañía no detiene las
+peticiones a SAP de las demás. Una compañía borrada o desactivada
+después de elegir las compañías registra sus tareas como fallidas.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.company import Company
+from ..models.sap_import import SAPSyncRun
+from .sap_import import DOCUMENT_TYPES, SAPDocumentImporter
+from .sap_partners import SAPPartnerSync
+
+logger = logging.getLogger(__name__)
+
+SyncTask = Callable[[Session, Company], Awaitable[Dict[str, Any]]]
+
+# Tareas por nombre, en orden de ejecución; cada una devuelve items
+# (registros leídos) y opcionalmente amortization_ids modificados
+SYNC_TASKS: Dict[str, SyncTask] = {}
+
+def sync_task(name: str):
+    """Registrar una tarea de sincronización por compañía"""
+    def decorator(fn: SyncTask) -> SyncTask:
+        SYNC_TASKS[name] = fn
+        return fn
+    return decorator
+
+@sync_task('business_partners')
+async def sync_business_partners(db: Session, company: Company) -> Dict[str, Any]:
+    """Clientes y proveedores con cambios (hash por CardCode); antes que los documentos"""
+    result = await SAPPartnerSync(db, company).run()
+    return {
+        'items': result['partners'],
+        'entities_created': result['created'],
+        'entities_updated': result['updated']
+    }
+
+@sync_task('documents')
+async def sync_documents(db: Session, company: Company) -> Dict[str, Any]:
+    """Importación incremental de facturas de clientes y proveedores"""
+    result = await SAPDocumentImporter(db, company).run(list(DOCUMENT_TYPES))
+    counts = result['document_types'].values()
+    return {
+        'items': sum(count['documents'] for count in counts),
+        'amortizations_created': sum(count['amortizations_created'] for count in counts),
+        'amortizations_updated': sum(count['amortizations_updated'] for count in counts),
+        'amortization_ids': [amortization_id for count in counts for amortization_id in count['amortization_ids']]
+    }
+
+class SAPSyncScheduler:
+    """
+    Planificador de sincronizaciones SAP multi-compañía
+
+    Args:
+        session_factory: Crea una sesión de base de datos por compañía
+        tasks: Tareas a ejecutar (por defecto todas las de SYNC_TASKS)
+        max_companies: Compañías sincronizándose a la vez
+        on_progress: Recibe (compañías terminadas, total, resultado)
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        tasks: Optional[Sequence[str]] = None,
+        max_companies: int = settings.SAP_SYNC_MAX_COMPANIES,
+        on_progress: Optional[Callable[[int, int, Dict[str, Any]], None]] = None
+    ):
+        tasks = list(tasks or SYNC_TASKS)
+        unknown = [task for task in tasks if task not in SYNC_TASKS]
+        if unknown:
+            raise ValueError(f"Tareas de sincronización desconocidas: {', '.join(unknown)}")
+        self.session_factory = session_factory
+        self.tasks = tasks
+        self.max_companies = max(1, max_companies)
+        self.on_progress = on_progress
+
+    def _company_ids(self, company_ids: Optional[Sequence[str]]) -> List[str]:
+        """Compañías a sincronizar, la de tarea más larga registrada primero"""
+        db = self.session_factory()
+        try:
+            query = select(Company.id).where(Company.is_active == True)
+            if company_ids is not None:
+                query = query.where(Company.id.in_(list(company_ids)))
+            ids = list(db.execute(query.order_by(Company.id)).scalars())
+
+            durations = dict(db.execute(
+                select(SAPSyncRun.company_id, func.max(SAPSyncRun.duration_ms))
+                .where(SAPSyncRun.company_id.in_(ids), SAPSyncRun.status == 'completed')
+                .group_by(SAPSyncRun.company_id)
+            ).all()) if ids else {}
+        finally:
+            db.close()
+        return sorted(ids, key=lambda company_id: -(durations.get(company_id) or 0))
+
+    async def run(self, company_ids: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Sincronizar las compañías (todas las activas si no se indican)
+
+        Returns:
+            Resultado por compañía: espera, duración y resultado de cada tarea
+        """
+        ids = self._company_ids(company_ids)
+        slots = asyncio.Semaphore(self.max_companies)
+        started = time.monotonic()
+        done = 0
+        results: List[Dict[str, Any]] = []
+
+        async def run_company(company_id: str) -> None:
+            nonlocal done
+            async with slots:
+                result = await self._sync_company(company_id, int((time.monotonic() - started) * 1000))
+            results.append(result)
+            done += 1
+            if self.on_progress:
+                self.on_progress(done, len(ids), result)
+
+        await asyncio.gather(*(run_company(company_id) for company_id in ids))
+        logger.info(
+            f"SAP sync of {len(ids)} companies finished in {int((time.monotonic() - started) * 1000)} ms"
+        )
+        order = {company_id: index for index, company_id in enumerate(ids)}
+        return sorted(results, key=lambda result: order[result['company_id']])
+
+    async def _sync_company(self, company_id: str, wait_ms: int) -> Dict[str, Any]:
+        db = self.session_factory()
+        company_started = time.monotonic()
+        result: Dict[str, Any] = {'company_id': company_id, 'wait_ms': wait_ms, 'tasks': {}}
+        try:
+            company = await asyncio.to_thread(db.get, Company, company_id)
+            if company is not None and not company.is_active:
+                company = None
+            for task in self.tasks:
+                result['tasks'][task] = await self._run_task(db, company_id, company, task, wait_ms)
+        finally:
+            db.close()
+        result['duration_ms'] = int((time.monotonic() - company_started) * 1000)
+        return result
+
+    async def _run_task(
+        self,
+        db: Session,
+        company_id: str,
+        company: Optional[Company],
+        task: str,
+        wait_ms: int
+    ) -> Dict[str, Any]:
+        started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        try:
+            if company is None:
+                raise LookupError(f"Compañía {company_id} no encontrada o inactiva")
+            outcome = await SYNC_TASKS[task](db, company)
+            status, error = 'completed', None
+        except Exception as e:
+            await asyncio.to_thread(db.rollback)
+            logger.error(f"SAP sync task {task} failed for {company_id}: {e}")
+            outcome, status, error = {}, 'failed', str(e)
+
+        duration_ms = int((time.monotonic() - started) * 1000)
+        await asyncio.to_thread(self._record_run, db, SAPSyncRun(
+            company_id=company_id,
+            task=task,
+            started_at=started_at,
+            wait_ms=wait_ms,
+            duration_ms=duration_ms,
+            items=outcome.get('items', 0),
+            status=status,
+            error=error
+        ))
+        logger.info(f"SAP sync {company_id}/{task}: {status} in {duration_ms} ms ({outcome.get('items', 0)} items)")
+        return {**outcome, 'status': status, 'duration_ms': duration_ms, **({'error': error} if error else {})}
+
+    @staticmethod
+    def _record_run(db: Session, run: SAPSyncRun) -> None:
+        db.add(run)
+        db.commit()
@@ -0,0 +1,499 @@
+# api-gateway/app/services/sap_service.py
+"""
+Cliente async del SAP Business One Service Layer.
+
+Todo el proceso comparte un httpx.AsyncClient (pool de conexiones
+keep-alive: sin handshake TLS por llamada) y una sesión B1SESSION por
+(CompanyDB, usuario):
+
+- La sesión se reutiliza entre peticiones y se renueva con /Login antes
+  de caducar. SessionTimeout es deslizante: cada petición correcta lo
+  extiende.
+- Un 401 invalida la sesión; la petición se repite una vez tras el login.
+- Las peticiones simultáneas a una compañía se limitan con un semáforo
+  (SAP_MAX_CONCURRENCY_PER_COMPANY) y los logins de una misma sesión se
+  serializan con un lock.
+- Las de todo el servidor se limitan con SAP_MAX_CONCURRENCY_PER_SERVER
+  (FairSemaphore): los huecos libres se reparten por turnos entre las
+  compañías en espera, así que una compañía con mucho trabajo no deja
+  sin turno a las demás.
+
+Cada servidor (Company.sap_server_url) tiene su propio pool (get_pool).
+
+Las cookies de sesión se envían explícitamente: el cliente no guarda
+cookies, para que las sesiones de distintas compañías no se mezclen.
+
+El cliente HTTP, los locks y los semáforos pertenecen al event loop en el
+que se crean; si cambia el loop (cada trabajo de Celery usa asyncio.run)
+se recrean, y las sesiones, que son solo datos, se conservan. Los
+trabajos usan run_with_pools, que cierra el cliente HTTP antes de que
+termine su loop (un cliente de un loop cerrado ya no se puede cerrar).
+"""
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+from collections import OrderedDict, deque
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+import asyncio
+import logging
+import time
+
+import httpx
+
+from ..config import settings
+from ..models.company import Company
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+class SAPServiceLayerError(Exception):
+    """Error devuelto por el Service Layer (o de conexión con él)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, code: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+class SAPSession:
+    """Sesión B1SESSION (y ROUTEID si hay balanceador) de una compañía y usuario"""
+
+    __slots__ = ('session_id', 'route_id', 'timeout', 'expires_at')
+
+    def __init__(self, session_id: str, route_id: Optional[str], timeout: float, now: float):
+        self.session_id = session_id
+        self.route_id = route_id
+        self.timeout = timeout
+        self.expires_at = now + timeout
+
+    def touch(self, now: float) -> None:
+        """Extender la caducidad tras una petición correcta"""
+        self.expires_at = now + self.timeout
+
+    @property
+    def cookie(self) -> str:
+        cookie = f"B1SESSION={self.session_id}"
+        if self.route_id:
+            cookie += f"; ROUTEID={self.route_id}"
+        return cookie
+
+def _error_details(response: httpx.Response) -> Tuple[str, Any]:
+    """Mensaje y código de error del Service Layer (formatos v1 y v2)"""
+    try:
+        error = response.json().get('error', {})
+    except ValueError:
+        return response.text or f"HTTP {response.status_code}", None
+    message = error.get('message')
+    if isinstance(message, dict):
+        message = message.get('value')
+    return message or f"HTTP {response.status_code}", error.get('code')
+
+class FairSemaphore:
+    """
+    Semáforo con una cola por clave (compañía) atendida por turnos
+
+    Cuando se libera un permiso pasa a la primera clave en espera, que
+    después va al final de la rotación.
+    """
+
+    def __init__(self, value: int):
+        self._free = value
+        self._waiters: 'OrderedDict[str, Deque[asyncio.Future]]' = OrderedDict()
+
+    async def acquire(self, key: str) -> None:
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # El permiso llegó a la vez que la cancelación: pasarlo al siguiente
+                self.release()
+            else:
+                queue = self._waiters.get(key)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiters[key]
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            key, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            if queue:
+                self._waiters.move_to_end(key)
+            else:
+                del self._waiters[key]
+            if not future.done():
+                future.set_result(None)
+                return
+        self._free += 1
+
+class SAPServiceLayerPool:
+    """
+    Conexiones y sesiones compartidas con el Service Layer
+
+    Args:
+        base_url: URL del Service Layer (…/b1s/v1)
+        timeout: Timeout de cada petición en segundos
+        max_connections: Conexiones máximas del pool
+        max_concurrency: Peticiones simultáneas por compañía
+        max_server_concurrency: Peticiones simultáneas en el servidor (reparto por turnos)
+        refresh_margin: Segundos antes de caducar en los que se renueva la sesión
+        verify: Verificar el certificado TLS
+        transport: Transporte httpx alternativo (tests)
+        clock: Reloj monotónico (tests)
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 30.0,
+        max_connections: int = 20,
+        max_concurrency: int = 4,
+        max_server_concurrency: int = 16,
+        refresh_margin: float = 60.0,
+        verify: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.base_url = base_url.rstrip('/') + '/'
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.max_server_concurrency = max_server_concurrency
+        self.refresh_margin = refresh_margin
+        self.verify = verify
+        self.transport = transport
+        self.clock = clock
+        self.sessions: Dict[Tuple[str, str], SAPSession] = {}
+        self.stats = {"logins": 0, "requests": 0, "retries": 0}
+        self._loop = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._server_slots: Optional[FairSemaphore] = None
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            if self._client is not None:
+                logger.warning(f"SAP pool {self.base_url}: HTTP client of a previous event loop was not released")
+            self._loop = loop
+            self._client = None
+            self._locks = {}
+            self._semaphores = {}
+            self._server_slots = FairSemaphore(self.max_server_concurrency)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        self._bind_loop()
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                verify=self.verify,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                # Sin cookie jar: la sesión va en la cabecera de cada petición
+                cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+            )
+        return self._client
+
+    def _semaphore(self, company_db: str) -> asyncio.Semaphore:
+        self._bind_loop()
+        if company_db not in self._semaphores:
+            self._semaphores[company_db] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[company_db]
+
+    def _lock(self, key: Tuple[str, str]) -> asyncio.Lock:
+        self._bind_loop()
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    def _valid(self, session: Optional[SAPSession]) -> bool:
+        return session is not None and self.clock() < session.expires_at - self.refresh_margin
+
+    async def session(self, company_db: str, username: str, password: str) -> SAPSession:
+        """Sesión vigente de (company_db, username); login si no hay o está por caducar"""
+        key = (company_db, username)
+        session = self.sessions.get(key)
+        if self._valid(session):
+            return session
+
+        async with self._lock(key):
+            session = self.sessions.get(key)
+            if self._valid(session):
+                return session
+            session = await self._login(company_db, username, password)
+            self.sessions[key] = session
+            return session
+
+    async def _login(self, company_db: str, username: str, password: str) -> SAPSession:
+        try:
+            response = await self.client.post('Login', json={
+                'CompanyDB': company_db,
+                'UserName': username,
+                'Password': password
+            })
+        except httpx.HTTPError as e:
+            raise SAPServiceLayerError(f"No se pudo conectar con SAP Business One: {e}")
+
+        if response.is_error:
+            message, code = _error_details(response)
+            raise SAPServiceLayerError(f"Error de autenticación en SAP: {message}", response.status_code, code)
+
+        data = response.json()
+        self.stats["logins"] += 1
+        logger.info(f"SAP Service Layer login for {company_db}/{username}")
+        return SAPSession(
+            data['SessionId'],
+            response.cookies.get('ROUTEID'),
+            float(data.get('SessionTimeout', 30)) * 60,
+            self.clock()
+        )
+
+    def invalidate(self, company_db: str, username: str, session: Optional[SAPSession] = None) -> None:
+        """Descartar la sesión (solo si sigue siendo `session`, cuando se indica)"""
+        key = (company_db, username)
+        if session is None or self.sessions.get(key) is session:
+            self.sessions.pop(key, None)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        company_db: str,
+        username: str,
+        password: str,
+        **kwargs: Any
+    ) -> httpx.Response:
+        """
+        Petición autenticada al Service Layer
+
+        Raises:
+            SAPServiceLayerError: Respuesta de error o fallo de conexión
+        """
+        async with self._semaphore(company_db):
+            await self._server_slots.acquire(company_db)
+            try:
+                response, session = await self._send(method, path, company_db, username, password, kwargs)
+            finally:
+                self._server_slots.release()
+
+        if response.is_error:
+            message, code = _error_details(response)
+            raise SAPServiceLayerError(message, response.status_code, code)
+        session.touch(self.clock())
+        return response
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        company_db: str,
+        username: str,
+        password: str,
+        kwargs: Dict[str, Any]
+    ) -> Tuple[httpx.Response, SAPSession]:
+        """Petición con la sesión vigente; un 401 invalida la sesión y se reintenta una vez"""
+        for attempt in range(2):
+            session = await self.session(company_db, username, password)
+            headers = {**kwargs.pop('headers', {}), 'Cookie': session.cookie}
+            try:
+                response = await self.client.request(method, path.lstrip('/'), headers=headers, **kwargs)
+            except httpx.HTTPError as e:
+                raise SAPServiceLayerError(f"Error de conexión con SAP: {e}")
+            self.stats["requests"] += 1
+
+            if response.status_code == 401 and attempt == 0:
+                # Sesión caducada o cerrada en el servidor: login y reintento
+                self.stats["retries"] += 1
+                self.invalidate(company_db, username, session)
+                kwargs['headers'] = headers
+                continue
+            break
+        return response, session
+
+    async def release(self) -> None:
+        """Cerrar el cliente HTTP del loop actual, conservando las sesiones"""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+
+    async def close(self) -> None:
+        """Cerrar las sesiones (best effort) y el pool de conexiones"""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            for session in list(self.sessions.values()):
+                try:
+                    await self._client.post('Logout', headers={'Cookie': session.cookie})
+                except httpx.HTTPError:
+                    pass
+            await self._client.aclose()
+        self._client = None
+        self.sessions.clear()
+
+def _new_pool(base_url: str) -> SAPServiceLayerPool:
+    return SAPServiceLayerPool(
+        base_url,
+        timeout=settings.SAP_TIMEOUT,
+        max_connections=settings.SAP_MAX_CONNECTIONS,
+        max_concurrency=settings.SAP_MAX_CONCURRENCY_PER_COMPANY,
+        max_server_concurrency=settings.SAP_MAX_CONCURRENCY_PER_SERVER,
+        refresh_margin=settings.SAP_SESSION_REFRESH_MARGIN,
+        verify=settings.SAP_VERIFY_SSL
+    )
+
+# Pool del servidor por defecto (SAP_SERVICE_LAYER_URL) y de los demás servidores
+sap_pool = _new_pool(settings.SAP_SERVICE_LAYER_URL)
+server_pools: Dict[str, SAPServiceLayerPool] = {}
+
+def service_layer_url(server_url: Optional[str]) -> Optional[str]:
+    """URL del Service Layer a partir de Company.sap_server_url (con o sin /b1s/v1)"""
+    if not server_url:
+        return None
+    server_url = server_url.rstrip('/')
+    return server_url if '/b1s/' in server_url else f"{server_url}/b1s/v1"
+
+def get_pool(server_url: Optional[str] = None) -> SAPServiceLayerPool:
+    """Pool compartido del servidor (el de SAP_SERVICE_LAYER_URL si no se indica)"""
+    base_url = service_layer_url(server_url)
+    if base_url is None or base_url.rstrip('/') == sap_pool.base_url.rstrip('/'):
+        return sap_pool
+    if base_url not in server_pools:
+        server_pools[base_url] = _new_pool(base_url)
+    return server_pools[base_url]
+
+async def close_pools() -> None:
+    """Cerrar los pools de todos los servidores"""
+    for pool in [sap_pool, *server_pools.values()]:
+        await pool.close()
+
+def run_with_pools(coroutine: Awaitable[T]) -> T:
+    """
+    asyncio.run para código síncrono (trabajos de Celery) que usa los pools
+
+    Al terminar se cierran los clientes HTTP de los pools en el mismo loop;
+    las sesiones se conservan para el siguiente trabajo.
+    """
+    async def run() -> T:
+        try:
+            return await coroutine
+        finally:
+            for pool in [sap_pool, *server_pools.values()]:
+                await pool.release()
+    return asyncio.run(run())
+
+class SAPService:
+    """
+    Operaciones del Service Layer para una compañía
+
+    Es un objeto ligero (uno por petición o trabajo): las conexiones y las
+    sesiones son las del pool compartido.
+    """
+
+    def __init__(
+        self,
+        company_db: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        pool: Optional[SAPServiceLayerPool] = None
+    ):
+        self.company_db = company_db or settings.SAP_DEFAULT_COMPANY
+        self.username = username or settings.SAP_USERNAME
+        self.password = password or settings.SAP_PASSWORD
+        self.pool = pool or sap_pool
+
+    @classmethod
+    def for_company(cls, company: Company, pool: Optional[SAPServiceLayerPool] = None) -> 'SAPService':
+        """Servicio con el servidor, la base de datos SAP y el usuario configurados en la compañía"""
+        return cls(
+            company_db=company.sap_company_db or company.sap_database,
+            username=company.sap_username,
+            pool=pool or get_pool(company.sap_server_url)
+        )
+
+    async def set_company(self, company_db: str) -> None:
+        """Cambiar de compañía (la sesión de cada compañía se conserva en el pool)"""
+        self.company_db = company_db
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        if not self.username:
+            raise SAPServiceLayerError("Usuario de SAP no configurado")
+        return await self.pool.request(method, path, self.company_db, self.username, self.password, **kwargs)
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        response = await self.request('GET', path, params={
+            key: value for key, value in (params or {}).items() if value is not None
+        })
+        return response.json()
+
+    async def iter_pages(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Páginas de una consulta OData siguiendo odata.nextLink (paginación del servidor)
+
+        page_size se pide con Prefer: odata.maxpagesize; sin él rige el
+        tamaño de página configurado en el Service Layer.
+        """
+        headers = {'Prefer': f"odata.maxpagesize={page_size}"} if page_size else {}
+        response = await self.request('GET', path, headers=headers, params={
+            key: value for key, value in (params or {}).items() if value is not None
+        })
+        while True:
+            data = response.json()
+            yield data.get('value', [])
+            link = data.get('odata.nextLink') or data.get('@odata.nextLink')
+            if not link:
+                return
+            response = await self.request('GET', self._relative_link(link), headers=dict(headers))
+
+    def _relative_link(self, link: str) -> str:
+        """nextLink relativo a la URL base del Service Layer"""
+        url = httpx.URL(link)
+        if url.is_absolute_url:
+            link = url.raw_path.decode()
+        base_path = httpx.URL(self.pool.base_url).path
+        return link[len(base_path):] if link.startswith(base_path) else link
+
+    async def post(self, path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self.request('POST', path, json=data)
+        return response.json() if response.content else {}
+
+    async def patch(self, path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self.request('PATCH', path, json=data)
+        return response.json() if response.content else {}
+
+    async def test_connection(self) -> Dict[str, Any]:
+        """Comprobar credenciales y conectividad (login o sesión vigente)"""
+        await self.pool.session(self.company_db, self.username, self.password)
+        return {"status": "connected", "company": self.company_db}
+
+    async def get_business_partners(self, card_type: str = 'C') -> List[Dict[str, Any]]:
+        """Business partners de un tipo (C = clientes, S = proveedores)"""
+        response = await self.get('BusinessPartners', {
+            '$filter': f"CardType eq '{card_type}'",
+            '$select': 'CardCode,CardName,CardType,Currency,CreditLine,CurrentAccountBalance'
+        })
+        return response.get('value', [])
+
+    async def get_business_partner(self, card_code: str) -> Dict[str, Any]:
+        return await self.get(f"BusinessPartners('{card_code}')")
+
+    async def get_pending_documents(self, document_type: str = 'Invoices') -> List[Dict[str, Any]]:
+        """Documentos abiertos (Invoices, PurchaseInvoices, ...)"""
+        response = await self.get(document_type, {
+            '$filter': "DocumentStatus eq 'bost_Open'",
+            '$select': 'DocEntry,DocNum,CardCode,CardName,DocDate,DocDueDate,DocTotal,DocCurrency'
+        })
+        return response.get('value', [])
@@ -0,0 +1,231 @@
+# api-gateway/app/services/sap_sync.py
+"""
+Sincronización de amortizaciones con SAP Business One.
+
+Por cada cuota se crea un asiento (JournalEntries) contra la cuenta de
+amortización de la compañía y, si la cuota tiene importe pagado, un pago
+(IncomingPayments para clientes, VendorPayments para proveedores)
+aplicado a ese asiento. Los documentos se envían en $batch
+(SAPBatchPoster) y su número se guarda en sap_journal_entry /
+sap_payment_entry tras cada petición, así que volver a sincronizar solo
+envía lo que falta. Un envío sin respuesta no se repite a ciegas: el
+documento se busca antes en SAP (asientos por Reference/Reference2, pagos
+por CardCode/DocDate/Remarks).
+
+Cuentas:
+- Asientos: Company.default_amortization_account.
+- Pagos: cuenta de transferencia en el ajuste de compañía
+  ``sap_payment_account``.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+import logging
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..models.amortization import Amortization, AmortizationInstallment
+from ..models.company import Company, CompanySetting
+from ..models.entity import Entity
+from .sap_batch import BatchOperation, BatchResult, SAPBatchPoster
+from .sap_service import SAPService
+
+logger = logging.getLogger(__name__)
+
+# Amortizaciones por bloque (las cuotas de un bloque se envían juntas)
+SAP_SYNC_CHUNK_SIZE = 500
+
+PAYMENT_DOCUMENTS = {'cliente': 'IncomingPayments', 'proveedor': 'VendorPayments'}
+
+PAYMENT_ACCOUNT_SETTING = 'sap_payment_account'
+
+# Campos que identifican cada documento en SAP (búsqueda si un envío queda sin respuesta)
+JOURNAL_LOOKUP_FIELDS = ('Reference', 'Reference2')
+PAYMENT_LOOKUP_FIELDS = ('CardCode', 'DocDate', 'Remarks')
+
+def document_operation(key: Any, path: str, body: Dict[str, Any], lookup_fields: Tuple[str, ...]) -> BatchOperation:
+    """Creación de un documento, identificable por sus lookup_fields"""
+    return BatchOperation(key, 'POST', path, body, {field: body[field] for field in lookup_fields})
+
+def journal_entry(amortization: Any, installment: Any, account: str) -> Dict[str, Any]:
+    """Asiento de una cuota: cliente contra cuenta de amortización (al revés para proveedores)"""
+    amount = float(installment.total_amount)
+    debit, credit = ({'Debit': amount}, {'Credit': amount})
+    partner_line, account_line = (debit, credit) if amortization.entity_type == 'cliente' else (credit, debit)
+    return {
+        'ReferenceDate': installment.due_date.isoformat(),
+        'DueDate': installment.due_date.isoformat(),
+        'Reference': amortization.reference[:100],
+        'Reference2': f"{installment.installment_number}/{amortization.total_installments}",
+        'Memo': f"Amortización {amortization.reference}"[:50],
+        'JournalEntryLines': [
+            {'ShortName': amortization.sap_card_code, **partner_line},
+            {'AccountCode': account, **account_line}
+        ]
+    }
+
+def payment(amortization: Any, installment: Any, journal_entry_number: int, account: str) -> Dict[str, Any]:
+    """Pago por transferencia aplicado al asiento de la cuota"""
+    amount = float(installment.paid_amount)
+    payment_date = (installment.payment_date or installment.due_date).isoformat()
+    return {
+        'CardCode': amortization.sap_card_code,
+        'DocDate': payment_date,
+        'TransferAccount': account,
+        'TransferDate': payment_date,
+        'TransferSum': amount,
+        'Remarks': f"Amortización {amortization.reference} cuota {installment.installment_number}"[:254],
+        'PaymentInvoices': [{
+            'DocEntry': journal_entry_number,
+            'InvoiceType': 'it_JournalEntry',
+            'SumApplied': amount
+        }]
+    }
+
+class SAPDocumentSync:
+    """
+    Creación de los documentos SAP de las cuotas de una compañía
+
+    Args:
+        db: Sesión de base de datos
+        company: Compañía de las amortizaciones
+        sap: Servicio SAP (por defecto el de la compañía)
+        poster: Envío por lotes (por defecto con la configuración SAP_BATCH_*)
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        company: Company,
+        sap: Optional[SAPService] = None,
+        poster: Optional[SAPBatchPoster] = None
+    ):
+        self.db = db
+        self.company_id = company.id
+        self.account = company.default_amortization_account
+        self.payment_account = db.execute(
+            select(CompanySetting.setting_value).where(
+                CompanySetting.company_id == company.id,
+                CompanySetting.setting_key == PAYMENT_ACCOUNT_SETTING
+            )
+        ).scalar()
+        self.poster = poster or SAPBatchPoster(sap or SAPService.for_company(company))
+
+    async def sync(self, amortization_ids: List[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Enviar los documentos pendientes de las amortizaciones
+
+        Returns:
+            (resultados, errores) por amortización, con el formato de
+            BulkOperationResponse (los errores incluyen company_id)
+        """
+        results, errors = [], []
+        for start in range(0, len(amortization_ids), SAP_SYNC_CHUNK_SIZE):
+            chunk_results, chunk_errors = await self._sync_chunk(amortization_ids[start:start + SAP_SYNC_CHUNK_SIZE])
+            results.extend(chunk_results)
+            errors.extend(chunk_errors)
+        return results, errors
+
+    def _store(self, column: str, response_key: str):
+        """on_success: guardar el número de documento de cada operación y confirmar"""
+        def on_success(succeeded: List[Tuple[BatchOperation, BatchResult]]) -> None:
+            self.db.execute(update(AmortizationInstallment), [
+                {'id': operation.key[1], column: int(result.body[response_key])}
+                for operation, result in succeeded
+            ])
+            self.db.commit()
+        return on_success
+
+    async def _sync_chunk(self, amortization_ids: List[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        amortizations = {
+            row.id: row for row in self.db.execute(
+                select(
+                    Amortization.id, Amortization.reference, Amortization.total_installments,
+                    Entity.sap_card_code, Entity.type.label('entity_type')
+                )
+                .join(Entity, Amortization.entity_id == Entity.id)
+                .where(Amortization.id.in_(amortization_ids))
+            )
+        }
+        installments = self.db.execute(
+            select(
+                AmortizationInstallment.id, AmortizationInstallment.amortization_id,
+                AmortizationInstallment.installment_number, AmortizationInstallment.due_date,
+                AmortizationInstallment.payment_date, AmortizationInstallment.total_amount,
+                AmortizationInstallment.paid_amount, AmortizationInstallment.sap_journal_entry,
+                AmortizationInstallment.sap_payment_entry
+            )
+            .where(AmortizationInstallment.amortization_id.in_(amortization_ids))
+            .order_by(AmortizationInstallment.amortization_id, AmortizationInstallment.installment_number)
+        ).all()
+
+        posted: Dict[str, Dict[str, int]] = {
+            amortization_id: {'journal_entries': 0, 'payments': 0} for amortization_id in amortizations
+        }
+        failures: Dict[str, List[str]] = defaultdict(list)
+
+        # 1. Asientos de las cuotas que no los tienen
+        journal_entries = {row.id: row.sap_journal_entry for row in installments}
+        missing = [row for row in installments if row.sap_journal_entry is None]
+        if missing and not self.account:
+            for amortization_id in {row.amortization_id for row in missing}:
+                failures[amortization_id].append("Cuenta de amortización de la compañía no configurada")
+            missing = []
+        journal_results = await self.poster.post([
+            document_operation(('journal', row.id), 'JournalEntries',
+                               journal_entry(amortizations[row.amortization_id], row, self.account),
+                               JOURNAL_LOOKUP_FIELDS)
+            for row in missing
+        ], on_success=self._store('sap_journal_entry', 'JdtNum'))
+
+        by_installment = {row.id: row for row in installments}
+        for (_, installment_id), result in journal_results.items():
+            amortization_id = by_installment[installment_id].amortization_id
+            if result.ok:
+                journal_entries[installment_id] = int(result.body['JdtNum'])
+                posted[amortization_id]['journal_entries'] += 1
+            else:
+                failures[amortization_id].append(f"Cuota {by_installment[installment_id].installment_number}: {result.error}")
+
+        # 2. Pagos de las cuotas con importe pagado, aplicados a su asiento
+        unpaid = [
+            row for row in installments
+            if row.paid_amount and row.sap_payment_entry is None and journal_entries[row.id] is not None
+        ]
+        if unpaid and not self.payment_account:
+            for amortization_id in {row.amortization_id for row in unpaid}:
+                failures[amortization_id].append(f"Cuenta de pagos no configurada ({PAYMENT_ACCOUNT_SETTING})")
+            unpaid = []
+        payment_results = await self.poster.post([
+            document_operation(('payment', row.id),
+                               PAYMENT_DOCUMENTS.get(amortizations[row.amortization_id].entity_type, 'IncomingPayments'),
+                               payment(amortizations[row.amortization_id], row, journal_entries[row.id], self.payment_account),
+                               PAYMENT_LOOKUP_FIELDS)
+            for row in unpaid
+        ], on_success=self._store('sap_payment_entry', 'DocEntry'))
+
+        for (_, installment_id), result in payment_results.items():
+            amortization_id = by_installment[installment_id].amortization_id
+            if result.ok:
+                posted[amortization_id]['payments'] += 1
+            else:
+                failures[amortization_id].append(
+                    f"Pago cuota {by_installment[installment_id].installment_number}: {result.error}"
+                )
+
+        results, errors = [], []
+        for amortization_id, counts in posted.items():
+            if failures.get(amortization_id):
+                errors.append({
+                    'id': amortization_id,
+                    'company_id': self.company_id,
+                    'error': f"{len(failures[amortization_id])} documentos no creados: {failures[amortization_id][0]}",
+                    **counts
+                })
+            else:
+                results.append({'id': amortization_id, 'company_id': self.company_id, **counts})
+        logger.info(
+            f"SAP sync {self.company_id}: {len(results)} amortizations synced, {len(errors)} with errors "
+            f"({self.poster.stats['requests']} $batch requests)"
+        )
+        return results, errors
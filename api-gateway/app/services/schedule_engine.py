@@ -0,0 +1,255 @@
+# api-gateway/app/services/schedule_engine.py
+"""
+Motor vectorizado de cálculo de tablas de amortización.
+
+Calcula en un solo paso las cuotas de N amortizaciones como arrays
+columnares (número de cuota, vencimiento, capital, interés, total y saldo).
+Los importes se manejan en céntimos enteros y el redondeo se concilia al
+final de cada tabla para que la suma del capital coincida exactamente con
+el monto total.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+import numpy as np
+
+from ..utils.due_dates import FREQUENCY_MONTHS, due_date_table, to_date
+
+AMORTIZATION_METHODS = ('linear', 'french', 'german', 'decreasing')
+
+_CENT = Decimal('0.01')
+
+def _to_cents(amount: Any) -> int:
+    """Convertir un monto a céntimos enteros (redondeo half-up)"""
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    """Redondear importes (en céntimos) al entero más cercano, half-up"""
+    return (np.sign(values) * np.floor(np.abs(values) + 0.5)).astype(np.int64)
+
+def _value(config: Any, field: str, default: Any = None) -> Any:
+    """Leer un campo de configuración desde un objeto o un dict"""
+    if isinstance(config, dict):
+        value = config.get(field, default)
+    else:
+        value = getattr(config, field, default)
+    if value is None:
+        return default
+    # Enums de los schemas (AmortizationMethod, PaymentFrequency)
+    return getattr(value, 'value', value)
+
+class ScheduleBatch:
+    """
+    Resultado columnar de un cálculo por lotes.
+
+    Las filas de todas las tablas se guardan concatenadas; ``offsets[i]`` y
+    ``offsets[i + 1]`` delimitan las cuotas de la configuración ``i``.
+    Los importes se expresan en céntimos (int64).
+    """
+
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        installment_number: np.ndarray,
+        due_date: np.ndarray,
+        principal: np.ndarray,
+        interest: np.ndarray,
+        total: np.ndarray,
+        balance: np.ndarray
+    ):
+        self.offsets = offsets
+        self.installment_number = installment_number
+        self.due_date = due_date
+        self.principal = principal
+        self.interest = interest
+        self.total = total
+        self.balance = balance
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def row_count(self) -> int:
+        """Total de cuotas calculadas en el lote"""
+        return int(self.offsets[-1])
+
+    def bounds(self, index: int) -> Tuple[int, int]:
+        """Rango de filas de la tabla ``index``"""
+        return int(self.offsets[index]), int(self.offsets[index + 1])
+
+    def schedule(self, index: int) -> List[Dict[str, Any]]:
+        """
+        Obtener la tabla de una configuración como lista de dicts.
+
+        Usa las mismas claves que ``Amortization.calculate_installments``
+        con importes ``Decimal`` redondeados a céntimos.
+        """
+        start, end = self.bounds(index)
+        numbers = self.installment_number[start:end].tolist()
+        due_dates = self.due_date[start:end].tolist()
+        principal = self.principal[start:end].tolist()
+        interest = self.interest[start:end].tolist()
+        total = self.total[start:end].tolist()
+        balance = self.balance[start:end].tolist()
+
+        return [
+            {
+                'installment_number': numbers[i],
+                'due_date': due_dates[i],
+                'principal_amount': Decimal(principal[i]) * _CENT,
+                'interest_amount': Decimal(interest[i]) * _CENT,
+                'total_amount': Decimal(total[i]) * _CENT,
+                'remaining_balance': Decimal(balance[i]) * _CENT,
+            }
+            for i in range(end - start)
+        ]
+
+    def iter_schedules(self) -> Iterator[List[Dict[str, Any]]]:
+        """Iterar las tablas en el mismo orden que las configuraciones"""
+        for index in range(len(self)):
+            yield self.schedule(index)
+
+    def totals(self, index: int) -> Dict[str, Decimal]:
+        """Totales de capital, interés e importe de la tabla ``index``"""
+        start, end = self.bounds(index)
+        return {
+            'total_principal': Decimal(int(self.principal[start:end].sum())) * _CENT,
+            'total_interest': Decimal(int(self.interest[start:end].sum())) * _CENT,
+            'total_amount': Decimal(int(self.total[start:end].sum())) * _CENT,
+        }
+
+def calculate_schedules(
+    configs: Sequence[Any],
+    roll: Optional[str] = None,
+    holidays: Iterable[date] = ()
+) -> ScheduleBatch:
+    """
+    Calcular las tablas de amortización de varias configuraciones a la vez
+
+    Args:
+        configs: Objetos o dicts con total_amount, total_installments,
+            interest_rate (anual, en %), start_date, amortization_method y
+            frequency (p. ej. instancias de Amortization o
+            AmortizationCalculation)
+        roll: Convención de ajuste de vencimientos a día hábil
+        holidays: Festivos para el ajuste a día hábil
+
+    Returns:
+        ScheduleBatch con las cuotas de todas las configuraciones
+    """
+    count = len(configs)
+    if count == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return ScheduleBatch(
+            offsets=np.zeros(1, dtype=np.int64),
+            installment_number=empty,
+            due_date=np.empty(0, dtype='datetime64[D]'),
+            principal=empty,
+            interest=empty,
+            total=empty,
+            balance=empty
+        )
+
+    principal_cents = np.empty(count, dtype=np.int64)
+    periods = np.empty(count, dtype=np.int64)
+    annual_rate = np.empty(count, dtype=np.float64)
+    months = np.empty(count, dtype=np.int64)
+    methods = np.empty(count, dtype=np.int8)
+    date_keys = []
+
+    for i, config in enumerate(configs):
+        method = _value(config, 'amortization_method', 'linear')
+        if method not in AMORTIZATION_METHODS:
+            raise ValueError(f'amortization_method must be one of: {list(AMORTIZATION_METHODS)}')
+
+        installments = int(_value(config, 'total_installments', 0))
+        if installments < 1:
+            raise ValueError('total_installments must be greater than zero')
+
+        frequency = _value(config, 'frequency', 'monthly')
+        principal_cents[i] = _to_cents(_value(config, 'total_amount', 0))
+        periods[i] = installments
+        annual_rate[i] = float(_value(config, 'interest_rate', 0))
+        months[i] = FREQUENCY_MONTHS.get(frequency, 1)
+        methods[i] = AMORTIZATION_METHODS.index(method)
+        date_keys.append((to_date(_value(config, 'start_date')), frequency, installments))
+
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(periods, out=offsets[1:])
+    rows = int(offsets[-1])
+
+    # Índice de configuración y número de cuota (1..n) de cada fila
+    owner = np.repeat(np.arange(count), periods)
+    number = np.arange(rows, dtype=np.int64) - offsets[:-1][owner] + 1
+
+    n = periods[owner].astype(np.float64)
+    k = number.astype(np.float64)
+    amount = principal_cents[owner].astype(np.float64)
+    # Tasa por período según la frecuencia (anual / períodos por año)
+    rate = annual_rate[owner] / 100.0 * months[owner] / 12.0
+    method = methods[owner]
+
+    principal = np.empty(rows, dtype=np.float64)
+
+    # linear / german: cuotas iguales de capital
+    mask = (method == AMORTIZATION_METHODS.index('linear')) | \
+           (method == AMORTIZATION_METHODS.index('german'))
+    principal[mask] = amount[mask] / n[mask]
+
+    # decreasing: capital decreciente por suma de dígitos (n, n-1, ..., 1)
+    mask = method == AMORTIZATION_METHODS.index('decreasing')
+    principal[mask] = amount[mask] * (n[mask] - k[mask] + 1.0) / (n[mask] * (n[mask] + 1.0) / 2.0)
+
+    # french: cuota total constante (sin interés equivale a capital constante)
+    french = method == AMORTIZATION_METHODS.index('french')
+    mask = french & (rate <= 0)
+    principal[mask] = amount[mask] / n[mask]
+
+    mask = french & (rate > 0)
+    r = rate[mask]
+    growth_n = np.power(1.0 + r, n[mask])
+    growth_k = np.power(1.0 + r, k[mask] - 1.0)
+    payment = amount[mask] * r * growth_n / (growth_n - 1.0)
+    opening = amount[mask] * growth_k - payment * (growth_k - 1.0) / r
+    # Cuota e interés se redondean por separado para que el total sea constante
+    french_interest = _round_cents(opening * r)
+    principal[mask] = _round_cents(payment) - french_interest
+
+    # Redondeo a céntimos y conciliación: la última cuota absorbe el residuo
+    principal_rounded = _round_cents(principal)
+    last_rows = offsets[1:] - 1
+    group_sums = np.add.reduceat(principal_rounded, offsets[:-1])
+    principal_rounded[last_rows] += principal_cents - group_sums
+
+    cumulative = np.cumsum(principal_rounded)
+    paid_before_group = np.concatenate(([0], cumulative[last_rows][:-1]))
+    balance = principal_cents[owner] - (cumulative - paid_before_group[owner])
+
+    # Interés sobre el saldo pendiente al inicio de cada período
+    interest = _round_cents((balance + principal_rounded) * rate)
+    interest[mask] = french_interest
+    total = principal_rounded + interest
+
+    # Vencimientos: rejilla memorizada por (start_date, frequency, n)
+    holidays = tuple(holidays)
+    due_date = np.empty(rows, dtype='datetime64[D]')
+    for i, (start_date, frequency, installments) in enumerate(date_keys):
+        due_date[offsets[i]:offsets[i + 1]] = due_date_table(
+            start_date, frequency, installments, roll, holidays
+        )
+
+    return ScheduleBatch(
+        offsets=offsets,
+        installment_number=number,
+        due_date=due_date,
+        principal=principal_rounded,
+        interest=interest,
+        total=total,
+        balance=balance
+    )
+
+def calculate_schedule(config: Any, roll: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Calcular la tabla de una sola configuración usando el motor por lotes"""
+    return calculate_schedules([config], roll=roll).schedule(0)
@@ -0,0 +1,272 @@
+# api-gateway/app/utils/cache.py
+"""
+Caché de respuestas en Redis para endpoints de lectura.
+
+Las entradas guardan el JSON ya serializado y su ETag. La clave incluye
+el propietario (company_id o amortization_id), la consulta normalizada y
+un contador de generación del propietario: invalidar es un INCR del
+contador, sin buscar ni borrar claves (las entradas antiguas caducan por
+TTL). Las respuestas de una amortización incluyen también la generación de
+su compañía, así que invalidar la compañía las invalida.
+
+Si Redis no responde, la caché se desactiva durante RETRY_AFTER segundos
+y los endpoints responden sin caché (el ETag se sigue calculando). Una
+invalidación perdida en ese intervalo queda acotada por CACHE_TTL.
+"""
+from typing import Any, Iterable, List, NamedTuple, Optional, Tuple
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import time
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from ..config import settings
+from .serialization import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+class CachedResponse(NamedTuple):
+    """Cuerpo JSON serializado y su ETag"""
+    body: bytes
+    etag: str
+
+@lru_cache(maxsize=64)
+def _type_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+def serialize_response(response_model: Any, content: Any) -> CachedResponse:
+    """Validar contra el response_model y serializar a JSON (como FastAPI)"""
+    adapter = _type_adapter(response_model)
+    body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+    return encoded_response(body)
+
+def encoded_response(body: bytes) -> CachedResponse:
+    """JSON ya codificado (utils.serialization) con su ETag"""
+    return CachedResponse(body, make_etag(body))
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Comprobar If-None-Match (admite lista, comodín y ETags débiles)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(
+        (value[2:] if value.startswith("W/") else value) == etag for value in candidates
+    )
+
+def etag_response(request: Request, cached: CachedResponse) -> Response:
+    """Respuesta JSON con ETag, o 304 si el cliente ya tiene esa versión"""
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(content=cached.body, headers=headers)
+
+def normalize_query(params: Iterable[Tuple[str, Any]], exclude: Iterable[str] = ()) -> str:
+    """Consulta normalizada: parámetros ordenados, sin vacíos ni excluidos"""
+    excluded = set(exclude)
+    items = sorted(
+        (key, str(value)) for key, value in params
+        if key not in excluded and value not in (None, "")
+    )
+    return json.dumps(items, separators=(",", ":"))
+
+class ResponseCache:
+    """Caché de respuestas serializadas en Redis con invalidación por generación"""
+
+    RETRY_AFTER = 30
+
+    def __init__(self, redis_url: str, ttl: int, enabled: bool = True, prefix: str = "gateway:cache"):
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.enabled = enabled
+        self.prefix = prefix
+        self._client = None
+        self._sync_client = None
+        self._down_until = 0.0
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis.asyncio as redis
+            self._client = redis.from_url(
+                self.redis_url,
+                socket_connect_timeout=0.5,
+                socket_timeout=0.5
+            )
+        return self._client
+
+    @property
+    def sync_client(self):
+        """Cliente síncrono (workers de Celery), creado una vez y con su pool de conexiones"""
+        if self._sync_client is None:
+            import redis
+            self._sync_client = redis.from_url(
+                self.redis_url,
+                socket_connect_timeout=0.5,
+                socket_timeout=0.5
+            )
+        return self._sync_client
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and time.monotonic() >= self._down_until
+
+    def _failed(self, error: Exception) -> None:
+        self.stats["errors"] += 1
+        self._down_until = time.monotonic() + self.RETRY_AFTER
+        logger.warning(f"Response cache disabled for {self.RETRY_AFTER}s: {error}")
+
+    def _generation_key(self, owner_type: str, owner_id: str) -> str:
+        return f"{self.prefix}:gen:{owner_type}:{owner_id}"
+
+    async def key(
+        self,
+        scope: str,
+        owner_type: str,
+        owner_id: str,
+        params: Iterable[Tuple[str, Any]] = (),
+        company_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Construir la clave de una respuesta
+
+        Args:
+            scope: Endpoint (list, detail, installments)
+            owner_type: company o amortization (dueño de la invalidación)
+            owner_id: company_id o amortization_id
+            params: Parámetros de la consulta
+            company_id: Compañía del dueño (amortization): su generación
+                también forma parte de la clave
+
+        Returns:
+            Clave, o None si la caché no está disponible
+        """
+        if not self.available:
+            return None
+        generation_keys = [self._generation_key(owner_type, owner_id)]
+        if company_id and owner_type != "company":
+            generation_keys.append(self._generation_key("company", company_id))
+        try:
+            generations = await self.client.mget(generation_keys)
+        except Exception as e:
+            self._failed(e)
+            return None
+
+        generation = ".".join(str(int(value or 0)) for value in generations)
+        digest = hashlib.sha1(normalize_query(params).encode()).hexdigest()
+        return f"{self.prefix}:{scope}:{owner_type}:{owner_id}:{generation}:{digest}"
+
+    async def company_generation(self, company_id: str) -> Optional[str]:
+        """Generación actual de una compañía (None si la caché no está disponible)"""
+        if not self.available:
+            return None
+        try:
+            value = await self.client.get(self._generation_key("company", company_id))
+        except Exception as e:
+            self._failed(e)
+            return None
+        return str(int(value or 0))
+
+    def company_generation_sync(self, company_id: str) -> Optional[str]:
+        """company_generation con cliente síncrono (fuera del event loop)"""
+        if not self.available:
+            return None
+        try:
+            value = self.sync_client.get(self._generation_key("company", company_id))
+        except Exception as e:
+            self._failed(e)
+            return None
+        return str(int(value or 0))
+
+    async def get(self, key: Optional[str]) -> Optional[CachedResponse]:
+        if key is None or not self.available:
+            return None
+        try:
+            value = await self.client.get(key)
+        except Exception as e:
+            self._failed(e)
+            return None
+
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        etag, _, body = value.partition(b"\n")
+        return CachedResponse(body, etag.decode())
+
+    async def set(self, key: Optional[str], cached: CachedResponse) -> None:
+        if key is None or not self.available:
+            return
+        try:
+            await self.client.set(key, cached.etag.encode() + b"\n" + cached.body, ex=self.ttl)
+        except Exception as e:
+            self._failed(e)
+
+    async def invalidate(
+        self,
+        company_id: Optional[str] = None,
+        amortization_id: Optional[str] = None,
+        amortization_ids: Iterable[str] = ()
+    ) -> None:
+        """Invalidar las respuestas de una compañía y/o amortizaciones"""
+        if not self.enabled:
+            return
+        keys = self._invalidation_keys(company_id, amortization_id, amortization_ids)
+        if not keys:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.incr(key)
+                await pipe.execute()
+        except Exception as e:
+            # Sin invalidación no se puede seguir sirviendo desde caché
+            self._failed(e)
+
+    def invalidate_sync(
+        self,
+        company_id: Optional[str] = None,
+        amortization_id: Optional[str] = None,
+        amortization_ids: Iterable[str] = ()
+    ) -> None:
+        """invalidate con cliente síncrono (workers de Celery, fuera del event loop)"""
+        if not self.enabled:
+            return
+        keys = self._invalidation_keys(company_id, amortization_id, amortization_ids)
+        if not keys:
+            return
+        try:
+            with self.sync_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.incr(key)
+                pipe.execute()
+        except Exception as e:
+            self._failed(e)
+
+    def _invalidation_keys(
+        self,
+        company_id: Optional[str],
+        amortization_id: Optional[str],
+        amortization_ids: Iterable[str]
+    ) -> List[str]:
+        keys = []
+        if company_id:
+            keys.append(self._generation_key("company", company_id))
+        if amortization_id:
+            keys.append(self._generation_key("amortization", amortization_id))
+        keys.extend(self._generation_key("amortization", owner_id) for owner_id in amortization_ids)
+        return keys
+
+# Instancia global de la caché de respuestas
+response_cache = ResponseCache(
+    settings.REDIS_URL,
+    settings.CACHE_TTL,
+    enabled=settings.RESPONSE_CACHE_ENABLED
+)
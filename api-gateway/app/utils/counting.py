@@ -0,0 +1,209 @@
+# api-gateway/app/utils/counting.py
+"""
+Estrategias de conteo para listados paginados.
+
+- exact: COUNT(*) de la query filtrada (comportamiento original).
+- estimated: estimación del planificador de PostgreSQL (EXPLAIN) o
+  pg_class.reltuples si la query no tiene filtros. Si la estimación es
+  pequeña se hace el COUNT exacto, que en ese caso es barato.
+- cached: COUNT exacto reutilizado por (company_id, hash de filtros)
+  durante un TTL. Los totales se guardan en memoria de cada proceso, pero
+  la clave incluye la generación de la compañía en Redis (la de
+  ResponseCache): invalidar en cualquier proceso, API o worker, es un
+  INCR de esa generación y deja los totales antiguos inaccesibles en
+  todos. Si Redis no está disponible la clave va sin generación y solo
+  se invalida en el propio proceso; el retraso queda acotado por
+  COUNT_CACHE_TTL.
+
+En bases de datos distintas de PostgreSQL, estimated cae a exact.
+"""
+from typing import Any, Dict, Hashable, Optional, Tuple
+from sqlalchemy.engine import Dialect
+from sqlalchemy.orm import Query
+from sqlalchemy import text
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from ..config import settings
+from .cache import ResponseCache, response_cache
+
+logger = logging.getLogger(__name__)
+
+COUNT_MODES = ('exact', 'estimated', 'cached')
+
+class CountCache:
+    """
+    Caché en memoria de totales con TTL, indexada por (company_id, hash de filtros)
+
+    Con `generations`, invalidate incrementa también la generación de la
+    compañía en Redis, que forma parte de las claves (count_cache_key).
+    """
+
+    def __init__(self, ttl: float = 60, maxsize: int = 10000, generations: Optional[ResponseCache] = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generations = generations
+        self._data: Dict[Tuple[Optional[str], Hashable], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Optional[str], Hashable]) -> Optional[int]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, total = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return total
+
+    def set(self, key: Tuple[Optional[str], Hashable], total: int) -> None:
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl, total)
+
+    async def generation(self, company_id: Optional[str]) -> Optional[str]:
+        """Generación de la compañía en Redis para count_cache_key (None sin Redis)"""
+        if self.generations is None or not company_id:
+            return None
+        return await self.generations.company_generation(company_id)
+
+    def generation_sync(self, company_id: Optional[str]) -> Optional[str]:
+        """generation con cliente síncrono (fuera del event loop)"""
+        if self.generations is None or not company_id:
+            return None
+        return self.generations.company_generation_sync(company_id)
+
+    def invalidate(self, company_id: Optional[str] = None) -> None:
+        """Eliminar los totales de una compañía (o todos) en todos los procesos"""
+        with self._lock:
+            if company_id is None:
+                self._data.clear()
+            else:
+                for key in [key for key in self._data if key[0] == company_id]:
+                    del self._data[key]
+        if self.generations is not None and company_id:
+            self.generations.invalidate_sync(company_id=company_id)
+
+    def _evict(self) -> None:
+        """Eliminar entradas expiradas y, si no basta, la más antigua"""
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._data.items() if expires_at < now]:
+            del self._data[key]
+        if len(self._data) >= self.maxsize:
+            del self._data[min(self._data, key=lambda key: self._data[key][0])]
+
+# Instancia global de la caché de totales (generaciones de la caché de respuestas)
+count_cache = CountCache(ttl=settings.COUNT_CACHE_TTL, generations=response_cache)
+
+def filters_hash(filters: Any) -> str:
+    """Hash estable de un objeto de filtros (pydantic) o dict, ignorando valores vacíos"""
+    if hasattr(filters, 'dict'):
+        filters = filters.dict()
+    normalized = {
+        key: value for key, value in sorted(filters.items())
+        if value not in (None, False, '')
+    }
+    raw = json.dumps(normalized, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def count_cache_key(filters: Any, generation: Optional[str] = None) -> Tuple[Optional[str], str]:
+    """
+    Clave de caché (company_id, hash de filtros)
+
+    generation es la generación de la compañía leída antes de contar
+    (CountCache.generation / generation_sync): un total
+    calculado mientras otra escritura invalida queda en la generación
+    anterior.
+    """
+    company_id = filters.get('company_id') if isinstance(filters, dict) else getattr(filters, 'company_id', None)
+    digest = filters_hash(filters)
+    if generation is not None:
+        digest = f"{generation}:{digest}"
+    return company_id, digest
+
+def explain_sql(statement: Any, dialect: Dialect) -> Tuple[str, Any]:
+    """
+    EXPLAIN (FORMAT JSON) de una sentencia y sus parámetros para exec_driver_sql
+
+    Las listas IN se expanden (render_postcompile) y los parámetros siguen
+    el paramstyle del driver: dict para pyformat (psycopg2), tupla en el
+    orden de los marcadores para los posicionales ($1... de asyncpg).
+    """
+    compiled = statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return f"EXPLAIN (FORMAT JSON) {compiled}", params
+
+def _estimate_rows(query: Query) -> Optional[int]:
+    """Filas estimadas por PostgreSQL para la query (None si no es posible)"""
+    session = query.session
+    if session.get_bind().dialect.name != 'postgresql':
+        return None
+
+    statement = query.statement
+    if statement.whereclause is None:
+        table = query.column_descriptions[0]['entity'].__table__
+        row = session.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table.name}
+        ).first()
+        # reltuples = -1 si la tabla nunca se ha analizado
+        if row is not None and row[0] is not None and row[0] >= 0:
+            return int(row[0])
+
+    sql, params = explain_sql(statement, session.get_bind().dialect)
+    plan = session.connection().exec_driver_sql(sql, params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def count_query(
+    query: Query,
+    count_mode: str = "exact",
+    cache_key: Optional[Tuple[Optional[str], Hashable]] = None,
+    cache: Optional[CountCache] = None,
+    exact_threshold: Optional[int] = None
+) -> Tuple[int, str]:
+    """
+    Contar las filas de una query según la estrategia indicada
+
+    Args:
+        query: Query de SQLAlchemy (sin orden ni límites)
+        count_mode: exact, estimated o cached
+        cache_key: Clave (company_id, hash de filtros) para el modo cached
+        cache: Caché a usar (por defecto la global)
+        exact_threshold: En modo estimated, por debajo de este valor se cuenta exacto
+
+    Returns:
+        Tupla (total, modo que lo produjo)
+    """
+    if count_mode not in COUNT_MODES:
+        raise ValueError(f"count_mode must be one of: {list(COUNT_MODES)}")
+
+    if count_mode == "cached" and cache_key is not None:
+        cache = cache if cache is not None else count_cache
+        total = cache.get(cache_key)
+        if total is not None:
+            return total, "cached"
+        total = query.count()
+        cache.set(cache_key, total)
+        return total, "exact"
+
+    if count_mode == "estimated":
+        if exact_threshold is None:
+            exact_threshold = settings.COUNT_ESTIMATE_THRESHOLD
+        try:
+            estimate = _estimate_rows(query)
+        except Exception as e:
+            logger.warning(f"Row estimate failed, falling back to COUNT: {e}")
+            estimate = None
+        if estimate is not None and estimate >= exact_threshold:
+            return estimate, "estimated"
+
+    return query.count(), "exact"
@@ -0,0 +1,198 @@
+# api-gateway/app/utils/due_dates.py
+"""
+Cálculo de fechas de vencimiento con aritmética de calendario exacta.
+
+Las tablas de vencimientos se precalculan y memorizan por
+(start_date, frequency, n, roll), de modo que la generación y regeneración
+masiva de cuotas reutiliza la misma rejilla de fechas en lugar de
+recalcularla fila a fila.
+
+days_elapsed es la misma aritmética en SQL (días entre dos fechas), para
+calcular retrasos en el SELECT en lugar de con date.today() por fila.
+"""
+from typing import Iterable, List, Optional, Tuple, Union
+from datetime import date, datetime
+from functools import lru_cache
+import numpy as np
+
+from sqlalchemy import Date, Integer, func, literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+# Meses por período según la frecuencia de pago
+FREQUENCY_MONTHS = {
+    'monthly': 1,
+    'quarterly': 3,
+    'biannual': 6,
+    'annual': 12,
+}
+
+# Convenciones de ajuste a día hábil (nombre -> convención de numpy.busday_offset)
+BUSINESS_DAY_ROLLS = {
+    'following': 'following',
+    'modified_following': 'modifiedfollowing',
+    'preceding': 'preceding',
+    'modified_preceding': 'modifiedpreceding',
+}
+
+def to_date(value: Union[date, datetime, str]) -> date:
+    """Normalizar date/datetime/string ISO a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def frequency_months(frequency: Optional[str]) -> int:
+    """Meses por período de una frecuencia (mensual por defecto)"""
+    return FREQUENCY_MONTHS.get(frequency or 'monthly', 1)
+
+def month_offsets(start: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    Sumar meses a fechas (vectorizado) con ajuste a fin de mes
+
+    Args:
+        start: Fechas de inicio (datetime64[D])
+        months: Meses a sumar a cada fecha
+
+    Returns:
+        Array datetime64[D]; el día se conserva salvo que el mes destino sea
+        más corto (31 ene + 1 mes = 28/29 feb, 31 ene + 2 meses = 31 mar)
+    """
+    start = np.asarray(start, dtype='datetime64[D]')
+    start_month = start.astype('datetime64[M]')
+    day = (start - start_month.astype('datetime64[D]')).astype(np.int64)
+
+    target_month = start_month + np.asarray(months, dtype=np.int64)
+    first_day = target_month.astype('datetime64[D]')
+    month_length = ((target_month + 1).astype('datetime64[D]') - first_day).astype(np.int64)
+
+    return first_day + np.minimum(day, month_length - 1)
+
+def add_months(start_date: date, months: int) -> date:
+    """Sumar meses a una fecha con ajuste a fin de mes"""
+    return month_offsets(np.array([start_date], dtype='datetime64[D]'), np.array([months]))[0].item()
+
+def roll_business_days(
+    dates: np.ndarray,
+    roll: str,
+    holidays: Iterable[date] = ()
+) -> np.ndarray:
+    """
+    Ajustar fechas a día hábil (lunes a viernes, excluyendo festivos)
+
+    Args:
+        dates: Fechas a ajustar (datetime64[D])
+        roll: following, modified_following, preceding o modified_preceding
+        holidays: Festivos adicionales
+
+    Returns:
+        Array datetime64[D] con las fechas ajustadas
+    """
+    if roll not in BUSINESS_DAY_ROLLS:
+        raise ValueError(f'roll must be one of: {list(BUSINESS_DAY_ROLLS)}')
+
+    return np.busday_offset(
+        dates,
+        0,
+        roll=BUSINESS_DAY_ROLLS[roll],
+        holidays=np.array(sorted(holidays), dtype='datetime64[D]')
+    )
+
+@lru_cache(maxsize=8192)
+def _due_date_table(
+    start_date: date,
+    frequency: str,
+    n: int,
+    roll: Optional[str],
+    holidays: Tuple[date, ...]
+) -> np.ndarray:
+    numbers = np.arange(1, n + 1, dtype=np.int64)
+    table = month_offsets(
+        np.full(n, start_date, dtype='datetime64[D]'),
+        numbers * frequency_months(frequency)
+    )
+
+    if roll:
+        table = roll_business_days(table, roll, holidays)
+
+    # Las tablas se comparten entre llamadas: proteger contra escritura
+    table.flags.writeable = False
+    return table
+
+def due_date_table(
+    start_date: Union[date, str],
+    frequency: Optional[str],
+    n: int,
+    roll: Optional[str] = None,
+    holidays: Iterable[date] = ()
+) -> np.ndarray:
+    """
+    Tabla memorizada de vencimientos de las cuotas 1..n
+
+    Args:
+        start_date: Fecha de inicio de la amortización
+        frequency: monthly, quarterly, biannual o annual
+        n: Número de cuotas
+        roll: Convención de ajuste a día hábil (None = sin ajuste)
+        holidays: Festivos para el ajuste a día hábil
+
+    Returns:
+        Array datetime64[D] de solo lectura con n vencimientos
+    """
+    return _due_date_table(
+        to_date(start_date),
+        frequency or 'monthly',
+        int(n),
+        roll,
+        tuple(sorted(holidays))
+    )
+
+def generate_due_dates(
+    start_date: Union[date, str],
+    frequency: Optional[str],
+    n: int,
+    roll: Optional[str] = None,
+    holidays: Iterable[date] = ()
+) -> List[date]:
+    """Vencimientos de las cuotas 1..n como lista de date"""
+    return due_date_table(start_date, frequency, n, roll, holidays).tolist()
+
+def due_date_cache_info():
+    """Estadísticas de la caché de tablas de vencimiento"""
+    return _due_date_table.cache_info()
+
+def clear_due_date_cache() -> None:
+    """Vaciar la caché de tablas de vencimiento"""
+    _due_date_table.cache_clear()
+
+class days_elapsed(FunctionElement):
+    """
+    Días naturales entre `start` y `end` en SQL (negativo si end < start)
+
+    end admite una expresión o un date; por defecto CURRENT_DATE.
+    """
+    type = Integer()
+    name = 'days_elapsed'
+    inherit_cache = True
+
+    def __init__(self, start, end=None):
+        if end is None:
+            end = func.current_date()
+        elif isinstance(end, date):
+            end = literal(to_date(end), Date)
+        super().__init__(start, end)
+
+@compiles(days_elapsed)
+def _days_elapsed_default(element, compiler, **kw):
+    start, end = element.clauses
+    return (
+        f"CAST(julianday({compiler.process(end, **kw)}) - "
+        f"julianday({compiler.process(start, **kw)}) AS INTEGER)"
+    )
+
+@compiles(days_elapsed, 'postgresql')
+def _days_elapsed_postgresql(element, compiler, **kw):
+    # date - date es un entero en PostgreSQL
+    start, end = element.clauses
+    return f"({compiler.process(end, **kw)} - {compiler.process(start, **kw)})"
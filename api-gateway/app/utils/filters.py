@@ -5,6 +5,8 @@ from pydantic import BaseModel, validator
 from sqlalchemy.orm import Query
 from sqlalchemy import and_, or_, func, text
 
+from .search import search_condition, is_search_column, query_dialect_name
+
 class BaseFilters(BaseModel):
     """Filtros base para todas las entidades"""
     company_id: Optional[str] = None
@@ -158,26 +160,20 @@ def apply_amortization_filters(query: Query, filters: AmortizationFilters, model
     if filters.pending_only:
         query = query.filter(model.status.in_(['active', 'overdue']))
     
-    # Filtro de búsqueda general
+    # Filtro de búsqueda general (reference/description normalizados e indexados)
     if filters.search:
-        search_term = f"%{filters.search}%"
-        query = query.filter(
-            or_(
-                model.reference.ilike(search_term),
-                model.description.ilike(search_term)
-            )
-        )
-    
-    # Filtro por nombre de entidad (requiere join)
-    if filters.entity_name:
+        query = apply_search_filter(query, filters.search, [model.search_text])
+    
+    # Filtros por nombre y tipo de entidad (un solo join con Entity)
+    if filters.entity_name or filters.entity_type:
         from ..models.entity import Entity
-        entity_search = f"%{filters.entity_name}%"
-        query = query.join(Entity).filter(Entity.name.ilike(entity_search))
+        query = query.join(Entity)
+    
+    if filters.entity_name:
+        query = apply_search_filter(query, filters.entity_name, [Entity.search_name])
     
-    # Filtro por tipo de entidad (requiere join)
     if filters.entity_type:
-        from ..models.entity import Entity
-        query = query.join(Entity).filter(Entity.type == filters.entity_type)
+        query = query.filter(Entity.type == filters.entity_type)
     
     return query
 
@@ -227,13 +223,7 @@ def apply_installment_filters(query: Query, filters: InstallmentFilters, model)
     
     # Filtros booleanos especiales
     if filters.overdue_only:
-        today = date.today()
-        query = query.filter(
-            and_(
-                model.status == 'pending',
-                model.due_date < today
-            )
-        )
+        query = query.filter(model.is_overdue)
     
     if filters.paid_only:
         query = query.filter(model.status == 'paid')
@@ -282,6 +272,9 @@ def apply_search_filter(query: Query, search_term: str, search_fields: List[str]
     """
     Aplicar filtro de búsqueda en múltiples campos
     
+    Las columnas normalizadas de búsqueda (utils.search) usan su índice
+    (pg_trgm / FTS5); el resto de campos se buscan con ILIKE.
+    
     Args:
         query: Query de SQLAlchemy
         search_term: Término de búsqueda
@@ -293,7 +286,12 @@ def apply_search_filter(query: Query, search_term: str, search_fields: List[str]
     if not search_term or not search_fields:
         return query
     
+    dialect_name = query_dialect_name(query)
     search_pattern = f"%{search_term}%"
-    conditions = [field.ilike(search_pattern) for field in search_fields]
+    conditions = [
+        search_condition(field, search_term, dialect_name) if is_search_column(field)
+        else field.ilike(search_pattern)
+        for field in search_fields
+    ]
     
     return query.filter(or_(*conditions))
\ No newline at end of file
@@ -4,6 +4,20 @@ from datetime import date, datetime
 from decimal import Decimal
 import locale
 
+# Configuraciones de formato por moneda
+CURRENCY_FORMATS = {
+    "EUR": {"symbol": "€", "position": "after", "decimals": 2},
+    "USD": {"symbol": "$", "position": "before", "decimals": 2},
+    "GBP": {"symbol": "£", "position": "before", "decimals": 2},
+    "JPY": {"symbol": "¥", "position": "before", "decimals": 0},
+    "CHF": {"symbol": "CHF", "position": "after", "decimals": 2},
+    "ARS": {"symbol": "AR$", "position": "before", "decimals": 2},
+}
+
+def currency_format(currency: str) -> dict:
+    """Símbolo, posición y decimales de una moneda"""
+    return CURRENCY_FORMATS.get(currency, {"symbol": currency, "position": "after", "decimals": 2})
+
 def format_currency(
     amount: Union[int, float, Decimal, str],
     currency: str = "EUR",
@@ -30,17 +44,7 @@ def format_currency(
         elif isinstance(amount, (int, float)):
             amount = Decimal(str(amount))
         
-        # Configuraciones de formato por moneda
-        currency_formats = {
-            "EUR": {"symbol": "€", "position": "after", "decimals": 2},
-            "USD": {"symbol": "$", "position": "before", "decimals": 2},
-            "GBP": {"symbol": "£", "position": "before", "decimals": 2},
-            "JPY": {"symbol": "¥", "position": "before", "decimals": 0},
-            "CHF": {"symbol": "CHF", "position": "after", "decimals": 2},
-            "ARS": {"symbol": "AR$", "position": "before", "decimals": 2},
-        }
-        
-        config = currency_formats.get(currency, {"symbol": currency, "position": "after", "decimals": 2})
+        config = currency_format(currency)
         
         # Formatear número
         if config["decimals"] == 0:
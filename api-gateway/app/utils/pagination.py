@@ -1,8 +1,14 @@
 # api-gateway/app/utils/pagination.py
-from typing import List, Any, Dict, Optional
+from typing import List, Any, Dict, Optional, Tuple
+from datetime import date, datetime
+from decimal import Decimal
 from sqlalchemy.orm import Query
-from sqlalchemy import func, desc, asc
+from sqlalchemy import func, desc, asc, and_, or_, tuple_
 from pydantic import BaseModel
+from .counting import count_query
+import base64
+import binascii
+import json
 import math
 
 class PaginatedResult(BaseModel):
@@ -18,13 +24,22 @@ class PaginatedResult(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
+class InvalidCursorError(ValueError):
+    """Cursor de paginación mal formado o de otra ordenación"""
+    pass
+
 def paginate(
     query: Query,
     page: int = 1,
     page_size: int = 20,
     sort_by: Optional[str] = None,
     sort_order: str = "desc",
-    max_page_size: int = 100
+    max_page_size: int = 100,
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    include_total: bool = False,
+    count_mode: str = "exact",
+    count_key: Optional[Tuple[Optional[str], str]] = None
 ) -> Dict[str, Any]:
     """
     Paginar una query de SQLAlchemy
@@ -36,16 +51,34 @@ def paginate(
         sort_by: Campo para ordenar
         sort_order: Orden (asc/desc)
         max_page_size: Tamaño máximo de página
+        cursor: Cursor opaco devuelto como next_cursor (activa el modo keyset)
+        use_cursor: Usar paginación keyset aunque no haya cursor (primera página)
+        include_total: En modo keyset, calcular también el total (COUNT)
+        count_mode: Estrategia de conteo (exact/estimated/cached, ver utils.counting)
+        count_key: Clave (company_id, hash de filtros) para count_mode=cached
         
     Returns:
-        Dict con datos paginados
+        Dict con datos paginados y count_mode (modo que produjo el total)
     """
+    if cursor or use_cursor:
+        return paginate_keyset(
+            query,
+            page_size=page_size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            max_page_size=max_page_size,
+            include_total=include_total,
+            count_mode=count_mode,
+            count_key=count_key
+        )
+    
     # Validar parámetros
     page = max(1, page)
     page_size = min(max(1, page_size), max_page_size)
     
     # Obtener total de elementos
-    total = query.count()
+    total, count_mode = count_query(query, count_mode, cache_key=count_key)
     
     # Calcular offset
     offset = (page - 1) * page_size
@@ -69,11 +102,19 @@ def paginate(
             pass
     
     # Aplicar paginación
-    items = query.offset(offset).limit(page_size).all()
+    if count_mode == "exact":
+        items = query.offset(offset).limit(page_size).all()
+        has_next = None
+    else:
+        # Con un total aproximado, has_next se decide con una fila extra
+        rows = query.offset(offset).limit(page_size + 1).all()
+        items = rows[:page_size]
+        has_next = len(rows) > page_size
     
     # Calcular metadatos de paginación
     total_pages = math.ceil(total / page_size) if total > 0 else 1
-    has_next = page < total_pages
+    if has_next is None:
+        has_next = page < total_pages
     has_prev = page > 1
     
     return {
@@ -83,7 +124,160 @@ def paginate(
         "page_size": page_size,
         "has_next": has_next,
         "has_prev": has_prev,
-        "total_pages": total_pages
+        "total_pages": total_pages,
+        "count_mode": count_mode
+    }
+
+def _encode_cursor_value(value: Any) -> Any:
+    """Serializar el valor de ordenación para el cursor"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def _decode_cursor_value(column, value: Any) -> Any:
+    """Restaurar el valor de ordenación según el tipo de la columna"""
+    if value is None:
+        return None
+    
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return python_type(value)
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, last_id: Any) -> str:
+    """Construir cursor opaco a partir de la última fila de la página"""
+    payload = {
+        "s": sort_by,
+        "o": sort_order,
+        "v": _encode_cursor_value(value),
+        "id": last_id
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decodificar cursor opaco"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise InvalidCursorError("Invalid pagination cursor")
+    
+    if not isinstance(payload, dict) or not {"s", "o", "v", "id"} <= payload.keys():
+        raise InvalidCursorError("Invalid pagination cursor")
+    
+    return payload
+
+def _keyset_columns(query: Query, sort_by: Optional[str]) -> Tuple[Any, Any, str]:
+    """Obtener columna de ordenación y columna id del modelo de la query"""
+    model = query.column_descriptions[0]['entity']
+    table_columns = model.__table__.columns
+    
+    if not sort_by or sort_by not in table_columns or sort_by == "id":
+        sort_by = "created_at" if "created_at" in table_columns else "id"
+    
+    return getattr(model, sort_by), model.id, sort_by
+
+def paginate_keyset(
+    query: Query,
+    page_size: int = 20,
+    sort_by: Optional[str] = None,
+    sort_order: str = "desc",
+    cursor: Optional[str] = None,
+    max_page_size: int = 100,
+    include_total: bool = False,
+    count_mode: str = "exact",
+    count_key: Optional[Tuple[Optional[str], str]] = None
+) -> Dict[str, Any]:
+    """
+    Paginar por cursor (keyset) sobre (sort_by, id)
+    
+    En lugar de OFFSET, cada página filtra las filas posteriores a la última
+    fila de la página anterior, por lo que una página profunda cuesta lo
+    mismo que la primera. No ejecuta COUNT salvo que include_total sea True.
+    
+    Args:
+        query: Query de SQLAlchemy sobre un único modelo
+        page_size: Elementos por página
+        sort_by: Campo para ordenar
+        sort_order: Orden (asc/desc)
+        cursor: next_cursor de la página anterior (None = primera página)
+        max_page_size: Tamaño máximo de página
+        include_total: Calcular el total de elementos
+        count_mode: Estrategia de conteo para include_total
+        count_key: Clave (company_id, hash de filtros) para count_mode=cached
+        
+    Returns:
+        Dict con datos paginados y next_cursor
+    """
+    page_size = min(max(1, page_size), max_page_size)
+    sort_order = "asc" if sort_order and sort_order.lower() == "asc" else "desc"
+    sort_field, id_field, sort_by = _keyset_columns(query, sort_by)
+    column = sort_field.property.columns[0]
+    # Columnas NOT NULL o con default de servidor (created_at) nunca quedan
+    # a NULL: se ordena por la columna tal cual para recorrer el índice
+    # (company_id, created_at, id) sin ordenación adicional
+    nullable = column.nullable and column.server_default is None
+    
+    total = None
+    if include_total:
+        total, count_mode = count_query(query, count_mode, cache_key=count_key)
+    else:
+        count_mode = None
+    
+    if cursor:
+        payload = decode_cursor(cursor)
+        if payload["s"] != sort_by or payload["o"] != sort_order:
+            raise InvalidCursorError("Cursor does not match the requested sort")
+        
+        value = _decode_cursor_value(column, payload["v"])
+        last_id = payload["id"]
+        after = (lambda a, b: a > b) if sort_order == "asc" else (lambda a, b: a < b)
+        
+        # Los NULL del campo de ordenación van siempre al final
+        if value is None:
+            query = query.filter(and_(sort_field.is_(None), after(id_field, last_id)))
+        elif nullable:
+            query = query.filter(
+                or_(
+                    after(tuple_(sort_field, id_field), tuple_(value, last_id)),
+                    sort_field.is_(None)
+                )
+            )
+        else:
+            query = query.filter(after(tuple_(sort_field, id_field), tuple_(value, last_id)))
+    
+    direction = asc if sort_order == "asc" else desc
+    if nullable:
+        query = query.order_by(direction(sort_field).nulls_last(), direction(id_field))
+    else:
+        query = query.order_by(direction(sort_field), direction(id_field))
+    
+    rows = query.limit(page_size + 1).all()
+    has_next = len(rows) > page_size
+    items = rows[:page_size]
+    
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(sort_by, sort_order, getattr(last, sort_by), last.id)
+    
+    return {
+        "items": items,
+        "total": total,
+        "page": None,
+        "page_size": page_size,
+        "has_next": has_next,
+        "has_prev": cursor is not None,
+        "total_pages": (math.ceil(total / page_size) if total > 0 else 1) if total is not None else None,
+        "next_cursor": next_cursor,
+        "count_mode": count_mode
     }
 
 def paginate_list(
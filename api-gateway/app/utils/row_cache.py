@@ -0,0 +1,228 @@
+# api-gateway/app/utils/row_cache.py
+"""
+Caché en proceso (LRU + TTL) de filas Company y Entity.
+
+Las entradas guardan los valores de columna, no instancias ORM: en cada
+acierto se reconstruye una instancia desanclada y se incorpora a la
+sesión con ``merge(load=False)``, sin consultar la base de datos (las
+relaciones siguen cargándose de forma perezosa).
+
+Claves:
+- ("Company", company_id)
+- ("Entity", entity_id)
+- ("Entity", company_id, sap_card_code)
+
+Invalidación:
+- Eventos after_update/after_delete del mapper: se eliminan todas las
+  claves de la fila por su id, incluida la clave alternativa aunque haya
+  cambiado sap_card_code.
+- UPDATE/DELETE masivos (query.update, upserts) no disparan eventos del
+  mapper: quien los ejecute debe llamar a invalidate_company.
+- Con ROW_CACHE_PUBSUB las invalidaciones se publican en Redis y cada
+  worker las aplica en su caché (ver start_listener). Si Redis falla,
+  la coherencia entre workers queda acotada por ROW_CACHE_TTL.
+"""
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Type
+from collections import OrderedDict
+import json
+import logging
+import threading
+import time
+import uuid
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from ..config import settings
+from ..models.company import Company
+from ..models.entity import Entity
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[Hashable, ...]
+
+class RowCache:
+    """Caché LRU con TTL de valores de columna por clave"""
+
+    def __init__(self, ttl: float = 300, maxsize: int = 5000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, keys: List[CacheKey], values: Dict[str, Any]) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key in keys:
+                self._data[key] = (expires_at, values)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def discard_row(self, model_name: str, row_id: str) -> None:
+        """Eliminar todas las claves de una fila (por id y por clave alternativa)"""
+        self._discard(lambda key, values: key[0] == model_name and values.get("id") == row_id)
+
+    def discard_company(self, company_id: str) -> None:
+        """Eliminar la compañía y todas sus entidades"""
+        self._discard(lambda key, values: values.get("company_id") == company_id
+                      or key == ("Company", company_id))
+
+    def _discard(self, predicate) -> None:
+        with self._lock:
+            for key in [key for key, (_, values) in self._data.items() if predicate(key, values)]:
+                del self._data[key]
+                self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class RowCacheBroadcaster:
+    """Difusión de invalidaciones entre workers por Redis pub/sub"""
+
+    CHANNEL = "gateway:row-cache"
+
+    def __init__(self, cache: RowCache, redis_url: str, enabled: bool = False):
+        self.cache = cache
+        self.redis_url = redis_url
+        self.enabled = enabled
+        self.origin = uuid.uuid4().hex
+        self._client = None
+        self._thread: Optional[threading.Thread] = None
+        self._pubsub = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+            self._client = redis.from_url(self.redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+        return self._client
+
+    def publish(self, model_name: Optional[str] = None, row_id: Optional[str] = None,
+                company_id: Optional[str] = None) -> None:
+        if not self.enabled:
+            return
+        message = json.dumps({"origin": self.origin, "model": model_name, "id": row_id, "company_id": company_id})
+        try:
+            self.client.publish(self.CHANNEL, message)
+        except Exception as e:
+            logger.warning(f"Row cache invalidation not broadcast: {e}")
+
+    def apply(self, data: bytes) -> None:
+        """Aplicar una invalidación recibida de otro worker"""
+        message = json.loads(data)
+        if message.get("origin") == self.origin:
+            return
+        if message.get("model") and message.get("id"):
+            self.cache.discard_row(message["model"], message["id"])
+        if message.get("company_id"):
+            self.cache.discard_company(message["company_id"])
+
+    def start_listener(self) -> None:
+        """Suscribirse al canal en un hilo en segundo plano"""
+        if not self.enabled or self._thread is not None:
+            return
+        try:
+            import redis
+            # Sin socket_timeout: la suscripción espera mensajes indefinidamente
+            self._pubsub = redis.from_url(self.redis_url).pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self.CHANNEL: lambda message: self.apply(message["data"])})
+            self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        except Exception as e:
+            logger.warning(f"Row cache listener not started: {e}")
+
+    def stop_listener(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+# Instancias globales
+row_cache = RowCache(ttl=settings.ROW_CACHE_TTL, maxsize=settings.ROW_CACHE_MAXSIZE)
+row_cache_broadcaster = RowCacheBroadcaster(row_cache, settings.REDIS_URL, enabled=settings.ROW_CACHE_PUBSUB)
+
+def _column_values(instance: Any) -> Dict[str, Any]:
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(type(instance)).column_attrs}
+
+def _keys(model_name: str, values: Dict[str, Any]) -> List[CacheKey]:
+    keys: List[CacheKey] = [(model_name, values["id"])]
+    if model_name == "Entity":
+        keys.append((model_name, values["company_id"], values["sap_card_code"]))
+    return keys
+
+def _from_cache(db: Session, model: Type, values: Dict[str, Any]) -> Any:
+    """Instancia de la sesión a partir de valores cacheados, sin consultar"""
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return db.merge(instance, load=False)
+
+def _cached_lookup(db: Session, model: Type, key: CacheKey, query) -> Optional[Any]:
+    values = row_cache.get(key)
+    if values is not None:
+        return _from_cache(db, model, values)
+
+    instance = query.first()
+    if instance is not None:
+        values = _column_values(instance)
+        row_cache.set(_keys(model.__name__, values), values)
+    return instance
+
+def get_company(db: Session, company_id: str) -> Optional[Company]:
+    """Obtener compañía por id (con caché)"""
+    return _cached_lookup(
+        db, Company, ("Company", company_id),
+        db.query(Company).filter(Company.id == company_id)
+    )
+
+def get_entity(db: Session, entity_id: str, company_id: Optional[str] = None) -> Optional[Entity]:
+    """Obtener entidad por id (con caché), opcionalmente comprobando la compañía"""
+    entity = _cached_lookup(
+        db, Entity, ("Entity", entity_id),
+        db.query(Entity).filter(Entity.id == entity_id)
+    )
+    if entity is not None and company_id is not None and entity.company_id != company_id:
+        return None
+    return entity
+
+def get_entity_by_card_code(db: Session, company_id: str, sap_card_code: str) -> Optional[Entity]:
+    """Obtener entidad por (company_id, sap_card_code) (con caché)"""
+    return _cached_lookup(
+        db, Entity, ("Entity", company_id, sap_card_code),
+        db.query(Entity).filter(Entity.company_id == company_id, Entity.sap_card_code == sap_card_code)
+    )
+
+def invalidate_company(company_id: str) -> None:
+    """Invalidar una compañía y sus entidades (tras escrituras masivas)"""
+    row_cache.discard_company(company_id)
+    row_cache_broadcaster.publish(company_id=company_id)
+
+def _invalidate_row(mapper, connection, target) -> None:
+    """Eliminar las claves de la fila modificada o borrada"""
+    model_name = mapper.class_.__name__
+    row_cache.discard_row(model_name, target.id)
+    row_cache_broadcaster.publish(model_name, target.id)
+
+for _model in (Company, Entity):
+    event.listen(_model, "after_update", _invalidate_row)
+    event.listen(_model, "after_delete", _invalidate_row)
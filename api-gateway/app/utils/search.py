@@ -0,0 +1,180 @@
+# api-gateway/app/utils/search.py
+"""
+Búsqueda de texto indexada.
+
+Cada modelo con búsqueda tiene una columna normalizada (sin acentos,
+casefold, espacios colapsados) que se mantiene en before_insert/before_update:
+
+- PostgreSQL: índice GIN pg_trgm sobre la columna; LIKE '%term%' lo usa.
+- SQLite: tabla FTS5 (tokenizer trigram) con una copia del texto y una
+  tabla {tabla}_fts_keys (fts_rowid INTEGER PRIMARY KEY, clave UNIQUE) que
+  asigna a cada clave primaria un rowid entero estable; los triggers
+  borran y reinsertan por rowid y la búsqueda es un MATCH que devuelve
+  rowids, traducidos a claves por la tabla de correspondencia. No se usa
+  contenido externo: content_rowid exige un rowid estable en la tabla del
+  modelo y las tablas con clave String no lo garantizan.
+
+Los términos de menos de 3 caracteres no forman trigramas y se resuelven
+con LIKE sobre la columna normalizada.
+"""
+from typing import Any, List, Optional
+import unicodedata
+
+from sqlalchemy import DDL, event, literal_column, select, table, bindparam
+from sqlalchemy.sql.elements import ColumnElement
+
+TRIGRAM_MIN_LENGTH = 3
+
+def normalize_search_text(*values: Optional[str]) -> str:
+    """Unir y normalizar textos para búsqueda: sin acentos, casefold y espacios simples"""
+    text = " ".join(value for value in values if value)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.casefold().split())
+
+def escape_like(value: str, escape: str = "\\") -> str:
+    """Escapar comodines de LIKE"""
+    return value.replace(escape, escape * 2).replace("%", escape + "%").replace("_", escape + "_")
+
+def fts_table_name(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+def fts_keys_table_name(table_name: str) -> str:
+    return f"{table_name}_fts_keys"
+
+def trigram_index_name(table_name: str, column_name: str) -> str:
+    return f"ix_{table_name}_{column_name}_trgm"
+
+def search_ddl(
+    table_name: str,
+    column_name: str,
+    dialect_name: str,
+    concurrently: bool = False,
+    key_column: str = "id"
+) -> List[str]:
+    """
+    Sentencias que crean el índice de búsqueda de una columna normalizada
+
+    Args:
+        table_name: Tabla del modelo
+        column_name: Columna normalizada
+        dialect_name: postgresql o sqlite (otros: sin índice)
+        concurrently: En PostgreSQL, CREATE INDEX CONCURRENTLY (migraciones)
+        key_column: Clave primaria de la tabla (SQLite: clave de cada fila FTS5)
+    """
+    if dialect_name == "postgresql":
+        return [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+            f"{trigram_index_name(table_name, column_name)} "
+            f"ON {table_name} USING gin ({column_name} gin_trgm_ops)",
+        ]
+
+    if dialect_name == "sqlite":
+        fts, keys = fts_table_name(table_name), fts_keys_table_name(table_name)
+        rowid_of = f"(SELECT fts_rowid FROM {keys} WHERE {key_column} = old.{key_column})"
+        insert_new = (
+            f"INSERT INTO {fts}(rowid, {column_name}) "
+            f"SELECT fts_rowid, new.{column_name} FROM {keys} WHERE {key_column} = new.{key_column}; "
+        )
+        return [
+            f"CREATE TABLE IF NOT EXISTS {keys} ("
+            f"fts_rowid INTEGER PRIMARY KEY, {key_column} VARCHAR NOT NULL UNIQUE)",
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_name}, tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+            f"INSERT INTO {keys}({key_column}) VALUES (new.{key_column}); {insert_new}END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = {rowid_of}; "
+            f"DELETE FROM {keys} WHERE {key_column} = old.{key_column}; END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {key_column}, {column_name} ON {table_name} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = {rowid_of}; "
+            f"UPDATE {keys} SET {key_column} = new.{key_column} WHERE {key_column} = old.{key_column}; "
+            f"{insert_new}END",
+        ]
+
+    return []
+
+def populate_search_sql(table_name: str, column_name: str, key_column: str = "id") -> List[str]:
+    """SQLite: cargar la tabla FTS5 con las filas existentes (tras search_ddl en una tabla con datos)"""
+    fts, keys = fts_table_name(table_name), fts_keys_table_name(table_name)
+    return [
+        f"INSERT INTO {keys}({key_column}) SELECT {key_column} FROM {table_name}",
+        f"INSERT INTO {fts}(rowid, {column_name}) SELECT {keys}.fts_rowid, {table_name}.{column_name} "
+        f"FROM {table_name} JOIN {keys} ON {keys}.{key_column} = {table_name}.{key_column}",
+    ]
+
+def drop_search_ddl(table_name: str, column_name: str, dialect_name: str) -> List[str]:
+    """Sentencias inversas de search_ddl"""
+    if dialect_name == "postgresql":
+        return [f"DROP INDEX IF EXISTS {trigram_index_name(table_name, column_name)}"]
+
+    if dialect_name == "sqlite":
+        fts = fts_table_name(table_name)
+        return [
+            f"DROP TRIGGER IF EXISTS {fts}_ai",
+            f"DROP TRIGGER IF EXISTS {fts}_ad",
+            f"DROP TRIGGER IF EXISTS {fts}_au",
+            f"DROP TABLE IF EXISTS {fts}",
+            f"DROP TABLE IF EXISTS {fts_keys_table_name(table_name)}",
+        ]
+
+    return []
+
+def register_search_column(model, column_name: str, *source_names: str) -> None:
+    """
+    Declarar una columna normalizada de búsqueda en un modelo
+
+    Mantiene la columna a partir de los campos origen al insertar/actualizar
+    y crea su índice de búsqueda junto con la tabla (create_all).
+    """
+    model.__search_columns__ = {**getattr(model, "__search_columns__", {}), column_name: source_names}
+
+    def fill(mapper, connection, target):
+        setattr(target, column_name, normalize_search_text(*(getattr(target, name) for name in source_names)))
+
+    event.listen(model, "before_insert", fill)
+    event.listen(model, "before_update", fill)
+
+    table_name = model.__tablename__
+    key_column = next(iter(model.__table__.primary_key.columns)).name
+    for dialect_name in ("postgresql", "sqlite"):
+        for statement in search_ddl(table_name, column_name, dialect_name, key_column=key_column):
+            event.listen(model.__table__, "after_create", DDL(statement).execute_if(dialect=dialect_name))
+
+def search_condition(column, term: str, dialect_name: Optional[str] = None) -> ColumnElement:
+    """
+    Condición de búsqueda por subcadena sobre una columna normalizada
+
+    Args:
+        column: Columna normalizada (atributo del modelo)
+        term: Término de búsqueda (se normaliza igual que la columna)
+        dialect_name: Dialecto de la conexión (sqlite usa la tabla FTS5)
+    """
+    normalized = normalize_search_text(term)
+    table_name = column.table.name
+
+    if dialect_name == "sqlite" and len(normalized) >= TRIGRAM_MIN_LENGTH:
+        fts, keys = fts_table_name(table_name), fts_keys_table_name(table_name)
+        key = next(iter(column.table.primary_key.columns))
+        phrase = '"' + normalized.replace('"', '""') + '"'
+        rowids = select(literal_column("rowid")).select_from(table(fts)).where(
+            literal_column(fts).op("MATCH")(bindparam("search_match", phrase, unique=True))
+        )
+        matches = select(literal_column(key.name)).select_from(table(keys)).where(
+            literal_column("fts_rowid").in_(rowids)
+        )
+        return key.in_(matches)
+
+    return column.like(f"%{escape_like(normalized)}%", escape="\\")
+
+def is_search_column(column: Any) -> bool:
+    """Indica si un atributo es una columna normalizada de búsqueda"""
+    model = getattr(column, "class_", None)
+    return column.key in getattr(model, "__search_columns__", {})
+
+def query_dialect_name(query: Any) -> Optional[str]:
+    """Dialecto de la sesión de una Query (None si no tiene sesión)"""
+    session = getattr(query, "session", None)
+    if session is None:
+        return None
+    return session.get_bind().dialect.name
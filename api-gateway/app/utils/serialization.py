@@ -0,0 +1,157 @@
+# api-gateway/app/utils/serialization.py
+"""
+Serialización rápida de respuestas de lectura.
+
+El camino general (objeto ORM -> dict -> validación del response_model ->
+JSON) convierte cada valor dos veces. Para las tablas de cuotas y el
+detalle de amortización se seleccionan solo las columnas del
+response_model, como tuplas, y se codifican directamente con orjson:
+
+- Decimal se emite como cadena (igual que Pydantic), sin pasar por float.
+- Los campos float del schema se convierten con float(); date y datetime
+  los codifica orjson en ISO 8601 (UTC como 'Z', igual que Pydantic).
+
+El JSON resultante es idéntico byte a byte al del camino con Pydantic,
+de modo que los ETag de la caché de respuestas no cambian.
+
+Con fields= (parse_fields, RowEncoder.project) la respuesta se limita a
+los campos pedidos y la consulta solo selecciona esas columnas.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union, get_args, get_origin
+from decimal import Decimal
+import copy
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+def json_default(value: Any) -> Any:
+    """Tipos que orjson no codifica de forma nativa"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Serializar a JSON compacto con orjson"""
+    return orjson.dumps(content, default=json_default, option=ORJSON_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+    """Respuesta JSON codificada con orjson (los bytes ya codificados se envían tal cual)"""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+class FieldSelectionError(ValueError):
+    """Campos no válidos en fields="""
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str], required: Sequence[str] = ('id',)) -> Optional[List[str]]:
+    """
+    Parsear fields=a,b,c contra los campos de un schema
+
+    Args:
+        fields: Lista separada por comas (None o vacía = todos los campos)
+        allowed: Campos del schema, en el orden de la respuesta
+        required: Campos que se devuelven siempre
+
+    Returns:
+        Campos pedidos en el orden de `allowed`, o None si no se restringe
+    """
+    if not fields or not fields.strip():
+        return None
+    requested = {name.strip() for name in fields.split(',') if name.strip()}
+    unknown = sorted(requested - set(allowed))
+    if unknown:
+        raise FieldSelectionError(f"Campos no válidos: {', '.join(unknown)}")
+    requested.update(required)
+    return [name for name in allowed if name in requested]
+
+def _is_float(annotation: Any) -> bool:
+    if annotation is float:
+        return True
+    if get_origin(annotation) is Union:
+        return float in get_args(annotation)
+    return False
+
+class RowEncoder:
+    """
+    Columnas de un response_model y codificación de sus filas a JSON
+
+    Cada campo del schema se resuelve, por orden, en `columns` (expresiones
+    explícitas) o en el primer modelo de `sources` que tenga un atributo
+    con ese nombre.
+
+    Args:
+        response_model: Schema Pydantic de la respuesta
+        sources: Modelos ORM de donde tomar las columnas
+        columns: Expresiones SQL por nombre de campo
+        exclude: Campos del schema que no se seleccionan
+    """
+
+    def __init__(
+        self,
+        response_model: type,
+        *sources: Any,
+        columns: Optional[Dict[str, Any]] = None,
+        exclude: Iterable[str] = ()
+    ):
+        columns = columns or {}
+        excluded = set(exclude)
+        fields, expressions, converters = [], [], []
+
+        for name, field in response_model.model_fields.items():
+            if name in excluded:
+                continue
+            expression = columns.get(name)
+            if expression is None:
+                source = next((model for model in sources if hasattr(model, name)), None)
+                if source is None:
+                    raise ValueError(f"No column for field '{name}' of {response_model.__name__}")
+                expression = getattr(source, name)
+            fields.append(name)
+            expressions.append(expression.label(name))
+            converters.append(float if _is_float(field.annotation) else None)
+
+        self._set_fields(fields, expressions, converters)
+
+    def _set_fields(self, fields: List[str], columns: List[Any], converters: List[Optional[Callable[[Any], Any]]]) -> None:
+        self.fields = fields
+        self.columns = columns
+        self._all_converters = converters
+        self._converters = [
+            (index, converter) for index, converter in enumerate(converters) if converter is not None
+        ]
+
+    def project(self, fields: Optional[Sequence[str]]) -> 'RowEncoder':
+        """Encoder limitado a `fields`, en el orden del schema (None = el mismo encoder)"""
+        if fields is None:
+            return self
+        unknown = set(fields) - set(self.fields)
+        if unknown:
+            raise FieldSelectionError(f"Campos no válidos: {', '.join(sorted(unknown))}")
+        indexes = [index for index, name in enumerate(self.fields) if name in fields]
+        projected = copy.copy(self)
+        projected._set_fields(
+            [self.fields[index] for index in indexes],
+            [self.columns[index] for index in indexes],
+            [self._all_converters[index] for index in indexes]
+        )
+        return projected
+
+    def to_dict(self, row: Sequence[Any]) -> Dict[str, Any]:
+        """Fila (tupla en el orden de `columns`) -> dict en el orden del schema"""
+        item = dict(zip(self.fields, row))
+        for index, converter in self._converters:
+            value = row[index]
+            if value is not None:
+                item[self.fields[index]] = converter(value)
+        return item
+
+    def encode(self, rows: Iterable[Sequence[Any]]) -> bytes:
+        """Lista de filas -> JSON"""
+        return dumps([self.to_dict(row) for row in rows])
@@ -0,0 +1,266 @@
+# api-gateway/app/worker.py
+"""
+Trabajos en segundo plano con Celery.
+
+Las operaciones largas (regeneración de tablas, operaciones en lote,
+importaciones) se encolan y la API responde 202 con el id del trabajo,
+sin mantener la conexión HTTP abierta (nginx corta a los 60 s). El
+estado, el progreso y el resultado se consultan en /jobs/{id}.
+
+Worker (con -B, el planificador de tareas periódicas en el mismo proceso):
+    celery -A app.worker worker -B --loglevel=info
+
+Tareas periódicas (beat_schedule):
+- overdue_sweep: barrido nocturno de vencidos (OVERDUE_SWEEP_HOUR, UTC)
+- sap_sync: sincronización de todas las compañías con SAP cada
+  SAP_SYNC_INTERVAL_MINUTES (si es mayor que 0)
+
+Los trabajos que llaman a SAP (import_from_sap, sync_business_partners,
+sync_to_sap en lote)
+ejecutan su parte async con run_with_pools (asyncio.run que cierra el
+cliente HTTP al terminar); el pool de SAP conserva las sesiones entre
+trabajos.
+
+Con JOBS_EAGER los trabajos se ejecutan en el propio proceso al
+encolarlos y sus resultados se guardan igualmente en el backend (en los
+tests, un backend en memoria).
+
+Cada trabajo abre su propia sesión con ``session_factory`` y publica su
+progreso como estado PROGRESS con meta {current, total, ...}.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from contextlib import contextmanager
+from datetime import date
+from multiprocessing import current_process
+import logging
+
+from celery import Celery, Task
+from celery.schedules import crontab
+
+from .config import settings
+from .database import SessionLocal
+from .models.amortization import Amortization
+from .models.company import Company
+from .schemas.common import BulkOperationRequest, ImportRequest
+from .services.amortization_service import AmortizationService
+from .services.bulk_service import BulkOperationService
+from .services.import_service import AmortizationImporter
+from .services.overdue_sweep import run_overdue_sweep
+from .services.sap_import import SAPDocumentImporter
+from .services.sap_partners import SAPPartnerSync
+from .services.sap_scheduler import SAPSyncScheduler
+from .services.sap_service import run_with_pools
+from .utils.cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+celery_app = Celery(
+    "api_gateway",
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL,
+    backend=settings.CELERY_RESULT_BACKEND or settings.REDIS_URL
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_track_started=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    result_expires=settings.JOB_RESULT_TTL,
+    result_extended=True,
+    task_always_eager=settings.JOBS_EAGER,
+    task_store_eager_result=True,
+    task_eager_propagates=False,
+    timezone="UTC",
+    beat_schedule={
+        "overdue-sweep": {
+            "task": "jobs.overdue_sweep",
+            "schedule": crontab(hour=settings.OVERDUE_SWEEP_HOUR, minute=0),
+        },
+    },
+)
+
+if settings.SAP_SYNC_INTERVAL_MINUTES > 0:
+    celery_app.conf.beat_schedule["sap-sync"] = {
+        "task": "jobs.sap_sync",
+        "schedule": settings.SAP_SYNC_INTERVAL_MINUTES * 60,
+    }
+
+# Sesiones de los trabajos (los tests la sustituyen por la de su transacción)
+session_factory: Callable = SessionLocal
+
+# Trabajos que se pueden enviar por POST /jobs (tipo -> tarea)
+JOB_TASKS: Dict[str, Task] = {}
+
+def job(name: str):
+    """Registrar una tarea de Celery como tipo de trabajo"""
+    def decorator(fn):
+        task = celery_app.task(name=f"jobs.{name}", bind=True)(fn)
+        JOB_TASKS[name] = task
+        return task
+    return decorator
+
+@contextmanager
+def job_session():
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def report_progress(task: Task, current: int, total: Optional[int] = None, **extra: Any) -> None:
+    """Publicar el progreso del trabajo (estado PROGRESS)"""
+    if task.request.id is None:
+        return
+    task.update_state(state="PROGRESS", meta={"current": current, "total": total, **extra})
+
+@job("regenerate_installments")
+def regenerate_installments(self, amortization_ids: List[str], chunk_size: int = 1000) -> Dict[str, Any]:
+    """Regenerar las tablas de cuotas de varias amortizaciones por bloques (se omiten las que tienen pagos)"""
+    created = 0
+    skipped: List[str] = []
+    companies = set()
+    with job_session() as db:
+        service = AmortizationService(db)
+        for start in range(0, len(amortization_ids), chunk_size):
+            chunk = amortization_ids[start:start + chunk_size]
+            paid = service.paid_amortization_ids(chunk)
+            skipped.extend(sorted(paid))
+            amortizations = db.query(Amortization).filter(Amortization.id.in_(chunk)).all()
+            amortizations = [amortization for amortization in amortizations if amortization.id not in paid]
+            if amortizations:
+                created += len(service.regenerate_schedules(amortizations))
+            companies.update(amortization.company_id for amortization in amortizations)
+            report_progress(self, min(start + chunk_size, len(amortization_ids)), len(amortization_ids))
+
+    for company_id in companies:
+        # La generación de la compañía invalida también sus totales cacheados (count_cache)
+        response_cache.invalidate_sync(company_id=company_id, amortization_ids=amortization_ids)
+    return {"amortizations": len(amortization_ids), "installments_created": created, "skipped": skipped}
+
+@job("bulk_operation")
+def bulk_operation(self, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Operación en lote (BulkOperationRequest) con resultado por id"""
+    with job_session() as db:
+        result = BulkOperationService(db).run(BulkOperationRequest(**request))
+
+    changed: Dict[str, List[str]] = {}
+    # sync_to_sap informa company_id también en los errores (documentos creados en parte)
+    for item in result["results"] + [error for error in result["errors"] if "company_id" in error]:
+        changed.setdefault(item["company_id"], []).append(item["id"])
+    for company_id, ids in changed.items():
+        response_cache.invalidate_sync(company_id=company_id, amortization_ids=ids)
+    return result
+
+@job("import_amortizations")
+def import_amortizations(self, company_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Importación masiva (ImportRequest) con progreso por bloque"""
+    def on_progress(progress: Dict[str, int]) -> None:
+        report_progress(self, progress["processed_rows"], None, **progress)
+
+    # Los procesos del pool prefork de Celery no pueden crear procesos hijos
+    workers = 0 if current_process().daemon else None
+    with job_session() as db:
+        result = AmortizationImporter(db, company_id, workers=workers, on_progress=on_progress).run(
+            ImportRequest(**request)
+        )
+
+    if result["imported_ids"]:
+        response_cache.invalidate_sync(company_id=company_id)
+    return result
+
+@job("import_from_sap")
+def import_from_sap(
+    self,
+    company_id: str,
+    document_types: List[str],
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    full: bool = False
+) -> Dict[str, Any]:
+    """Importación incremental de documentos SAP (marca de agua por tipo de documento)"""
+    def on_progress(document_type: str, result: Dict[str, Any]) -> None:
+        report_progress(self, result["documents"], None, document_type=document_type,
+                        amortizations_created=result["amortizations_created"])
+
+    with job_session() as db:
+        company = db.get(Company, company_id)
+        if company is None:
+            raise ValueError(f"Compañía no encontrada: {company_id}")
+        importer = SAPDocumentImporter(db, company, on_progress=on_progress)
+        result = run_with_pools(importer.run(
+            document_types,
+            date.fromisoformat(date_from) if date_from else None,
+            date.fromisoformat(date_to) if date_to else None,
+            full
+        ))
+
+    amortization_ids = [
+        amortization_id for counts in result["document_types"].values()
+        for amortization_id in counts.pop("amortization_ids")
+    ]
+    if amortization_ids:
+        response_cache.invalidate_sync(company_id=company_id, amortization_ids=amortization_ids)
+    return result
+
+@job("sync_business_partners")
+def sync_business_partners(self, company_id: str, entity_types: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Sincronización de business partners: solo se escriben los que han cambiado"""
+    def on_progress(result: Dict[str, Any]) -> None:
+        report_progress(self, result["partners"], None, created=result["created"], updated=result["updated"])
+
+    with job_session() as db:
+        company = db.get(Company, company_id)
+        if company is None:
+            raise ValueError(f"Compañía no encontrada: {company_id}")
+        result = run_with_pools(SAPPartnerSync(db, company, on_progress=on_progress).run(entity_types))
+
+    if result["created"] or result["updated"]:
+        response_cache.invalidate_sync(company_id=company_id)
+    return result
+
+@job("sap_sync")
+def sap_sync(self, company_ids: Optional[List[str]] = None, tasks: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Sincronización con SAP de varias compañías en paralelo, con tiempos por compañía"""
+    def on_progress(current: int, total: int, result: Dict[str, Any]) -> None:
+        amortization_ids = [
+            amortization_id for outcome in result["tasks"].values()
+            for amortization_id in outcome.pop("amortization_ids", [])
+        ]
+        # Nombres de entidad cambiados: las respuestas de toda la compañía
+        entities_changed = any(
+            outcome.get("entities_created") or outcome.get("entities_updated") for outcome in result["tasks"].values()
+        )
+        if amortization_ids or entities_changed:
+            response_cache.invalidate_sync(company_id=result["company_id"], amortization_ids=amortization_ids)
+        report_progress(self, current, total)
+
+    scheduler = SAPSyncScheduler(session_factory, tasks=tasks, on_progress=on_progress)
+    results = run_with_pools(scheduler.run(company_ids))
+    return {
+        "companies": results,
+        "failed": [
+            result["company_id"] for result in results
+            if any(outcome["status"] == "failed" for outcome in result["tasks"].values())
+        ]
+    }
+
+@job("overdue_sweep")
+def overdue_sweep(self, company_id: Optional[str] = None, as_of: Optional[str] = None) -> Dict[str, Any]:
+    """Barrido de vencidos (una compañía o todas) con progreso por compañía"""
+    def on_progress(current: int, total: int, result: Dict[str, Any]) -> None:
+        amortization_ids = result.pop("amortization_ids", None)
+        if amortization_ids:
+            response_cache.invalidate_sync(company_id=result["company_id"], amortization_ids=amortization_ids)
+        report_progress(self, current, total)
+
+    with job_session() as db:
+        results = run_overdue_sweep(db, company_id, date.fromisoformat(as_of) if as_of else None, on_progress)
+
+    return {
+        "companies": results,
+        "installments_updated": sum(result.get("installments_updated", 0) for result in results),
+        "amortizations_updated": sum(result.get("amortizations_updated", 0) for result in results),
+        "failed": [result["company_id"] for result in results if "error" in result]
+    }
@@ -0,0 +1,70 @@
+# api-gateway/benchmarks/bench_schedule_engine.py
+"""
+Benchmark: cálculo de cuotas por objeto vs motor vectorizado por lotes.
+
+Uso (desde api-gateway/):
+    python -m benchmarks.bench_schedule_engine --contracts 50000 --installments 36
+"""
+import argparse
+import random
+import time
+from datetime import date
+from decimal import Decimal
+
+from app.models import Amortization
+from app.services.schedule_engine import AMORTIZATION_METHODS, calculate_schedules
+
+def build_amortizations(contracts: int, installments: int, seed: int = 42):
+    """Crear amortizaciones en memoria (sin base de datos)"""
+    rng = random.Random(seed)
+    return [
+        Amortization(
+            total_amount=Decimal(rng.randint(1_000, 500_000)),
+            total_installments=installments,
+            interest_rate=Decimal(rng.randint(0, 1500)) / 100,
+            start_date=date(2024, rng.randint(1, 12), rng.randint(1, 28)),
+            amortization_method=rng.choice(AMORTIZATION_METHODS),
+            frequency=rng.choice(['monthly', 'quarterly']),
+        )
+        for _ in range(contracts)
+    ]
+
+def per_object(amortizations):
+    """Ruta original: bucle Decimal por amortización y por cuota"""
+    rows = 0
+    for amortization in amortizations:
+        if amortization.amortization_method == 'french':
+            rows += len(amortization._calculate_french_installments())
+        else:
+            rows += len(amortization._calculate_linear_installments())
+    return rows
+
+def batch(amortizations):
+    """Motor vectorizado: todas las tablas en una sola llamada"""
+    return calculate_schedules(amortizations).row_count
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--contracts', type=int, default=50_000)
+    parser.add_argument('--installments', type=int, default=36)
+    args = parser.parse_args()
+
+    amortizations = build_amortizations(args.contracts, args.installments)
+
+    rows_object, elapsed_object = timed(per_object, amortizations)
+    rows_batch, elapsed_batch = timed(batch, amortizations)
+
+    print(f"Contratos: {args.contracts:,}  cuotas/contrato: {args.installments}")
+    print(f"Por objeto: {rows_object:>12,} cuotas  {elapsed_object:8.2f}s  "
+          f"{rows_object / elapsed_object:>12,.0f} cuotas/s")
+    print(f"Por lotes:  {rows_batch:>12,} cuotas  {elapsed_batch:8.2f}s  "
+          f"{rows_batch / elapsed_batch:>12,.0f} cuotas/s")
+    print(f"Aceleración: x{elapsed_object / elapsed_batch:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,21 @@ from fastapi.testclient import TestClient
 import os
 from typing import Generator
 
+# Trabajos en el propio proceso con backend de resultados en memoria
+os.environ.setdefault("JOBS_EAGER", "true")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+
 from app.main import app
-from app.database import get_db, Base
+from app.database import get_db, get_async_db, Base
 from app.models.user import User
 from app.models.company import Company
 from app.models.entity import Entity
 from app.models.amortization import Amortization, AmortizationInstallment
 from app.services.auth_service import AuthService
+from app.services.sap_service import SAPService
+from app.utils.cache import response_cache
+from app.utils.row_cache import row_cache
+from tests.fake_service_layer import FakeServiceLayer, fake_pool
 
 # Configuración de base de datos de test
 TEST_DATABASE_URL = os.getenv(
@@ -36,13 +44,38 @@ def db_session(setup_database):
     """Sesión de base de datos para tests"""
     connection = engine.connect()
     transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    # commit/rollback de la sesión usan un SAVEPOINT: un rollback del código
+    # probado no deshace la transacción externa (ni los datos de los fixtures)
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     
     yield session
     
     session.close()
     transaction.rollback()
     connection.close()
+    # Las filas cacheadas pertenecen a la transacción deshecha
+    row_cache.clear()
+
+class AsyncSessionAdapter:
+    """
+    Interfaz de AsyncSession sobre la sesión de test, para que los endpoints
+    async vean los datos de los fixtures (misma transacción)
+    """
+    
+    def __init__(self, session):
+        self.sync_session = session
+    
+    async def execute(self, statement, *args, **kwargs):
+        return self.sync_session.execute(statement, *args, **kwargs)
+    
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+    
+    async def commit(self):
+        self.sync_session.commit()
+    
+    async def rollback(self):
+        self.sync_session.rollback()
 
 @pytest.fixture
 def client(db_session):
@@ -53,9 +86,16 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        yield AsyncSessionAdapter(db_session)
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Los datos de cada test se deshacen al terminar: sin caché de respuestas
+    cache_enabled, response_cache.enabled = response_cache.enabled, False
     with TestClient(app) as c:
         yield c
+    response_cache.enabled = cache_enabled
     app.dependency_overrides.clear()
 
 @pytest.fixture
@@ -137,3 +177,13 @@ def test_amortization(db_session, test_company, test_entity):
     db_session.commit()
     db_session.refresh(amortization)
     return amortization
+
+@pytest.fixture
+def service_layer():
+    """Service Layer de SAP simulado (los módulos lo redefinen con sus registros)"""
+    return FakeServiceLayer()
+
+@pytest.fixture
+def sap(service_layer):
+    """Cliente SAP de la compañía de test (TESTDB) contra el Service Layer simulado"""
+    return SAPService("TESTDB", "manager", "secret", pool=fake_pool(service_layer))
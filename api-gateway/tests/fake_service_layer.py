@@ -0,0 +1,228 @@
+# api-gateway/tests/fake_service_layer.py
+"""Service Layer de SAP B1 simulado para los tests del cliente (httpx.ASGITransport)"""
+import asyncio
+import json
+import re
+import uuid
+from collections import defaultdict
+from urllib.parse import urlencode
+
+import httpx
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from app.services.sap_service import SAPServiceLayerPool
+
+def sl_error(status_code: int, code: int, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={
+        "error": {"code": code, "message": {"lang": "en-us", "value": message}}
+    })
+
+def split_parts(body: str, boundary: str):
+    """(cabeceras, contenido) de cada parte multipart"""
+    parts = []
+    for chunk in body.split(f"--{boundary}")[1:]:
+        if chunk.startswith("--"):
+            break
+        head, _, content = chunk.strip("\r\n").partition("\r\n\r\n")
+        parts.append((head, content))
+    return parts
+
+def boundary_of(content_type: str) -> str:
+    return re.search(r"boundary=([^;\s]+)", content_type).group(1)
+
+def fake_pool(service_layer: "FakeServiceLayer", url: str = "http://sap.test/b1s/v1", **kwargs) -> SAPServiceLayerPool:
+    """Pool del cliente SAP que envía las peticiones al Service Layer simulado"""
+    return SAPServiceLayerPool(url, transport=httpx.ASGITransport(app=service_layer.app), **kwargs)
+
+# Clave que devuelve cada tipo de documento al crearse
+DOCUMENT_KEYS = {"JournalEntries": "JdtNum", "IncomingPayments": "DocEntry", "VendorPayments": "DocEntry"}
+
+class FakeServiceLayer:
+    """
+    Login/Logout y BusinessPartners con el formato del Service Layer
+
+    Registra los logins por compañía, las sesiones activas y la máxima
+    concurrencia observada por compañía. `delay` simula latencia.
+
+    $batch crea JournalEntries/IncomingPayments/VendorPayments con change
+    sets atómicos: `reject(path, body)` devuelve un mensaje para rechazar
+    una operación (400 para todo su change set) y `unavailable` es el
+    número de peticiones $batch siguientes que responden 503.
+
+    Las colecciones de `records` (Invoices, PurchaseInvoices y
+    BusinessPartners en lugar de `partners`) y los documentos creados
+    por $batch se consultan
+    con $filter (condiciones `Campo op 'valor'` unidas por and), $select,
+    $orderby y paginación por odata.nextLink ($skip).
+    """
+
+    def __init__(self, session_timeout: int = 30, delay: float = 0.0, password: str = "secret"):
+        self.session_timeout = session_timeout
+        self.password = password
+        self.delay = delay
+        self.sessions = {}
+        self.logins = defaultdict(int)
+        self.active = defaultdict(int)
+        self.max_active = defaultdict(int)
+        self.partners = {}
+        self.documents = defaultdict(list)
+        self.batch_requests = 0
+        self.reject = lambda path, body: None
+        self.unavailable = 0
+        self._next_key = 1000
+        self.records = defaultdict(list)
+        self.queries = []
+        self.app = self._build_app()
+
+    def expire_sessions(self) -> None:
+        """Cerrar todas las sesiones en el servidor (reinicio del Service Layer)"""
+        self.sessions.clear()
+
+    def _build_app(self) -> FastAPI:
+        router = APIRouter(prefix="/b1s/v1")
+
+        @router.post("/Login")
+        async def login(request: Request):
+            body = await request.json()
+            if body.get("Password") != self.password:
+                return sl_error(401, -304, "Fail to get DB Credentials from SLD")
+            session_id = str(uuid.uuid4())
+            self.sessions[session_id] = body["CompanyDB"]
+            self.logins[body["CompanyDB"]] += 1
+            response = JSONResponse({
+                "odata.metadata": "$metadata#B1Sessions/@Element",
+                "SessionId": session_id,
+                "Version": "1000190",
+                "SessionTimeout": self.session_timeout
+            })
+            response.set_cookie("B1SESSION", session_id)
+            response.set_cookie("ROUTEID", ".node1")
+            return response
+
+        @router.post("/Logout")
+        async def logout(request: Request):
+            self.sessions.pop(request.cookies.get("B1SESSION"), None)
+            return Response(status_code=204)
+
+        @router.get("/BusinessPartners")
+        async def business_partners(request: Request):
+            company_db = self.sessions.get(request.cookies.get("B1SESSION"))
+            if company_db is None:
+                return sl_error(401, 301, "Invalid session or session already timeout.")
+            self.active[company_db] += 1
+            self.max_active[company_db] = max(self.max_active[company_db], self.active[company_db])
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                self.active[company_db] -= 1
+            if "BusinessPartners" in self.records:
+                return await query("BusinessPartners", request)
+            return {"value": self.partners.get(company_db, [])}
+
+        @router.post("/$batch")
+        async def batch(request: Request):
+            if self.sessions.get(request.cookies.get("B1SESSION")) is None:
+                return sl_error(401, 301, "Invalid session or session already timeout.")
+            self.batch_requests += 1
+            if self.unavailable:
+                self.unavailable -= 1
+                return sl_error(503, -1, "Service Unavailable")
+
+            body = (await request.body()).decode()
+            response_boundary = f"batchresponse_{uuid.uuid4()}"
+            lines = []
+            for head, content in split_parts(body, boundary_of(request.headers["content-type"])):
+                lines += [f"--{response_boundary}", *self._changeset(boundary_of(head), content)]
+            lines += [f"--{response_boundary}--", ""]
+            return Response(
+                "\r\n".join(lines),
+                status_code=202,
+                media_type=f"multipart/mixed;boundary={response_boundary}"
+            )
+
+        @router.get("/{collection}")
+        async def query(collection: str, request: Request):
+            if self.sessions.get(request.cookies.get("B1SESSION")) is None:
+                return sl_error(401, 301, "Invalid session or session already timeout.")
+            params = dict(request.query_params)
+            self.queries.append((collection, params))
+            match = re.search(r"odata.maxpagesize=(\d+)", request.headers.get("prefer", ""))
+            page_size = int(match.group(1)) if match else 20
+            skip = int(params.get("$skip", 0))
+
+            rows = [
+                row for row in self.records[collection] + self.documents[collection]
+                if self._matches(row, params.get("$filter"))
+            ]
+            if params.get("$orderby"):
+                fields = [field.strip() for field in params["$orderby"].split(",")]
+                rows.sort(key=lambda row: [row[field] for field in fields])
+            page = rows[skip:skip + page_size]
+            if params.get("$select"):
+                fields = params["$select"].split(",")
+                page = [{field: row.get(field) for field in fields} for row in page]
+
+            body = {"odata.metadata": f"$metadata#{collection}", "value": page}
+            if skip + page_size < len(rows):
+                body["odata.nextLink"] = f"{collection}?{urlencode({**params, '$skip': skip + page_size})}"
+            return body
+
+        app = FastAPI()
+        app.include_router(router)
+        return app
+
+    @staticmethod
+    def _matches(row, expression):
+        if not expression:
+            return True
+        operators = {"eq": lambda a, b: a == b, "ge": lambda a, b: a >= b, "le": lambda a, b: a <= b,
+                     "gt": lambda a, b: a > b, "lt": lambda a, b: a < b}
+        for condition in expression.split(" and "):
+            field, operator, value = re.match(r"(\w+) (\w+) '([^']*)'", condition.strip()).groups()
+            if not operators[operator](str(row[field]), value):
+                return False
+        return True
+
+    def _changeset(self, boundary: str, content: str):
+        """Líneas de la respuesta de un change set (todo o nada)"""
+        created, responses = [], []
+        for head, message in split_parts(content, boundary):
+            content_id = re.search(r"Content-ID: (\S+)", head).group(1)
+            request_line, _, payload = message.partition("\r\n\r\n")
+            path = request_line.split()[1].rsplit("/", 1)[-1]
+            document = json.loads(payload)
+            error = self.reject(path, document)
+            if error:
+                return [
+                    "Content-Type: application/http",
+                    "Content-Transfer-Encoding: binary",
+                    "",
+                    "HTTP/1.1 400 Bad Request",
+                    "Content-Type: application/json;odata=minimalmetadata;charset=utf-8",
+                    "",
+                    json.dumps({"error": {"code": -10, "message": {"lang": "en-us", "value": error}}}),
+                ]
+            self._next_key += 1
+            created.append((path, {DOCUMENT_KEYS[path]: self._next_key, **document}))
+            responses.append((content_id, created[-1][1]))
+
+        for path, document in created:
+            self.documents[path].append(document)
+        changeset = f"changesetresponse_{uuid.uuid4()}"
+        lines = [f"Content-Type: multipart/mixed;boundary={changeset}", ""]
+        for content_id, document in responses:
+            lines += [
+                f"--{changeset}",
+                "Content-Type: application/http",
+                "Content-Transfer-Encoding: binary",
+                f"Content-ID: {content_id}",
+                "",
+                "HTTP/1.1 201 Created",
+                "Content-Type: application/json;odata=minimalmetadata;charset=utf-8",
+                "",
+                json.dumps(document),
+                "",
+            ]
+        lines.append(f"--{changeset}--")
+        return lines
@@ -0,0 +1,114 @@
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.models.amortization import Amortization, AmortizationInstallment
+from app.models.entity import Entity
+from app.services.aging_engine import (
+    AgingPeriodsError, bucket_labels, validate_periods, aging_report, iter_aging_detail, iter_csv, DETAIL_COLUMNS
+)
+
+AS_OF = date(2024, 6, 30)
+
+@pytest.fixture
+def aging_installments(db_session, test_company, test_entity):
+    """Cuotas con distintos días de vencimiento a la fecha de corte"""
+    supplier = Entity(company_id=test_company.id, sap_card_code="P0001", name="Proveedor", type="proveedor")
+    db_session.add(supplier)
+    db_session.flush()
+
+    installments = {
+        test_entity.id: [
+            # (días vencidos, estado, total, pagado)
+            (-10, "pending", 100, 0),
+            (0, "pending", 100, 0),
+            (1, "pending", 100, 0),
+            (30, "partial", 100, 40),
+            (45, "overdue", 100, 0),
+            (200, "pending", 100, 0),
+            (50, "paid", 100, 100),
+        ],
+        supplier.id: [
+            (95, "pending", 250, 0),
+        ],
+    }
+    for entity_id, rows in installments.items():
+        amortization = Amortization(
+            company_id=test_company.id,
+            entity_id=entity_id,
+            reference=f"AGING-{entity_id[:8]}",
+            total_amount=1000,
+            pending_amount=1000,
+            total_installments=len(rows),
+            installment_amount=100,
+            start_date=date(2024, 1, 1)
+        )
+        db_session.add(amortization)
+        db_session.flush()
+        for number, (days, status, total, paid) in enumerate(rows, start=1):
+            db_session.add(AmortizationInstallment(
+                amortization_id=amortization.id,
+                installment_number=number,
+                due_date=AS_OF - timedelta(days=days),
+                principal_amount=total,
+                total_amount=total,
+                paid_amount=paid,
+                status=status
+            ))
+    db_session.commit()
+    return supplier
+
+class TestAging:
+    """Tests para el motor de aging"""
+
+    def test_bucket_labels(self):
+        """Test de etiquetas y validación de tramos"""
+        assert bucket_labels([30, 60, 90, 120]) == ["current", "1-30", "31-60", "61-90", "91-120", "121+"]
+        with pytest.raises(AgingPeriodsError):
+            validate_periods([30, 30])
+        with pytest.raises(AgingPeriodsError):
+            validate_periods([])
+
+    def test_aging_report(self, db_session, test_company, test_entity, aging_installments):
+        """Test de tramos calculados en SQL agrupados por entidad"""
+        report = aging_report(db_session, test_company.id, as_of=AS_OF)
+
+        assert report["buckets"] == ["current", "1-30", "31-60", "61-90", "91-120", "121+"]
+        assert report["totals"] == {
+            "current": Decimal("200.00"),
+            "1-30": Decimal("160.00"),
+            "31-60": Decimal("100.00"),
+            "61-90": Decimal("0"),
+            "91-120": Decimal("250.00"),
+            "121+": Decimal("100.00"),
+        }
+        assert report["total"] == Decimal("810.00")
+
+        entities = {entity["entity_id"]: entity for entity in report["entities"]}
+        assert entities[test_entity.id]["installments"] == 6
+        assert entities[test_entity.id]["total"] == Decimal("560.00")
+        assert entities[aging_installments.id]["buckets"]["91-120"] == Decimal("250.00")
+
+    def test_custom_periods_and_entity_type(self, db_session, test_company, aging_installments):
+        """Test de tramos configurables y filtro por tipo de entidad"""
+        report = aging_report(db_session, test_company.id, aging_periods=[90], entity_type="proveedor", as_of=AS_OF)
+
+        assert report["buckets"] == ["current", "1-90", "91+"]
+        assert report["totals"]["91+"] == Decimal("250.00")
+        assert [entity["entity_type"] for entity in report["entities"]] == ["proveedor"]
+
+    def test_detail_streaming(self, db_session, test_company, aging_installments):
+        """Test del detalle por cuota leído por bloques"""
+        rows = list(iter_aging_detail(db_session, test_company.id, as_of=AS_OF, chunk_size=2))
+
+        assert len(rows) == 7
+        by_days = {row["days_overdue"]: row for row in rows}
+        assert by_days[-10]["bucket"] == "current"
+        assert by_days[1]["bucket"] == "1-30"
+        assert by_days[30]["outstanding_amount"] == Decimal("60.00")
+        assert by_days[200]["bucket"] == "121+"
+
+        csv_text = "".join(iter_csv(iter(rows), DETAIL_COLUMNS, batch_size=3))
+        lines = csv_text.strip().splitlines()
+        assert lines[0] == ",".join(DETAIL_COLUMNS)
+        assert len(lines) == 8
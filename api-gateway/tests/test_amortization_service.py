@@ -0,0 +1,216 @@
+# api-gateway/tests/test_amortization_service.py
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from fastapi import HTTPException
+
+from app.models.amortization import Amortization, AmortizationInstallment
+from app.schemas.amortization import AmortizationUpdate
+from app.services.amortization_service import AmortizationService, PaidScheduleError
+
+@pytest.fixture
+def service(db_session):
+    return AmortizationService(db_session)
+
+@pytest.fixture
+def scheduled_amortization(db_session, service, test_amortization):
+    """Amortización de test con su tabla de cuotas"""
+    service.regenerate_schedules([test_amortization])
+    return test_amortization
+
+def installments(db_session, amortization_id):
+    return db_session.query(AmortizationInstallment).filter_by(
+        amortization_id=amortization_id
+    ).order_by(AmortizationInstallment.installment_number).all()
+
+class TestUpdateAmortization:
+    """Tests para la actualización de amortizaciones"""
+
+    @pytest.mark.asyncio
+    async def test_update_fields(self, db_session, service, test_amortization):
+        """Test de actualización de los campos enviados"""
+        amortization = await service.update_amortization(
+            test_amortization.id,
+            AmortizationUpdate(description="Updated description", interest_rate=Decimal("4.5"), status="suspended")
+        )
+
+        assert amortization.id == test_amortization.id
+        db_session.expire_all()
+        amortization = db_session.get(Amortization, test_amortization.id)
+        assert amortization.description == "Updated description"
+        assert amortization.interest_rate == Decimal("4.5")
+        assert amortization.status == "suspended"
+        assert amortization.reference == "TEST-AMORT-001"
+
+    @pytest.mark.asyncio
+    async def test_update_recalculates_installments(self, db_session, service, scheduled_amortization):
+        """Test de recálculo de la tabla con el nuevo tipo de interés"""
+        assert scheduled_amortization.total_interest > 0
+
+        await service.update_amortization(
+            scheduled_amortization.id, AmortizationUpdate(interest_rate=0), recalculate_installments=True
+        )
+
+        db_session.expire_all()
+        rows = installments(db_session, scheduled_amortization.id)
+        assert len(rows) == 12
+        assert all(row.interest_amount == 0 for row in rows)
+        assert db_session.get(Amortization, scheduled_amortization.id).total_interest == 0
+
+    @pytest.mark.asyncio
+    async def test_update_not_found(self, service, test_amortization):
+        """Test de amortización inexistente o eliminada"""
+        assert await service.update_amortization("no-existe", AmortizationUpdate(description="x")) is None
+
+        await service.delete_amortization(test_amortization.id)
+        assert await service.update_amortization(test_amortization.id, AmortizationUpdate(description="x")) is None
+
+    @pytest.mark.asyncio
+    async def test_recalculate_with_payments(self, db_session, service, scheduled_amortization):
+        """Test de recálculo rechazado si hay cuotas pagadas"""
+        first = installments(db_session, scheduled_amortization.id)[0]
+        await service.record_payment(
+            scheduled_amortization.id, first.id, Decimal("50"), date(2024, 2, 1), create_sap_entry=False
+        )
+
+        with pytest.raises(HTTPException) as error:
+            await service.update_amortization(
+                scheduled_amortization.id, AmortizationUpdate(description="x", interest_rate=0),
+                recalculate_installments=True
+            )
+
+        assert error.value.status_code == 400
+        db_session.expire_all()
+        assert db_session.get(Amortization, scheduled_amortization.id).description == "Test amortization"
+        assert db_session.get(AmortizationInstallment, first.id).paid_amount == Decimal("50")
+
+class TestRegenerateSchedules:
+    """Tests para la regeneración de tablas de cuotas"""
+
+    @pytest.mark.asyncio
+    async def test_paid_installments_kept(self, db_session, service, scheduled_amortization, test_entity):
+        """Test de regeneración rechazada con una cuota pagada (aunque los totales no lo reflejen)"""
+        other = Amortization(
+            company_id=scheduled_amortization.company_id, entity_id=test_entity.id, reference="OTHER",
+            total_amount=1200, pending_amount=1200, total_installments=12, installment_amount=100,
+            start_date=date(2024, 1, 1), amortization_method="linear", frequency="monthly"
+        )
+        db_session.add(other)
+        db_session.commit()
+        service.regenerate_schedules([other])
+
+        first = installments(db_session, scheduled_amortization.id)[0]
+        first.paid_amount = first.total_amount
+        first.status = "paid"
+        db_session.commit()
+
+        with pytest.raises(PaidScheduleError) as error:
+            service.regenerate_schedules([scheduled_amortization, other])
+        assert error.value.amortization_ids == [scheduled_amortization.id]
+
+        with pytest.raises(HTTPException) as error:
+            await service.generate_installments(scheduled_amortization.id, overwrite_existing=True)
+        assert error.value.status_code == 400
+
+        db_session.expire_all()
+        assert db_session.get(AmortizationInstallment, first.id).status == "paid"
+        assert len(installments(db_session, scheduled_amortization.id)) == 12
+        assert service.paid_amortization_ids([scheduled_amortization.id, other.id]) == {scheduled_amortization.id}
+
+class TestDeleteAmortization:
+    """Tests para la eliminación de amortizaciones"""
+
+    @pytest.mark.asyncio
+    async def test_soft_delete(self, db_session, service, scheduled_amortization):
+        """Test de soft delete: se desactiva y conserva sus cuotas"""
+        assert await service.delete_amortization(scheduled_amortization.id) is True
+        assert await service.delete_amortization(scheduled_amortization.id) is False
+
+        db_session.expire_all()
+        assert db_session.get(Amortization, scheduled_amortization.id).is_active is False
+        assert len(installments(db_session, scheduled_amortization.id)) == 12
+
+    @pytest.mark.asyncio
+    async def test_force_delete(self, db_session, service, scheduled_amortization):
+        """Test de borrado con sus cuotas"""
+        amortization_id = scheduled_amortization.id
+
+        assert await service.delete_amortization(amortization_id, force_delete=True) is True
+
+        db_session.expire_all()
+        assert db_session.get(Amortization, amortization_id) is None
+        assert installments(db_session, amortization_id) == []
+        assert await service.delete_amortization("no-existe", force_delete=True) is False
+
+class TestRecordPayment:
+    """Tests para el registro de pagos de cuotas"""
+
+    @pytest.mark.asyncio
+    async def test_partial_then_full_payment(self, db_session, service, scheduled_amortization):
+        """Test de pago parcial y pago del resto de la cuota"""
+        first, second = installments(db_session, scheduled_amortization.id)[:2]
+        pending = scheduled_amortization.pending_amount
+
+        result = await service.record_payment(
+            scheduled_amortization.id, first.id, Decimal("100"), date(2024, 2, 1),
+            notes="Primer pago", create_sap_entry=False
+        )
+
+        assert result["installment_status"] == "partial"
+        assert result["installment_remaining_amount"] == first.total_amount - Decimal("100")
+        assert result["paid_installments"] == 0
+        assert result["sap"] is None
+
+        result = await service.record_payment(
+            scheduled_amortization.id, first.id, first.total_amount - Decimal("100"), date(2024, 2, 5),
+            create_sap_entry=False
+        )
+
+        assert result["installment_status"] == "paid"
+        db_session.expire_all()
+        first = db_session.get(AmortizationInstallment, first.id)
+        assert first.paid_amount == first.total_amount
+        assert first.payment_date == date(2024, 2, 5)
+        assert first.notes == "Primer pago"
+        amortization = db_session.get(Amortization, scheduled_amortization.id)
+        assert amortization.paid_amount == first.total_amount
+        assert amortization.pending_amount == pending - first.total_amount
+        assert amortization.paid_installments == 1
+        assert amortization.next_due_date == second.due_date
+        # El siguiente vencimiento (2024) ya ha pasado
+        assert amortization.status == "overdue"
+
+    @pytest.mark.asyncio
+    async def test_invalid_payment(self, db_session, service, scheduled_amortization):
+        """Test de pagos rechazados sin cambios en la cuota"""
+        first = installments(db_session, scheduled_amortization.id)[0]
+
+        with pytest.raises(HTTPException) as error:
+            await service.record_payment(
+                scheduled_amortization.id, first.id, first.total_amount + 1, date(2024, 2, 1), create_sap_entry=False
+            )
+        assert error.value.status_code == 400
+
+        with pytest.raises(HTTPException) as error:
+            await service.record_payment(
+                "otra-amortizacion", first.id, Decimal("10"), date(2024, 2, 1), create_sap_entry=False
+            )
+        assert error.value.status_code == 404
+
+        db_session.expire_all()
+        assert db_session.get(AmortizationInstallment, first.id).paid_amount == 0
+
+    @pytest.mark.asyncio
+    async def test_sap_error_keeps_payment(self, db_session, service, scheduled_amortization):
+        """Test de error de SAP informado en el resultado sin deshacer el pago"""
+        first = installments(db_session, scheduled_amortization.id)[0]
+
+        result = await service.record_payment(
+            scheduled_amortization.id, first.id, first.total_amount, date(2024, 2, 1)
+        )
+
+        # La compañía de test no tiene cuenta de amortización configurada
+        assert "Cuenta de amortización" in result["sap"]["error"]
+        db_session.expire_all()
+        assert db_session.get(AmortizationInstallment, first.id).status == "paid"
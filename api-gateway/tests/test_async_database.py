@@ -0,0 +1,186 @@
+import pytest
+import pytest_asyncio
+import json
+from datetime import date, timedelta
+from typing import List
+from decimal import Decimal
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database import get_async_database_url
+from app.models.company import Company
+from app.models.entity import Entity
+from app.models.amortization import Amortization
+from app.services.amortization_service import AmortizationService, AsyncAmortizationService
+from app.services.schedule_engine import calculate_schedules
+from app.services.installment_writer import InstallmentBulkWriter
+from app.schemas.installment import InstallmentResponse
+from app.utils.cache import serialize_response
+from app.utils.filters import AmortizationFilters
+
+@pytest_asyncio.fixture
+async def async_db_session():
+    """Sesión async real (aiosqlite en memoria)"""
+    engine = create_async_engine(get_async_database_url("sqlite://"))
+    async with engine.begin() as connection:
+        await connection.run_sync(Amortization.metadata.create_all)
+
+    session = async_sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+
+    await session.close()
+    await engine.dispose()
+
+@pytest_asyncio.fixture
+async def async_amortizations(async_db_session):
+    """Compañía, entidad y tres amortizaciones con cuotas"""
+    def populate(session):
+        session.add(Company(id="ASYNC01", name="Async Company", sap_database="ASYNCDB"))
+        entity = Entity(company_id="ASYNC01", sap_card_code="C001", name="Async Entity", type="cliente")
+        session.add(entity)
+        session.flush()
+
+        amortizations = [
+            Amortization(
+                company_id="ASYNC01",
+                entity_id=entity.id,
+                reference=f"ASYNC-{i:03d}",
+                total_amount=Decimal("1200.00"),
+                pending_amount=Decimal("1200.00"),
+                total_installments=12,
+                installment_amount=Decimal("100.00"),
+                interest_rate=Decimal("0"),
+                start_date=date.today() - timedelta(days=65),
+                amortization_method="linear",
+                frequency="monthly"
+            )
+            for i in range(3)
+        ]
+        session.add_all(amortizations)
+        session.flush()
+        InstallmentBulkWriter(session).write([a.id for a in amortizations], calculate_schedules(amortizations))
+        session.commit()
+        return [a.id for a in amortizations]
+
+    return await async_db_session.run_sync(populate)
+
+class TestAsyncDatabase:
+    """Tests para la capa async de base de datos"""
+
+    def test_async_database_url(self):
+        """Test de traducción de URL al driver async"""
+        assert get_async_database_url("postgresql://u:p@db:5432/x") == "postgresql+asyncpg://u:p@db:5432/x"
+        assert get_async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+        assert get_async_database_url("mysql://u:p@db/x") == "mysql://u:p@db/x"
+
+    @pytest.mark.asyncio
+    async def test_list_amortizations(self, async_db_session, async_amortizations):
+        """Test de listado async (offset y cursor)"""
+        service = AsyncAmortizationService(async_db_session)
+        filters = AmortizationFilters(company_id="ASYNC01")
+
+        result = await service.list_amortizations(filters, page_size=2)
+        assert result["total"] == 3
+        assert result["has_next"] is True
+        assert result["items"][0]["entity_name"] == "Async Entity"
+
+        first = await service.list_amortizations(filters, page_size=2, use_cursor=True)
+        second = await service.list_amortizations(filters, page_size=2, cursor=first["next_cursor"])
+        ids = [item["id"] for item in first["items"] + second["items"]]
+        assert sorted(ids) == sorted(async_amortizations)
+
+    @pytest.mark.asyncio
+    async def test_get_amortization_detail(self, async_db_session, async_amortizations):
+        """Test de detalle async con y sin cuotas"""
+        service = AsyncAmortizationService(async_db_session)
+
+        detail = await service.get_amortization_detail(async_amortizations[0])
+        assert detail["entity_card_code"] == "C001"
+        assert [i.installment_number for i in detail["installments"]] == list(range(1, 13))
+
+        detail = await service.get_amortization_detail(async_amortizations[0], include_installments=False)
+        assert detail["installments"] is None
+
+        assert await service.get_amortization_detail("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_get_installments(self, async_db_session, async_amortizations):
+        """Test de cuotas async con filtro de vencidas"""
+        service = AsyncAmortizationService(async_db_session)
+
+        installments = await service.get_installments(async_amortizations[0])
+        assert len(installments) == 12
+
+        overdue = await service.get_installments(async_amortizations[0], overdue_only=True)
+        assert len(overdue) == 2
+        assert all(i.due_date < date.today() for i in overdue)
+
+    @pytest.mark.asyncio
+    async def test_installment_computed_fields(self, async_db_session, async_amortizations):
+        """Test de campos calculados en SQL (retraso, importe pendiente) y ordenación por ellos"""
+        service = AsyncAmortizationService(async_db_session)
+
+        installments = await service.get_installments(async_amortizations[0], sort_by="days_overdue", sort_order="desc")
+        first = installments[0]
+        assert first.installment_number == 1
+        assert first.is_overdue is True
+        assert first.days_overdue == (date.today() - first.due_date).days
+        assert installments[-1].is_overdue is False
+        assert installments[-1].days_overdue == 0
+        assert first.remaining_amount == first.total_amount
+        assert first.payment_percentage == 0
+
+        serialized = serialize_response(List[InstallmentResponse], installments)
+        assert b'"is_overdue":true' in serialized.body
+
+    @pytest.mark.asyncio
+    async def test_installments_json(self, async_db_session, async_amortizations):
+        """Test de cuotas y detalle codificados con orjson (mismo JSON que con Pydantic)"""
+        service = AsyncAmortizationService(async_db_session)
+
+        installments = await service.get_installments(async_amortizations[0], sort_by="due_date", sort_order="desc")
+        body = await service.get_installments_json(async_amortizations[0], sort_by="due_date", sort_order="desc")
+        assert body == serialize_response(List[InstallmentResponse], installments).body
+
+        detail = json.loads(await service.get_amortization_detail_json(async_amortizations[0]))
+        assert detail["entity_card_code"] == "C001"
+        assert detail["total_amount"] == "1200.00"
+        assert [i["installment_number"] for i in detail["installments"]] == list(range(1, 13))
+
+        detail = json.loads(await service.get_amortization_detail_json(async_amortizations[0], include_installments=False))
+        assert detail["installments"] is None
+        assert await service.get_amortization_detail_json("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_sparse_fieldsets(self, async_db_session, async_amortizations):
+        """Test de fields en listado y detalle (solo las columnas pedidas en la consulta)"""
+        service = AsyncAmortizationService(async_db_session)
+        statements = []
+        engine = async_db_session.bind.sync_engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            filters = AmortizationFilters(company_id="ASYNC01")
+            result = await service.list_amortizations(
+                filters, page_size=2, use_cursor=True, fields=["id", "reference", "entity_name"]
+            )
+            assert [list(item) for item in result["items"]] == [["id", "reference", "entity_name"]] * 2
+            assert result["items"][0]["entity_name"] == "Async Entity"
+            second = await service.list_amortizations(
+                filters, page_size=2, cursor=result["next_cursor"], fields=["id", "amortization_method"]
+            )
+            assert len(second["items"]) == 1
+            assert list(second["items"][0]) == ["id", "amortization_method"]
+
+            detail = json.loads(await service.get_amortization_detail_json(
+                async_amortizations[0], include_installments=False, fields=["id", "status", "total_amount"]
+            ))
+            assert detail == {"id": async_amortizations[0], "total_amount": "1200.00", "status": "active"}
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        selects = [statement for statement in statements if statement.lstrip().startswith("SELECT")]
+        assert selects
+        assert not any("amortizations.description" in statement for statement in selects)
+        assert not any("entities" in statement for statement in selects[-1:])
@@ -0,0 +1,126 @@
+import pytest
+from datetime import date
+
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+
+from app.models.amortization import Amortization, AmortizationInstallment
+from app.models.summary import AmortizationMonthlySummary
+from app.schemas.common import BulkOperationRequest
+from app.services.bulk_service import BulkOperationError, BulkOperationService, id_condition
+
+@pytest.fixture
+def bulk_amortizations(db_session, test_company, test_entity):
+    """Cinco amortizaciones de test (la última suspendida)"""
+    amortizations = [
+        Amortization(
+            company_id=test_company.id,
+            entity_id=test_entity.id,
+            reference=f"BULK-{i}",
+            total_amount=1200,
+            pending_amount=1200,
+            total_installments=12,
+            installment_amount=100,
+            interest_rate=0,
+            start_date=date(2024, 1, 1),
+            amortization_method="linear",
+            frequency="monthly",
+            status="suspended" if i == 4 else "active"
+        )
+        for i in range(5)
+    ]
+    db_session.add_all(amortizations)
+    db_session.commit()
+    return amortizations
+
+def summary_counts(db_session, company_id):
+    rows = db_session.query(AmortizationMonthlySummary).filter_by(company_id=company_id).all()
+    return {row.status: row.amortization_count for row in rows if row.amortization_count}
+
+class TestBulkOperations:
+    """Tests para operaciones en lote"""
+
+    def test_suspend_by_ids(self, db_session, test_company, bulk_amortizations):
+        """Test de cambio de estado en un UPDATE con resultado por id"""
+        ids = [a.id for a in bulk_amortizations] + ["no-existe"]
+        result = BulkOperationService(db_session).run(BulkOperationRequest(ids=ids, operation="suspend"))
+
+        assert result["total_requested"] == 6
+        assert result["successful"] == 4
+        assert {error["id"] for error in result["errors"]} == {bulk_amortizations[4].id, "no-existe"}
+        db_session.expire_all()
+        assert {a.status for a in db_session.query(Amortization)} == {"suspended"}
+        assert summary_counts(db_session, test_company.id) == {"suspended": 5}
+
+    def test_reactivate_by_filters(self, db_session, test_company, bulk_amortizations):
+        """Test de operación por filtros"""
+        result = BulkOperationService(db_session).run(BulkOperationRequest(
+            filters={"company_id": test_company.id, "status": "suspended"}, operation="reactivate"
+        ))
+        assert result["successful"] == 1
+        assert result["results"][0]["status"] == "active"
+        assert summary_counts(db_session, test_company.id) == {"active": 5}
+
+    def test_soft_delete(self, db_session, test_company, bulk_amortizations):
+        """Test de borrado lógico (fuera del resumen y de siguientes operaciones)"""
+        ids = [bulk_amortizations[0].id, bulk_amortizations[1].id]
+        service = BulkOperationService(db_session, chunk_size=1)
+        assert service.run(BulkOperationRequest(ids=ids, operation="delete"))["successful"] == 2
+        assert summary_counts(db_session, test_company.id) == {"active": 2, "suspended": 1}
+
+        result = service.run(BulkOperationRequest(ids=ids, operation="cancel"))
+        assert result["failed"] == 2
+
+    def test_summary_deltas(self, db_session, test_company, bulk_amortizations):
+        """Test de deltas del resumen solo para las filas modificadas (sin reconstruir la compañía)"""
+        first, second = bulk_amortizations[:2]
+        first.paid_amount, first.pending_amount = 300, 900
+        second.start_date = date(2024, 3, 10)
+        db_session.add(AmortizationMonthlySummary(
+            company_id=test_company.id, entity_type="cliente", status="active", month=date(2020, 1, 1),
+            amortization_count=7, total_amount=0, paid_amount=0, pending_amount=0
+        ))
+        db_session.commit()
+
+        ids = [a.id for a in bulk_amortizations]
+        BulkOperationService(db_session).run(BulkOperationRequest(ids=ids[:3], operation="cancel"))
+        BulkOperationService(db_session).run(BulkOperationRequest(ids=ids[2:], operation="delete"))
+
+        rows = {
+            (row.status, row.month): (row.amortization_count, row.total_amount, row.paid_amount, row.pending_amount)
+            for row in db_session.query(AmortizationMonthlySummary).filter_by(company_id=test_company.id)
+            if row.amortization_count
+        }
+        assert rows == {
+            ("cancelled", date(2024, 1, 1)): (1, 1200, 300, 900),
+            ("cancelled", date(2024, 3, 1)): (1, 1200, 0, 1200),
+            # Grupo ajeno a la operación: no se recalcula
+            ("active", date(2020, 1, 1)): (7, 0, 0, 0),
+        }
+
+    def test_recalculate(self, db_session, bulk_amortizations):
+        """Test de regeneración de cuotas (se rechazan las que tienen pagos)"""
+        bulk_amortizations[1].paid_amount = 100
+        bulk_amortizations[1].paid_installments = 1
+        db_session.commit()
+
+        ids = [bulk_amortizations[0].id, bulk_amortizations[1].id]
+        result = BulkOperationService(db_session).run(BulkOperationRequest(ids=ids, operation="recalculate"))
+
+        assert [item["id"] for item in result["results"]] == [bulk_amortizations[0].id]
+        assert result["errors"][0]["id"] == bulk_amortizations[1].id
+        assert db_session.query(AmortizationInstallment).filter_by(amortization_id=ids[0]).count() == 12
+
+    def test_invalid_requests(self, db_session):
+        """Test de solicitudes no válidas"""
+        with pytest.raises(ValidationError):
+            BulkOperationRequest(ids=["a"], filters={"company_id": "TEST001"}, operation="cancel")
+        with pytest.raises(ValidationError):
+            BulkOperationRequest(ids=["a"], operation="archive")
+        with pytest.raises(BulkOperationError):
+            BulkOperationService(db_session).run(BulkOperationRequest(filters={"status": "active"}, operation="cancel"))
+
+    def test_postgres_any(self):
+        """Test de un único parámetro array en PostgreSQL"""
+        sql = str(id_condition(Amortization.id, ["a", "b", "c"], "postgresql").compile(dialect=postgresql.dialect()))
+        assert sql == "amortizations.id = ANY (%(ids)s::VARCHAR[])"
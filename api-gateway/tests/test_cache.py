@@ -0,0 +1,149 @@
+import pytest
+import asyncio
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from starlette.requests import Request
+
+from app.config import settings
+from app.schemas.amortization import AmortizationListResponse
+from app.utils.cache import (
+    ResponseCache, CachedResponse, serialize_response, etag_response, normalize_query, make_etag
+)
+from app.utils.counting import CountCache, count_cache_key
+
+def make_request(headers=None) -> Request:
+    """Request mínima con cabeceras"""
+    raw = [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": b""})
+
+def redis_cache() -> ResponseCache:
+    """Caché contra el Redis configurado (REDIS_URL); se omite el test si no responde"""
+    cache = ResponseCache(settings.REDIS_URL, ttl=60, prefix=f"test:{uuid.uuid4().hex}")
+    try:
+        asyncio.run(cache.client.ping())
+    except Exception:
+        pytest.skip("Redis no disponible")
+    finally:
+        cache._client = None
+    return cache
+
+class TestResponseCache:
+    """Tests para la caché de respuestas y ETags"""
+
+    def test_normalize_query(self):
+        """Test de normalización de la consulta (orden y vacíos)"""
+        first = normalize_query([("page", "2"), ("company_id", "C1"), ("status", "")])
+        second = normalize_query([("company_id", "C1"), ("page", "2")])
+        assert first == second
+        assert normalize_query([("page", "3"), ("company_id", "C1")]) != first
+
+    def test_serialize_response(self):
+        """Test de serialización con el response_model"""
+        content = {
+            "items": [{
+                "id": "A1", "reference": "REF", "entity_name": "E", "entity_type": "cliente",
+                "total_amount": Decimal("100.00"), "pending_amount": Decimal("100.00"),
+                "paid_installments": 0, "total_installments": 12, "next_due_date": None,
+                "status": "active", "created_at": datetime(2024, 1, 1)
+            }],
+            "total": 1, "page": 1, "page_size": 20, "has_next": False, "has_prev": False
+        }
+        cached = serialize_response(AmortizationListResponse, content)
+
+        assert b'"reference":"REF"' in cached.body
+        assert cached.etag == make_etag(cached.body)
+
+    def test_etag_response(self):
+        """Test de respuesta 304 con If-None-Match"""
+        cached = CachedResponse(b'{"ok":true}', make_etag(b'{"ok":true}'))
+
+        response = etag_response(make_request(), cached)
+        assert response.status_code == 200
+        assert response.headers["etag"] == cached.etag
+
+        response = etag_response(make_request({"If-None-Match": f'"other", W/{cached.etag}'}), cached)
+        assert response.status_code == 304
+        assert response.body == b""
+
+        response = etag_response(make_request({"If-None-Match": '"other"'}), cached)
+        assert response.status_code == 200
+
+    def test_unavailable_redis(self):
+        """Test de degradación sin Redis: se responde sin caché"""
+        cache = ResponseCache("redis://127.0.0.1:1/0", ttl=60)
+
+        async def run():
+            key = await cache.key("list", "company", "C1", [("page", "1")])
+            return key, await cache.get(key)
+
+        assert asyncio.run(run()) == (None, None)
+        assert cache.stats["errors"] == 1
+        assert not cache.available
+
+    def test_invalidation(self):
+        """Test de invalidación por compañía y amortización"""
+        cache = redis_cache()
+        cached = CachedResponse(b"[]", make_etag(b"[]"))
+
+        async def run():
+            list_key = await cache.key("list", "company", "C1", [("page", "1")])
+            detail_key = await cache.key("detail", "amortization", "A1", company_id="C1")
+            other_key = await cache.key("detail", "amortization", "A2", company_id="C2")
+            for key in (list_key, detail_key, other_key):
+                await cache.set(key, cached)
+            hits = (await cache.get(list_key), await cache.get(detail_key))
+
+            # Invalidar la compañía invalida también el detalle de sus amortizaciones
+            await cache.invalidate(company_id="C1")
+            after_company = (
+                await cache.get(await cache.key("list", "company", "C1", [("page", "1")])),
+                await cache.get(await cache.key("detail", "amortization", "A1", company_id="C1")),
+                await cache.get(await cache.key("detail", "amortization", "A2", company_id="C2"))
+            )
+
+            detail_key = await cache.key("detail", "amortization", "A1", company_id="C1")
+            await cache.set(detail_key, cached)
+            await cache.invalidate(amortization_id="A1")
+            after_amortization = await cache.get(await cache.key("detail", "amortization", "A1", company_id="C1"))
+
+            other_key = await cache.key("detail", "amortization", "A2", company_id="C2")
+            cache.invalidate_sync(company_id="C2")
+            after_sync = await cache.get(await cache.key("detail", "amortization", "A2", company_id="C2"))
+            await cache.client.aclose()
+            cache.sync_client.close()
+            return hits, after_company, after_amortization, after_sync
+
+        hits, after_company, after_amortization, after_sync = asyncio.run(run())
+        assert hits == (cached, cached)
+        assert after_company == (None, None, cached)
+        assert after_amortization is None
+        assert after_sync is None
+
+    def test_sync_client_reused(self):
+        """Test de un único cliente síncrono para las invalidaciones de los workers"""
+        cache = ResponseCache("redis://127.0.0.1:1/0", ttl=60)
+
+        client = cache.sync_client
+        cache.invalidate_sync(company_id="C1")
+
+        assert cache.sync_client is client
+        assert cache.stats["errors"] == 1
+        client.close()
+
+    def test_count_cache_generations(self):
+        """Test de totales cacheados invalidados desde otro proceso (generación en Redis)"""
+        cache = redis_cache()
+        api, worker = CountCache(ttl=60, generations=cache), CountCache(ttl=60, generations=cache)
+        filters = {"company_id": "C1", "status": "active"}
+
+        key = count_cache_key(filters, api.generation_sync("C1"))
+        api.set(key, 42)
+        assert api.get(count_cache_key(filters, api.generation_sync("C1"))) == 42
+
+        # El worker solo puede incrementar la generación, no borrar la memoria de la API
+        worker.invalidate("C1")
+        assert api.get(count_cache_key(filters, api.generation_sync("C1"))) is None
+        assert asyncio.run(api.generation("C1")) == "1"
+        cache.sync_client.close()
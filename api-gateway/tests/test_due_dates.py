@@ -0,0 +1,63 @@
+import pytest
+from datetime import date
+
+from app.models.amortization import Amortization
+from app.utils.due_dates import (
+    add_months, generate_due_dates, due_date_table, due_date_cache_info, clear_due_date_cache
+)
+
+class TestDueDates:
+    """Tests para el cálculo de fechas de vencimiento"""
+
+    def test_add_months_end_of_month(self):
+        """Test de ajuste a fin de mes"""
+        assert add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+        assert add_months(date(2023, 1, 31), 1) == date(2023, 2, 28)
+        assert add_months(date(2024, 1, 31), 2) == date(2024, 3, 31)
+        assert add_months(date(2024, 11, 15), 3) == date(2025, 2, 15)
+
+    @pytest.mark.parametrize("frequency,expected", [
+        ("monthly", [date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]),
+        ("quarterly", [date(2024, 4, 30), date(2024, 7, 31), date(2024, 10, 31)]),
+        ("biannual", [date(2024, 7, 31), date(2025, 1, 31), date(2025, 7, 31)]),
+        ("annual", [date(2025, 1, 31), date(2026, 1, 31), date(2027, 1, 31)]),
+    ])
+    def test_frequencies(self, frequency, expected):
+        """Test de vencimientos por frecuencia"""
+        assert generate_due_dates(date(2024, 1, 31), frequency, 3) == expected
+
+    def test_business_day_roll(self):
+        """Test de ajuste a día hábil"""
+        # 2024-06-30 es domingo
+        start = date(2024, 5, 30)
+        assert generate_due_dates(start, "monthly", 1) == [date(2024, 6, 30)]
+        assert generate_due_dates(start, "monthly", 1, roll="following") == [date(2024, 7, 1)]
+        assert generate_due_dates(start, "monthly", 1, roll="modified_following") == [date(2024, 6, 28)]
+        assert generate_due_dates(start, "monthly", 1, roll="preceding") == [date(2024, 6, 28)]
+
+    def test_holidays(self):
+        """Test de festivos en el ajuste a día hábil"""
+        dates = generate_due_dates(
+            date(2024, 11, 25), "monthly", 1, roll="following", holidays=[date(2024, 12, 25)]
+        )
+        assert dates == [date(2024, 12, 26)]
+
+    def test_table_is_memoized(self):
+        """Test de reutilización de la tabla de vencimientos"""
+        clear_due_date_cache()
+        first = due_date_table(date(2024, 1, 15), "monthly", 360)
+        second = due_date_table("2024-01-15", "monthly", 360)
+
+        assert first is second
+        assert due_date_cache_info().hits == 1
+        assert not first.flags.writeable
+
+    def test_installment_beyond_total(self):
+        """Test de vencimiento de una cuota posterior al total de cuotas"""
+        amortization = Amortization(start_date=date(2024, 1, 31), frequency="quarterly", total_installments=2)
+
+        assert amortization._calculate_due_date(2) == date(2024, 7, 31)
+        assert amortization._calculate_due_date(5) == date(2025, 4, 30)
+
+        with pytest.raises(ValueError):
+            amortization._calculate_due_date(0)
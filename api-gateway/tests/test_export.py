@@ -0,0 +1,110 @@
+import pytest
+import io
+import tracemalloc
+import zipfile
+from datetime import date
+
+from sqlalchemy import insert
+
+from app.models.amortization import Amortization, AmortizationInstallment
+from app.schemas.common import ExportRequest
+from app.services.export_service import (
+    ExportError, EXPORT_COLUMNS, stream_export, iter_export_rows, iter_xlsx_export, excel_money_format
+)
+from app.utils.filters import AmortizationFilters
+
+def add_installments(db_session, amortization_id, count):
+    """Insertar `count` cuotas de una amortización"""
+    db_session.execute(insert(AmortizationInstallment), [
+        {
+            "id": f"{amortization_id[:8]}-{number:08d}",
+            "amortization_id": amortization_id,
+            "installment_number": number,
+            "due_date": date(2024, 1 + number % 12, 1),
+            "principal_amount": 1234.5,
+            "interest_amount": 0,
+            "total_amount": 1234.5,
+            "paid_amount": 0,
+            "status": "pending",
+        }
+        for number in range(1, count + 1)
+    ])
+    db_session.commit()
+
+@pytest.fixture
+def export_installments(db_session, test_amortization):
+    """Amortización de test con 3 cuotas"""
+    add_installments(db_session, test_amortization.id, 3)
+    return test_amortization
+
+class TestExport:
+    """Tests para la exportación en streaming"""
+
+    def test_csv_export(self, db_session, test_company, export_installments):
+        """Test de exportación CSV con formatters"""
+        request = ExportRequest(format="csv", filters={"company_id": test_company.id}, date_format="DD/MM/YYYY")
+        content, media_type, filename = stream_export(db_session, request)
+        lines = "".join(content).strip().splitlines()
+
+        assert media_type == "text/csv"
+        assert filename.endswith(".csv")
+        assert lines[0].split(",")[0] == "Referencia"
+        assert len(lines) == 4
+        assert "01/02/2024" in lines[1]
+        assert "1.234.50 €" in lines[1]
+
+    def test_filters(self, db_session, test_company, export_installments):
+        """Test de reutilización de apply_amortization_filters"""
+        rows = list(iter_export_rows(db_session, AmortizationFilters(company_id=test_company.id, status="cancelled")))
+        assert rows == []
+
+        rows = list(iter_export_rows(db_session, AmortizationFilters(
+            company_id=test_company.id, entity_type="cliente", entity_name="test"
+        )))
+        assert len(rows) == 3
+
+    @pytest.mark.parametrize("request_data", [
+        {"format": "csv", "filters": {}},
+        {"format": "pdf", "filters": {"company_id": "TEST001"}},
+        {"format": "csv", "filters": {"company_id": "TEST001"}, "date_format": "MM-DD"},
+        {"format": "csv", "filters": {"company_id": "TEST001", "status": "desconocido"}},
+    ])
+    def test_invalid_request(self, db_session, request_data):
+        """Test de solicitudes no válidas"""
+        with pytest.raises(ExportError):
+            stream_export(db_session, ExportRequest(**request_data))
+
+    def test_xlsx_export(self, db_session, test_company, export_installments):
+        """Test de exportación Excel (varias hojas al superar el límite de filas)"""
+        pytest.importorskip("xlsxwriter")
+        rows = iter_export_rows(db_session, AmortizationFilters(company_id=test_company.id))
+        data = b"".join(iter_xlsx_export(rows, max_rows=3))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+            names = workbook.namelist()
+            first_sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+        assert "xl/worksheets/sheet2.xml" in names
+        assert first_sheet.count("<row ") == 3
+        assert excel_money_format("EUR") == '#,##0.00 "€"'
+        assert excel_money_format("USD") == '"$" #,##0.00'
+
+    def test_constant_memory(self, db_session, test_company, test_amortization):
+        """Test de memoria: el pico no crece con el número de filas"""
+        request = ExportRequest(format="csv", filters={"company_id": test_company.id})
+        # expunge_all desancla la amortización de test
+        amortization_id = test_amortization.id
+
+        def peak(count):
+            db_session.query(AmortizationInstallment).delete()
+            add_installments(db_session, amortization_id, count)
+            db_session.expunge_all()
+            tracemalloc.start()
+            content, _, _ = stream_export(db_session, request, chunk_size=500)
+            for _ in content:
+                pass
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak_bytes
+
+        small, large = peak(2000), peak(20000)
+        assert large < small * 2
@@ -0,0 +1,137 @@
+import pytest
+import base64
+import io
+from datetime import date
+
+from app.models.amortization import Amortization, AmortizationInstallment
+from app.models.summary import AmortizationMonthlySummary
+from app.schemas.common import ImportRequest
+from app.services.import_service import AmortizationImporter, Base64Reader, ImportFileError, validate_row
+
+MAPPING = {
+    "Referencia": "reference",
+    "Cliente": "entity_card_code",
+    "Importe": "total_amount",
+    "Cuotas": "total_installments",
+    "Interés": "interest_rate",
+    "Inicio": "start_date",
+    "Método": "amortization_method",
+}
+
+def csv_request(lines, **kwargs):
+    text = "Referencia;Cliente;Importe;Cuotas;Interés;Inicio;Método\n" + "\n".join(lines) + "\n"
+    kwargs.setdefault("mapping", MAPPING)
+    return ImportRequest(
+        file_data=base64.b64encode(text.encode("utf-8")).decode(),
+        file_type="csv",
+        **kwargs
+    )
+
+class TestImport:
+    """Tests para la importación masiva por bloques"""
+
+    def test_csv_import(self, db_session, test_company, test_entity):
+        """Test de importación CSV con cuotas y resumen mensual"""
+        lines = [f"IMP-{i:03d};TEST001;1200,00;12;0;2024-0{1 + i % 3}-01;linear" for i in range(10)]
+        progress = []
+        result = AmortizationImporter(
+            db_session, test_company.id, chunk_size=4, workers=0, on_progress=progress.append
+        ).run(csv_request(lines))
+
+        assert result["total_rows"] == 10
+        assert result["successful_imports"] == 10
+        assert result["failed_imports"] == 0
+        assert len(result["imported_ids"]) == 10
+        assert [p["processed_rows"] for p in progress] == [4, 8, 10]
+
+        amortization = db_session.get(Amortization, result["imported_ids"][0])
+        assert amortization.entity_id == test_entity.id
+        assert float(amortization.installment_amount) == 100.0
+        assert amortization.search_text == "imp-000"
+        assert db_session.query(AmortizationInstallment).count() == 120
+
+        summary = db_session.query(AmortizationMonthlySummary).filter_by(company_id=test_company.id).all()
+        assert sum(row.amortization_count for row in summary) == 10
+        assert sum(float(row.total_amount) for row in summary) == 12000.0
+
+    def test_validation_errors(self, db_session, test_company, test_entity):
+        """Test de errores por fila (número de línea del fichero)"""
+        lines = [
+            "OK-1;TEST001;500;5;0;01/03/2024;french",
+            "MAL-1;TEST001;-5;5;0;2024-03-01;linear",
+            "MAL-2;TEST001;500;0;0;2024-03-01;linear",
+            "MAL-3;NOEXISTE;500;5;0;2024-03-01;linear",
+            "MAL-4;TEST001;500;5;0;2024-13-01;otro",
+        ]
+        result = AmortizationImporter(db_session, test_company.id, workers=0).run(csv_request(lines))
+
+        assert result["successful_imports"] == 1
+        assert result["failed_imports"] == 4
+        errors = {(error["row"], error["field"]) for error in result["validation_errors"]}
+        assert errors == {
+            (3, "total_amount"), (4, "total_installments"), (5, "entity_card_code"),
+            (6, "start_date"), (6, "amortization_method"),
+        }
+
+    def test_validate_only(self, db_session, test_company, test_entity):
+        """Test de validación sin importar"""
+        result = AmortizationImporter(db_session, test_company.id, workers=0).run(
+            csv_request(["VAL-1;TEST001;100;2;0;2024-01-01;linear"], validate_only=True)
+        )
+        assert result["successful_imports"] == 1
+        assert result["imported_ids"] == []
+        assert db_session.query(Amortization).count() == 0
+
+    def test_process_pool(self, db_session, test_company, test_entity):
+        """Test de validación en paralelo (orden de bloques conservado)"""
+        lines = [f"POOL-{i:03d};TEST001;100;2;0;2024-01-01;linear" for i in range(50)]
+        result = AmortizationImporter(db_session, test_company.id, chunk_size=7, workers=2).run(csv_request(lines))
+
+        assert result["successful_imports"] == 50
+        references = [db_session.get(Amortization, id).reference for id in result["imported_ids"]]
+        assert references == [f"POOL-{i:03d}" for i in range(50)]
+
+    def test_excel_import(self, db_session, test_company, test_entity):
+        """Test de importación Excel sin cabecera (mapeo por índice)"""
+        openpyxl = pytest.importorskip("openpyxl")
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["XLS-1", "TEST001", 2400.5, 24, 3.5, date(2024, 5, 15)])
+        sheet.append(["XLS-2", "TEST001", 100, 1, None, "2024-06-01"])
+        stream = io.BytesIO()
+        workbook.save(stream)
+
+        request = ImportRequest(
+            file_data="data:application/vnd.ms-excel;base64," + base64.b64encode(stream.getvalue()).decode(),
+            file_type="excel",
+            has_headers=False,
+            mapping={"0": "reference", "1": "entity_card_code", "2": "total_amount",
+                     "3": "total_installments", "4": "interest_rate", "5": "start_date"}
+        )
+        result = AmortizationImporter(db_session, test_company.id, workers=0).run(request)
+
+        assert result["successful_imports"] == 2
+        amortization = db_session.get(Amortization, result["imported_ids"][0])
+        assert amortization.start_date == date(2024, 5, 15)
+        assert float(amortization.total_amount) == 2400.5
+
+    def test_invalid_file(self, db_session, test_company):
+        """Test de mapeo y base64 no válidos"""
+        with pytest.raises(ImportFileError):
+            AmortizationImporter(db_session, test_company.id, workers=0).run(
+                csv_request([], mapping={"Referencia": "reference"})
+            )
+        with pytest.raises(ImportFileError):
+            Base64Reader("no es base64!!").read()
+
+    def test_validate_row(self):
+        """Test de normalización de una fila"""
+        row, errors = validate_row(2, {
+            "reference": " REF-1 ", "entity_card_code": "c001", "total_amount": "1000,50",
+            "total_installments": 12.0, "start_date": "31/01/2024",
+        })
+        assert errors == []
+        assert row["entity_card_code"] == "C001"
+        assert row["total_installments"] == 12
+        assert row["start_date"] == date(2024, 1, 31)
+        assert row["frequency"] == "monthly"
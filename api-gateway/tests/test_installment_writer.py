@@ -0,0 +1,45 @@
+import pytest
+from decimal import Decimal
+
+from app.models.amortization import AmortizationInstallment
+from app.services.schedule_engine import calculate_schedules
+from app.services.installment_writer import InstallmentBulkWriter
+
+class TestInstallmentBulkWriter:
+    """Tests para la persistencia masiva de cuotas"""
+
+    def test_write_schedule(self, db_session, test_amortization):
+        """Test de escritura de una tabla completa"""
+        batch = calculate_schedules([test_amortization])
+
+        ids = InstallmentBulkWriter(db_session).write([test_amortization.id], batch)
+
+        installments = db_session.query(AmortizationInstallment).filter(
+            AmortizationInstallment.amortization_id == test_amortization.id
+        ).order_by(AmortizationInstallment.installment_number).all()
+
+        assert len(ids) == len(set(ids)) == 12
+        assert [i.id for i in installments] == ids
+        assert sum(i.principal_amount for i in installments) == Decimal("10000.00")
+        assert installments[-1].remaining_balance == Decimal("0.00")
+        assert all(i.status == "pending" and i.is_active for i in installments)
+
+    def test_replace_schedule(self, db_session, test_amortization):
+        """Test de regeneración: reemplaza las cuotas existentes"""
+        writer = InstallmentBulkWriter(db_session, chunk_size=5)
+        batch = calculate_schedules([test_amortization])
+
+        writer.write([test_amortization.id], batch)
+        ids = writer.replace([test_amortization.id], batch)
+
+        count = db_session.query(AmortizationInstallment).filter(
+            AmortizationInstallment.amortization_id == test_amortization.id
+        ).count()
+        assert count == len(ids) == 12
+
+    def test_mismatched_ids(self, db_session, test_amortization):
+        """Test de validación: un ID por tabla del lote"""
+        batch = calculate_schedules([test_amortization, test_amortization])
+
+        with pytest.raises(ValueError):
+            InstallmentBulkWriter(db_session).write([test_amortization.id], batch)
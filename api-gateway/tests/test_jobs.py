@@ -0,0 +1,97 @@
+import pytest
+import base64
+
+from sqlalchemy.orm import sessionmaker
+
+from app import worker
+from app.models.amortization import AmortizationInstallment
+from app.services.job_service import JobNotFoundError, JobSubmitError, get_job, submit_job
+
+@pytest.fixture
+def job_db(db_session, monkeypatch):
+    """Los trabajos (eager) usan la conexión de la sesión de test"""
+    monkeypatch.setattr(worker.celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(worker, "session_factory", sessionmaker(bind=db_session.get_bind(), expire_on_commit=False))
+    return db_session
+
+class TestJobs:
+    """Tests para los trabajos en segundo plano"""
+
+    def test_regenerate_installments(self, job_db, test_amortization):
+        """Test de trabajo completado con resultado"""
+        job_id = submit_job("regenerate_installments", amortization_ids=[test_amortization.id])
+        job = get_job(job_id)
+
+        assert job["status"] == "completed"
+        assert job["job_type"] == "regenerate_installments"
+        assert job["result"] == {"amortizations": 1, "installments_created": 12, "skipped": []}
+        assert job_db.query(AmortizationInstallment).filter_by(amortization_id=test_amortization.id).count() == 12
+
+    def test_regenerate_skips_paid(self, job_db, test_amortization):
+        """Test de trabajo que omite las amortizaciones con cuotas pagadas"""
+        submit_job("regenerate_installments", amortization_ids=[test_amortization.id])
+        installment = job_db.query(AmortizationInstallment).filter_by(
+            amortization_id=test_amortization.id, installment_number=1
+        ).one()
+        installment.paid_amount = installment.total_amount
+        installment.status = "paid"
+        job_db.commit()
+
+        job = get_job(submit_job("regenerate_installments", amortization_ids=[test_amortization.id]))
+
+        assert job["result"] == {"amortizations": 1, "installments_created": 0, "skipped": [test_amortization.id]}
+        job_db.expire_all()
+        assert job_db.get(AmortizationInstallment, installment.id).status == "paid"
+
+    def test_bulk_recalculate(self, job_db, test_amortization):
+        """Test de operación en lote como trabajo (resultado por id)"""
+        job_id = submit_job("bulk_operation", request={"ids": [test_amortization.id, "x"], "operation": "recalculate"})
+        result = get_job(job_id)["result"]
+
+        assert result["successful"] == 1
+        assert result["errors"] == [{"id": "x", "error": "Amortización no encontrada"}]
+
+    def test_failed_job(self, job_db, test_company):
+        """Test de trabajo fallido (error en el estado)"""
+        request = {
+            "file_data": base64.b64encode(b"a;b\n1;2\n").decode(),
+            "file_type": "csv",
+            "mapping": {"a": "reference"}
+        }
+        job = get_job(submit_job("import_amortizations", company_id=test_company.id, request=request))
+
+        assert job["status"] == "failed"
+        assert "ImportFileError" in job["error"]
+
+    def test_overdue_sweep(self, job_db, test_company, test_amortization):
+        """Test de barrido de vencidos como trabajo"""
+        submit_job("regenerate_installments", amortization_ids=[test_amortization.id])
+        job = get_job(submit_job("overdue_sweep", as_of="2024-03-15"))
+
+        assert job["status"] == "completed"
+        assert job["result"]["installments_updated"] == 2
+        assert job["result"]["amortizations_updated"] == 1
+        assert job["result"]["failed"] == []
+        assert [company["company_id"] for company in job["result"]["companies"]] == [test_company.id]
+
+    def test_progress_and_pending(self):
+        """Test de estados pending y running con progreso"""
+        backend = worker.celery_app.backend
+        for job_id in ("job-pending", "job-running"):
+            backend.set(f"gateway:job-type:{job_id}", "bulk_operation")
+        backend.store_result("job-running", {"current": 5, "total": 10}, "PROGRESS")
+
+        assert get_job("job-pending")["status"] == "pending"
+        job = get_job("job-running")
+        assert job["status"] == "running"
+        assert job["progress"] == {"current": 5, "total": 10}
+
+        with pytest.raises(JobNotFoundError):
+            get_job("no-existe")
+
+    def test_invalid_submission(self):
+        """Test de tipo de trabajo y parámetros no válidos"""
+        with pytest.raises(JobSubmitError):
+            submit_job("desconocido")
+        with pytest.raises(JobSubmitError):
+            submit_job("regenerate_installments", ids=["a"])
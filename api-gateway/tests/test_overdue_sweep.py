@@ -0,0 +1,118 @@
+import pytest
+from datetime import date
+
+from sqlalchemy import select, update
+
+from app.models.amortization import AmortizationInstallment
+from app.models.summary import AmortizationMonthlySummary
+from app.models.sweep import OverdueSweepRun
+from app.services.amortization_service import AmortizationService
+from app.services.overdue_sweep import run_overdue_sweep, sweep_company
+from app.utils.filters import InstallmentFilters, apply_installment_filters
+
+@pytest.fixture
+def scheduled_amortization(db_session, test_amortization):
+    """Amortización de test con sus 12 cuotas mensuales (febrero de 2024 a enero de 2025)"""
+    AmortizationService(db_session).regenerate_schedules([test_amortization])
+    return test_amortization
+
+def installment_statuses(db_session, amortization_id):
+    rows = db_session.query(AmortizationInstallment.status).filter_by(
+        amortization_id=amortization_id
+    ).order_by(AmortizationInstallment.installment_number)
+    return [row.status for row in rows]
+
+class TestOverdueSweep:
+    """Tests para el barrido de vencidos"""
+
+    def test_sweep(self, db_session, test_company, scheduled_amortization):
+        """Test de cuotas y amortización marcadas como vencidas"""
+        result = sweep_company(db_session, test_company.id, as_of=date(2024, 3, 15))
+
+        assert result["installments_updated"] == 2
+        assert result["amortizations_updated"] == 1
+        assert result["previous_as_of"] is None
+        assert installment_statuses(db_session, scheduled_amortization.id)[:3] == ["overdue", "overdue", "pending"]
+
+        db_session.expire_all()
+        assert scheduled_amortization.status == "overdue"
+        assert scheduled_amortization.next_due_date == date(2024, 2, 1)
+        # Delta active -> overdue de la amortización (el grupo 'active' queda a cero)
+        summary = {
+            row.status: (row.amortization_count, row.total_amount, row.pending_amount)
+            for row in db_session.query(AmortizationMonthlySummary).filter_by(company_id=test_company.id)
+        }
+        assert summary == {
+            "active": (0, 0, 0),
+            "overdue": (1, scheduled_amortization.total_amount, scheduled_amortization.pending_amount),
+        }
+
+    def test_incremental(self, db_session, test_company, scheduled_amortization):
+        """Test de ejecuciones sucesivas: solo las cuotas que cruzan su vencimiento"""
+        sweep_company(db_session, test_company.id, as_of=date(2024, 3, 15))
+        assert sweep_company(db_session, test_company.id, as_of=date(2024, 3, 20))["installments_updated"] == 0
+
+        result = sweep_company(db_session, test_company.id, as_of=date(2024, 5, 2))
+        assert result["installments_updated"] == 2
+        assert result["previous_as_of"] == "2024-03-20"
+        assert result["amortizations_updated"] == 0
+
+        runs = db_session.query(OverdueSweepRun).filter_by(company_id=test_company.id).all()
+        assert len(runs) == 3
+        assert all(run.status == "completed" and run.duration_ms >= 0 for run in runs)
+
+    def test_next_due_date(self, db_session, test_company, scheduled_amortization):
+        """Test de recálculo de next_due_date (primera cuota sin pagar)"""
+        db_session.execute(
+            update(AmortizationInstallment)
+            .where(AmortizationInstallment.amortization_id == scheduled_amortization.id,
+                   AmortizationInstallment.installment_number <= 2)
+            .values(status="paid")
+        )
+        db_session.commit()
+
+        result = sweep_company(db_session, test_company.id, as_of=date(2024, 4, 15))
+        assert result["installments_updated"] == 1
+        assert result["next_due_dates_updated"] == 1
+        db_session.expire_all()
+        assert scheduled_amortization.next_due_date == date(2024, 4, 1)
+
+    def test_excluded_amortizations(self, db_session, test_company, scheduled_amortization):
+        """Test de amortizaciones canceladas o inactivas fuera del barrido"""
+        scheduled_amortization.status = "cancelled"
+        db_session.commit()
+
+        results = run_overdue_sweep(db_session, as_of=date(2024, 12, 31))
+        assert [result["company_id"] for result in results] == [test_company.id]
+        assert results[0]["installments_updated"] == 0
+        assert set(installment_statuses(db_session, scheduled_amortization.id)) == {"pending"}
+
+    def test_failed_run(self, db_session, test_company, monkeypatch):
+        """Test de ejecución fallida registrada sin detener el resto"""
+        def fail(*args, **kwargs):
+            raise RuntimeError("boom")
+        monkeypatch.setattr("app.services.overdue_sweep._update_rows", fail)
+
+        progress = []
+        results = run_overdue_sweep(db_session, as_of=date(2024, 1, 1),
+                                    on_progress=lambda current, total, result: progress.append((current, total)))
+        assert results == [{"company_id": test_company.id, "error": "boom"}]
+        assert progress == [(1, 1)]
+        run = db_session.query(OverdueSweepRun).one()
+        assert run.status == "failed"
+
+    def test_listing_after_sweep(self, db_session, test_company, scheduled_amortization):
+        """Test de cuotas marcadas 'overdue' por el barrido: siguen vencidas en el listado"""
+        sweep_company(db_session, test_company.id, as_of=date(2024, 3, 15))
+
+        filters = InstallmentFilters(amortization_id=scheduled_amortization.id, overdue_only=True)
+        installments = db_session.execute(
+            apply_installment_filters(select(AmortizationInstallment), filters, AmortizationInstallment)
+            .order_by(AmortizationInstallment.installment_number)
+        ).scalars().all()
+
+        # Todas las cuotas (2024-2025) han vencido; las dos primeras ya con estado 'overdue'
+        assert len(installments) == 12
+        assert [installment.status for installment in installments[:3]] == ["overdue", "overdue", "pending"]
+        assert all(installment.is_overdue for installment in installments)
+        assert installments[0].days_overdue == (date.today() - date(2024, 2, 1)).days
@@ -0,0 +1,126 @@
+import pytest
+import json
+from datetime import date
+
+from sqlalchemy import event, text
+
+from app.models.amortization import Amortization, AmortizationInstallment
+from app.utils.filters import (
+    AmortizationFilters, InstallmentFilters, apply_amortization_filters, apply_installment_filters
+)
+from app.utils.pagination import paginate_keyset
+
+def query_plan(db_session, query) -> str:
+    """Plan de ejecución de una query (texto con los nombres de índices usados)"""
+    dialect = db_session.get_bind().dialect
+    compiled = query.statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    connection = db_session.connection()
+
+    if dialect.name == "postgresql":
+        # Con tablas de test casi vacías el planificador prefiere Seq Scan;
+        # desactivarlo comprueba que existe un índice utilizable
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        return plan if isinstance(plan, str) else json.dumps(plan)
+
+    params = tuple(compiled.construct_params()[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return "\n".join(row[-1] for row in rows)
+
+def statement_plan(db_session, statement, parameters) -> str:
+    """Plan de ejecución de una sentencia ya compilada por el driver"""
+    connection = db_session.connection()
+
+    if db_session.get_bind().dialect.name == "postgresql":
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        return plan if isinstance(plan, str) else json.dumps(plan)
+
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "\n".join(row[-1] for row in rows)
+
+class TestQueryPlans:
+    """Tests de regresión: los filtros de listado deben usar índices"""
+
+    @pytest.mark.parametrize("filters,order_by,index", [
+        (
+            AmortizationFilters(company_id="TEST001", status="active", date_from=date(2024, 1, 1)),
+            None,
+            "ix_amortizations_company_status_start"
+        ),
+        (
+            AmortizationFilters(company_id="TEST001"),
+            Amortization.created_at.desc(),
+            "ix_amortizations_company_created"
+        ),
+        (
+            AmortizationFilters(entity_id="ENTITY01"),
+            None,
+            "ix_amortizations_entity"
+        ),
+    ])
+    def test_amortization_filters_use_index(self, db_session, filters, order_by, index):
+        """Test de índices en filtros de amortizaciones"""
+        query = apply_amortization_filters(db_session.query(Amortization), filters, Amortization)
+        if order_by is not None:
+            query = query.order_by(order_by)
+
+        assert index in query_plan(db_session, query)
+
+    @pytest.mark.parametrize("filters,index", [
+        (
+            InstallmentFilters(amortization_id="AMORT01", status="paid"),
+            "ix_installments_amortization_status_due"
+        ),
+        (
+            InstallmentFilters(overdue_only=True),
+            "ix_installments_pending_due"
+        ),
+    ])
+    def test_installment_filters_use_index(self, db_session, filters, index):
+        """Test de índices en filtros de cuotas"""
+        query = apply_installment_filters(
+            db_session.query(AmortizationInstallment), filters, AmortizationInstallment
+        )
+
+        assert index in query_plan(db_session, query)
+
+    def test_search_filter_uses_index(self, db_session):
+        """Test de índice de búsqueda (pg_trgm / FTS5) en el filtro search"""
+        filters = AmortizationFilters(search="maquinaria")
+        query = apply_amortization_filters(db_session.query(Amortization), filters, Amortization)
+        plan = query_plan(db_session, query)
+
+        if db_session.get_bind().dialect.name == "postgresql":
+            assert "ix_amortizations_search_text_trgm" in plan
+        else:
+            assert "amortizations_fts VIRTUAL TABLE" in plan
+
+    @pytest.mark.parametrize("sort_order", ["desc", "asc"])
+    def test_keyset_page_without_sort(self, db_session, test_company, test_entity, sort_order):
+        """Test de página keyset servida por el índice (sin ordenación temporal)"""
+        for i in range(3):
+            db_session.add(Amortization(
+                company_id=test_company.id, entity_id=test_entity.id, reference=f"PLAN-{i}",
+                total_amount=1000, pending_amount=1000, total_installments=12,
+                installment_amount=100, start_date=date(2024, 1, 1)
+            ))
+        db_session.commit()
+
+        query = db_session.query(Amortization).filter(Amortization.company_id == test_company.id)
+        first = paginate_keyset(query, page_size=1, sort_order=sort_order)
+
+        statements = []
+        listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            second = paginate_keyset(query, page_size=1, sort_order=sort_order, cursor=first["next_cursor"])
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert second["items"][0].id != first["items"][0].id
+        plan = statement_plan(db_session, *statements[-1])
+        assert "ix_amortizations_company_created" in plan
+        assert "TEMP B-TREE" not in plan
+        assert '"Node Type": "Sort"' not in plan
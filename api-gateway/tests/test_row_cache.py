@@ -0,0 +1,111 @@
+import pytest
+import json
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.models.entity import Entity
+from app.utils.row_cache import (
+    RowCache, RowCacheBroadcaster, row_cache, get_company, get_entity, get_entity_by_card_code
+)
+
+@contextmanager
+def count_queries(db_session):
+    """Contar las sentencias SQL ejecutadas en el bloque"""
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+class TestRowCache:
+    """Tests para la caché en proceso de Company y Entity"""
+
+    def test_lru_and_ttl(self):
+        """Test de expulsión LRU y caducidad por TTL"""
+        cache = RowCache(ttl=60, maxsize=2)
+        cache.set([("Company", "A")], {"id": "A"})
+        cache.set([("Company", "B")], {"id": "B"})
+        assert cache.get(("Company", "A")) == {"id": "A"}
+
+        cache.set([("Company", "C")], {"id": "C"})
+        assert cache.get(("Company", "B")) is None
+        assert cache.get(("Company", "A")) == {"id": "A"}
+        assert cache.stats["evictions"] == 1
+
+        cache.ttl = -1
+        cache.set([("Company", "D")], {"id": "D"})
+        assert cache.get(("Company", "D")) is None
+
+    def test_hit_skips_query(self, db_session, test_entity):
+        """Test de acierto sin consulta a la base de datos"""
+        row_cache.clear()
+        hits = row_cache.stats["hits"]
+        assert get_entity(db_session, test_entity.id).name == "Test Entity"
+
+        db_session.expunge_all()
+        with count_queries(db_session) as statements:
+            entity = get_entity_by_card_code(db_session, "TEST001", "TEST001")
+            same = get_entity(db_session, test_entity.id, "TEST001")
+
+        assert statements == []
+        assert entity is same
+        assert entity.id == test_entity.id
+        assert row_cache.stats["hits"] == hits + 2
+        # La instancia pertenece a la sesión: las relaciones se cargan
+        assert entity.company.name == "Test Company"
+
+    def test_company_mismatch(self, db_session, test_entity):
+        """Test de entidad de otra compañía"""
+        assert get_entity(db_session, test_entity.id, "OTRA") is None
+        assert get_entity(db_session, test_entity.id, "TEST001") is not None
+
+    def test_invalidation_on_update(self, db_session, test_company, test_entity):
+        """Test de invalidación al modificar filas"""
+        get_company(db_session, test_company.id)
+        get_entity(db_session, test_entity.id)
+
+        entity = db_session.get(Entity, test_entity.id)
+        entity.sap_card_code = "C99999"
+        entity.name = "Renombrada"
+        test_company.name = "Compañía renombrada"
+        db_session.commit()
+        db_session.expunge_all()
+
+        assert get_entity_by_card_code(db_session, "TEST001", "TEST001") is None
+        assert get_entity_by_card_code(db_session, "TEST001", "C99999").name == "Renombrada"
+        assert get_company(db_session, "TEST001").name == "Compañía renombrada"
+
+    def test_invalidation_on_delete(self, db_session, test_entity):
+        """Test de invalidación al borrar filas"""
+        entity_id = test_entity.id
+        get_entity(db_session, entity_id)
+
+        db_session.delete(test_entity)
+        db_session.commit()
+
+        assert get_entity(db_session, entity_id) is None
+
+    def test_broadcast_apply(self):
+        """Test de invalidaciones recibidas de otros workers"""
+        cache = RowCache()
+        broadcaster = RowCacheBroadcaster(cache, "redis://localhost:6379/0")
+        values = {"id": "E1", "company_id": "C1", "sap_card_code": "CARD"}
+        cache.set([("Entity", "E1"), ("Entity", "C1", "CARD")], values)
+
+        broadcaster.apply(json.dumps({"origin": broadcaster.origin, "model": "Entity", "id": "E1"}))
+        assert len(cache) == 2
+
+        broadcaster.apply(json.dumps({"origin": "otro", "model": "Entity", "id": "E1"}))
+        assert len(cache) == 0
+
+        cache.set([("Company", "C1")], {"id": "C1"})
+        cache.set([("Entity", "E2")], {"id": "E2", "company_id": "C1"})
+        broadcaster.apply(json.dumps({"origin": "otro", "company_id": "C1"}))
+        assert len(cache) == 0
@@ -0,0 +1,235 @@
+# api-gateway/tests/test_sap_batch.py
+from decimal import Decimal
+
+import httpx
+import pytest
+from sqlalchemy import update
+
+from app.models.amortization import AmortizationInstallment
+from app.models.company import CompanySetting
+from app.schemas.common import BulkOperationRequest
+from app.services.amortization_service import AmortizationService
+from app.services.bulk_service import BulkOperationService
+from app.services.sap_batch import BatchOperation, SAPBatchPoster, build_batch, parse_batch
+from app.services.sap_service import SAPService, SAPServiceLayerPool
+from app.services.sap_sync import SAPDocumentSync
+from tests.fake_service_layer import fake_pool
+
+@pytest.fixture
+def poster(sap):
+    return SAPBatchPoster(sap, batch_size=20, changesets=5, retries=2, retry_delay=0)
+
+class LostResponseTransport(httpx.AsyncBaseTransport):
+    """Transporte cuyas primeras peticiones $batch agotan el tiempo de espera (tras llegar a SAP si commit)"""
+
+    def __init__(self, app, timeouts=1, commit=True):
+        self.transport = httpx.ASGITransport(app=app)
+        self.timeouts = timeouts
+        self.commit = commit
+
+    async def handle_async_request(self, request):
+        if request.url.path.endswith("/$batch") and self.timeouts:
+            self.timeouts -= 1
+            if self.commit:
+                await self.transport.handle_async_request(request)
+            raise httpx.ReadTimeout("Read timed out", request=request)
+        return await self.transport.handle_async_request(request)
+
+def lost_response_poster(service_layer, **kwargs):
+    pool = SAPServiceLayerPool("http://sap.test/b1s/v1", transport=LostResponseTransport(service_layer.app, **kwargs))
+    return SAPBatchPoster(SAPService("TESTDB", "manager", "secret", pool=pool),
+                          batch_size=20, changesets=5, retries=2, retry_delay=0)
+
+@pytest.fixture
+def synced_company(db_session, test_company, test_amortization):
+    """Compañía con cuentas SAP y la amortización de test con 12 cuotas, 2 pagadas"""
+    test_company.default_amortization_account = "_SYS00000000010"
+    db_session.add(CompanySetting(company_id=test_company.id, setting_key="sap_payment_account",
+                                  setting_value="_SYS00000000001"))
+    AmortizationService(db_session).regenerate_schedules([test_amortization])
+    db_session.execute(
+        update(AmortizationInstallment)
+        .where(AmortizationInstallment.amortization_id == test_amortization.id,
+               AmortizationInstallment.installment_number <= 2)
+        .values(status="paid", paid_amount=AmortizationInstallment.total_amount)
+    )
+    db_session.commit()
+    return test_company
+
+def journal_entries(count, lookup=False):
+    return [
+        BatchOperation(number, "POST", "JournalEntries", {"Reference2": str(number), "Memo": "Test"},
+                       {"Reference2": str(number)} if lookup else None)
+        for number in range(1, count + 1)
+    ]
+
+def installment_entries(db_session, amortization_id):
+    rows = db_session.query(
+        AmortizationInstallment.sap_journal_entry, AmortizationInstallment.sap_payment_entry
+    ).filter_by(amortization_id=amortization_id).order_by(AmortizationInstallment.installment_number)
+    return [tuple(row) for row in rows]
+
+class TestSAPBatch:
+    """Tests para el envío de documentos SAP en $batch"""
+
+    def test_parse_failed_changeset(self):
+        """Test de un change set fallido: el error se asigna a todas sus operaciones"""
+        change_sets = [journal_entries(2), journal_entries(1)]
+        content_type, body = build_batch(change_sets, "/b1s/v1/")
+        assert body.count(b"POST /b1s/v1/JournalEntries HTTP/1.1") == 3
+
+        response = "\r\n".join([
+            "--batchresponse_1",
+            "Content-Type: application/http",
+            "Content-Transfer-Encoding: binary",
+            "",
+            "HTTP/1.1 400 Bad Request",
+            "Content-Type: application/json",
+            "",
+            '{"error": {"code": -5002, "message": {"lang": "en-us", "value": "Balance de asiento incorrecto"}}}',
+            "--batchresponse_1--",
+            ""
+        ])
+        results = parse_batch("multipart/mixed;boundary=batchresponse_1", response, change_sets)
+        assert [[result.status_code for result in change_set] for change_set in results] == [[400, 400], [None]]
+        assert results[0][1].error == "Balance de asiento incorrecto"
+        assert results[1][0].unresolved and not results[1][0].transient
+
+    @pytest.mark.asyncio
+    async def test_batched_posting(self, poster, service_layer):
+        """Test de 120 asientos en 6 change sets y 2 peticiones"""
+        stored = []
+        results = await poster.post(journal_entries(120), on_success=stored.extend)
+
+        assert all(result.ok for result in results.values())
+        assert len(service_layer.documents["JournalEntries"]) == 120
+        assert service_layer.batch_requests == 2
+        assert len(stored) == 120
+        assert results[7].body["JdtNum"] == results[1].body["JdtNum"] + 6
+        assert results[7].body["Reference2"] == "7"
+
+    @pytest.mark.asyncio
+    async def test_retry_failed_parts(self, poster, service_layer):
+        """Test de reintento solo del change set fallido, operación a operación"""
+        service_layer.reject = lambda path, body: "Cuenta bloqueada" if body["Reference2"] == "7" else None
+
+        results = await poster.post(journal_entries(120))
+
+        failed = [key for key, result in results.items() if not result.ok]
+        assert failed == [7]
+        assert results[7].status_code == 400
+        assert results[7].error == "Cuenta bloqueada"
+        assert len(service_layer.documents["JournalEntries"]) == 119
+        # 2 peticiones + 1 con los 20 reintentos; el 400 de una operación sola no se reintenta
+        assert service_layer.batch_requests == 3
+        assert poster.stats["retried"] == 20
+
+    @pytest.mark.asyncio
+    async def test_retry_unavailable(self, poster, service_layer):
+        """Test de reintento de una petición $batch fallida (503)"""
+        service_layer.unavailable = 1
+
+        results = await poster.post(journal_entries(10))
+
+        assert all(result.ok for result in results.values())
+        assert len(service_layer.documents["JournalEntries"]) == 10
+        assert service_layer.batch_requests == 2
+
+    @pytest.mark.asyncio
+    async def test_lost_response_not_reposted(self, service_layer):
+        """Test de $batch aplicado en SAP sin respuesta: sin lookup queda sin resolver y no se reenvía"""
+        poster = lost_response_poster(service_layer)
+
+        results = await poster.post(journal_entries(10))
+
+        assert all(result.unresolved and not result.ok for result in results.values())
+        assert len(service_layer.documents["JournalEntries"]) == 10
+        assert service_layer.batch_requests == 1
+        assert poster.stats["unresolved"] == 10 and poster.stats["retried"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lost_response_reconciled(self, service_layer):
+        """Test de $batch aplicado en SAP sin respuesta: los documentos se encuentran por lookup"""
+        poster = lost_response_poster(service_layer)
+        stored = []
+
+        results = await poster.post(journal_entries(10, lookup=True), on_success=stored.extend)
+
+        assert all(result.ok for result in results.values())
+        assert results[4].body["Reference2"] == "4"
+        assert results[4].body["JdtNum"] == service_layer.documents["JournalEntries"][3]["JdtNum"]
+        assert len(stored) == 10
+        assert len(service_layer.documents["JournalEntries"]) == 10
+        assert poster.stats["reconciled"] == 10 and poster.stats["retried"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lost_request_reposted(self, service_layer):
+        """Test de $batch que no llegó a SAP: el lookup no encuentra nada y se reenvía"""
+        poster = lost_response_poster(service_layer, commit=False)
+
+        results = await poster.post(journal_entries(10, lookup=True))
+
+        assert all(result.ok for result in results.values())
+        assert len(service_layer.documents["JournalEntries"]) == 10
+        assert poster.stats["retried"] == 10
+
+    @pytest.mark.asyncio
+    async def test_sync_documents_lost_response(self, db_session, synced_company, test_amortization, service_layer):
+        """Test de sincronización con la respuesta del primer $batch perdida: sin duplicados"""
+        poster = lost_response_poster(service_layer)
+
+        results, errors = await SAPDocumentSync(db_session, synced_company, poster=poster).sync([test_amortization.id])
+
+        assert errors == []
+        assert results[0]["journal_entries"] == 12 and results[0]["payments"] == 2
+        assert len(service_layer.documents["JournalEntries"]) == 12
+        assert len(service_layer.documents["IncomingPayments"]) == 2
+        entries = installment_entries(db_session, test_amortization.id)
+        assert [journal for journal, _ in entries] == [
+            document["JdtNum"] for document in service_layer.documents["JournalEntries"]
+        ]
+        assert poster.stats["reconciled"] == 12
+
+    @pytest.mark.asyncio
+    async def test_sync_documents(self, db_session, synced_company, test_amortization, sap, poster, service_layer):
+        """Test de asientos y pagos guardados en las cuotas; una segunda sincronización no duplica"""
+        sync = SAPDocumentSync(db_session, synced_company, poster=poster)
+        results, errors = await sync.sync([test_amortization.id])
+
+        assert errors == []
+        assert results == [{'id': test_amortization.id, 'company_id': synced_company.id,
+                            'journal_entries': 12, 'payments': 2}]
+        entries = installment_entries(db_session, test_amortization.id)
+        assert all(journal is not None for journal, _ in entries)
+        assert [payment is not None for _, payment in entries] == [True, True] + [False] * 10
+
+        payment = service_layer.documents["IncomingPayments"][0]
+        assert payment["CardCode"] == "TEST001"
+        assert payment["PaymentInvoices"][0]["DocEntry"] == entries[0][0]
+        assert payment["PaymentInvoices"][0]["InvoiceType"] == "it_JournalEntry"
+        lines = service_layer.documents["JournalEntries"][0]["JournalEntryLines"]
+        assert lines[0]["ShortName"] == "TEST001" and lines[0]["Debit"] == lines[1]["Credit"]
+
+        results, errors = await SAPDocumentSync(db_session, synced_company, poster=poster).sync([test_amortization.id])
+        assert results[0]["journal_entries"] == 0 and results[0]["payments"] == 0
+        assert len(service_layer.documents["JournalEntries"]) == 12
+
+    def test_bulk_sync_partial(self, db_session, synced_company, test_amortization, service_layer, monkeypatch):
+        """Test de sync_to_sap en lote con un documento rechazado"""
+        monkeypatch.setattr("app.services.sap_service.sap_pool", fake_pool(service_layer))
+        monkeypatch.setattr("app.services.sap_service.settings.SAP_PASSWORD", "secret")
+        monkeypatch.setattr("app.services.sap_service.settings.SAP_USERNAME", "manager")
+        service_layer.reject = lambda path, body: "Período cerrado" if body.get("Reference2") == "3/12" else None
+
+        result = BulkOperationService(db_session).run(
+            BulkOperationRequest(ids=[test_amortization.id], operation="sync_to_sap")
+        )
+
+        assert result["failed"] == 1
+        error = result["errors"][0]
+        assert error["company_id"] == synced_company.id
+        assert error["journal_entries"] == 11 and error["payments"] == 2
+        assert "Cuota 3: Período cerrado" in error["error"]
+        entries = installment_entries(db_session, test_amortization.id)
+        assert entries[2] == (None, None)
+        assert service_layer.logins["TESTDB"] == 1
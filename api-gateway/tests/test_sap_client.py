@@ -0,0 +1,130 @@
+# api-gateway/tests/test_sap_client.py
+import asyncio
+
+import pytest
+
+from app.services.sap_service import SAPService, SAPServiceLayerError, run_with_pools
+from tests.fake_service_layer import FakeServiceLayer, fake_pool
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def service_layer():
+    return FakeServiceLayer(session_timeout=30)
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def pool(service_layer, clock):
+    return fake_pool(service_layer, max_concurrency=2, refresh_margin=60, clock=clock)
+
+def sap(pool, company_db="SBODEMOUS", username="manager", password="secret"):
+    return SAPService(company_db, username, password, pool=pool)
+
+class TestSAPServiceLayerClient:
+    """Tests para el cliente pooled del Service Layer"""
+
+    @pytest.mark.asyncio
+    async def test_session_reuse(self, pool, service_layer):
+        """Test de una sola sesión B1SESSION para varias peticiones y servicios"""
+        service_layer.partners["SBODEMOUS"] = [{"CardCode": "C001", "CardName": "Cliente"}]
+
+        for _ in range(3):
+            partners = await sap(pool).get_business_partners()
+        assert partners == [{"CardCode": "C001", "CardName": "Cliente"}]
+        assert service_layer.logins["SBODEMOUS"] == 1
+        assert pool.stats["requests"] == 3
+        assert pool.sessions[("SBODEMOUS", "manager")].route_id == ".node1"
+        await pool.close()
+        assert service_layer.sessions == {}
+
+    @pytest.mark.asyncio
+    async def test_refresh_before_expiry(self, pool, service_layer, clock):
+        """Test de renovación de la sesión dentro del margen previo a caducar"""
+        service = sap(pool)
+        await service.get_business_partners()
+
+        # Cada petición extiende la sesión (timeout deslizante de 30 min)
+        clock.now += 25 * 60
+        await service.get_business_partners()
+        clock.now += 25 * 60
+        await service.get_business_partners()
+        assert service_layer.logins["SBODEMOUS"] == 1
+
+        clock.now += 29.5 * 60
+        await service.get_business_partners()
+        assert service_layer.logins["SBODEMOUS"] == 2
+        assert pool.stats["retries"] == 0
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_relogin_on_401(self, pool, service_layer):
+        """Test de login y reintento cuando el servidor invalida la sesión"""
+        service = sap(pool)
+        await service.get_business_partners()
+        service_layer.expire_sessions()
+
+        assert await service.get_business_partners() == []
+        assert service_layer.logins["SBODEMOUS"] == 2
+        assert pool.stats["retries"] == 1
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_login_error(self, pool):
+        """Test de credenciales inválidas"""
+        with pytest.raises(SAPServiceLayerError) as error:
+            await sap(pool, password="wrong").get_business_partners()
+        assert error.value.status_code == 401
+        assert error.value.code == -304
+        assert pool.sessions == {}
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_per_company(self, pool, service_layer):
+        """Test de límite de peticiones simultáneas por compañía con un solo login"""
+        service_layer.delay = 0.01
+
+        await asyncio.gather(
+            *(sap(pool).get_business_partners() for _ in range(8)),
+            *(sap(pool, company_db="SBOOTHER").get_business_partners() for _ in range(8))
+        )
+        assert service_layer.max_active["SBODEMOUS"] == 2
+        assert service_layer.max_active["SBOOTHER"] == 2
+        assert service_layer.logins == {"SBODEMOUS": 1, "SBOOTHER": 1}
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_sessions_per_company_and_user(self, pool, service_layer):
+        """Test de sesiones separadas por (CompanyDB, usuario)"""
+        service_layer.partners["SBOOTHER"] = [{"CardCode": "C900"}]
+
+        assert await sap(pool).get_business_partners() == []
+        assert await sap(pool, company_db="SBOOTHER").get_business_partners() == [{"CardCode": "C900"}]
+        await sap(pool, username="reader").get_business_partners()
+        assert set(pool.sessions) == {("SBODEMOUS", "manager"), ("SBOOTHER", "manager"), ("SBODEMOUS", "reader")}
+        assert len({session.session_id for session in pool.sessions.values()}) == 3
+        await pool.close()
+
+    def test_client_released_after_job(self, pool, service_layer, monkeypatch):
+        """Test de trabajos con su propio loop: el cliente se cierra y la sesión se conserva"""
+        monkeypatch.setattr("app.services.sap_service.sap_pool", pool)
+        clients = []
+
+        async def job():
+            await sap(pool).get_business_partners()
+            clients.append(pool.client)
+
+        run_with_pools(job())
+        run_with_pools(job())
+
+        assert len(clients) == 2 and clients[0] is not clients[1]
+        assert all(client.is_closed for client in clients)
+        assert pool._client is None
+        assert service_layer.logins["SBODEMOUS"] == 1
@@ -0,0 +1,160 @@
+# api-gateway/tests/test_sap_import.py
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.amortization import Amortization, AmortizationInstallment
+from app.models.company import Company
+from app.models.entity import Entity
+from app.models.sap_import import SAPImportWatermark
+from app.models.summary import AmortizationMonthlySummary
+from app.services.sap_import import SAPDocumentImporter, SAPImportError
+from tests.fake_service_layer import FakeServiceLayer
+
+def invoice(doc_entry, update_date, card_code="C001", **values):
+    return {
+        "DocEntry": doc_entry,
+        "DocNum": 1000 + doc_entry,
+        "CardCode": card_code,
+        "CardName": f"Cliente {card_code}",
+        "DocDate": "2024-01-15",
+        "DocDueDate": "2024-02-15",
+        "DocTotal": 1200.0,
+        "DocCurrency": "EUR",
+        "Comments": None,
+        "Cancelled": "tNO",
+        "UpdateDate": update_date.isoformat(),
+        "Address": "no seleccionado",
+        **values
+    }
+
+@pytest.fixture
+def service_layer():
+    service_layer = FakeServiceLayer()
+    first = date(2024, 3, 1)
+    service_layer.records["Invoices"] = [
+        invoice(number, first + timedelta(days=number // 10), card_code=f"C00{number % 3}")
+        for number in range(1, 46)
+    ]
+    return service_layer
+
+@pytest.fixture
+def importer(db_session, test_company, sap):
+    return SAPDocumentImporter(db_session, test_company, sap=sap, batch_size=20, page_size=20)
+
+def imported(db_session, company_id):
+    return db_session.query(Amortization).filter_by(company_id=company_id, sap_doc_type="Invoice").count()
+
+class TestSAPImport:
+    """Tests para la importación incremental desde SAP"""
+
+    @pytest.mark.asyncio
+    async def test_initial_import(self, db_session, test_company, importer, service_layer):
+        """Test de importación completa paginada con entidades y cuotas"""
+        result = await importer.run(["Invoices"])
+
+        counts = result["document_types"]["Invoices"]
+        assert counts["documents"] == 45
+        assert counts["amortizations_created"] == 45
+        assert counts["entities_created"] == 3
+        assert imported(db_session, test_company.id) == 45
+
+        # 3 páginas (odata.nextLink) con $select y sin filtro de marca de agua
+        assert len(service_layer.queries) == 3
+        first_query = service_layer.queries[0][1]
+        assert "$filter" not in first_query
+        assert "Address" not in first_query["$select"]
+        assert first_query["$orderby"] == "UpdateDate,DocEntry"
+
+        watermark = db_session.query(SAPImportWatermark).filter_by(
+            company_id=test_company.id, document_type="Invoices"
+        ).one()
+        assert watermark.last_update_date == date(2024, 3, 5)
+        assert watermark.last_doc_entry == 45
+        assert watermark.documents_imported == 45
+
+        amortization = db_session.query(Amortization).filter_by(sap_doc_entry=7).one()
+        assert amortization.reference == "Invoice-1007"
+        assert amortization.sap_base_ref == "1007"
+        assert amortization.start_date == date(2024, 2, 15)
+        assert db_session.query(AmortizationInstallment).filter_by(amortization_id=amortization.id).count() == 12
+        entity = db_session.query(Entity).filter_by(company_id=test_company.id, sap_card_code="C001").one()
+        assert entity.type == "cliente" and entity.name == "Cliente C001"
+
+    @pytest.mark.asyncio
+    async def test_incremental_import(self, db_session, test_company, importer, service_layer):
+        """Test de importación delta: solo los documentos desde la marca de agua"""
+        await importer.run(["Invoices"])
+        service_layer.queries.clear()
+
+        records = service_layer.records["Invoices"]
+        records[2]["Comments"] = "Renegociada"
+        records[2]["UpdateDate"] = "2024-03-06"
+        records[3]["Cancelled"] = "tYES"
+        records[3]["UpdateDate"] = "2024-03-06"
+        records.append(invoice(46, date(2024, 3, 7)))
+
+        result = await importer.run(["Invoices"])
+
+        counts = result["document_types"]["Invoices"]
+        assert service_layer.queries[0][1]["$filter"] == "UpdateDate ge '2024-03-05'"
+        # Día de la marca (40-45) + 2 modificadas + 1 nueva
+        assert counts["documents"] == 9
+        assert counts["amortizations_created"] == 1
+        assert counts["amortizations_updated"] == 2
+        assert imported(db_session, test_company.id) == 46
+
+        db_session.expire_all()
+        assert db_session.query(Amortization).filter_by(sap_doc_entry=3).one().description == "Renegociada"
+        assert db_session.query(Amortization).filter_by(sap_doc_entry=4).one().status == "cancelled"
+        summary = {
+            row.status: (row.amortization_count, row.total_amount)
+            for row in db_session.query(AmortizationMonthlySummary).filter_by(company_id=test_company.id)
+        }
+        assert summary == {"active": (45, 45 * 1200), "cancelled": (1, 1200)}
+        watermark = db_session.query(SAPImportWatermark).filter_by(company_id=test_company.id).one()
+        assert watermark.last_update_date == date(2024, 3, 7)
+        assert watermark.documents_imported == 9
+
+    @pytest.mark.asyncio
+    async def test_date_range(self, db_session, test_company, importer, service_layer):
+        """Test de recarga por rango de fechas sin usar ni mover la marca de agua"""
+        service_layer.records["Invoices"][0]["DocDate"] = "2023-12-20"
+
+        result = await importer.run(["Invoices"], date_from=date(2023, 12, 1), date_to=date(2023, 12, 31))
+
+        assert result["document_types"]["Invoices"]["amortizations_created"] == 1
+        assert service_layer.queries[0][1]["$filter"] == "DocDate ge '2023-12-01' and DocDate le '2023-12-31'"
+        assert db_session.query(SAPImportWatermark).count() == 0
+
+    @pytest.mark.asyncio
+    async def test_resume_after_failure(self, db_session, test_company, importer, monkeypatch):
+        """Test de marca de agua en el último bloque guardado tras un fallo"""
+        from app.services import sap_import
+        calls = []
+        original = sap_import.insert_amortizations
+
+        def fail_second_batch(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError("boom")
+            return original(*args, **kwargs)
+        monkeypatch.setattr(sap_import, "insert_amortizations", fail_second_batch)
+
+        with pytest.raises(RuntimeError):
+            await importer.run(["Invoices"])
+        # El rollback del bloque fallido no deshace los datos de los fixtures
+        assert db_session.get(Company, test_company.id) is not None
+        watermark = db_session.query(SAPImportWatermark).filter_by(company_id=test_company.id).one()
+        assert watermark.last_doc_entry == 20
+        assert imported(db_session, test_company.id) == 20
+
+        result = await importer.run(["Invoices"])
+        assert result["document_types"]["Invoices"]["amortizations_created"] == 25
+        assert imported(db_session, test_company.id) == 45
+
+    @pytest.mark.asyncio
+    async def test_unsupported_document_type(self, importer):
+        """Test de tipo de documento no soportado"""
+        with pytest.raises(SAPImportError):
+            await importer.run(["Orders"])
@@ -36,7 +36,8 @@ class TestSAPIntegration:
             "entity_type": "cliente"
         })
         
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert "job_id" in response.json()
 
     @patch('app.services.sap_service.SAPService')
     def test_import_documents(self, mock_sap_service, authenticated_client, test_company):
@@ -0,0 +1,132 @@
+# api-gateway/tests/test_sap_partners.py
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.models.entity import Entity
+from app.services.sap_partners import SAPPartnerSync
+from app.services.sap_scheduler import SYNC_TASKS
+from app.utils.row_cache import get_entity_by_card_code, row_cache
+from tests.fake_service_layer import FakeServiceLayer
+
+def partner(number, card_type="cCustomer", **values):
+    prefix = "C" if card_type == "cCustomer" else "P"
+    return {
+        "CardCode": f"{prefix}{number:05d}",
+        "CardName": f"Partner {number}",
+        "CardType": card_type,
+        "GroupCode": 100,
+        "Currency": "##",
+        "CreditLimit": 5000.0,
+        "CurrentAccountBalance": 0.0,
+        "Frozen": "tNO",
+        "Phone1": "600000000",
+        **values
+    }
+
+@pytest.fixture
+def service_layer():
+    service_layer = FakeServiceLayer()
+    service_layer.records["BusinessPartners"] = (
+        [partner(number) for number in range(1, 251)]
+        + [partner(number, "cSupplier") for number in range(1, 51)]
+        + [partner(number, "cLid") for number in range(1, 6)]
+    )
+    return service_layer
+
+@pytest.fixture
+def sync(db_session, test_company, sap):
+    return SAPPartnerSync(db_session, test_company, sap=sap, page_size=100)
+
+@pytest.fixture
+def written_rows(db_session):
+    """Filas escritas en entities (parámetros de cada INSERT/UPDATE)"""
+    rows = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT INTO ENTITIES", "UPDATE ENTITIES")):
+            rows.append(len(parameters) if executemany else 1)
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", count)
+    yield rows
+    event.remove(engine, "before_cursor_execute", count)
+
+class TestSAPPartnerSync:
+    """Tests para la sincronización de business partners"""
+
+    @pytest.mark.asyncio
+    async def test_initial_sync(self, db_session, test_company, sync, service_layer):
+        """Test de alta paginada de clientes y proveedores (sin leads)"""
+        result = await sync.run()
+
+        assert result["partners"] == 300
+        assert result["created"] == 300 and result["updated"] == 0
+        queries = [params for collection, params in service_layer.queries if collection == "BusinessPartners"]
+        assert len(queries) == 4
+        assert queries[0]["$filter"] == "CardType eq 'cCustomer'"
+        assert "Phone1" not in queries[0]["$select"]
+
+        entity = db_session.query(Entity).filter_by(company_id=test_company.id, sap_card_code="P00007").one()
+        assert entity.type == "proveedor"
+        assert entity.name == "Partner 7" and entity.search_name == "partner 7"
+        assert entity.currency == "EUR"
+        assert entity.credit_limit == Decimal("5000.00")
+        assert entity.sap_group_code == "100"
+        assert len(entity.sap_hash) == 40
+        assert db_session.query(Entity).filter_by(company_id=test_company.id).count() == 300
+
+    @pytest.mark.asyncio
+    async def test_only_changed_rows_written(self, db_session, test_company, sync, service_layer, written_rows):
+        """Test de resincronización: solo se escriben los partners con cambios"""
+        await sync.run()
+        written_rows.clear()
+
+        records = service_layer.records["BusinessPartners"]
+        records[10]["CardName"] = "Partner renombrado"
+        records[260]["Frozen"] = "tYES"
+        records[20]["Phone1"] = "699999999"  # Campo no sincronizado
+
+        result = await sync.run()
+
+        assert result["updated"] == 2 and result["created"] == 0
+        assert result["unchanged"] == 298
+        # Un único upsert por página con cambios, con solo las filas cambiadas
+        assert written_rows == [1, 1]
+
+        db_session.expire_all()
+        assert db_session.query(Entity).filter_by(sap_card_code="C00011").one().name == "Partner renombrado"
+        assert db_session.query(Entity).filter_by(sap_card_code="P00011").one().is_active is False
+
+        written_rows.clear()
+        result = await sync.run(["cliente"])
+        assert result["partners"] == 250 and result["unchanged"] == 250
+        assert written_rows == []
+
+    @pytest.mark.asyncio
+    async def test_existing_entity_updated(self, db_session, test_company, test_entity, sync, service_layer):
+        """Test de entidad existente sin hash: se actualiza en su fila y se invalida la caché"""
+        service_layer.records["BusinessPartners"].append(
+            partner(1, CardCode="TEST001", CardName="Nombre SAP", CurrentAccountBalance=1234.5)
+        )
+        assert get_entity_by_card_code(db_session, test_company.id, "TEST001").name == "Test Entity"
+
+        result = await sync.run(["cliente"])
+
+        assert result["created"] == 250 and result["updated"] == 1
+        db_session.expire_all()
+        entity = get_entity_by_card_code(db_session, test_company.id, "TEST001")
+        assert entity.id == test_entity.id
+        assert entity.name == "Nombre SAP"
+        assert entity.current_balance == Decimal("1234.50")
+        row_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_unsupported_entity_type(self, sync):
+        """Test de tipo de entidad no soportado"""
+        with pytest.raises(ValueError):
+            await sync.run(["lead"])
+
+    def test_scheduler_task_order(self):
+        """Test de business partners antes que los documentos en la sincronización multi-compañía"""
+        assert list(SYNC_TASKS)[:2] == ["business_partners", "documents"]
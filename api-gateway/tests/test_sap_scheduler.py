@@ -0,0 +1,171 @@
+# api-gateway/tests/test_sap_scheduler.py
+import asyncio
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.amortization import Amortization, AmortizationInstallment
+from app.models.company import Company
+from app.models.sap_import import SAPSyncRun
+from app.services.sap_scheduler import SAPSyncScheduler
+from app.services.sap_service import FairSemaphore, SAPService, get_pool, server_pools
+from app.utils.row_cache import row_cache
+from tests.fake_service_layer import FakeServiceLayer, fake_pool
+from tests.test_sap_import import invoice
+
+@pytest.fixture
+def servers(monkeypatch):
+    """Dos servidores SAP simulados; el segundo rechaza las credenciales"""
+    server_a = FakeServiceLayer()
+    server_a.records["Invoices"] = [invoice(number, date(2024, 3, 1)) for number in range(1, 31)]
+    server_b = FakeServiceLayer(password="other")
+    monkeypatch.setattr("app.services.sap_service.settings.SAP_USERNAME", "manager")
+    monkeypatch.setattr("app.services.sap_service.settings.SAP_PASSWORD", "secret")
+    monkeypatch.setattr("app.services.sap_service.sap_pool", fake_pool(server_a))
+    monkeypatch.setitem(server_pools, "http://sap-b.test/b1s/v1", fake_pool(server_b, "http://sap-b.test/b1s/v1"))
+    return server_a, server_b
+
+COMPANY_IDS = ["SAP002", "SAP003", "TEST001"]
+
+@pytest.fixture
+def session_factory(setup_database, db_session):
+    """
+    Sesiones con conexión propia y commits reales, como en el worker
+
+    Las compañías sincronizan en paralelo con una sesión cada una; sobre
+    la conexión de db_session el rollback de una deshace las demás. Los
+    datos se borran al terminar.
+    """
+    factory = sessionmaker(bind=db_session.get_bind().engine, expire_on_commit=False)
+    yield factory
+    with factory() as db:
+        amortization_ids = select(Amortization.id).where(Amortization.company_id.in_(COMPANY_IDS))
+        db.execute(delete(AmortizationInstallment).where(AmortizationInstallment.amortization_id.in_(amortization_ids)))
+        for table in reversed(Base.metadata.sorted_tables):
+            if "company_id" in table.c:
+                db.execute(delete(table).where(table.c.company_id.in_(COMPANY_IDS)))
+        db.execute(delete(Company).where(Company.id.in_(COMPANY_IDS)))
+        db.commit()
+    row_cache.clear()
+
+@pytest.fixture
+def companies(session_factory):
+    """TEST001 y SAP002 en el servidor por defecto, SAP003 en el segundo servidor"""
+    with session_factory() as db:
+        db.add_all([
+            Company(id="TEST001", name="Test Company", currency="EUR", sap_database="TESTDB"),
+            Company(id="SAP002", name="Segunda", currency="EUR", sap_database="SBO002"),
+            Company(id="SAP003", name="Tercera", currency="EUR", sap_database="SBO003",
+                    sap_server_url="http://sap-b.test"),
+        ])
+        db.commit()
+    return COMPANY_IDS
+
+class TestSAPScheduler:
+    """Tests para la sincronización SAP multi-compañía"""
+
+    @pytest.mark.asyncio
+    async def test_fair_semaphore(self):
+        """Test de reparto por turnos de los permisos entre compañías"""
+        semaphore = FairSemaphore(1)
+        await semaphore.acquire("A")
+        order = []
+
+        async def worker(key, name):
+            await semaphore.acquire(key)
+            order.append(name)
+            await asyncio.sleep(0)
+            semaphore.release()
+
+        tasks = [asyncio.create_task(worker("A", f"A{number}")) for number in range(2, 5)]
+        tasks.append(asyncio.create_task(worker("B", "B1")))
+        await asyncio.sleep(0)
+        semaphore.release()
+        await asyncio.gather(*tasks)
+        assert order == ["A2", "B1", "A3", "A4"]
+
+    @pytest.mark.asyncio
+    async def test_server_fairness(self):
+        """Test de una compañía con mucho trabajo que no bloquea a otra del mismo servidor"""
+        service_layer = FakeServiceLayer(delay=0.01)
+        pool = fake_pool(service_layer, max_concurrency=4, max_server_concurrency=4)
+        finished = []
+
+        async def fetch(company_db):
+            await SAPService(company_db, "manager", "secret", pool=pool).get_business_partners()
+            finished.append(company_db)
+
+        await asyncio.gather(*(fetch("BIG") for _ in range(20)), *(fetch("SMALL") for _ in range(2)))
+        assert service_layer.max_active["BIG"] <= 4
+        assert max(index for index, company_db in enumerate(finished) if company_db == "SMALL") < 10
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_sync_companies(self, companies, servers, session_factory):
+        """Test de sincronización en paralelo con tiempos y fallo aislado por compañía"""
+        server_a, server_b = servers
+        progress = []
+        scheduler = SAPSyncScheduler(session_factory, tasks=["documents"],
+                                     on_progress=lambda current, total, result: progress.append(current))
+
+        results = await scheduler.run()
+
+        assert [result["company_id"] for result in results] == companies
+        by_company = {result["company_id"]: result for result in results}
+        assert by_company["TEST001"]["tasks"]["documents"]["items"] == 30
+        assert by_company["SAP002"]["tasks"]["documents"]["amortizations_created"] == 30
+        assert by_company["SAP003"]["tasks"]["documents"]["status"] == "failed"
+        assert all(result["duration_ms"] >= 0 and result["wait_ms"] >= 0 for result in results)
+        assert progress == [1, 2, 3]
+        assert server_a.logins == {"TESTDB": 1, "SBO002": 1}
+
+        with session_factory() as db:
+            runs = {run.company_id: run for run in db.query(SAPSyncRun).all()}
+            assert runs["TEST001"].status == "completed" and runs["TEST001"].items == 30
+            assert runs["SAP003"].status == "failed" and runs["SAP003"].error
+            assert db.query(Amortization).filter_by(company_id="SAP002").count() == 30
+
+    @pytest.mark.asyncio
+    async def test_company_removed(self, companies, servers, session_factory):
+        """Test de una compañía desactivada después de elegir las compañías: falla sola"""
+        scheduler = SAPSyncScheduler(session_factory, tasks=["business_partners", "documents"])
+        company_ids = scheduler._company_ids
+
+        def deactivate_after_listing(requested):
+            ids = company_ids(requested)
+            with session_factory() as db:
+                db.get(Company, "SAP002").is_active = False
+                db.commit()
+            return ids
+
+        scheduler._company_ids = deactivate_after_listing
+        results = await scheduler.run(["SAP002", "TEST001"])
+
+        by_company = {result["company_id"]: result for result in results}
+        assert {task["status"] for task in by_company["SAP002"]["tasks"].values()} == {"failed"}
+        assert "SAP002" in by_company["SAP002"]["tasks"]["documents"]["error"]
+        assert by_company["TEST001"]["tasks"]["documents"]["status"] == "completed"
+        with session_factory() as db:
+            runs = db.query(SAPSyncRun).filter_by(company_id="SAP002").all()
+            assert sorted(run.task for run in runs) == ["business_partners", "documents"]
+            assert all(run.status == "failed" for run in runs)
+
+    def test_longest_first(self, companies, session_factory):
+        """Test de orden: primero las compañías con la sincronización más larga registrada"""
+        with session_factory() as db:
+            db.add(SAPSyncRun(company_id="TEST001", task="documents", started_at=datetime.now(timezone.utc),
+                              duration_ms=5000, items=10, status="completed"))
+            db.commit()
+
+        scheduler = SAPSyncScheduler(session_factory)
+        assert scheduler._company_ids(None) == ["TEST001", "SAP002", "SAP003"]
+        assert scheduler._company_ids(["SAP003"]) == ["SAP003"]
+
+    def test_pool_per_server(self):
+        """Test de un pool por servidor SAP"""
+        assert get_pool(None) is get_pool("https://localhost:50000/b1s/v1")
+        assert get_pool("https://sap-x.test:50000") is get_pool("https://sap-x.test:50000/b1s/v1/")
+        assert get_pool("https://sap-x.test:50000").base_url == "https://sap-x.test:50000/b1s/v1/"
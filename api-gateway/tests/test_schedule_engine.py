@@ -0,0 +1,80 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from app.services.schedule_engine import calculate_schedules, calculate_schedule
+
+class TestScheduleEngine:
+    """Tests para el motor de cálculo de cuotas por lotes"""
+
+    def _config(self, method, **kwargs):
+        config = {
+            "total_amount": Decimal("10000.00"),
+            "total_installments": 12,
+            "interest_rate": Decimal("5.0"),
+            "start_date": date(2024, 1, 1),
+            "amortization_method": method,
+            "frequency": "monthly",
+        }
+        config.update(kwargs)
+        return config
+
+    @pytest.mark.parametrize("method", ["linear", "french", "german", "decreasing"])
+    def test_principal_reconciles_to_total(self, method):
+        """Test de conciliación: la suma de capital es exactamente el monto total"""
+        installments = calculate_schedule(self._config(method, total_amount=Decimal("1000.01")))
+
+        assert len(installments) == 12
+        assert sum(i["principal_amount"] for i in installments) == Decimal("1000.01")
+        assert installments[-1]["remaining_balance"] == Decimal("0.00")
+        for installment in installments:
+            assert installment["total_amount"] == installment["principal_amount"] + installment["interest_amount"]
+
+    def test_linear_installments(self):
+        """Test de cuotas lineales"""
+        installments = calculate_schedule(self._config("linear", total_amount=Decimal("12000")))
+
+        assert installments[0]["principal_amount"] == Decimal("1000.00")
+        assert installments[0]["interest_amount"] == Decimal("50.00")
+        assert installments[-1]["interest_amount"] == Decimal("4.17")
+
+    def test_french_installments_constant_total(self):
+        """Test de sistema francés: cuota total constante, la última concilia el redondeo"""
+        installments = calculate_schedule(self._config("french"))
+        totals = {i["total_amount"] for i in installments[:-1]}
+
+        assert totals == {Decimal("856.07")}
+        assert abs(installments[-1]["total_amount"] - Decimal("856.07")) <= Decimal("0.10")
+
+    def test_decreasing_installments(self):
+        """Test de capital decreciente por suma de dígitos"""
+        installments = calculate_schedule(self._config("decreasing", total_installments=4))
+        principal = [i["principal_amount"] for i in installments]
+
+        assert principal == [Decimal("4000.00"), Decimal("3000.00"), Decimal("2000.00"), Decimal("1000.00")]
+
+    def test_batch_matches_single(self):
+        """Test de que el lote devuelve lo mismo que el cálculo individual"""
+        configs = [
+            self._config("french"),
+            self._config("linear", total_installments=6, frequency="quarterly"),
+            self._config("decreasing", interest_rate=Decimal("0")),
+        ]
+        batch = calculate_schedules(configs)
+
+        assert len(batch) == 3
+        assert batch.row_count == 30
+        for index, config in enumerate(configs):
+            assert batch.schedule(index) == calculate_schedule(config)
+
+    def test_zero_interest_french(self):
+        """Test de sistema francés sin interés"""
+        installments = calculate_schedule(self._config("french", interest_rate=Decimal("0")))
+
+        assert all(i["interest_amount"] == Decimal("0.00") for i in installments)
+        assert sum(i["principal_amount"] for i in installments) == Decimal("10000.00")
+
+    def test_invalid_method(self):
+        """Test de método de amortización inválido"""
+        with pytest.raises(ValueError):
+            calculate_schedules([self._config("unknown")])
@@ -0,0 +1,118 @@
+import pytest
+from datetime import date
+
+from sqlalchemy import text
+
+from app.models.amortization import Amortization
+from app.utils.filters import AmortizationFilters, apply_amortization_filters, apply_search_filter
+from app.utils.search import normalize_search_text, escape_like
+
+@pytest.fixture
+def search_amortizations(db_session, test_company, test_entity):
+    """Amortizaciones con textos acentuados"""
+    texts = [
+        ("PRÉSTAMO-001", "Préstamo maquinaria de obra"),
+        ("LEASING-002", "Leasing vehículos"),
+        ("ANTICIPO-003", None),
+    ]
+    for reference, description in texts:
+        db_session.add(Amortization(
+            company_id=test_company.id,
+            entity_id=test_entity.id,
+            reference=reference,
+            description=description,
+            total_amount=1000,
+            pending_amount=1000,
+            total_installments=12,
+            installment_amount=100,
+            start_date=date(2024, 1, 1)
+        ))
+    db_session.commit()
+
+class TestSearch:
+    """Tests para la búsqueda indexada"""
+
+    def test_normalize_search_text(self):
+        """Test de normalización (acentos, mayúsculas, espacios)"""
+        assert normalize_search_text("  Préstamo ", None, "MAQUINARIA\tObra") == "prestamo maquinaria obra"
+        assert normalize_search_text("Compañía Ñandú") == "compania nandu"
+        assert normalize_search_text(None) == ""
+
+    def test_escape_like(self):
+        """Test de escape de comodines"""
+        assert escape_like("50%_a\\b") == "50\\%\\_a\\\\b"
+
+    def test_search_column_is_maintained(self, db_session, search_amortizations):
+        """Test de mantenimiento de la columna normalizada"""
+        amortization = db_session.query(Amortization).filter(Amortization.reference == "LEASING-002").one()
+        assert amortization.search_text == "leasing-002 leasing vehiculos"
+
+        amortization.description = "Renting flota"
+        db_session.commit()
+        assert amortization.search_text == "leasing-002 renting flota"
+
+    @pytest.mark.parametrize("term,expected", [
+        ("prestamo", {"PRÉSTAMO-001"}),
+        ("MAQUINARIA", {"PRÉSTAMO-001"}),
+        ("vehículos", {"LEASING-002"}),
+        ("-00", {"PRÉSTAMO-001", "LEASING-002", "ANTICIPO-003"}),
+        ("ob", {"PRÉSTAMO-001"}),
+        ("inexistente", set()),
+    ])
+    def test_search_filter(self, db_session, test_company, search_amortizations, term, expected):
+        """Test de búsqueda por subcadena sin acentos ni mayúsculas"""
+        filters = AmortizationFilters(company_id=test_company.id, search=term)
+        query = apply_amortization_filters(db_session.query(Amortization), filters, Amortization)
+
+        assert {a.reference for a in query.all()} == expected
+
+    def test_search_index_keyed_by_id(self, db_session, test_company, search_amortizations):
+        """Test de la tabla FTS5 por rowid mapeado a la clave primaria tras actualizar y borrar (SQLite)"""
+        if db_session.get_bind().dialect.name != "sqlite":
+            pytest.skip("Tabla FTS5 solo en SQLite")
+
+        leasing = db_session.query(Amortization).filter(Amortization.reference == "LEASING-002").one()
+        anticipo = db_session.query(Amortization).filter(Amortization.reference == "ANTICIPO-003").one()
+        anticipo_id = anticipo.id
+        leasing.description = "Renting flota"
+        db_session.delete(anticipo)
+        db_session.commit()
+
+        indexed = dict(db_session.execute(text(
+            "SELECT k.id, f.search_text FROM amortizations_fts f "
+            "JOIN amortizations_fts_keys k ON k.fts_rowid = f.rowid"
+        )).all())
+        assert indexed[leasing.id] == "leasing-002 renting flota"
+        assert anticipo_id not in indexed
+        assert len(indexed) == db_session.query(Amortization).count()
+        keys = db_session.execute(text("SELECT count(*) FROM amortizations_fts_keys")).scalar()
+        assert keys == len(indexed)
+
+        # Los triggers localizan la fila FTS5 por rowid (sin recorrer la tabla)
+        trigger = db_session.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'amortizations_fts_ad'"
+        )).scalar()
+        assert "DELETE FROM amortizations_fts WHERE rowid = " in trigger
+        plan = db_session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN DELETE FROM amortizations_fts WHERE rowid = "
+            "(SELECT fts_rowid FROM amortizations_fts_keys WHERE id = ?)", ("x",)
+        ).all()
+        assert "amortizations_fts VIRTUAL TABLE INDEX 0:=" in plan[0][-1]
+
+        for term, expected in (("renting", {"LEASING-002"}), ("vehiculos", set()), ("anticipo", set())):
+            filters = AmortizationFilters(company_id=test_company.id, search=term)
+            query = apply_amortization_filters(db_session.query(Amortization), filters, Amortization)
+            assert {a.reference for a in query.all()} == expected
+
+    def test_entity_name_filter(self, db_session, test_company, search_amortizations):
+        """Test de búsqueda por nombre de entidad"""
+        filters = AmortizationFilters(company_id=test_company.id, entity_name="test ENTITY")
+        query = apply_amortization_filters(db_session.query(Amortization), filters, Amortization)
+
+        assert query.count() == 3
+
+    def test_search_filter_plain_columns(self, db_session, search_amortizations):
+        """Test de búsqueda ILIKE en columnas sin índice de búsqueda"""
+        query = apply_search_filter(db_session.query(Amortization), "leasing", [Amortization.reference])
+
+        assert [a.reference for a in query.all()] == ["LEASING-002"]
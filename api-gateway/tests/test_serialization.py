@@ -0,0 +1,93 @@
+import pytest
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.models.amortization import AmortizationInstallment
+from app.schemas.installment import InstallmentResponse
+from app.utils.cache import serialize_response
+from app.utils.serialization import FastJSONResponse, FieldSelectionError, RowEncoder, dumps, parse_fields
+
+class Payment(BaseModel):
+    amount: Decimal
+    percentage: float
+    ratio: Optional[float] = None
+    paid_at: datetime
+    due_date: date
+    notes: Optional[str] = None
+
+class TestSerialization:
+    """Tests para la serialización rápida (orjson)"""
+
+    def test_dumps_matches_pydantic(self):
+        """Test de JSON idéntico al de Pydantic (Decimal como cadena, UTC como Z)"""
+        content = {
+            "amount": Decimal("833.33"),
+            "percentage": 12.5,
+            "ratio": 1.0,
+            "paid_at": datetime(2024, 3, 1, 10, 30, 0, 123000, tzinfo=timezone.utc),
+            "due_date": date(2024, 3, 1),
+            "notes": None
+        }
+        assert dumps(content) == serialize_response(Payment, content).body
+
+    def test_row_encoder(self):
+        """Test de columnas en el orden del schema y conversión de campos float"""
+        encoder = RowEncoder(Payment, columns={
+            "amount": AmortizationInstallment.total_amount,
+            "percentage": AmortizationInstallment.payment_percentage,
+            "ratio": AmortizationInstallment.paid_amount,
+            "paid_at": AmortizationInstallment.created_at,
+            "due_date": AmortizationInstallment.due_date,
+            "notes": AmortizationInstallment.notes
+        })
+        assert encoder.fields == list(Payment.model_fields)
+        assert [column.name for column in encoder.columns] == encoder.fields
+
+        row = (Decimal("100.00"), Decimal("50"), None, datetime(2024, 1, 1), date(2024, 2, 1), "x")
+        assert encoder.encode([row]) == (
+            b'[{"amount":"100.00","percentage":50.0,"ratio":null,'
+            b'"paid_at":"2024-01-01T00:00:00","due_date":"2024-02-01","notes":"x"}]'
+        )
+
+    def test_row_encoder_columns(self):
+        """Test de resolución de columnas desde el modelo ORM"""
+        encoder = RowEncoder(InstallmentResponse, AmortizationInstallment)
+        assert encoder.fields == list(InstallmentResponse.model_fields)
+
+        with pytest.raises(ValueError):
+            RowEncoder(Payment, AmortizationInstallment)
+
+    def test_parse_fields(self):
+        """Test de fields= (orden del schema, id siempre incluido, campos no válidos)"""
+        allowed = ("id", "reference", "status", "total_amount")
+        assert parse_fields(None, allowed) is None
+        assert parse_fields(" ", allowed) is None
+        assert parse_fields("status, reference", allowed) == ["id", "reference", "status"]
+        assert parse_fields("status", allowed, required=()) == ["status"]
+
+        with pytest.raises(FieldSelectionError):
+            parse_fields("reference,password", allowed)
+
+    def test_row_encoder_project(self):
+        """Test de encoder limitado a algunos campos"""
+        encoder = RowEncoder(InstallmentResponse, AmortizationInstallment)
+        projected = encoder.project(["payment_percentage", "id"])
+
+        assert projected.fields == ["id", "payment_percentage"]
+        assert len(projected.columns) == 2
+        assert projected.encode([("I1", Decimal("25"))]) == b'[{"id":"I1","payment_percentage":25.0}]'
+        assert encoder.project(None) is encoder
+        assert len(encoder.fields) == len(InstallmentResponse.model_fields)
+
+        with pytest.raises(FieldSelectionError):
+            encoder.project(["password"])
+
+    def test_fast_json_response(self):
+        """Test de respuesta con orjson (bytes ya codificados sin cambios)"""
+        assert FastJSONResponse(content=b'{"a":1}').body == b'{"a":1}'
+        response = FastJSONResponse(content={"amount": Decimal("1.50")})
+        assert response.body == b'{"amount":"1.50"}'
+        assert response.media_type == "application/json"
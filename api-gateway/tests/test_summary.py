@@ -0,0 +1,125 @@
+import pytest
+import asyncio
+from datetime import date
+from decimal import Decimal
+
+from app.models.amortization import Amortization
+from app.models.entity import Entity
+from app.models.summary import AmortizationMonthlySummary, rebuild_summary
+from app.services.amortization_service import AmortizationService
+
+def summary_rows(db_session):
+    """Grupos del resumen con importes normalizados (sin grupos vacíos)"""
+    rows = db_session.query(AmortizationMonthlySummary).all()
+    return sorted(
+        (row.company_id, row.entity_type, row.status, row.month, row.amortization_count,
+         Decimal(str(row.total_amount)).quantize(Decimal("0.01")),
+         Decimal(str(row.paid_amount)).quantize(Decimal("0.01")),
+         Decimal(str(row.pending_amount)).quantize(Decimal("0.01")))
+        for row in rows if row.amortization_count
+    )
+
+def assert_matches_rebuild(db_session):
+    """El resumen incremental coincide con el recalculado desde amortizations"""
+    incremental = summary_rows(db_session)
+    rebuild_summary(db_session.connection())
+    db_session.expire_all()
+    assert incremental == summary_rows(db_session)
+    return incremental
+
+@pytest.fixture
+def summary_amortizations(db_session, test_company, test_entity):
+    """Amortizaciones en dos meses para el resumen"""
+    amortizations = []
+    for reference, amount, start in (
+        ("SUM-001", 1000, date(2024, 1, 5)),
+        ("SUM-002", 500, date(2024, 1, 20)),
+        ("SUM-003", 300, date(2024, 2, 1)),
+    ):
+        amortization = Amortization(
+            company_id=test_company.id,
+            entity_id=test_entity.id,
+            reference=reference,
+            total_amount=amount,
+            pending_amount=amount,
+            paid_amount=0,
+            total_installments=10,
+            installment_amount=amount / 10,
+            start_date=start
+        )
+        db_session.add(amortization)
+        amortizations.append(amortization)
+    db_session.commit()
+    return amortizations
+
+class TestSummary:
+    """Tests para el resumen incremental de amortizaciones"""
+
+    def test_create(self, db_session, summary_amortizations):
+        """Test de deltas al crear amortizaciones"""
+        rows = assert_matches_rebuild(db_session)
+
+        assert [(row[3], row[4], row[5]) for row in rows] == [
+            (date(2024, 1, 1), 2, Decimal("1500.00")),
+            (date(2024, 2, 1), 1, Decimal("300.00")),
+        ]
+
+    def test_payment_and_status(self, db_session, summary_amortizations):
+        """Test de deltas al pagar, cancelar, mover de mes y desactivar"""
+        first, second, third = summary_amortizations
+        first.paid_amount = 400
+        first.pending_amount = 600
+        second.status = "cancelled"
+        third.start_date = date(2024, 3, 15)
+        db_session.commit()
+
+        rows = assert_matches_rebuild(db_session)
+        assert ("TEST001", "cliente", "cancelled", date(2024, 1, 1), 1,
+                Decimal("500.00"), Decimal("0.00"), Decimal("500.00")) in rows
+        assert ("TEST001", "cliente", "active", date(2024, 1, 1), 1,
+                Decimal("1000.00"), Decimal("400.00"), Decimal("600.00")) in rows
+
+        third.is_active = False
+        db_session.commit()
+        assert all(row[3] != date(2024, 3, 1) for row in assert_matches_rebuild(db_session))
+
+    def test_delete(self, db_session, summary_amortizations):
+        """Test de deltas al eliminar"""
+        db_session.delete(summary_amortizations[0])
+        db_session.commit()
+
+        rows = assert_matches_rebuild(db_session)
+        assert rows[0][4:6] == (1, Decimal("500.00"))
+
+    def test_entity_type_change(self, db_session, test_entity, summary_amortizations):
+        """Test de movimiento de grupos al cambiar el tipo de la entidad"""
+        entity = db_session.get(Entity, test_entity.id)
+        entity.type = "proveedor"
+        summary_amortizations[0].status = "completed"
+        db_session.commit()
+
+        rows = assert_matches_rebuild(db_session)
+        assert {row[1] for row in rows} == {"proveedor"}
+
+    def test_get_amortization_summary(self, db_session, test_company, summary_amortizations):
+        """Test del resumen y tendencias desde los grupos mensuales"""
+        summary_amortizations[2].status = "overdue"
+        db_session.commit()
+        service = AmortizationService(db_session)
+
+        summary = asyncio.run(service.get_amortization_summary(
+            company_id=test_company.id, date_to=date(2024, 2, 28)
+        ))
+        assert summary["total_amortizations"] == 3
+        assert summary["total_amount"] == Decimal("1800")
+        assert summary["overdue_count"] == 1
+        assert summary["overdue_amount"] == Decimal("300")
+        assert summary["active_count"] == 2
+        # Febrero (1 amortización, 300) frente a enero (2, 1500)
+        assert summary["amortizations_trend"] == -50.0
+        assert summary["amount_trend"] == -80.0
+
+        summary = asyncio.run(service.get_amortization_summary(
+            company_id=test_company.id, date_from=date(2024, 2, 1), status="overdue"
+        ))
+        assert summary["total_amortizations"] == 1
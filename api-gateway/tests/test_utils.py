@@ -19,6 +19,125 @@ class TestUtils:
         assert "page" in result
         assert "page_size" in result
 
+    def test_keyset_pagination(self, db_session, test_company, test_entity):
+        """Test de paginación por cursor (keyset)"""
+        from datetime import date
+        from app.models.amortization import Amortization
+        
+        for i in range(25):
+            db_session.add(Amortization(
+                company_id=test_company.id,
+                entity_id=test_entity.id,
+                reference=f"KEYSET-{i:03d}",
+                total_amount=1000 + (i % 5),
+                pending_amount=1000,
+                total_installments=12,
+                installment_amount=100,
+                start_date=date(2024, 1, 1)
+            ))
+        db_session.commit()
+        
+        query = db_session.query(Amortization).filter(Amortization.company_id == test_company.id)
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            result = paginate(query, page_size=10, sort_by="total_amount", sort_order="asc",
+                              cursor=cursor, use_cursor=True)
+            seen.extend(item.id for item in result["items"])
+            pages += 1
+            assert result["total"] is None
+            if not result["has_next"]:
+                assert result["next_cursor"] is None
+                break
+            cursor = result["next_cursor"]
+        
+        assert pages == 3
+        assert len(seen) == len(set(seen)) == 25
+        
+        amounts = [db_session.get(Amortization, item_id).total_amount for item_id in seen]
+        assert amounts == sorted(amounts)
+
+    def test_keyset_pagination_invalid_cursor(self, db_session, test_company):
+        """Test de cursor inválido"""
+        from app.models.company import Company
+        from app.utils.pagination import InvalidCursorError
+        
+        query = db_session.query(Company)
+        with pytest.raises(InvalidCursorError):
+            paginate(query, cursor="not-a-cursor")
+
+    def test_count_modes(self, db_session, test_company):
+        """Test de estrategias de conteo (exact/estimated/cached)"""
+        from app.models.company import Company
+        from app.utils.counting import CountCache, count_query, count_cache_key
+        
+        query = db_session.query(Company).filter(Company.id == test_company.id)
+        filters = AmortizationFilters(company_id=test_company.id)
+        cache = CountCache(ttl=60)
+        key = count_cache_key(filters)
+        
+        assert count_query(query, "exact") == (1, "exact")
+        # Por debajo del umbral, estimated cuenta exacto
+        assert count_query(query, "estimated", exact_threshold=10 ** 9) == (1, "exact")
+        
+        assert count_query(query, "cached", cache_key=key, cache=cache) == (1, "exact")
+        assert count_query(query, "cached", cache_key=key, cache=cache) == (1, "cached")
+        
+        # Mismos filtros en otro orden/valores vacíos -> misma clave
+        assert count_cache_key(AmortizationFilters(company_id=test_company.id, status=None)) == key
+        
+        cache.invalidate(test_company.id)
+        assert cache.get(key) is None
+        
+        with pytest.raises(ValueError):
+            count_query(query, "approximate")
+
+    def test_explain_sql_params(self):
+        """Test de EXPLAIN con listas IN expandidas y parámetros en el paramstyle del driver"""
+        from sqlalchemy import select
+        from sqlalchemy.dialects.postgresql import asyncpg, psycopg2
+        from app.models.amortization import AmortizationInstallment
+        from app.utils.counting import explain_sql
+        
+        statement = select(AmortizationInstallment.id).where(
+            AmortizationInstallment.amortization_id.in_(["a", "b"]),
+            AmortizationInstallment.installment_number > 3
+        )
+        
+        sql, params = explain_sql(statement, asyncpg.dialect())
+        assert "POSTCOMPILE" not in sql
+        assert "IN ($2::VARCHAR, $3::VARCHAR)" in sql and "> $1::INTEGER" in sql
+        assert params == (3, "a", "b")
+        
+        sql, params = explain_sql(statement, psycopg2.dialect())
+        assert "IN (%(amortization_id_1_1)s, %(amortization_id_1_2)s)" in sql
+        assert params == {"installment_number_1": 3, "amortization_id_1_1": "a", "amortization_id_1_2": "b"}
+
+    def test_estimated_count(self, db_session, test_company):
+        """Test de conteo estimado por el planificador (filtro con lista IN)"""
+        from app.models.company import Company
+        from app.utils.counting import count_query
+        
+        if db_session.get_bind().dialect.name != "postgresql":
+            pytest.skip("Estimación solo en PostgreSQL")
+        
+        query = db_session.query(Company).filter(Company.id.in_([test_company.id, "OTRA"]))
+        total, mode = count_query(query, "estimated", exact_threshold=0)
+        
+        assert mode == "estimated"
+        assert total >= 0
+
+    def test_pagination_count_mode(self, db_session, test_company):
+        """Test de count_mode en el resultado paginado"""
+        from app.models.company import Company
+        
+        query = db_session.query(Company)
+        result = paginate(query, page=1, page_size=10, count_mode="estimated")
+        
+        assert result["count_mode"] in ("exact", "estimated")
+        assert result["has_next"] is False
+
     def test_amortization_filters(self):
         """Test de filtros de amortización"""
         filters = AmortizationFilters(
@@ -4,6 +4,13 @@ import { AmortizationTable } from "./AmortizationTable.js";
 import { AmortizationForm } from "./AmortizationForm.js";
 import { AmortizationService } from "../services/AmortizationService.js";
 
+// Columnas que muestran las tarjetas y AmortizationTable (sin descripción,
+// campos SAP ni cuotas); el detalle se carga al abrir la tabla o el formulario
+const GRID_FIELDS = [
+    'id', 'reference', 'entity_name', 'status', 'total_amount', 'pending_amount',
+    'paid_installments', 'total_installments', 'next_due_date', 'amortization_method', 'start_date'
+];
+
 export class AmortizationManager extends Component {
     static template = xml`
         <div class="amortization-manager">
@@ -179,7 +186,8 @@ export class AmortizationManager extends Component {
         try {
             const amortizations = await this.amortizationService.getAmortizations(
                 this.props.company.id, 
-                this.props.type
+                this.props.type,
+                { fields: GRID_FIELDS.join(',') }
             );
             this.state.amortizations = amortizations;
             this.applyFilters();
@@ -87,6 +87,7 @@ export class AmortizationService {
 
     /**
      * Obtener lista de amortizaciones con filtros
+     * filters.fields limita las columnas de cada item (p. ej. 'id,reference,status')
      */
     async getAmortizations(companyId, type, filters = {}) {
         const params = new URLSearchParams({
@@ -106,11 +107,18 @@ export class AmortizationService {
 
     /**
      * Obtener detalle de una amortización específica
+     * Con fields (lista de campos) solo se devuelven esos campos
      */
-    async getAmortizationDetail(amortizationId, includeInstallments = true) {
+    async getAmortizationDetail(amortizationId, includeInstallments = true, fields = null) {
         const params = new URLSearchParams({
             include_installments: includeInstallments
         });
+        if (fields) {
+            params.set('fields', fields.join(','));
+            if (includeInstallments) {
+                params.set('include', 'installments');
+            }
+        }
 
         return await this.makeRequest(`/amortizations/${amortizationId}?${params}`);
     }